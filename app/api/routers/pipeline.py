@@ -100,7 +100,7 @@ async def _process_narration(task_id: str):
     """
     调用 PipelineIntegrator 真实处理流程
 
-    步骤：analyze → script → voice → caption → interleave → export
+    步骤：analyze → script / voice / caption（重叠进行）→ interleave → export
     """
     task = _tasks.get(task_id)
     if not task:
@@ -123,20 +123,13 @@ async def _process_narration(task_id: str):
         # ── 步骤 2: 分析场景 ──
         _update(task, "analyzing", 15.0, "正在分析视频场景...")
 
-        # ── 步骤 3: 生成文案 ──
-        _update(task, "script", 35.0, "正在生成解说脚本...")
-        if req.get("custom_script"):
-            integrator.generate_script(project, custom_script=req["custom_script"])
-        else:
-            integrator.generate_script(project)
-
-        # ── 步骤 4: 生成配音 ──
-        _update(task, "voice", 60.0, "正在合成配音...")
-        integrator.generate_voice(project)
-
-        # ── 步骤 5: 生成字幕 ──
-        _update(task, "caption", 75.0, "正在生成字幕...")
-        integrator.generate_captions(project, style=req.get("caption_style", "cinematic"))
+        # ── 步骤 3-5: 文案 / 配音 / 字幕（流水线重叠进行）──
+        _update(task, "script", 35.0, "正在生成解说脚本并同步合成配音...")
+        integrator.generate_pipelined(
+            project,
+            custom_script=req.get("custom_script") or None,
+            caption_style=req.get("caption_style", "cinematic"),
+        )
 
         # ── 步骤 6: 视角映射 + 穿插 ──
         if req.get("include_interleave", True):
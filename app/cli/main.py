@@ -128,13 +128,14 @@ def _handle_project_command(args) -> int:
     PROJECTS_DIR = os.path.expanduser("~/Voxplore/Projects")
 
     def _load_project_metadata(project_path: str) -> dict | None:
-        """从 project.json 加载项目元数据"""
+        """从 project.json 加载项目元数据（含尚未合并进快照的保存日志）"""
+        from app.core.project_journal import get_store
+
         pf = os.path.join(project_path, "project.json")
         if not os.path.exists(pf):
             return None
         try:
-            with open(pf, "r", encoding="utf-8") as f:
-                return json.load(f).get("metadata", {})
+            return (get_store(pf).load() or {}).get("metadata", {})
         except json.JSONDecodeError as e:
             logger.debug(f"Invalid project metadata JSON: {e}")
             return None
@@ -9,6 +9,7 @@ Voxplore 核心模块
 - exceptions: 异常定义
 - logger: 日志
 - project_manager: 项目管理
+- project_index: 项目库索引
 - service_registry: 服务注册表
 - secure_key_manager: 密钥管理
 """
@@ -31,6 +32,8 @@ from .exceptions import (
 )
 from .logger import setup_logging, get_logger
 from .project_manager import ProjectManager
+from .project_index import ProjectIndex
+from .project_journal import JournaledStore, get_background_saver
 from .service_container import ServiceContainer
 from .secure_key_manager import SecureKeyManager
 
@@ -72,6 +75,9 @@ __all__ = [
 
     # Project
     "ProjectManager",
+    "ProjectIndex",
+    "JournaledStore",
+    "get_background_saver",
 
     # Service
     "ServiceContainer",
@@ -253,15 +253,10 @@ class RateLimitError(ProviderError):
         provider: Optional[str] = None,
         retry_after: Optional[float] = None,
     ):
-        details: Dict[str, Any] = {"retry_after": retry_after} if retry_after else {}
-        if provider:
-            details["provider"] = provider
-
-        super().__init__(
-            message=message,
-            provider=provider,
-            details=details,
-        )
+        super().__init__(message=message, provider=provider)
+        self.retry_after = retry_after
+        if retry_after:
+            self.details["retry_after"] = retry_after
 
 
 class CircuitOpenError(ProviderError):
@@ -273,17 +268,9 @@ class CircuitOpenError(ProviderError):
         provider: Optional[str] = None,
         failure_count: Optional[int] = None,
     ):
-        details: Dict[str, Any] = {}
+        super().__init__(message=message, provider=provider)
         if failure_count is not None:
-            details["failure_count"] = failure_count
-        if provider:
-            details["provider"] = provider
-
-        super().__init__(
-            message=message,
-            provider=provider,
-            details=details,
-        )
+            self.details["failure_count"] = failure_count
 
 
 class SecurityError(VoxploreError):
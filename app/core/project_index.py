@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+项目库索引
+
+把每个项目的元数据（名称、描述、类型、状态、标签、缩略图、时间）存入 SQLite，
+项目页按需分页、排序、搜索，不再逐个完整解析 project.json。
+
+- 保存项目时由 ProjectManager 调用 upsert() 更新
+- reconcile() 增量对账：项目根目录 mtime 未变时不重新列目录，
+  只 stat 已知项目的 project.json；(mtime, 大小) 变化的才重新读取元数据
+- 读取元数据只解码 project.json 开头的 metadata 对象，不解析媒体和时间线
+
+使用示例:
+    index = ProjectIndex("~/Voxplore/cache/project_library.db")
+    index.reconcile("~/Voxplore/Projects")
+    page = index.query(search="旅行", sort="modified_at", offset=0, limit=50)
+    total = index.count(search="旅行")
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models.project_models import ProjectMetadata
+from .project_journal import JOURNAL_SUFFIX, get_store
+
+logger = logging.getLogger(__name__)
+
+
+PROJECT_FILE = 'project.json'
+SORT_COLUMNS = ("modified_at", "created_at", "name")
+
+_METADATA_PREFIX = re.compile(r'\s*\{\s*"metadata"\s*:\s*')
+_decoder = json.JSONDecoder()
+
+
+def read_metadata(project_file: str) -> Dict[str, Any]:
+    """
+    读取 project.json 中的 metadata 对象
+
+    Project.save() 把 metadata 写在最前面，只解码这一段；
+    其他写法回退到完整解析。存在未合并的保存日志时快照可能过期，
+    经 JournaledStore 读快照并重放日志。
+    """
+    if os.path.exists(project_file + JOURNAL_SUFFIX):
+        return get_store(project_file).load()['metadata']
+    with open(project_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    match = _METADATA_PREFIX.match(text)
+    if match:
+        try:
+            value, _ = _decoder.raw_decode(text, match.end())
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+    return json.loads(text)['metadata']
+
+
+def _timestamp(value: Any, fallback_ns: int) -> str:
+    """元数据里的时间统一为 ISO 字符串，缺失时用文件 mtime"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value:
+        return str(value)
+    return datetime.fromtimestamp(fallback_ns / 1e9).isoformat()
+
+
+@dataclass
+class ProjectIndexEntry:
+    """项目库中的一条记录"""
+    path: str
+    project_id: str
+    metadata: ProjectMetadata
+    modified_at: str
+    created_at: str
+    file_mtime_ns: int
+    file_size: int
+
+
+class ProjectIndex:
+    """
+    项目库索引（SQLite，线程安全）
+
+    db_path 为 None 时使用内存数据库（进程内有效）。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(os.path.expanduser(db_path)) if db_path else None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ---------- 存储 ----------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.db_path is not None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.db_path) if self.db_path else ":memory:", check_same_thread=False
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    path TEXT PRIMARY KEY,
+                    root TEXT,
+                    project_id TEXT,
+                    name TEXT,
+                    project_type TEXT,
+                    status TEXT,
+                    created_at TEXT,
+                    modified_at TEXT,
+                    search_text TEXT,
+                    metadata TEXT,
+                    file_mtime_ns INTEGER,
+                    file_size INTEGER,
+                    indexed_at INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_root ON projects(root)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_modified ON projects(modified_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_name ON projects(name)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS roots (
+                    root TEXT PRIMARY KEY,
+                    mtime_ns INTEGER
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @classmethod
+    def _signature(cls, project_path: str) -> Optional[Tuple[int, int]]:
+        """project.json 与保存日志合起来的 (mtime, 大小)，后台保存只追加日志"""
+        project_file = os.path.join(project_path, PROJECT_FILE)
+        signature = cls._stat(project_file)
+        journal = cls._stat(project_file + JOURNAL_SUFFIX)
+        if signature is None or journal is None:
+            return signature
+        return max(signature[0], journal[0]), signature[1] + journal[1]
+
+    def _write(self, conn: sqlite3.Connection, project_path: str, root: str,
+               metadata: Dict[str, Any], signature: Tuple[int, int],
+               project_id: Optional[str] = None) -> None:
+        """写入一条记录（调用方持有锁）"""
+        mtime_ns, size = signature
+        if project_id is None:
+            row = conn.execute(
+                "SELECT project_id FROM projects WHERE path=?", (project_path,)
+            ).fetchone()
+            project_id = row[0] if row else metadata.get("name", "")
+        search_text = "\n".join([
+            metadata.get("name", ""),
+            metadata.get("description", ""),
+            " ".join(metadata.get("tags", []) or []),
+        ]).lower()
+        conn.execute(
+            "INSERT OR REPLACE INTO projects (path, root, project_id, name, project_type, status, "
+            "created_at, modified_at, search_text, metadata, file_mtime_ns, file_size, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (project_path, root, project_id, metadata.get("name", ""),
+             str(metadata.get("project_type", "")), str(metadata.get("status", "")),
+             _timestamp(metadata.get("created_at"), mtime_ns),
+             _timestamp(metadata.get("modified_at"), mtime_ns),
+             search_text, json.dumps(metadata, ensure_ascii=False, default=str),
+             mtime_ns, size, int(time.time())),
+        )
+
+    # ---------- 更新 ----------
+
+    def upsert(self, project_path: str, metadata: Dict[str, Any],
+               project_id: Optional[str] = None) -> bool:
+        """
+        保存项目后更新索引
+
+        Args:
+            project_path: 项目目录
+            metadata: ProjectMetadata.to_dict() 的结果
+            project_id: 项目 ID（None 时沿用已有记录，新记录用项目名）
+
+        Returns:
+            是否写入成功（project.json 不存在时为 False）
+        """
+        project_path = os.path.abspath(project_path)
+        signature = self._signature(project_path)
+        if signature is None:
+            return False
+        with self._lock:
+            try:
+                conn = self._db()
+                self._write(conn, project_path, os.path.dirname(project_path),
+                            metadata, signature, project_id)
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.warning(f"项目索引写入失败 {project_path}: {e}")
+                return False
+
+    def remove(self, project_path: str) -> None:
+        """删除项目后移除记录"""
+        with self._lock:
+            try:
+                conn = self._db()
+                conn.execute("DELETE FROM projects WHERE path=?", (os.path.abspath(project_path),))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"项目索引删除失败 {project_path}: {e}")
+
+    def reconcile(self, projects_dir: str) -> Dict[str, int]:
+        """
+        与项目目录增量对账
+
+        Args:
+            projects_dir: 项目根目录（每个子目录一个项目）
+
+        Returns:
+            {"added": n, "updated": n, "removed": n}
+        """
+        root = os.path.abspath(os.path.expanduser(projects_dir))
+        result = {"added": 0, "updated": 0, "removed": 0}
+        root_stat = self._stat(root)
+
+        with self._lock:
+            conn = self._db()
+            known = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in conn.execute(
+                    "SELECT path, file_mtime_ns, file_size FROM projects WHERE root=?", (root,)
+                )
+            }
+            row = conn.execute("SELECT mtime_ns FROM roots WHERE root=?", (root,)).fetchone()
+            indexed_root_mtime = row[0] if row else None
+
+        if root_stat is None:
+            candidates: List[str] = []
+            complete = False
+        elif indexed_root_mtime is not None and indexed_root_mtime == root_stat[0]:
+            # 根目录没有增删子目录，只检查已知项目
+            candidates = list(known)
+            complete = True
+        else:
+            candidates, complete = [], True
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if not entry.is_dir():
+                            continue
+                        if os.path.exists(os.path.join(entry.path, PROJECT_FILE)):
+                            candidates.append(entry.path)
+                        else:
+                            # 目录已建但 project.json 还没写入，下次仍需列目录
+                            complete = False
+            except OSError as e:
+                logger.warning(f"扫描项目目录失败 {root}: {e}")
+                return result
+
+        changed: List[Tuple[str, Dict[str, Any], Tuple[int, int]]] = []
+        present = set()
+        for path in candidates:
+            signature = self._signature(path)
+            if signature is None:
+                continue
+            present.add(path)
+            if known.get(path) == signature:
+                continue
+            try:
+                changed.append((path, read_metadata(os.path.join(path, PROJECT_FILE)), signature))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"读取项目元数据失败 {path}: {e}")
+                present.discard(path)
+
+        removed = [path for path in known if path not in present]
+        with self._lock:
+            try:
+                conn = self._db()
+                for path, metadata, signature in changed:
+                    self._write(conn, path, root, metadata, signature)
+                    result["updated" if path in known else "added"] += 1
+                conn.executemany("DELETE FROM projects WHERE path=?", [(p,) for p in removed])
+                result["removed"] = len(removed)
+                conn.execute(
+                    "INSERT OR REPLACE INTO roots (root, mtime_ns) VALUES (?, ?)",
+                    (root, root_stat[0] if root_stat and complete else None),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"项目索引对账失败 {root}: {e}")
+        return result
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def _where(root: Optional[str], search: str, project_type: Optional[str],
+               status: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if root is not None:
+            clauses.append("root=?")
+            params.append(os.path.abspath(os.path.expanduser(root)))
+        if search:
+            clauses.append("instr(search_text, ?) > 0")
+            params.append(search.lower())
+        if project_type:
+            clauses.append("project_type=?")
+            params.append(project_type)
+        if status:
+            clauses.append("status=?")
+            params.append(status)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, search: str = "", project_type: Optional[str] = None,
+              status: Optional[str] = None, sort: str = "modified_at",
+              descending: bool = True, offset: int = 0, limit: Optional[int] = None,
+              root: Optional[str] = None) -> List[ProjectIndexEntry]:
+        """
+        分页查询
+
+        Args:
+            search: 在名称、描述、标签中搜索（不区分大小写）
+            project_type: 项目类型值（如 "video_editing"）
+            status: 项目状态值（如 "active"）
+            sort: 排序字段，SORT_COLUMNS 之一
+            descending: 是否降序
+            offset: 跳过条数
+            limit: 最多返回条数（None 表示不限）
+            root: 只查某个项目根目录
+
+        Returns:
+            索引记录列表
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        where, params = self._where(root, search, project_type, status)
+        order = "DESC" if descending else "ASC"
+        sql = (
+            "SELECT path, project_id, metadata, created_at, modified_at, file_mtime_ns, file_size "
+            f"FROM projects{where} ORDER BY {sort} {order}, path LIMIT ? OFFSET ?"
+        )
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self._db().execute(sql, params).fetchall()
+
+        entries = []
+        for path, project_id, metadata, created_at, modified_at, mtime_ns, size in rows:
+            try:
+                meta = ProjectMetadata.from_dict(json.loads(metadata))
+            except (ValueError, KeyError) as e:
+                logger.debug(f"项目索引记录无效 {path}: {e}")
+                continue
+            entries.append(ProjectIndexEntry(
+                path=path, project_id=project_id, metadata=meta,
+                modified_at=modified_at, created_at=created_at,
+                file_mtime_ns=mtime_ns, file_size=size,
+            ))
+        return entries
+
+    def count(self, search: str = "", project_type: Optional[str] = None,
+              status: Optional[str] = None, root: Optional[str] = None) -> int:
+        """符合条件的记录数（用于分页）"""
+        where, params = self._where(root, search, project_type, status)
+        with self._lock:
+            return self._db().execute(f"SELECT COUNT(*) FROM projects{where}", params).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+__all__ = [
+    "ProjectIndex",
+    "ProjectIndexEntry",
+    "read_metadata",
+    "SORT_COLUMNS",
+]
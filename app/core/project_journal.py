@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志式项目保存
+
+大项目每次保存都完整重写 JSON 会在主线程上卡顿，写到一半崩溃还会留下损坏的文件。
+这里把保存拆成：
+- 快照: <path>，只通过 "写临时文件 + fsync + os.replace" 原子替换
+- 日志: <path>.journal，首行记录所基于快照的内容摘要，之后每次保存只追加
+  与上次保存的差异（一行一条记录）
+- 压缩: 日志记录数或体积超过阈值时写新快照并清空日志
+- 恢复: 加载时读快照再重放日志；摘要与快照不符的日志（压缩时替换快照后、
+  删除日志前崩溃留下的旧日志）整体丢弃，末尾写了一半或无法应用的记录及其后的记录丢弃
+
+保存在后台写线程执行（BackgroundSaver），同一文件连续的保存只写最新一份。
+
+使用示例:
+    store = get_store("/path/project.json")
+    data = store.load()                       # 快照 + 日志重放
+    get_background_saver().submit(store, data)   # 立即返回
+    get_background_saver().flush()               # 等待写完（如退出前）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """原子写 JSON：写入同目录临时文件并 fsync，再 os.replace 覆盖目标"""
+    _atomic_write_bytes(path, json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8"))
+
+
+def _atomic_write_bytes(path: str, raw: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _base_id(raw: Optional[bytes]) -> Optional[str]:
+    """快照内容摘要，作为日志的基线标识"""
+    return hashlib.sha1(raw).hexdigest() if raw is not None else None
+
+
+def snapshot(value: Any) -> Any:
+    """复制 dict / list 结构（叶子值不可变），交给后台线程后调用方可以继续修改原对象"""
+    if isinstance(value, dict):
+        return {k: snapshot(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [snapshot(v) for v in value]
+    return value
+
+
+# ============================================================================
+# 差异
+# ============================================================================
+
+def diff(old: Any, new: Any, path: Tuple = (), depth: int = 6) -> List[Dict[str, Any]]:
+    """
+    计算把 old 变成 new 的操作列表
+
+    操作:
+        {"op": "set", "path": [...], "value": v}   设置（列表下标等于长度时为追加）
+        {"op": "del", "path": [...]}               删除字典键
+        {"op": "trunc", "path": [...], "len": n}   列表截断到 n 项
+    超过 depth 层的变化整体 set。
+    """
+    if old == new:
+        return []
+    if depth > 0 and isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "del", "path": list(path + (key,))})
+        for key, value in new.items():
+            if key in old:
+                ops.extend(diff(old[key], value, path + (key,), depth - 1))
+            else:
+                ops.append({"op": "set", "path": list(path + (key,)), "value": value})
+        return ops
+    if depth > 0 and isinstance(old, list) and isinstance(new, list):
+        ops = []
+        if len(new) < len(old):
+            ops.append({"op": "trunc", "path": list(path), "len": len(new)})
+        for i, value in enumerate(new):
+            if i < len(old):
+                ops.extend(diff(old[i], value, path + (i,), depth - 1))
+            else:
+                ops.append({"op": "set", "path": list(path + (i,)), "value": value})
+        return ops
+    return [{"op": "set", "path": list(path), "value": new}]
+
+
+def apply(state: Any, ops: List[Dict[str, Any]]) -> Any:
+    """按顺序应用 diff() 产生的操作，返回新的根对象"""
+    for op in ops:
+        path = op["path"]
+        if op["op"] == "set" and not path:
+            state = op["value"]
+            continue
+        target = state
+        for key in path[:-1] if op["op"] != "trunc" else path:
+            target = target[key]
+        if op["op"] == "trunc":
+            del target[op["len"]:]
+        elif op["op"] == "del":
+            target.pop(path[-1], None)
+        elif isinstance(target, list) and path[-1] == len(target):
+            target.append(op["value"])
+        else:
+            target[path[-1]] = op["value"]
+    return state
+
+
+# ============================================================================
+# 存储
+# ============================================================================
+
+class JournaledStore:
+    """
+    快照 + 追加日志的 JSON 存储（线程安全）
+
+    第一次保存（本进程内尚未加载/保存过）总是写完整快照，之后的保存追加差异。
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = 2,
+                 compact_records: int = 100, compact_ratio: float = 0.5):
+        """
+        Args:
+            path: 快照文件路径
+            indent: 快照 JSON 缩进
+            compact_records: 日志记录数达到该值时压缩
+            compact_ratio: 日志体积超过快照体积的该比例时压缩
+        """
+        self.path = os.path.abspath(path)
+        self.journal_path = self.path + JOURNAL_SUFFIX
+        self.indent = indent
+        self.compact_records = compact_records
+        self.compact_ratio = compact_ratio
+        self._state: Optional[Any] = None
+        self._base: Optional[str] = None
+        self._records = 0
+        self._lock = threading.Lock()
+
+    # ---------- 读取 ----------
+
+    def load(self) -> Optional[Any]:
+        """读快照并重放日志；文件不存在返回 None"""
+        with self._lock:
+            return snapshot(self._load())
+
+    def _load(self) -> Optional[Any]:
+        raw = None
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        self._base = _base_id(raw)
+        state = json.loads(raw) if raw is not None else None
+
+        self._records = 0
+        if os.path.exists(self.journal_path):
+            state = self._replay(raw, state)
+        self._state = state
+        return state
+
+    def _replay(self, raw: Optional[bytes], state: Any) -> Any:
+        """重放日志；基线不符的日志删除，写了一半或无法应用的记录连同其后的记录截掉"""
+        records: List[List[Dict[str, Any]]] = []
+        ends: List[int] = []
+        with open(self.journal_path, "rb") as f:
+            header = f.readline()
+            try:
+                base = json.loads(header)["base"] if header.endswith(b"\n") else None
+            except (ValueError, KeyError, TypeError):
+                base = None
+            if base is None or base != self._base:
+                # 不是基于当前快照写的日志（快照已包含其变化，或快照被替换过）
+                if header:
+                    logger.warning(f"日志与快照不匹配，已丢弃: {self.journal_path}")
+                os.remove(self.journal_path)
+                return state
+            good = len(header)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    ops = json.loads(line)["ops"]
+                except (ValueError, KeyError, TypeError):
+                    break
+                good += len(line)
+                records.append(ops)
+                ends.append(good)
+
+        for i, ops in enumerate(records):
+            try:
+                state = apply(state, ops)
+            except Exception as e:
+                # 记录与当前状态对不上：停在上一条完整记录（apply 可能已改了一半，从快照重建）
+                logger.warning(f"日志记录无法应用，丢弃其后的记录: {e}")
+                state = json.loads(raw)
+                for good_ops in records[:i]:
+                    state = apply(state, good_ops)
+                records = records[:i]
+                good = ends[i - 1] if i else len(header)
+                break
+        self._records = len(records)
+
+        if good < os.path.getsize(self.journal_path):
+            # 写了一半的末尾记录：截掉，保证后续追加从完整行开始
+            logger.warning(f"丢弃未写完的日志记录: {self.journal_path}")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+        return state
+
+    # ---------- 写入 ----------
+
+    def save(self, data: Any) -> None:
+        """
+        保存（同步）：追加差异，必要时压缩为新快照
+
+        data 保存后归存储所有，调用方不应再修改（可先 snapshot()）。
+        """
+        with self._lock:
+            if self._state is None:
+                self._compact(data)
+                return
+            ops = diff(self._state, data)
+            if not ops:
+                return
+            record = json.dumps({"ops": ops}, ensure_ascii=False) + "\n"
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(json.dumps({"base": self._base}) + "\n")
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+            self._state = data
+            self._records += 1
+            if self._should_compact():
+                self._compact(data)
+
+    def compact(self, data: Optional[Any] = None) -> None:
+        """写完整快照并清空日志（data 为 None 时用当前状态）"""
+        with self._lock:
+            if data is None:
+                data = self._state if self._state is not None else self._load()
+            if data is not None:
+                self._compact(data)
+
+    def _should_compact(self) -> bool:
+        if self._records >= self.compact_records:
+            return True
+        try:
+            journal = os.path.getsize(self.journal_path)
+            return journal > self.compact_ratio * max(os.path.getsize(self.path), 1)
+        except OSError:
+            return True
+
+    def _compact(self, data: Any) -> None:
+        raw = json.dumps(data, ensure_ascii=False, indent=self.indent).encode("utf-8")
+        _atomic_write_bytes(self.path, raw)
+        # 快照已包含全部变化，日志可以丢弃（先替换快照再删日志；两步之间崩溃留下的
+        # 旧日志基线是旧快照的摘要，加载时会被丢弃而不是重放到新快照上）
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._state = data
+        self._base = _base_id(raw)
+        self._records = 0
+
+
+_stores: Dict[str, JournaledStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, **kwargs) -> JournaledStore:
+    """按路径共享的存储实例（同一文件的差异基线只有一份）"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = JournaledStore(key, **kwargs)
+        return store
+
+
+# ============================================================================
+# 后台写线程
+# ============================================================================
+
+class BackgroundSaver:
+    """
+    单个后台写线程
+
+    submit() 立即返回 Future；同一存储还没开始写的旧数据会被新数据替换，
+    旧 Future 与新 Future 在新数据写完时一起完成。
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Tuple[JournaledStore, Any, List[Future]]] = {}
+        self._order: List[str] = []
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, store: JournaledStore, data: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            entry = self._pending.get(store.path)
+            if entry is None:
+                self._order.append(store.path)
+                self._pending[store.path] = (store, data, [future])
+            else:
+                self._pending[store.path] = (store, data, entry[2] + [future])
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="project-saver", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._order:
+                    if not self._cond.wait(timeout=30.0) and not self._order:
+                        self._thread = None
+                        return
+                path = self._order.pop(0)
+                store, data, futures = self._pending.pop(path)
+                self._busy += 1
+            try:
+                store.save(data)
+            except Exception as e:
+                logger.error(f"后台保存失败 {path}: {e}")
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future in futures:
+                    future.set_result(path)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交的保存完成，返回是否在超时前完成"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._order and not self._busy, timeout)
+
+
+_saver: Optional[BackgroundSaver] = None
+_saver_lock = threading.Lock()
+
+
+def get_background_saver() -> BackgroundSaver:
+    """获取全局后台写线程"""
+    global _saver
+    if _saver is None:
+        with _saver_lock:
+            if _saver is None:
+                _saver = BackgroundSaver()
+    return _saver
+
+
+__all__ = [
+    "JournaledStore",
+    "BackgroundSaver",
+    "atomic_write_json",
+    "snapshot",
+    "diff",
+    "apply",
+    "get_store",
+    "get_background_saver",
+]
@@ -20,6 +20,8 @@ from PySide6.QtCore import QObject, Signal
 
 from .config_manager import ConfigManager
 from .secure_key_manager import get_secure_key_manager
+from .project_index import ProjectIndex
+from .project_journal import JournaledStore, get_background_saver, get_store, snapshot
 from .models.project_models import (
     ProjectStatus, ProjectType,
     ProjectMetadata, ProjectSettings,
@@ -75,21 +77,36 @@ class Project:
         self.is_modified = True
         self.metadata.modified_at = datetime.now()
 
-    def save(self) -> bool:
-        """保存项目"""
+    @property
+    def store(self) -> JournaledStore:
+        """project.json 的日志式存储"""
+        return get_store(os.path.join(self.path, 'project.json'))
+
+    def to_data(self) -> Dict[str, Any]:
+        """项目文件内容"""
+        return {
+            'metadata': self.metadata.to_dict(),
+            'settings': asdict(self.settings),
+            'media_files': {k: v.to_dict() for k, v in self.media_files.items()},
+            'timeline': self.timeline.to_dict(),
+            'version': '2.0.0'
+        }
+
+    def save(self, background: bool = False) -> bool:
+        """
+        保存项目
+
+        background=True 时只把变更交给后台写线程追加到日志（自动保存用），立即返回；
+        否则同步写完整快照。
+        """
         try:
-            project_data = {
-                'metadata': self.metadata.to_dict(),
-                'settings': asdict(self.settings),
-                'media_files': {k: v.to_dict() for k, v in self.media_files.items()},
-                'timeline': self.timeline.to_dict(),
-                'version': '2.0.0'
-            }
-
-            # 保存主项目文件
-            project_file = os.path.join(self.path, 'project.json')
-            with open(project_file, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, indent=2, ensure_ascii=False)
+            project_data = snapshot(self.to_data())
+            saver = get_background_saver()
+            if background:
+                saver.submit(self.store, project_data)
+            else:
+                saver.flush()
+                self.store.compact(project_data)
 
             # 保存项目锁文件
             lock_file = os.path.join(self.path, '.lock')
@@ -103,16 +120,18 @@ class Project:
             logging.error(f"Failed to save project {self.id}: {e}")
             return False
 
+    def compact(self) -> None:
+        """等待后台保存完成并把日志合并进 project.json（备份、导出等直接读文件前调用）"""
+        get_background_saver().flush()
+        self.store.compact()
+
     def load(self) -> bool:
         """加载项目"""
         try:
-            project_file = os.path.join(self.path, 'project.json')
-            if not os.path.exists(project_file):
+            project_data = self.store.load()
+            if project_data is None:
                 return False
 
-            with open(project_file, 'r', encoding='utf-8') as f:
-                project_data = json.load(f)
-
             # 加载元数据
             self.metadata = ProjectMetadata.from_dict(project_data['metadata'])
 
@@ -147,6 +166,7 @@ class Project:
             os.makedirs(backup_path, exist_ok=True)
 
             # 复制项目文件
+            self.compact()
             shutil.copy2(os.path.join(self.path, 'project.json'),
                         os.path.join(backup_path, 'project.json'))
 
@@ -227,6 +247,9 @@ class ProjectManager(QObject):
         # 确保目录存在
         self._ensure_directories()
 
+        # 项目库索引（元数据存 SQLite，项目页分页/搜索不再逐个解析 project.json）
+        self.library = ProjectIndex(os.path.expanduser("~/Voxplore/cache/project_library.db"))
+
         # 加载最近项目
         self.recent_projects: List[str] = self._load_recent_projects()
 
@@ -313,6 +336,7 @@ class ProjectManager(QObject):
                 self.projects[project_id] = project
                 self.current_project = project
                 self._add_to_recent_projects(project_path)
+                self.library.upsert(project_path, project.metadata.to_dict(), project_id)
 
                 self.project_created.emit(project_id)
                 self.logger.info(f"Created project: {name} ({project_id})")
@@ -346,9 +370,8 @@ class ProjectManager(QObject):
                     self.error_occurred.emit("OPEN_ERROR", "项目已被其他进程打开")
                     return None
 
-            # 加载项目数据
-            with open(project_file, 'r', encoding='utf-8') as f:
-                project_data = json.load(f)
+            # 加载项目数据（快照 + 日志重放）
+            project_data = get_store(project_file).load()
 
             # 创建项目元数据
             metadata = ProjectMetadata.from_dict(project_data['metadata'])
@@ -391,8 +414,9 @@ class ProjectManager(QObject):
                 if backup_path:
                     project.cleanup_old_backups(project.settings.backup_count)
 
-            # 保存项目
-            if project.save():
+            # 保存项目（自动保存在后台写日志，不阻塞界面）
+            if project.save(background=auto_save):
+                self.library.upsert(project.path, project.metadata.to_dict(), project_id)
                 self.project_saved.emit(project_id)
                 if not auto_save:
                     self.logger.info(f"Saved project: {project.metadata.name} ({project_id})")
@@ -418,6 +442,8 @@ class ProjectManager(QObject):
                 # 这里应该显示对话框询问用户
                 # 为了简化，我们直接保存
                 self.save_project(project_id)
+            else:
+                project.compact()
 
             # 删除项目锁
             lock_file = os.path.join(project.path, '.lock')
@@ -452,8 +478,9 @@ class ProjectManager(QObject):
             if os.path.exists(project.path):
                 shutil.rmtree(project.path)
 
-            # 从项目列表中移除
+            # 从项目列表和项目库中移除
             del self.projects[project_id]
+            self.library.remove(project.path)
 
             # 从最近项目中移除
             if project.path in self.recent_projects:
@@ -477,6 +504,7 @@ class ProjectManager(QObject):
                 return False
 
             project = self.projects[project_id]
+            project.compact()
 
             # 创建ZIP文件
             with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
@@ -531,9 +559,8 @@ class ProjectManager(QObject):
                 self.error_occurred.emit("IMPORT_ERROR", "无效的项目文件")
                 return None
 
-            # 加载项目数据
-            with open(project_file, 'r', encoding='utf-8') as f:
-                project_data = json.load(f)
+            # 加载项目数据（快照 + 日志重放）
+            project_data = get_store(project_file).load()
 
             # 创建项目目录
             metadata = ProjectMetadata.from_dict(project_data['metadata'])
@@ -587,33 +614,53 @@ class ProjectManager(QObject):
         """获取最近项目列表"""
         return self.recent_projects.copy()
 
-    def scan_projects(self) -> List[Project]:
-        """扫描项目目录，发现所有项目"""
-        discovered_projects = []
-
+    def scan_projects(self, search: str = "", project_type: Optional[str] = None,
+                      status: Optional[str] = None, sort: str = "modified_at",
+                      descending: bool = True, offset: int = 0,
+                      limit: Optional[int] = None, reconcile: bool = True) -> List[Project]:
+        """
+        扫描项目目录，发现所有项目
+
+        先与项目库索引增量对账（只重新读取有变化的项目），再从索引分页查询。
+        返回的 Project 只含元数据，打开项目时才加载媒体和时间线。
+
+        Args:
+            search: 在名称、描述、标签中搜索
+            project_type: 项目类型值
+            status: 项目状态值
+            sort: 排序字段（modified_at / created_at / name）
+            descending: 是否降序
+            offset: 分页偏移
+            limit: 每页条数（None 表示全部）
+            reconcile: 是否先对账（翻页时可跳过）
+        """
         try:
-            for project_dir in os.listdir(self.projects_dir):
-                project_path = os.path.join(self.projects_dir, project_dir)
-                if os.path.isdir(project_path):
-                    project_file = os.path.join(project_path, 'project.json')
-                    if os.path.exists(project_file):
-                        try:
-                            with open(project_file, 'r', encoding='utf-8') as f:
-                                project_data = json.load(f)
-
-                            metadata = ProjectMetadata.from_dict(project_data['metadata'])
-                            project = Project(metadata.name, project_path, metadata)
-                            discovered_projects.append(project)
-
-                        except Exception as e:
-                            self.logger.warning(f"Failed to load project from {project_path}: {e}")
-
-            return discovered_projects
-
+            if reconcile:
+                self.library.reconcile(self.projects_dir)
+            entries = self.library.query(
+                search=search, project_type=project_type, status=status,
+                sort=sort, descending=descending, offset=offset, limit=limit,
+                root=self.projects_dir,
+            )
         except Exception as e:
             self.logger.error(f"Failed to scan projects: {e}")
             return []
 
+        open_by_path = {p.path: p for p in self.projects.values()}
+        discovered_projects = []
+        for entry in entries:
+            project = open_by_path.get(entry.path)
+            if project is None:
+                project = Project(entry.project_id, entry.path, entry.metadata)
+            discovered_projects.append(project)
+        return discovered_projects
+
+    def count_projects(self, search: str = "", project_type: Optional[str] = None,
+                       status: Optional[str] = None) -> int:
+        """项目库中符合条件的项目数（配合 scan_projects 分页）"""
+        return self.library.count(search=search, project_type=project_type,
+                                  status=status, root=self.projects_dir)
+
     def _load_templates(self) -> None:
         """加载项目模板"""
         try:
@@ -662,6 +709,7 @@ class ProjectManager(QObject):
             os.makedirs(template_path, exist_ok=True)
 
             # 复制项目文件
+            project.compact()
             shutil.copy2(os.path.join(project.path, 'project.json'),
                         os.path.join(template_path, 'project.json'))
 
@@ -708,6 +756,10 @@ class ProjectManager(QObject):
         if hasattr(self, 'auto_save_timer'):
             self.auto_save_timer.stop()
 
+        get_background_saver().flush()
+
+        self.library.close()
+
         # 清理临时目录
         if os.path.exists(self.temp_dir):
             try:
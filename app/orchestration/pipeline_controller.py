@@ -2,14 +2,17 @@
 Pipeline 控制器 — 串联 MonologueMaker 各阶段，提供 Qt 信号驱动 UI 更新
 """
 
+import time
 import traceback
 from enum import Enum
+from pathlib import Path
 from typing import Optional
 
 from PySide6.QtCore import QObject, Signal
 
 from app.services.video.monologue_maker import MonologueMaker, MonologueProject
 from app.core.logger import Logger
+from app.utils.tracing import Span, tracer
 
 
 class PipelineStage(Enum):
@@ -55,6 +58,8 @@ class PipelineController(QObject):
         PipelineStage.DONE: "完成",
         PipelineStage.ERROR: "错误",
     }
+    # 流水线模式下重叠进行的阶段（按先后顺序）
+    _OVERLAPPED_STAGES = (PipelineStage.SCRIPT, PipelineStage.VOICE, PipelineStage.CAPTION)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -88,6 +93,7 @@ class PipelineController(QObject):
         emotion: str,
         style,
         output_dir: str,
+        pipelined: bool = True,
     ) -> None:
         """
         启动完整 Pipeline（Step1 + Step2 + Step3）
@@ -98,6 +104,8 @@ class PipelineController(QObject):
             emotion: 情感基调
             style: MonologueStyle
             output_dir: 输出目录
+            pipelined: 文案/配音/字幕重叠进行（边生成文案边合成配音），
+                False 时依次执行各阶段
         """
         if self._is_running:
             self.logger.warning("Pipeline 已在运行中，忽略重复启动")
@@ -106,37 +114,47 @@ class PipelineController(QObject):
         self._is_running = True
         self._is_paused = False
 
+        trace_root = None
         try:
-            # --- Stage 1: 创建项目 & 分析视频 ---
-            self._set_stage(PipelineStage.ANALYZING)
-            self._project = self._maker.create_project(
-                source_video=video_path,
-                context=context,
-                emotion=emotion,
-                output_dir=output_dir,
-            )
-            self._project.style = style
-
-            # --- Stage 2: 生成文案 ---
-            self._set_stage(PipelineStage.SCRIPT)
-            self._maker.generate_script(self._project)
-
-            # --- Stage 3: 生成配音 ---
-            self._set_stage(PipelineStage.VOICE)
-            self._maker.generate_voice(self._project)
-
-            # --- Stage 4: 生成字幕 ---
-            self._set_stage(PipelineStage.CAPTION)
-            self._maker.generate_captions(self._project)
-
-            # --- Stage 5: 导出 ---
-            self._set_stage(PipelineStage.EXPORTING)
-            draft_path = self._maker.export_to_jianying(
-                self._project,
-                output_dir + "/jianying_drafts",
-            )
+            with tracer.span("pipeline", category="pipeline", file=video_path) as trace_root:
+                # --- Stage 1: 创建项目 & 分析视频 ---
+                self._set_stage(PipelineStage.ANALYZING)
+                self._project = self._maker.create_project(
+                    source_video=video_path,
+                    context=context,
+                    emotion=emotion,
+                    output_dir=output_dir,
+                )
+                self._project.style = style
+
+                if pipelined:
+                    # --- Stage 2-4: 文案 / 配音 / 字幕重叠进行 ---
+                    # 各阶段进度通过 stage_progress 分别推送，
+                    # 阶段切换由 _on_maker_progress 按进度推进
+                    self._set_stage(PipelineStage.SCRIPT)
+                    self._maker.generate_pipelined(self._project)
+                else:
+                    # --- Stage 2: 生成文案 ---
+                    self._set_stage(PipelineStage.SCRIPT)
+                    self._maker.generate_script(self._project)
+
+                    # --- Stage 3: 生成配音 ---
+                    self._set_stage(PipelineStage.VOICE)
+                    self._maker.generate_voice(self._project)
+
+                    # --- Stage 4: 生成字幕 ---
+                    self._set_stage(PipelineStage.CAPTION)
+                    self._maker.generate_captions(self._project)
+
+                # --- Stage 5: 导出 ---
+                self._set_stage(PipelineStage.EXPORTING)
+                draft_path = self._maker.export_to_jianying(
+                    self._project,
+                    output_dir + "/jianying_drafts",
+                )
 
             # --- 完成 ---
+            self._export_trace(output_dir, trace_root)
             self._set_stage(PipelineStage.DONE)
             self._is_running = False
             self.finished.emit(draft_path)
@@ -145,6 +163,7 @@ class PipelineController(QObject):
             self._is_running = False
             err_msg = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
             self.logger.error(f"Pipeline 执行出错: {err_msg}")
+            self._export_trace(output_dir, trace_root)
             self._set_stage(PipelineStage.ERROR)
             self.error_occurred.emit(str(e))
 
@@ -203,6 +222,28 @@ class PipelineController(QObject):
         if stage != PipelineStage.DONE and stage != PipelineStage.ERROR:
             self.stage_progress.emit(stage.value, 0.0)
 
+    def _export_trace(self, output_dir: str, root: Optional[Span]) -> Optional[str]:
+        """
+        追踪开启时导出本次运行（root 及其后代）的 trace 与阶段汇总，然后只清除这些记录
+
+        其它并发流水线或调用方记录的 span 不受影响。
+        """
+        if not tracer.enabled or not isinstance(root, Span):
+            return None
+        spans = tracer.spans_under(root)
+        try:
+            path = tracer.export_chrome_trace(
+                str(Path(output_dir) / "traces" / f"pipeline_{time.strftime('%Y%m%d_%H%M%S')}.json"),
+                spans,
+            )
+            self.logger.info(f"Pipeline trace 已导出: {path}\n{tracer.format_summary(spans)}")
+            return path
+        except OSError as e:
+            self.logger.warning(f"导出 trace 失败: {e}")
+            return None
+        finally:
+            tracer.discard(spans)
+
     def _on_maker_progress(self, stage_label: str, progress: float) -> None:
         """
         接收 MonologueMaker 的进度回调，转发为 Qt Signal
@@ -216,4 +257,9 @@ class PipelineController(QObject):
             "生成字幕": PipelineStage.CAPTION,
         }
         stage = mapping.get(stage_label, self._current_stage)
+        order = self._OVERLAPPED_STAGES
+        if (stage in order and self._current_stage in order
+                and order.index(stage) > order.index(self._current_stage)):
+            # 流水线模式下阶段重叠：首次收到后续阶段的进度即切换阶段
+            self._set_stage(stage)
         self.stage_progress.emit(stage.value, progress)
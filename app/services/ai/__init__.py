@@ -21,6 +21,9 @@ from .base_llm_provider import (
     ProviderError,
 )
 from .llm_manager import LLMManager
+from .llm_router import LatencyRouter
+from .single_flight import SingleFlight
+from .tiered_cache import TieredLLMCache
 
 # 视觉相关
 from .vision_providers import (
@@ -28,6 +31,7 @@ from .vision_providers import (
     VisionAnalyzerFactory,
     FIRST_PERSON_ANALYSIS_PROMPT,
 )
+from .vision_client import VisionResultCache, get_vision_cache, prepare_image
 
 # 语音相关
 from .voice_generator import VoiceGenerator, VoiceConfig, VoiceStyle
@@ -44,6 +48,7 @@ from .subtitle_extractor import (
     SubtitleMerger,
     SubtitleTranslator,
 )
+from .translation_memory import TranslationMemory, get_translation_memory
 
 # ASR
 from .sensevoice_provider import SenseVoiceProvider
@@ -72,11 +77,17 @@ __all__ = [
     "ProviderType",
     "ProviderError",
     "LLMManager",
+    "LatencyRouter",
+    "SingleFlight",
+    "TieredLLMCache",
 
     # Vision
     "VisionProvider",
     "VisionAnalyzerFactory",
     "FIRST_PERSON_ANALYSIS_PROMPT",
+    "VisionResultCache",
+    "get_vision_cache",
+    "prepare_image",
 
     # Voice
     "VoiceGenerator",
@@ -93,6 +104,8 @@ __all__ = [
     "SpeechSubtitleExtractor",
     "SubtitleMerger",
     "SubtitleTranslator",
+    "TranslationMemory",
+    "get_translation_memory",
 
     # ASR
     "SenseVoiceProvider",
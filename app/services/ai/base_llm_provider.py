@@ -11,7 +11,7 @@ LLM 提供商抽象基类
 - 异常类 (ProviderError)
 - 混入类 (HTTPClientMixin, ModelManagerMixin)
 - 基类 (BaseLLMProvider)
-- 速率限制器 (RateLimiter)
+- 速率限制器 (RateLimiter / AdaptiveRateLimiter)
 - 熔断器 (CircuitBreaker)
 - 重试机制 (RetryHandler) ✅ 新增
 
@@ -33,13 +33,15 @@ from .errors import (
 from .retry import (
     RetryHandler,
     RateLimiter,
+    AdaptiveRateLimiter,
     CircuitBreaker,
+    retry_after_seconds,
 )
+from .single_flight import SingleFlight, request_key
 import asyncio
 import httpx
 import logging
 import time
-import hashlib
 
 logger = logging.getLogger(__name__)
 
@@ -114,9 +116,9 @@ class RequestCache:
         self._misses = 0
 
     def _make_key(self, request: LLMRequest) -> str:
-        """生成缓存键"""
-        content = f"{request.model}:{request.prompt[:100]}:{request.temperature}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """生成缓存键（完整请求指纹）"""
+        return request_key(request)
+
     async def get(self, request: LLMRequest) -> Optional[LLMResponse]:
         """获取缓存的响应（通过 request 对象）"""
         key = self._make_key(request)
@@ -259,7 +261,7 @@ class HTTPClientMixin:
         )
 
     def _handle_http_error(self, e: httpx.HTTPStatusError) -> ProviderError:
-        """处理HTTP错误"""
+        """处理HTTP错误（429 转为带 Retry-After 的 RateLimitError）"""
         error_msg = f"HTTP 错误: {e.response.status_code}"
         try:
             error_data = e.response.json()
@@ -272,8 +274,12 @@ class HTTPClientMixin:
                 error_msg = f"服务器错误: {error_msg}"
             elif e.response.status_code == 401:
                 error_msg = f"认证失败: {error_msg}"
-        except Exception as e:
-            logger.debug(f"Failed to parse error response: {e}")
+        except Exception as parse_error:
+            logger.debug(f"Failed to parse error response: {parse_error}")
+        if e.response.status_code == 429:
+            if not error_msg.startswith("速率限制"):
+                error_msg = f"速率限制: {error_msg}"
+            return RateLimitError(error_msg, retry_after=retry_after_seconds(e))
         return ProviderError(error_msg)
 
 
@@ -316,6 +322,9 @@ class ModelManagerMixin:
 class BaseLLMProvider(ABC):
     """LLM 提供商抽象基类"""
 
+    # 默认限流参数（AdaptiveRateLimiter 参数），可由子类或配置的 rate_limit 覆盖
+    RATE_LIMITS: Dict[str, Any] = {}
+
     def __init__(self, api_key: str, base_url: str):
         """
         初始化提供商
@@ -327,18 +336,19 @@ class BaseLLMProvider(ABC):
         self.api_key = api_key
         self.base_url = base_url
 
-        # 初始化安全组件
-        self._rate_limiter = RateLimiter()
+        # 初始化安全组件：按请求数 / token 数限流，AIMD 调整并发
+        self.rate_limiter = AdaptiveRateLimiter(**self.RATE_LIMITS)
         self._circuit_breaker = CircuitBreaker()
 
         # 初始化请求缓存（减少重复 API 调用，TTL=24h）
         self._cache = RequestCache(max_size=500, ttl=DEFAULT_LONG_CACHE_TTL)
 
+        # 进行中请求合并
+        self._flights = SingleFlight()
+
     def _make_cache_key(self, request: LLMRequest) -> str:
-        """生成缓存键（基于 model + prompt 前200字 + temperature）"""
-        prompt_preview = request.prompt[:200] if request.prompt else ""
-        content = f"{request.model}:{prompt_preview}:{request.temperature}:{request.max_tokens}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """生成缓存键（完整请求指纹，与 RequestCache / 请求合并一致）"""
+        return request_key(request)
 
     @abstractmethod
     async def generate(self, request: LLMRequest) -> LLMResponse:
@@ -390,34 +400,68 @@ class BaseLLMProvider(ABC):
             return result is not None
         except (asyncio.TimeoutError, Exception):
             return False
+
+    async def count_tokens(self, text: str) -> int:
+        """计算 token 数量（估算，见 estimate_text_tokens）"""
+        return estimate_text_tokens(text)
+
+    async def estimate_tokens(self, request: LLMRequest) -> int:
+        """请求最多消耗的 token 数（提示词 + 最大生成长度），用于 token 预算"""
+        prompt_tokens = await self.count_tokens(request.system_prompt + request.prompt)
+        return prompt_tokens + request.max_tokens
+
+    def configure_rate_limits(self, **limits: Any) -> None:
+        """按配置重建限流器（rpm / tpm / max_concurrency 等）"""
+        self.rate_limiter = AdaptiveRateLimiter(**{**self.RATE_LIMITS, **limits})
+
+    async def generate_limited(self, request: LLMRequest) -> LLMResponse:
+        """
+        经限流器调用 generate
+
+        按预估 token 占用预算，结束后按实际用量校正；429 会降低并发并遵守 Retry-After。
+        """
+        async with self.rate_limiter.limit(await self.estimate_tokens(request)) as permit:
+            response = await self.generate(request)
+            if response.tokens_used:
+                permit.used_tokens = response.tokens_used
+            return response
+
     async def generate_cached(self, request: LLMRequest) -> LLMResponse:
         """
         生成文本（带缓存）✅ 优化：重复 prompt 直接返回缓存结果
 
-        缓存键 = model + prompt 前200字 + temperature + max_tokens（TTL=24h）。
+        缓存键为完整请求指纹（TTL=24h）。
+        缓存未命中时，并发的完全相同请求只调用一次 generate。
         """
         key = self._make_cache_key(request)
         cached = await self._cache.get_from_key(key)
         if cached is not None:
             logger.debug(f"[Cache hit] {key[:8]}... ({self.__class__.__name__})")
             return cached
-        response = await self.generate(request)
-        await self._cache.set_from_key(key, response)
-        return response
+
+        async def fetch() -> LLMResponse:
+            response = await self.generate_limited(request)
+            await self._cache.set_from_key(key, response)
+            return response
+
+        # 缓存未命中时，并发的相同请求共享同一次调用
+        return await self._flights.do(key, fetch)
 
     async def generate_batch(
         self,
         requests: List[LLMRequest],
-        max_concurrency: int = 5,
+        max_concurrency: Optional[int] = None,
         use_cache: bool = True,
         deduplicate: bool = True,
     ) -> List[LLMResponse]:
         """
         批量生成文本 ✅ 优化：asyncio.gather 并发 + 请求缓存 + 请求去重
 
+        实际并发由提供商的自适应限流器控制。
+
         Args:
             requests: LLM 请求列表
-            max_concurrency: 最大并发数（防止超出 API 限制）
+            max_concurrency: 额外的并发上限（None 表示只受限流器约束）
             use_cache: 是否启用缓存（默认启用，重复 prompt 直接返回）
             deduplicate: 是否对重复请求去重（相同 prompt+model+temperature 只调用一次）
 
@@ -446,7 +490,7 @@ class BaseLLMProvider(ABC):
             else:
                 unique_results = await gather_with_concurrency(
                     max_concurrency,
-                    *[self.generate(req) for req in unique_requests]
+                    *[self.generate_limited(req) for req in unique_requests]
                 )
 
             # 将结果映射回原始顺序
@@ -460,7 +504,7 @@ class BaseLLMProvider(ABC):
         else:
             results = await gather_with_concurrency(
                 max_concurrency,
-                *[self.generate(req) for req in requests]
+                *[self.generate_limited(req) for req in requests]
             )
         return [
             r if isinstance(r, LLMResponse) else None
@@ -478,8 +522,14 @@ class BaseLLMProvider(ABC):
 
 # ============ 工具函数 ============
 
+def estimate_text_tokens(text: str) -> int:
+    """估算文本 token 数：中文约 1.5 token/字，其他约 0.25 token/字符"""
+    chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
+    return int(chinese_chars * 1.5 + (len(text) - chinese_chars) * 0.25)
+
+
 async def gather_with_concurrency(
-    n: int,
+    n: Optional[int],
     *tasks,
     return_exceptions: bool = True
 ) -> List[Any]:
@@ -487,13 +537,16 @@ async def gather_with_concurrency(
     控制并发数的 asyncio.gather ✅ 新增
 
     Args:
-        n: 最大并发数
+        n: 最大并发数（None 或 <= 0 不限制）
         *tasks: 异步任务
         return_exceptions: 是否返回异常
 
     Returns:
         结果列表
     """
+    if not n or n <= 0:
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
     semaphore = asyncio.Semaphore(n)
 
     async def _run_with_semaphore(task):
@@ -514,11 +567,13 @@ __all__ = [
     "RateLimitError",
     "CircuitOpenError",
     "RateLimiter",
+    "AdaptiveRateLimiter",
     "CircuitBreaker",
     "RequestCache",
     "RetryHandler",
     "HTTPClientMixin",
     "ModelManagerMixin",
     "BaseLLMProvider",
+    "estimate_text_tokens",
     "gather_with_concurrency",  # ✅ 新增
 ]
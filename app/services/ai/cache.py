@@ -6,17 +6,22 @@ Voxplore LLM 缓存和重试机制
 提高 LLM API 调用性能和可靠性
 """
 
-import hashlib
-import json
 import time
 from pathlib import Path
 from typing import Optional, Dict, Any, Callable
 from functools import wraps
 
+from .single_flight import request_key
+
 import logging
 logger = logging.getLogger(__name__)
 
 
+def message_key(messages: list, model: str, temperature: Optional[float] = None) -> str:
+    """消息列表的缓存键（与 LLMRequest 的 request_key 使用同一种指纹）"""
+    return request_key({"messages": messages, "model": model, "temperature": temperature})
+
+
 class LLMMemoryCache:
     """LLM 响应内存缓存"""
 
@@ -40,16 +45,7 @@ class LLMMemoryCache:
         temperature: Optional[float] = None
     ) -> str:
         """生成缓存键"""
-        # 创建包含所有参数的字符串
-        data = {
-            "messages": messages,
-            "model": model,
-            "temperature": temperature
-        }
-        data_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-
-        # 使用 MD5 哈希生成键
-        return hashlib.md5(data_str.encode()).hexdigest()
+        return message_key(messages, model, temperature)
 
     def get(
         self,
@@ -166,13 +162,14 @@ class LLMDiskCache:
 
     def _generate_key(self, messages: list, model: str, temperature: Optional[float] = None) -> str:
         """生成缓存键"""
-        data = {"messages": messages, "model": model, "temperature": temperature}
-        data_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(data_str.encode()).hexdigest()
+        return message_key(messages, model, temperature)
 
     def get(self, messages: list, model: str, temperature: Optional[float] = None) -> Optional[Dict]:
         """获取缓存响应"""
-        key = self._generate_key(messages, model, temperature)
+        return self.get_key(self._generate_key(messages, model, temperature))
+
+    def get_key(self, key: str) -> Optional[Dict]:
+        """按缓存键获取缓存响应"""
         import sqlite3
         conn = sqlite3.connect(str(self._db_path))
         conn.row_factory = sqlite3.Row
@@ -199,12 +196,29 @@ class LLMDiskCache:
         latency_ms: float = 0.0
     ) -> None:
         """设置缓存"""
-        key = self._generate_key(messages, model, temperature)
+        self.set_key(
+            self._generate_key(messages, model, temperature), model, content,
+            temperature=temperature, provider=provider,
+            tokens_used=tokens_used, latency_ms=latency_ms,
+            prompt_preview=messages[-1]["content"][:100] if messages else "",
+        )
+
+    def set_key(
+        self,
+        key: str,
+        model: str,
+        content: str,
+        temperature: Optional[float] = None,
+        provider: str = "",
+        tokens_used: int = 0,
+        latency_ms: float = 0.0,
+        prompt_preview: str = "",
+    ) -> None:
+        """按缓存键设置缓存"""
         now = int(time.time())
         import sqlite3
         conn = sqlite3.connect(str(self._db_path))
         cursor = conn.cursor()
-        prompt_preview = messages[-1]["content"][:100] if messages else ""
         cursor.execute("""
             INSERT OR REPLACE INTO responses
             (key, provider, model, prompt_preview, temperature, content, tokens_used, latency_ms, created_at, expires_at)
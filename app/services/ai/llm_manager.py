@@ -6,8 +6,12 @@ LLM 管理器
 统一管理所有 LLM 提供商，支持自动切换和负载均衡
 """
 
+import asyncio
+import concurrent.futures
 import logging
-from typing import Dict, Optional, List, Any, AsyncIterator
+import threading
+import time
+from typing import Dict, Optional, List, Any, AsyncIterator, Awaitable, TypeVar
 
 
 from .base_llm_provider import (
@@ -17,6 +21,10 @@ from .base_llm_provider import (
     ProviderError,
     ProviderType,  # 从基础模块导入
 )
+from app.utils.tracing import tracer
+from .llm_router import LatencyRouter
+from .single_flight import SingleFlight, request_key
+from .tiered_cache import TieredLLMCache
 from .providers.qwen import QwenProvider
 from .providers.kimi import KimiProvider
 from .providers.glm5 import GLM5Provider
@@ -29,6 +37,27 @@ from .providers.hunyuan import HunyuanProvider
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 所有 LLMManager 共用的后台事件循环（常驻守护线程，按需启动）
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """获取共享的后台事件循环，不存在时启动（视觉分析等其他异步客户端也在此复用连接）"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="llm-manager-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
 def _safe_import():
     """安全导入依赖"""
     try:
@@ -44,8 +73,11 @@ class LLMManager:
 
     功能:
     1. 统一接口访问所有提供商
-    2. 自动切换失败提供商
-    3. 配置驱动
+    2. 自动切换失败提供商（按延迟/错误率排序）
+    3. 可选对冲请求，压低尾延迟
+    4. 分层响应缓存 + 合并并发的相同请求（single-flight）
+    5. 按提供商自适应限流（请求数 / token 数预算，AIMD 并发）
+    6. 配置驱动
     """
 
     def __init__(self, config: Dict[str, Any]):
@@ -59,6 +91,25 @@ class LLMManager:
         self.providers: Dict[ProviderType, BaseLLMProvider] = {}
         self._default_provider: Optional[ProviderType] = None
 
+        # 路由：按延迟/错误率排序候选，可选对冲请求
+        routing = config.get("LLM", {}).get("routing", {}) or {}
+        self.router = LatencyRouter(
+            alpha=routing.get("ewma_alpha", 0.2),
+            hedge_quantile=routing.get("hedge_quantile", 0.95),
+        )
+        self.hedge = bool(routing.get("hedge", False))
+        self.max_hedges = int(routing.get("max_hedges", 1))
+
+        # 进行中的相同请求合并（含流式）
+        self._flights = SingleFlight()
+
+        # 分层响应缓存：内存 LRU → 持久化 → 可选语义近似
+        cache_config = config.get("LLM", {}).get("cache", {}) or {}
+        self.cache: Optional[TieredLLMCache] = (
+            TieredLLMCache.from_config(cache_config)
+            if cache_config.get("enabled", True) else None
+        )
+
         # 初始化提供商
         self._init_providers()
 
@@ -196,6 +247,12 @@ class LLMManager:
             else:
                 logger.debug("⏭️  LLM Provider [hunyuan] 已启用但 API Key 未配置")
 
+        # 按配置覆盖各提供商的限流参数（rpm / tpm / 并发范围）
+        for provider_type, provider in self.providers.items():
+            limits = llm_config.get(provider_type.value, {}).get("rate_limit")
+            if limits:
+                provider.configure_rate_limits(**limits)
+
         # 设置默认提供商
         default_name = llm_config.get("default_provider", "qwen")
         try:
@@ -213,63 +270,178 @@ class LLMManager:
         self,
         request: LLMRequest,
         provider: Optional[ProviderType] = None,
+        use_cache: Optional[bool] = None,
     ) -> LLMResponse:
         """
         生成文本
 
+        使用缓存时先查分层缓存（内存 → 持久化 → 语义近似）；
+        并发的相同请求（同一提供商参数）只发出一次调用，结果共享。
+        候选提供商按路由统计（延迟 EWMA × 错误率）排序，失败时依次切换；
+        开启对冲时，首选提供商超过其 p95 延迟仍未返回，会向下一个提供商
+        并发发出请求，先返回者胜出，其余请求取消。
+
         Args:
             request: LLM 请求
-            provider: 指定提供商（可选）
+            provider: 指定提供商（可选，始终最先尝试）
+            use_cache: 是否读写响应缓存；默认只缓存 temperature <= 0 的确定性请求，
+                创作类（temperature > 0）请求需显式传 True，重新生成时传 False
 
         Returns:
             LLM 响应
         """
-        # 确定使用的提供商
-        if provider and provider in self.providers:
-            active_provider = self.providers[provider]
-        else:
-            provider = self._default_provider
-            if not provider or provider not in self.providers:
-                raise ProviderError("没有可用的提供商")
-            active_provider = self.providers[provider]
+        if use_cache is None:
+            use_cache = request.temperature <= 0
+        scope = provider and provider.value
+        # 并发的相同请求共享同一次调用
+        return await self._flights.do(
+            request_key(request, scope, use_cache),
+            lambda: self._generate_cached(request, provider, use_cache),
+        )
 
-        try:
-            return await active_provider.generate(request)
+    async def _generate_cached(
+        self,
+        request: LLMRequest,
+        provider: Optional[ProviderType],
+        use_cache: bool,
+    ) -> LLMResponse:
+        scope = provider and provider.value
+        if use_cache and self.cache is not None:
+            cached = await self.cache.get(request, scope)
+            if cached is not None:
+                return cached
+
+        response = await self._generate(request, provider)
+        if (use_cache and self.cache is not None
+                and response.content and response.finish_reason != "error"):
+            await self.cache.put(request, response, scope)
+        return response
+
+    async def _generate(
+        self,
+        request: LLMRequest,
+        provider: Optional[ProviderType] = None,
+    ) -> LLMResponse:
+        candidates = self._candidates(provider)
+        if not candidates:
+            raise ProviderError("没有可用的提供商")
 
-        except ProviderError as e:
-            # 自动切换到下一个可用的提供商
-            logger.warning(f"提供商 {provider.value} 失败: {e}")
-            return await self._try_fallback(request, exclude=[provider])
+        if self.hedge and len(candidates) > 1:
+            return await self._generate_hedged(request, candidates)
 
-    async def _try_fallback(
+        for i, provider_type in enumerate(candidates):
+            try:
+                if i:
+                    logger.info(f"尝试备用提供商: {provider_type.value}")
+                return await self._call_provider(
+                    provider_type, self.providers[provider_type], request
+                )
+            except ProviderError as e:
+                logger.warning(f"提供商 {provider_type.value} 失败: {e}")
+
+        raise ProviderError("所有提供商均失败")
+
+    def _candidates(self, provider: Optional[ProviderType] = None) -> List[ProviderType]:
+        """候选顺序：指定的提供商 > 按路由代价排序（代价相同时默认提供商在前）"""
+        base = list(self.providers)
+        if self._default_provider in self.providers:
+            base.remove(self._default_provider)
+            base.insert(0, self._default_provider)
+        ordered = self.router.order(base)
+        if provider in self.providers:
+            ordered.remove(provider)
+            ordered.insert(0, provider)
+        return ordered
+
+    async def _generate_hedged(
         self,
         request: LLMRequest,
-        exclude: List[ProviderType],
+        candidates: List[ProviderType],
     ) -> LLMResponse:
-        """
-        尝试备用提供商
-
-        Args:
-            request: LLM 请求
-            exclude: 要排除的提供商列表
+        """对冲请求：先返回者胜出，失败时继续下一个候选"""
+        queue = list(candidates)
+        tasks: Dict[asyncio.Task, ProviderType] = {}
+        hedges = 0
+
+        def launch() -> ProviderType:
+            provider_type = queue.pop(0)
+            task = asyncio.ensure_future(
+                self._call_provider(provider_type, self.providers[provider_type], request)
+            )
+            tasks[task] = provider_type
+            return provider_type
 
-        Returns:
-            LLM 响应
+        primary = launch()
+        try:
+            while tasks:
+                delay = None
+                if queue and hedges < self.max_hedges:
+                    delay = self.router.hedge_delay(primary)
+                done, _ = await asyncio.wait(
+                    tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
 
-        Raises:
-            ProviderError: 所有提供商均失败
-        """
-        for provider_type, provider_instance in self.providers.items():
-            if provider_type not in exclude:
-                try:
-                    logger.info(f"尝试备用提供商: {provider_type.value}")
-                    return await provider_instance.generate(request)
-                except ProviderError as e:
-                    logger.warning(f"提供商 {provider_type.value} 失败: {e}")
+                if not done:
+                    # 首选超过 p95 仍未返回：对冲到下一个候选
+                    hedges += 1
+                    hedged = launch()
+                    logger.info(f"{primary.value} 超过 {delay:.2f}s 未返回，对冲请求 {hedged.value}")
                     continue
 
+                for task in done:
+                    provider_type = tasks.pop(task)
+                    try:
+                        return task.result()
+                    except ProviderError as e:
+                        logger.warning(f"提供商 {provider_type.value} 失败: {e}")
+
+                if not tasks and queue:
+                    primary = launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
         raise ProviderError("所有提供商均失败")
 
+    async def _call_provider(
+        self,
+        provider_type: ProviderType,
+        provider_instance: BaseLLMProvider,
+        request: LLMRequest,
+    ) -> LLMResponse:
+        """调用单个提供商（记录路由统计；开启追踪时记录 llm span）"""
+        start = time.perf_counter()
+        with tracer.span(
+            "llm.generate", category="llm",
+            provider=provider_type.value, model=request.model,
+        ) as span:
+            try:
+                response = await provider_instance.generate_limited(request)
+            except asyncio.CancelledError:
+                # 对冲请求先返回时首选被取消，已耗时仍计入统计
+                self.router.record_cancelled(provider_type, time.perf_counter() - start)
+                raise
+            except Exception:
+                self.router.record_failure(provider_type, time.perf_counter() - start)
+                raise
+            self.router.record_success(provider_type, time.perf_counter() - start)
+            span.set(tokens=response.tokens_used)
+            return response
+
+    def routing_stats(self) -> Dict[ProviderType, Dict[str, float]]:
+        """各提供商的路由统计（延迟 EWMA / 错误率 / p95）"""
+        return self.router.stats()
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """各缓存层的命中率（未启用缓存时为空）"""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def rate_limit_stats(self) -> Dict[ProviderType, Dict[str, Any]]:
+        """各提供商的限流状态（当前并发上限 / 排队数 / 429 次数）"""
+        return {pt: p.rate_limiter.stats() for pt, p in self.providers.items()}
+
     def get_provider(self, provider_type: ProviderType) -> BaseLLMProvider:
         """
         获取指定提供商
@@ -330,7 +502,27 @@ class LLMManager:
 
         Yields:
             dict: {'content': str, 'done': bool}
+
+        并发的相同流式请求共享同一个上游流，每个消费者都收到完整分块序列。
         """
+        request = LLMRequest(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        key = request_key(request, "stream", provider and provider.value)
+        async for chunk in self._flights.stream(
+            key, lambda: self._stream_generate(request, provider)
+        ):
+            yield chunk
+
+    async def _stream_generate(
+        self,
+        request: LLMRequest,
+        provider: Optional[ProviderType] = None,
+    ) -> AsyncIterator[dict]:
         if provider is None:
             provider = self._default_provider
 
@@ -345,27 +537,15 @@ class LLMManager:
         # 检查是否支持流式
         if not hasattr(provider_instance, "stream_generate"):
             # 不支持流式，回退到普通 generate
-            request = LLMRequest(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                model=model,
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
-            response = await provider_instance.generate(request)
+            response = await provider_instance.generate_limited(request)
             yield {"done": False, "content": response.content}
             yield {"done": True, "content": ""}
             return
 
-        request = LLMRequest(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-        )
-        async for chunk in provider_instance.stream_generate(request):
-            yield chunk
+        limiter = provider_instance.rate_limiter
+        async with limiter.limit(await provider_instance.estimate_tokens(request)):
+            async for chunk in provider_instance.stream_generate(request):
+                yield chunk
 
     async def close_all(self):
         """关闭所有提供商的连接"""
@@ -373,6 +553,34 @@ class LLMManager:
             if hasattr(provider, "close"):
                 await provider.close()
 
+    def run_sync(self, coro: Awaitable[T]) -> T:
+        """
+        在共享的后台事件循环中运行协程并等待结果
+
+        每次 asyncio.run() 都会新建事件循环，绑定旧循环的连接池无法复用；
+        同步调用都走同一个常驻循环，HTTP 连接（含 TLS 会话）跨调用保持。
+        可以在有运行中事件循环的线程里调用（阻塞该线程直到完成）。
+
+        Raises:
+            RuntimeError: 在后台循环自身中调用（会死锁）
+        """
+        loop = get_background_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("run_sync() 不能在管理器的后台事件循环中调用，请直接 await")
+        return self.submit(coro).result()
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """在共享的后台事件循环中调度协程，不等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+    def shutdown(self) -> None:
+        """关闭本管理器所有提供商的连接（共享事件循环继续运行）"""
+        self.run_sync(self.close_all())
+
     def generate_sync(
         self,
         prompt: str,
@@ -399,9 +607,6 @@ class LLMManager:
         Raises:
             ProviderError: 所有提供商均失败
         """
-        import asyncio
-        import concurrent.futures
-
         request = LLMRequest(
             prompt=prompt,
             system_prompt=system_prompt,
@@ -410,19 +615,8 @@ class LLMManager:
             temperature=temperature
         )
 
-        # 如果已经有 running loop，在新线程的独立 loop 中运行
-        try:
-            asyncio.get_running_loop()
-        except RuntimeError:
-            # 没有运行中的 loop，可以安全用 asyncio.run()
-            result = asyncio.run(self.generate(request, provider))
-            return result.content
-
-        # 已有 loop，在新线程中运行（避免与 running loop 冲突）
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-            future = pool.submit(asyncio.run, self.generate(request, provider))
-            result = future.result()
-            return result.content
+        result = self.run_sync(self.generate(request, provider))
+        return result.content
 
     def ask(
         self,
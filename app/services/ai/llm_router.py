@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM 提供商路由
+
+按每个提供商的延迟 EWMA 与错误率 EWMA 给候选排序，并给出对冲请求的等待时间
+（最近延迟样本的 p95）。
+
+用法:
+    router = LatencyRouter()
+    for provider in router.order(candidates):
+        ...
+    router.record_success(provider, latency)
+    router.record_cancelled(provider, elapsed)  # 输掉对冲被取消
+    delay = router.hedge_delay(provider)      # None 表示样本不足，不对冲
+"""
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Hashable, List, Optional, Sequence
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderStats:
+    """单个提供商的运行统计"""
+    latency: Optional[float] = None      # 成功请求延迟的 EWMA（秒）
+    error_rate: float = 0.0              # 失败率 EWMA（0-1）
+    requests: int = 0
+    failures: int = 0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=64))
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class LatencyRouter:
+    """
+    延迟感知路由（线程安全）
+
+    代价 = 延迟 EWMA × (1 + error_penalty × 错误率 EWMA)，代价小的优先。
+    没有统计的提供商按当前已知最低延迟估计（乐观估计），
+    这样已知提供商变慢或出错时会自然轮到它们被试探。
+    """
+
+    def __init__(self, alpha: float = 0.2, error_penalty: float = 4.0,
+                 hedge_quantile: float = 0.95, min_samples: int = 5,
+                 window: int = 64):
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.window = window
+        self._stats: Dict[Hashable, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, provider: Hashable) -> ProviderStats:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = self._stats[provider] = ProviderStats(samples=deque(maxlen=self.window))
+        return stats
+
+    # ---------- 记录 ----------
+
+    def record_success(self, provider: Hashable, latency: float) -> None:
+        with self._lock:
+            stats = self._get(provider)
+            stats.requests += 1
+            stats.samples.append(latency)
+            stats.latency = latency if stats.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * stats.latency
+            )
+            stats.error_rate *= 1 - self.alpha
+
+    def record_failure(self, provider: Hashable, latency: Optional[float] = None) -> None:
+        """记录失败；latency 为失败前耗时（如超时），会计入延迟 EWMA"""
+        with self._lock:
+            stats = self._get(provider)
+            stats.requests += 1
+            stats.failures += 1
+            stats.error_rate = self.alpha + (1 - self.alpha) * stats.error_rate
+            if latency is not None and stats.latency is not None and latency > stats.latency:
+                stats.latency = self.alpha * latency + (1 - self.alpha) * stats.latency
+
+    def record_cancelled(self, provider: Hashable, elapsed: float) -> None:
+        """
+        记录被取消的请求（如对冲请求先返回）
+
+        elapsed 是真实延迟的下界：计入延迟样本，且只会拉高延迟 EWMA，
+        否则慢提供商输掉对冲后统计不变，之后仍被排在前面。
+        """
+        with self._lock:
+            stats = self._get(provider)
+            stats.requests += 1
+            stats.samples.append(elapsed)
+            if stats.latency is None:
+                stats.latency = elapsed
+            elif elapsed > stats.latency:
+                stats.latency = self.alpha * elapsed + (1 - self.alpha) * stats.latency
+
+    # ---------- 查询 ----------
+
+    def cost(self, provider: Hashable) -> float:
+        """预期代价（秒）"""
+        with self._lock:
+            return self._cost(provider, self._baseline())
+
+    def _baseline(self) -> float:
+        known = [s.latency for s in self._stats.values() if s.latency is not None]
+        return min(known) if known else 0.0
+
+    def _cost(self, provider: Hashable, baseline: float) -> float:
+        stats = self._stats.get(provider)
+        if stats is None:
+            return baseline
+        latency = stats.latency if stats.latency is not None else baseline
+        return latency * (1 + self.error_penalty * stats.error_rate) + stats.error_rate
+
+    def order(self, candidates: Sequence[Hashable]) -> List[Hashable]:
+        """按代价排序（稳定排序：代价相同保持传入顺序）"""
+        with self._lock:
+            baseline = self._baseline()
+            return sorted(candidates, key=lambda p: self._cost(p, baseline))
+
+    def hedge_delay(self, provider: Hashable) -> Optional[float]:
+        """对冲等待时间：延迟样本的 hedge_quantile 分位数，样本不足返回 None"""
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None or len(stats.samples) < self.min_samples:
+                return None
+            return stats.quantile(self.hedge_quantile)
+
+    def stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """统计快照"""
+        with self._lock:
+            return {
+                provider: {
+                    "latency": s.latency or 0.0,
+                    "error_rate": s.error_rate,
+                    "p95": s.quantile(0.95) or 0.0,
+                    "requests": s.requests,
+                    "failures": s.failures,
+                }
+                for provider, s in self._stats.items()
+            }
+
+
+__all__ = ["LatencyRouter", "ProviderStats"]
@@ -217,13 +217,6 @@ class DeepSeekProvider(BaseLLMProvider, HTTPClientMixin, ModelManagerMixin):
         except Exception as e:
             raise ProviderError(f"流式生成失败: {str(e)}")
 
-    async def count_tokens(self, text: str) -> int:
-        """计算 token 数量（估算）"""
-        # 简单估算：中文约 1.5 token/字符，英文约 0.25 token/字符
-        chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-        other_chars = len(text) - chinese_chars
-        return int(chinese_chars * 1.5 + other_chars * 0.25)
-
     async def close(self):
         """关闭 HTTP 客户端"""
         await self._close_http_client()
@@ -13,7 +13,7 @@
 
 import time
 import httpx
-from typing import List
+from typing import List, Optional
 
 from ..base_llm_provider import (
     BaseLLMProvider,
@@ -139,14 +139,16 @@ class QwenProvider(BaseLLMProvider, HTTPClientMixin, ModelManagerMixin):
     async def generate_batch(
         self,
         requests: List[LLMRequest],
-        max_concurrency: int = 5
+        max_concurrency: Optional[int] = None
     ) -> List[LLMResponse]:
         """
         批量生成文本 ✅ 优化：使用 asyncio.gather 并发处理
 
+        实际并发由自适应限流器按 429 / 延迟反馈调整。
+
         Args:
             requests: LLM 请求列表
-            max_concurrency: 最大并发数（防止超出 API 限制）
+            max_concurrency: 额外的并发上限（None 表示只受限流器约束）
 
         Returns:
             LLM 响应列表
@@ -157,7 +159,7 @@ class QwenProvider(BaseLLMProvider, HTTPClientMixin, ModelManagerMixin):
         # 使用 gather_with_concurrency 控制并发数
         results = await gather_with_concurrency(
             max_concurrency,
-            *[self.generate(req) for req in requests]
+            *[self.generate_limited(req) for req in requests]
         )
 
         # 处理异常
@@ -4,17 +4,23 @@
 """
 LLM 请求重试机制
 
-提供重试处理、速率限制和熔断器功能。
+提供重试处理、速率限制（含按提供商的自适应限流）和熔断器功能。
 """
 
 import asyncio
 import logging
 import random
-from typing import Any, Callable, Optional
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from enum import Enum
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
 
-from .errors import CircuitOpenError
+from .errors import CircuitOpenError, RateLimitError
 
 
 logger = logging.getLogger(__name__)
@@ -99,7 +105,8 @@ class RetryHandler:
                 logger.warning(f"Attempt {attempt}/{self.max_attempts} failed: {e}")
 
                 if attempt < self.max_attempts:
-                    delay = self._calculate_delay(attempt)
+                    # 服务端给出 Retry-After 时至少等待该时长
+                    delay = max(self._calculate_delay(attempt), retry_after_seconds(e) or 0.0)
                     logger.info(f"Retrying in {delay:.2f} seconds...")
                     await asyncio.sleep(delay)
                 else:
@@ -108,14 +115,51 @@ class RetryHandler:
         raise last_exception
 
 
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    从异常中取出服务端要求的等待时间（Retry-After，秒）
+
+    支持 RateLimitError.details["retry_after"] 和带 response 的 HTTP 异常
+    （Retry-After 为秒数或 HTTP 日期）。
+    """
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict) and details.get("retry_after"):
+        return float(details["retry_after"])
+
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """是否为 429 / 速率限制错误"""
+    if isinstance(exc, RateLimitError):
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
 class RateLimiter:
     """
     速率限制器
 
-    实现令牌桶算法的异步速率限制。
+    实现令牌桶算法的异步速率限制（单调时钟，可跨事件循环使用）。
     """
 
-    def __init__(self, rate: float, capacity: int):
+    def __init__(self, rate: float = 10.0, capacity: int = 10):
         """
         初始化速率限制器
 
@@ -125,9 +169,9 @@ class RateLimiter:
         """
         self.rate = rate
         self.capacity = capacity
-        self._tokens = capacity
-        self._last_update = datetime.now()
-        self._lock = asyncio.Lock()
+        self._tokens = float(capacity)
+        self._last_update = time.monotonic()
+        self._lock = threading.Lock()
 
     async def acquire(self, timeout: float = 30.0) -> bool:
         """
@@ -142,30 +186,288 @@ class RateLimiter:
         Raises:
             asyncio.TimeoutError: 获取令牌超时
         """
-        start_time = asyncio.get_event_loop().time()
+        deadline = time.monotonic() + timeout
 
         while True:
-            async with self._lock:
-                now = datetime.now()
-                elapsed = (now - self._last_update).total_seconds()
+            with self._lock:
+                now = time.monotonic()
                 self._tokens = min(
                     self.capacity,
-                    self._tokens + elapsed * self.rate
+                    self._tokens + (now - self._last_update) * self.rate
                 )
                 self._last_update = now
 
                 if self._tokens >= 1:
                     self._tokens -= 1
                     return True
+                wait_time = (1 - self._tokens) / self.rate
 
-            elapsed = asyncio.get_event_loop().time() - start_time
-            wait_time = (1 - self._tokens) / self.rate
-            if elapsed + wait_time > timeout:
+            if now + wait_time > deadline:
                 raise asyncio.TimeoutError("Rate limiter acquisition timeout")
 
             await asyncio.sleep(wait_time)
 
 
+@dataclass
+class RatePermit:
+    """一次放行：预估 token 数，调用方可回填实际用量用于校正 token 预算"""
+    tokens: int = 0
+    used_tokens: Optional[int] = None
+
+
+class AdaptiveRateLimiter:
+    """
+    自适应速率限制器（每个提供商一个）
+
+    - 请求预算：每分钟请求数（rpm）令牌桶
+    - token 预算：每分钟 token 数（tpm）令牌桶，按预估 token 扣减，
+      调用结束后按实际用量多退少补
+    - 并发：AIMD，成功时加性增长（约每轮 +increase），
+      429 或延迟明显升高时乘性减小；同一轮内的多次拥塞信号只减一次
+    - 429 的 Retry-After：在该时间点之前不再放行新请求
+
+    计时统一使用 time.monotonic()；状态由线程锁保护，等待者按事件循环唤醒，
+    可以在多个事件循环（如 asyncio.run 的临时循环）间共享。
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        latency_decrease: float = 0.9,
+        alpha: float = 0.2,
+        default_backoff: float = 1.0,
+    ):
+        """
+        Args:
+            rpm: 每分钟请求数上限（None 不限）
+            tpm: 每分钟 token 数上限（None 不限）
+            initial_concurrency: 初始并发上限
+            min_concurrency / max_concurrency: 并发上限的范围
+            increase: 每轮成功的并发增量
+            decrease: 429 时并发的乘数
+            latency_factor: 延迟 EWMA 超过基线的该倍数视为拥塞
+            latency_decrease: 延迟拥塞时并发的乘数
+            alpha: 延迟 EWMA 平滑系数
+            default_backoff: 429 未带 Retry-After 时的暂停时间（秒）
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_decrease = latency_decrease
+        self.alpha = alpha
+        self.default_backoff = default_backoff
+
+        self._limit = float(min(self.max_concurrency,
+                                max(self.min_concurrency, initial_concurrency)))
+        self._active = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._requests = float(rpm) if rpm else 0.0
+        self._tokens = float(tpm) if tpm else 0.0
+        self._refilled = time.monotonic()
+        self._blocked_until = 0.0
+        self._latency: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._cooldown = 0          # 本轮剩余完成数，期间忽略新的拥塞信号
+        self._lock = threading.Lock()
+
+        self.throttled = 0
+
+    # ---------- 放行 ----------
+
+    @property
+    def concurrency(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    async def acquire(self, tokens: int = 0) -> RatePermit:
+        """
+        等待并发槽位和预算
+
+        Args:
+            tokens: 本次请求预估的 token 数（提示词 + 最大生成长度）
+
+        Returns:
+            RatePermit；用完必须调用 release()
+        """
+        await self._acquire_slot()
+        try:
+            await self._acquire_budget(tokens)
+        except BaseException:
+            self._release_slot()
+            raise
+        return RatePermit(tokens=tokens)
+
+    def release(self, permit: RatePermit) -> None:
+        """归还并发槽位，并按实际 token 用量校正预算"""
+        if self.tpm and permit.used_tokens is not None:
+            with self._lock:
+                self._refill(time.monotonic())
+                self._tokens += self._charge(permit.tokens) - self._charge(permit.used_tokens)
+        self._release_slot()
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0) -> AsyncIterator[RatePermit]:
+        """
+        限流上下文：放行后执行，结束时自动反馈延迟 / 429 并归还槽位
+
+        用法:
+            async with limiter.limit(estimated_tokens) as permit:
+                response = await call()
+                permit.used_tokens = response.tokens_used
+        """
+        permit = await self.acquire(tokens)
+        start = time.monotonic()
+        try:
+            yield permit
+        except Exception as e:
+            if is_rate_limited(e):
+                self.on_throttle(retry_after_seconds(e))
+            raise
+        else:
+            self.on_success(time.monotonic() - start)
+        finally:
+            self.release(permit)
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < int(self._limit) and not self._waiters:
+                self._active += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted and future.done() and not future.cancelled():
+                # 槽位已经移交给本等待者，退还
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        """把空出的槽位按 FIFO 交给等待者（调用方持有锁）"""
+        while self._waiters and self._active < int(self._limit):
+            loop, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._active += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:
+                # 事件循环已关闭
+                self._active -= 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    def _charge(self, tokens: int) -> float:
+        # 单个请求最多扣满一个桶，否则永远等不到
+        return float(min(tokens, self.tpm)) if self.tpm else 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled
+        self._refilled = now
+        if self.rpm:
+            self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60)
+
+    async def _acquire_budget(self, tokens: int) -> None:
+        cost = self._charge(tokens)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if self.rpm and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+                if self.tpm and self._tokens < cost:
+                    wait = max(wait, (cost - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    self._tokens -= cost
+                    return
+            await asyncio.sleep(wait)
+
+    # ---------- 反馈 ----------
+
+    def on_success(self, latency: float) -> None:
+        """成功：更新延迟；未拥塞时加性增长并发上限"""
+        with self._lock:
+            self._latency = latency if self._latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self._latency
+            )
+            if self._baseline is None or self._latency < self._baseline:
+                self._baseline = self._latency
+
+            if self._cooldown > 0:
+                self._cooldown -= 1
+            elif self._latency > self.latency_factor * self._baseline:
+                self._backoff(self.latency_decrease)
+            else:
+                self._limit = min(float(self.max_concurrency),
+                                  self._limit + self.increase / self._limit)
+            self._wake()
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """收到 429：暂停到 Retry-After 之后，并乘性减小并发上限"""
+        with self._lock:
+            self.throttled += 1
+            pause = retry_after if retry_after is not None else self.default_backoff
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            if self._cooldown > 0:
+                self._cooldown -= 1
+            else:
+                self._backoff(self.decrease)
+        logger.info(f"触发速率限制，暂停 {pause:.1f}s，并发上限降为 {self.concurrency}")
+
+    def _backoff(self, factor: float) -> None:
+        self._limit = max(float(self.min_concurrency), self._limit * factor)
+        # 已发出的请求还会带回同一轮的拥塞信号，不重复减小
+        self._cooldown = self._active
+        # 延迟基线随之上移，避免持续高于基线导致并发一路降到底
+        self._baseline = self._latency
+
+    def stats(self) -> Dict[str, Any]:
+        """运行状态快照"""
+        with self._lock:
+            return {
+                "concurrency": int(self._limit),
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "latency": self._latency or 0.0,
+                "throttled": self.throttled,
+                "blocked_for": max(0.0, self._blocked_until - time.monotonic()),
+            }
+
+
 class CircuitState(Enum):
     """熔断器状态"""
     CLOSED = "closed"      # 正常状态，请求正常通过
@@ -277,6 +579,10 @@ __all__ = [
     "RetryStrategy",
     "RetryHandler",
     "RateLimiter",
+    "RatePermit",
+    "AdaptiveRateLimiter",
+    "retry_after_seconds",
+    "is_rate_limited",
     "CircuitState",
     "CircuitBreaker",
 ]
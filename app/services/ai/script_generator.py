@@ -36,7 +36,6 @@ AI 文案生成器 (Script Generator)
 
 
 import os
-import asyncio
 from typing import Optional, List, Dict, Any
 
 from .base_llm_provider import LLMRequest
@@ -167,6 +166,7 @@ class ScriptGenerator:
         self,
         topic: str,
         config: Optional[ScriptConfig] = None,
+        use_cache: Optional[bool] = None,
     ) -> GeneratedScript:
         """
         生成文案
@@ -174,6 +174,7 @@ class ScriptGenerator:
         Args:
             topic: 主题/内容描述
             config: 生成配置
+            use_cache: 是否读写 LLM 响应缓存（None 按 LLMManager 默认策略）
 
         Returns:
             生成的文案对象
@@ -181,22 +182,10 @@ class ScriptGenerator:
         config = config or ScriptConfig()
 
         if self.use_llm_manager:
-            # 新架构：使用 LLMManager（异步包装为同步）
-            # 避免在已有 event loop 的线程中调用 run_until_complete
-            async def _run():
-                result = await self._generate_async(topic, config)
-                await self.llm_manager.close_all()
-                return result
-
-            try:
-                asyncio.get_running_loop()
-                # 已有 loop，在新线程中运行
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-                    raw_content, provider_used = pool.submit(asyncio.run, _run()).result()
-            except RuntimeError:
-                # 没有运行中的 loop
-                raw_content, provider_used = asyncio.run(_run())
+            # 新架构：使用 LLMManager（在其后台事件循环中运行，连接跨调用复用）
+            raw_content, provider_used = self.llm_manager.run_sync(
+                self._generate_async(topic, config, use_cache=use_cache)
+            )
 
         else:
             # 传统方式
@@ -209,10 +198,19 @@ class ScriptGenerator:
 
         return script
 
+    def regenerate(
+        self,
+        topic: str,
+        config: Optional[ScriptConfig] = None,
+    ) -> GeneratedScript:
+        """重新生成文案（绕过响应缓存，总是请求新的回答）"""
+        return self.generate(topic, config, use_cache=False)
+
     async def _generate_async(
         self,
         topic: str,
         config: ScriptConfig,
+        use_cache: Optional[bool] = None,
     ) -> tuple[str, str]:
         """
         异步生成（使用 LLMManager）
@@ -245,7 +243,9 @@ class ScriptGenerator:
         )
 
         # 调用 LLMManager
-        response = await self.llm_manager.generate(request, provider=provider_type)
+        response = await self.llm_manager.generate(
+            request, provider=provider_type, use_cache=use_cache
+        )
         provider_name = response.model.split("-")[0] if "-" in response.model else response.model
 
         return response.content, provider_name
@@ -536,7 +536,11 @@ def generate_script(
         use_llm_manager=use_llm_manager,
     )
     config = ScriptConfig(style=style, target_duration=duration)
-    return generator.generate(topic, config)
+    try:
+        return generator.generate(topic, config)
+    finally:
+        if generator.llm_manager is not None:
+            generator.llm_manager.shutdown()
 
 
 def demo_generate():
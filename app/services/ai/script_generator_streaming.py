@@ -25,7 +25,8 @@
 import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any, Callable, AsyncIterator
+import queue
+from typing import Optional, Dict, Any, Callable, AsyncIterator, Iterator
 
 from .script_generator import ScriptGenerator
 from .script_models import (
@@ -38,6 +39,96 @@ from .script_models import (
 logger = logging.getLogger(__name__)
 
 
+# 简化的情感词典
+POSITIVE_WORDS = (
+    '好', '棒', '美', '喜欢', '爱', '开心', '高兴', '快乐',
+    '精彩', '完美', '赞', '优秀', '成功', '幸福', '温暖',
+    '感动', '希望', '期待', '兴奋', '激动',
+)
+
+NEGATIVE_WORDS = (
+    '坏', '差', '丑', '讨厌', '恨', '难过', '伤心', '痛苦',
+    '糟糕', '失败', '悲剧', '可怜', '失望', '绝望', '冷漠',
+    '可怕', '恐惧', '愤怒', '生气', '郁闷',
+)
+
+
+class IncrementalSentiment:
+    """
+    增量情感估算
+
+    与全文关键词扫描结果一致（出现过的正/负面词各计一次），
+    但每次只扫描新文本块和上一块末尾的重叠部分（最长词长 - 1 个字符），
+    流式累计的总开销与文本长度成线性。
+    """
+
+    def __init__(self):
+        self._positive: set = set()
+        self._negative: set = set()
+        self._overlap = max(len(w) for w in POSITIVE_WORDS + NEGATIVE_WORDS) - 1
+        self._tail = ""
+
+    def update(self, chunk: str) -> float:
+        """追加文本块，返回当前情感值"""
+        window = self._tail + chunk
+        for word in POSITIVE_WORDS:
+            if word not in self._positive and word in window:
+                self._positive.add(word)
+        for word in NEGATIVE_WORDS:
+            if word not in self._negative and word in window:
+                self._negative.add(word)
+        self._tail = window[-self._overlap:] if self._overlap else ""
+        return self.value
+
+    @property
+    def value(self) -> float:
+        """情感值 (-1.0 到 1.0)，无情感词时为 0.0"""
+        total = len(self._positive) + len(self._negative)
+        if total == 0:
+            return 0.0
+        return (len(self._positive) - len(self._negative)) / total
+
+
+class StreamAccumulator:
+    """
+    流式文本累加器
+
+    文本块存入列表，需要全文时才拼接（拼接结果缓存），
+    避免逐块 `full += chunk` 的二次复制；同时增量维护情感值。
+    """
+
+    def __init__(self):
+        self._parts: list = []
+        self._length = 0
+        self.sentiment = IncrementalSentiment()
+
+    def append(self, chunk: str) -> float:
+        """追加文本块，返回当前情感值"""
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        return self.sentiment.update(chunk)
+
+    def text(self) -> str:
+        """完整文本"""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def tail(self, n: int) -> str:
+        """最后 n 个字符（不拼接全文）"""
+        pieces = []
+        remaining = n
+        for part in reversed(self._parts):
+            if remaining <= 0:
+                break
+            pieces.append(part[-remaining:])
+            remaining -= len(part)
+        return "".join(reversed(pieces))
+
+    def __len__(self) -> int:
+        return self._length
+
+
 class StreamingScriptGenerator(ScriptGenerator):
     """
     流式文案生成器
@@ -140,24 +231,10 @@ class StreamingScriptGenerator(ScriptGenerator):
             完整的 GeneratedScript
         """
         try:
-            # 尝试使用异步流式生成
-            async def _run():
-                return await self._generate_streaming_async(
-                    topic, config, callback, sentiment_callback
-                )
-
-            # 检测是否有运行中的 event loop
-            try:
-                asyncio.get_running_loop()
-                # 已有 loop，在新线程中运行
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-                    result = pool.submit(asyncio.run, _run()).result()
-            except RuntimeError:
-                # 没有运行中的 loop
-                result = asyncio.run(_run())
-
-            return result
+            # 在 LLMManager 的后台事件循环中运行，连接跨调用复用
+            return self.llm_manager.run_sync(
+                self._generate_streaming_async(topic, config, callback, sentiment_callback)
+            )
 
         except Exception as e:
             logger.warning(f"流式生成失败，回退到普通方式: {e}")
@@ -214,35 +291,30 @@ class StreamingScriptGenerator(ScriptGenerator):
 
         if supports_streaming and self.stream_enabled:
             # 使用流式生成
-            full_content = ""
+            content = StreamAccumulator()
             last_sentiment = 0.0
 
             # 使用异步迭代器获取流式响应
             async for chunk in self._stream_generate(request, provider_type):
                 if chunk:
-                    full_content += chunk
+                    sentiment = content.append(chunk)
 
                     # 调用文本块回调
                     if callback:
                         callback(chunk)
 
-                    # 尝试情感分析（如果提供回调）
-                    if sentiment_callback and len(full_content) > 10:
-                        sentiment = self._analyze_sentiment_fast(full_content)
+                    # 情感变化回调（情感值随文本块增量更新）
+                    if sentiment_callback and len(content) > 10:
                         if abs(sentiment - last_sentiment) > 0.1:  # 显著变化时回调
                             sentiment_callback(chunk, sentiment)
                             last_sentiment = sentiment
 
-            # 关闭 provider 连接
-            await self.llm_manager.close_all()
-
-            # 解析结果
-            return self._parse_response(full_content, config)
+            # 解析结果（provider 连接保留，供下次生成复用）
+            return self._parse_response(content.text(), config)
         else:
             # 不支持流式，回退到普通生成
             logger.info("Provider 不支持流式或流式已禁用，使用普通生成方式")
             response = await self.llm_manager.generate(request, provider=provider_type)
-            await self.llm_manager.close_all()
 
             full_content = response.content
 
@@ -272,6 +344,18 @@ class StreamingScriptGenerator(ScriptGenerator):
             if hasattr(self.llm_manager, 'generate_streaming'):
                 async for chunk in self.llm_manager.generate_streaming(request, provider=provider_type):
                     yield chunk
+            elif hasattr(self.llm_manager, 'stream_generate'):
+                async for chunk in self.llm_manager.stream_generate(
+                    prompt=request.prompt,
+                    system_prompt=request.system_prompt,
+                    model=request.model,
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature,
+                    provider=provider_type,
+                ):
+                    if chunk.get("done"):
+                        break
+                    yield chunk.get("content", "")
             else:
                 # 回退: 普通生成
                 response = await self.llm_manager.generate(request, provider=provider_type)
@@ -331,18 +415,9 @@ class StreamingScriptGenerator(ScriptGenerator):
         # 使用普通生成
         if self.use_llm_manager:
             # 复用父类的新架构
-            async def _run():
-                result = await self._generate_async(topic, config)
-                await self.llm_manager.close_all()
-                return result
-
-            try:
-                asyncio.get_running_loop()
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-                    raw_content, provider_used = pool.submit(asyncio.run, _run()).result()
-            except RuntimeError:
-                raw_content, provider_used = asyncio.run(_run())
+            raw_content, provider_used = self.llm_manager.run_sync(
+                self._generate_async(topic, config)
+            )
         else:
             raw_content = self._generate_openai(topic, config)
             provider_used = "openai"
@@ -362,6 +437,107 @@ class StreamingScriptGenerator(ScriptGenerator):
 
         return script
 
+    def iter_chunks(
+        self,
+        topic: str,
+        config: Optional[ScriptConfig] = None,
+    ) -> Iterator[str]:
+        """
+        同步迭代流式文本块
+
+        流式请求在 LLMManager 的后台事件循环里进行，调用方可以边收边处理
+        （如把完整的句子送去配音），不必等整篇文案生成完。
+        流式没有返回内容时回退到普通生成，整篇作为一个文本块。
+
+        Args:
+            topic: 主题/内容描述
+            config: 生成配置
+
+        Yields:
+            文本块
+        """
+        config = config or ScriptConfig()
+        if not (self.use_llm_manager and self.llm_manager is not None):
+            yield self.generate(topic, config).content
+            return
+
+        from .llm_manager import ProviderType
+        from .base_llm_provider import LLMRequest
+
+        provider_type = None
+        if config.provider:
+            try:
+                provider_type = ProviderType(config.provider)
+            except ValueError:
+                logger.debug(f"Invalid provider '{config.provider}', using default")
+
+        request = LLMRequest(
+            prompt=self._build_prompt(topic, config),
+            system_prompt=self.STYLE_PROMPTS.get(
+                config.style, self.STYLE_PROMPTS[ScriptStyle.COMMENTARY]
+            ),
+            model=config.model,
+            max_tokens=config.target_words * 2,
+            temperature=0.7,
+        )
+
+        chunks: "queue.Queue" = queue.Queue()
+        finished = object()
+
+        async def _run():
+            try:
+                received = False
+                if self.stream_enabled:
+                    async for chunk in self._stream_generate(request, provider_type):
+                        if chunk:
+                            received = True
+                            chunks.put(chunk)
+                if not received:
+                    response = await self.llm_manager.generate(request, provider=provider_type)
+                    chunks.put(response.content)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(finished)
+
+        # 流式请求在 LLMManager 的后台事件循环中进行，本线程边收边产出
+        future = self.llm_manager.submit(_run())
+        try:
+            while True:
+                item = chunks.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 调用方提前停止迭代时取消流式请求
+            future.cancel()
+
+    def iter_monologue_chunks(
+        self,
+        context: str,
+        emotion: str = "neutral",
+        duration: float = 30.0,
+    ) -> Iterator[str]:
+        """
+        同步迭代独白文案的流式文本块（提示词与 generate_monologue 相同）
+
+        Args:
+            context: 场景/情境描述
+            emotion: 情感
+            duration: 目标时长（秒）
+
+        Yields:
+            文本块
+        """
+        config = ScriptConfig(
+            style=ScriptStyle.MONOLOGUE,
+            tone=VoiceTone.EMOTIONAL,
+            target_duration=duration,
+        )
+        return self.iter_chunks(f"场景: {context}\n情感: {emotion}", config)
+
     def generate_streaming_async(
         self,
         topic: str,
@@ -469,16 +645,16 @@ class StreamingScriptGenerator(ScriptGenerator):
         async def _sse_generator():
             cfg = config if config is not None else ScriptConfig()
 
-            full_content = ""
+            content = StreamAccumulator()
 
             async for chunk in self._stream_sse_content(topic, cfg):
                 if chunk:
-                    full_content += chunk
+                    content.append(chunk)
                     # SSE 格式: data: {chunk}\n\n
                     yield f"data: {json.dumps({'type': 'chunk', 'content': chunk})}\n\n"
 
             # 发送完成信号
-            yield f"data: {json.dumps({'type': 'done', 'content': full_content})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'content': content.text()})}\n\n"
 
         return _sse_generator()
 
@@ -555,22 +731,9 @@ class StreamingScriptGenerator(ScriptGenerator):
         Returns:
             情感值 (-1.0 到 1.0)
         """
-        # 简化的情感词典
-        positive_words = [
-            '好', '棒', '美', '喜欢', '爱', '开心', '高兴', '快乐',
-            '精彩', '完美', '赞', '优秀', '成功', '幸福', '温暖',
-            '感动', '希望', '期待', '兴奋', '激动',
-        ]
-
-        negative_words = [
-            '坏', '差', '丑', '讨厌', '恨', '难过', '伤心', '痛苦',
-            '糟糕', '失败', '悲剧', '可怜', '失望', '绝望', '冷漠',
-            '可怕', '恐惧', '愤怒', '生气', '郁闷',
-        ]
-
         # 简单计数
-        pos_count = sum(1 for w in positive_words if w in text)
-        neg_count = sum(1 for w in negative_words if w in text)
+        pos_count = sum(1 for w in POSITIVE_WORDS if w in text)
+        neg_count = sum(1 for w in NEGATIVE_WORDS if w in text)
 
         total = pos_count + neg_count
         if total == 0:
@@ -602,21 +765,19 @@ class StreamingScriptGenerator(ScriptGenerator):
         async def _iter():
             cfg = config if config is not None else ScriptConfig()
             last_sentiment = 0.0
-            full_content = ""
+            content = StreamAccumulator()
 
             async for chunk in self._stream_content(topic, cfg):
                 if chunk:
-                    full_content += chunk
+                    sentiment = content.append(chunk)
                     yield {'type': 'chunk', 'content': chunk}
 
-                    # 每隔一段时间检测情感变化
-                    if len(full_content) % 50 < 10:
-                        sentiment = self._analyze_sentiment_fast(full_content)
-                        if abs(sentiment - last_sentiment) > 0.15:
-                            yield {'type': 'sentiment', 'value': sentiment, 'text': full_content[-20:]}
-                            last_sentiment = sentiment
+                    # 情感值增量更新，每个文本块都可以检测变化
+                    if abs(sentiment - last_sentiment) > 0.15:
+                        yield {'type': 'sentiment', 'value': sentiment, 'text': content.tail(20)}
+                        last_sentiment = sentiment
 
-            yield {'type': 'done', 'content': full_content}
+            yield {'type': 'done', 'content': content.text()}
 
         return _iter()
 
@@ -663,7 +824,10 @@ def generate_script_streaming(
         生成的文案
     """
     generator = StreamingScriptGenerator(use_llm_manager=True)
-    return generator.generate_streaming(topic, config, callback)
+    try:
+        return generator.generate_streaming(topic, config, callback)
+    finally:
+        generator.llm_manager.shutdown()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求合并（single-flight）
+
+同一事件循环内，键相同的并发调用共享同一个进行中的任务：
+- do(): 普通请求，所有调用方拿到同一个结果（或同一个异常）
+- stream(): 流式请求，一个上游迭代器扇出给多个消费者，晚到的消费者先补发已收到的分块
+
+调用方取消只会退出自己的等待；所有调用方都离开后才取消上游请求。
+
+用法:
+    flights = SingleFlight()
+    response = await flights.do(request_key(request), lambda: provider.generate(request))
+    async for chunk in flights.stream(key, lambda: provider.stream_generate(request)):
+        ...
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def request_key(request: Any, *extra: Any) -> str:
+    """请求的完整指纹（所有字段 + 附加维度，如提供商）"""
+    fields = dataclasses.asdict(request) if dataclasses.is_dataclass(request) else request
+    data = json.dumps([fields, [str(e) for e in extra]], sort_keys=True,
+                      ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamFlight:
+    __slots__ = ("task", "chunks", "done", "error", "cond", "subscribers")
+
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = asyncio.Condition()
+        self.subscribers = 0
+
+
+class SingleFlight:
+    """合并进行中的相同异步请求"""
+
+    def __init__(self):
+        # 任务和 Future 绑定事件循环，按循环分开登记
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.started = 0
+        self.coalesced = 0
+
+    def _inflight(self) -> Dict[Hashable, Any]:
+        return self._loops.setdefault(asyncio.get_running_loop(), {})
+
+    def _release(self, inflight: Dict, key: Hashable, flight: Any) -> None:
+        if inflight.get(key) is flight:
+            del inflight[key]
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入键为 key 的进行中请求
+
+        Args:
+            key: 请求键
+            factory: 无进行中请求时调用，返回 awaitable
+
+        Returns:
+            上游请求的结果
+        """
+        inflight = self._inflight()
+        flight = inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._release(inflight, key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有调用方都已取消，不再需要上游结果
+                flight.task.cancel()
+
+    async def stream(self, key: Hashable,
+                     factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        订阅或发起键为 key 的流式请求
+
+        Args:
+            key: 请求键
+            factory: 无进行中请求时调用，返回异步迭代器
+
+        Yields:
+            上游分块（每个订阅者都从第一个分块开始收到完整序列）
+        """
+        inflight = self._inflight()
+        flight = inflight.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            inflight[key] = flight
+            flight.task = asyncio.ensure_future(self._pump(flight, factory))
+            flight.task.add_done_callback(lambda _: self._release(inflight, key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with flight.cond:
+                    await flight.cond.wait_for(
+                        lambda: index < len(flight.chunks) or flight.done
+                    )
+                    pending = flight.chunks[index:]
+                    finished = flight.done
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+                if finished and index >= len(flight.chunks):
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    @staticmethod
+    async def _pump(flight: _StreamFlight, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for chunk in factory():
+                async with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            async with flight.cond:
+                flight.cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        return {"started": self.started, "coalesced": self.coalesced}
+
+
+__all__ = ["SingleFlight", "request_key"]
@@ -10,6 +10,7 @@
 两种方式可以组合使用，互相补充。
 """
 
+import hashlib
 import os
 import subprocess
 import tempfile
@@ -22,6 +23,8 @@ from .subtitle_types import SubtitleSegment, SubtitleExtractionResult
 from .subtitle_speech import SpeechSubtitleExtractor
 from .subtitle_merger import SubtitleMerger
 from .subtitle_translator import SubtitleTranslator
+from .vision_client import VisionResultCache, openai_client, prepare_image
+from ..video_tools.ffmpeg_tool import FFmpegTool
 
 # 导出所有公共类型和类
 __all__ = [
@@ -39,6 +42,10 @@ __all__ = [
 logger = logging.getLogger(__name__)
 
 
+OCR_PROMPT = "提取这张视频截图中的字幕文字。只返回字幕文字内容，如果没有字幕则返回空字符串。不要加任何解释。"
+OCR_MODEL = "gpt-5-mini"
+
+
 class OCRSubtitleExtractor:
     """
     OCR 字幕提取器
@@ -49,6 +56,7 @@ class OCRSubtitleExtractor:
                  provider: str = "openai"):
         self._api_key = api_key or os.getenv("OPENAI_API_KEY")
         self._provider = provider
+        self._cache = VisionResultCache(max_entries=512, max_distance=0)
 
     def extract(self, video_path: str,
                 sample_interval: float = 1.0,
@@ -129,18 +137,23 @@ class OCRSubtitleExtractor:
         return ""
 
     def _ocr_openai(self, image_base64: str) -> str:
-        """使用 OpenAI Vision 做 OCR"""
-        from openai import OpenAI
-
-        client = OpenAI(api_key=self._api_key)
+        """使用 OpenAI Vision 做 OCR（共享客户端，重复帧走缓存）"""
+        prepared = prepare_image(image_base64, max_side=512)
+        # 字幕只占画面一小块，感知哈希区分不出字幕变化，按内容摘要精确匹配
+        digest = int(hashlib.sha1(prepared.data.encode()).hexdigest()[:16], 16)
+        cached = self._cache.get(digest, OCR_PROMPT, provider="openai", model=OCR_MODEL)
+        if cached is not None:
+            return cached["text"]
+
+        client = openai_client(self._api_key)
         response = client.chat.completions.create(
-            model="gpt-5-mini",
+            model=OCR_MODEL,
             messages=[{
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": "提取这张视频截图中的字幕文字。只返回字幕文字内容，如果没有字幕则返回空字符串。不要加任何解释。"},
+                    {"type": "text", "text": OCR_PROMPT},
                     {"type": "image_url", "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}",
+                        "url": f"data:image/jpeg;base64,{prepared.data}",
                         "detail": "low"
                     }}
                 ]
@@ -149,7 +162,8 @@ class OCRSubtitleExtractor:
         )
         text = response.choices[0].message.content.strip()
         if text in ("", "无", "无字幕", "空", "没有字幕"):
-            return ""
+            text = ""
+        self._cache.put(digest, OCR_PROMPT, {"text": text}, provider="openai", model=OCR_MODEL)
         return text
 
     def _extract_frames(self, video_path: str, duration: float,
@@ -177,16 +191,7 @@ class OCRSubtitleExtractor:
 
     def _get_duration(self, video_path: str) -> float:
         """获取视频时长"""
-        cmd = [
-            'ffprobe', '-v', 'quiet',
-            '-show_entries', 'format=duration',
-            '-of', 'csv=p=0', video_path
-        ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
-        try:
-            return float(r.stdout.strip())
-        except (ValueError, AttributeError):
-            return 0.0
+        return FFmpegTool.get_duration(video_path)
 
 
 # ========== 便捷函数 ==========
@@ -17,6 +17,7 @@ from pathlib import Path
 from typing import List, Optional, Tuple
 
 from .subtitle_types import SubtitleSegment, SubtitleExtractionResult
+from ..video_tools.ffmpeg_tool import FFmpegTool
 
 
 logger = logging.getLogger(__name__)
@@ -248,10 +249,4 @@ class SpeechSubtitleExtractor:
         return output
 
     def _get_duration(self, path: str) -> float:
-        cmd = ['ffprobe', '-v', 'quiet', '-show_entries',
-               'format=duration', '-of', 'csv=p=0', path]
-        r = subprocess.run(cmd, capture_output=True, text=True)
-        try:
-            return float(r.stdout.strip())
-        except (ValueError, AttributeError):
-            return 0.0
+        return FFmpegTool.get_duration(path)
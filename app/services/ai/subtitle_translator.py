@@ -7,18 +7,48 @@
 1. OpenAI GPT（推荐，高质量）
 2. DeepL API（高质量，适合欧洲语言）
 3. Google Translate（免费，但有限制）
+
+翻译过的文本存入翻译记忆（TranslationMemory），只有新出现的字幕行才会调用接口；
+OpenAI 按 token 上限打包成批次，在速率限制器下并发发送。
 """
 
+import asyncio
 import os
 import logging
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
 
+from .base_llm_provider import estimate_text_tokens
+from .retry import AdaptiveRateLimiter
 from .subtitle_types import SubtitleSegment, SubtitleExtractionResult
+from .translation_memory import TranslationMemory, get_translation_memory
+
+T = TypeVar("T")
 
 
 logger = logging.getLogger(__name__)
 
 
+def pack_batches(texts: List[str], max_tokens: int, max_items: int) -> List[Tuple[int, int]]:
+    """
+    按 token 上限和条数上限把文本顺序打包成批次
+
+    Returns:
+        [(start, end), ...] 下标区间；单条超过上限的文本单独成批
+    """
+    batches = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_text_tokens(text) + 1  # 换行分隔
+        if i > start and (tokens + cost > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
 class SubtitleTranslator:
     """
     字幕翻译器
@@ -50,16 +80,39 @@ class SubtitleTranslator:
         "uk": "乌克兰语",
     }
 
+    OPENAI_MODEL = "gpt-4o-mini"
+
+    # 各翻译引擎共享的速率限制器（同一进程内的多个翻译器一起受限）
+    _rate_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
     def __init__(self, api_key: Optional[str] = None,
-                 provider: str = "openai"):
+                 provider: str = "openai",
+                 memory: Optional[TranslationMemory] = None,
+                 max_batch_tokens: int = 1500,
+                 max_concurrency: int = 4):
         """
         Args:
             api_key: API 密钥
             provider: 翻译引擎 "openai" / "deepl" / "google"
+            memory: 翻译记忆（默认全局持久化记忆）
+            max_batch_tokens: OpenAI 每批原文的 token 上限
+            max_concurrency: 同时进行的翻译请求数
         """
         self._api_key = api_key or os.getenv("OPENAI_API_KEY")
         self._deepl_key = os.getenv("DEEPL_API_KEY")
         self._provider = provider
+        self._memory = memory if memory is not None else get_translation_memory()
+        self._max_batch_tokens = max_batch_tokens
+        self._max_concurrency = max(1, max_concurrency)
+
+    def _rate_limiter(self) -> AdaptiveRateLimiter:
+        limiter = self._rate_limiters.get(self._provider)
+        if limiter is None:
+            limiter = self._rate_limiters.setdefault(self._provider, AdaptiveRateLimiter(
+                initial_concurrency=self._max_concurrency,
+                max_concurrency=self._max_concurrency * 2,
+            ))
+        return limiter
 
     def translate(self,
                  subtitle_result: SubtitleExtractionResult,
@@ -89,23 +142,9 @@ class SubtitleTranslator:
             method=f"translated_{subtitle_result.method}",
         )
 
-        # 分批翻译
+        # 只翻译翻译记忆中没有的文本
         all_texts = [seg.text for seg in subtitle_result.segments]
-
-        if self._provider == "openai":
-            translated_texts = self._translate_openai(
-                all_texts, target_lang, source_lang, batch_size
-            )
-        elif self._provider == "deepl":
-            translated_texts = self._translate_deepl(
-                all_texts, target_lang, source_lang
-            )
-        elif self._provider == "google":
-            translated_texts = self._translate_google(
-                all_texts, target_lang, source_lang
-            )
-        else:
-            raise ValueError(f"不支持的翻译引擎: {self._provider}")
+        translated_texts = self.translate_texts(all_texts, target_lang, source_lang, batch_size)
 
         # 构建翻译后的字幕片段
         for i, seg in enumerate(subtitle_result.segments):
@@ -120,71 +159,146 @@ class SubtitleTranslator:
         translated.full_text = " ".join(t.text for t in translated.segments)
         return translated
 
+    def translate_texts(self, texts: List[str],
+                        target_lang: str = "en",
+                        source_lang: str = "auto",
+                        batch_size: int = 20) -> List[str]:
+        """
+        翻译文本列表
+
+        重复文本只翻译一次；翻译记忆命中（精确或规范化匹配）的直接使用，
+        其余交给翻译引擎，成功的结果写回记忆。失败的文本保留原文。
+
+        Args:
+            texts: 原文列表
+            target_lang: 目标语言代码
+            source_lang: 源语言代码
+            batch_size: 每批最多的字幕条数（OpenAI）
+
+        Returns:
+            与 texts 一一对应的译文
+        """
+        if self._provider not in ("openai", "deepl", "google"):
+            raise ValueError(f"不支持的翻译引擎: {self._provider}")
+
+        unique = [t for t in dict.fromkeys(texts) if t.strip()]
+        found = self._memory.lookup(unique, source_lang, target_lang, self._provider)
+        missing = [t for t in unique if t not in found]
+
+        if missing:
+            logger.info(f"翻译记忆命中 {len(found)}/{len(unique)} 条，"
+                        f"需要翻译 {len(missing)} 条")
+            if self._provider == "openai":
+                results = self._translate_openai(missing, target_lang, source_lang, batch_size)
+            elif self._provider == "deepl":
+                results = self._translate_deepl(missing, target_lang, source_lang)
+            else:
+                results = self._translate_google(missing, target_lang, source_lang)
+
+            new = {text: result for text, result in zip(missing, results) if result}
+            self._memory.store(new, source_lang, target_lang, self._provider)
+            found.update(new)
+
+        return [found.get(text, text) for text in texts]
+
+    @staticmethod
+    def _run(coro: Awaitable[T]) -> T:
+        """在同步代码中运行协程；已处于事件循环中时（如 API 路由）放到独立线程"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+
     def _translate_openai(self, texts: List[str],
                          target_lang: str,
                          source_lang: str,
-                         batch_size: int) -> List[str]:
-        """使用 OpenAI GPT 翻译"""
-        from openai import OpenAI
+                         batch_size: int) -> List[Optional[str]]:
+        """使用 OpenAI GPT 翻译（按 token 打包，批次并发；失败的位置为 None）"""
+        from openai import AsyncOpenAI
 
-        client = OpenAI(api_key=self._api_key)
         target_name = self.SUPPORTED_LANGUAGES.get(target_lang, target_lang)
         source_name = self.SUPPORTED_LANGUAGES.get(source_lang, source_lang) if source_lang != "auto" else "源语言"
+        # 每行一段：字幕内部的换行合并为空格
+        lines = [" ".join(t.split()) for t in texts]
+        batches = pack_batches(lines, self._max_batch_tokens, batch_size)
 
-        translated = []
-
-        # 分批处理
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-
-            # 构建提示词
-            if source_lang == "auto":
-                prompt = f"""将以下{len(batch)}段字幕翻译成{target_name}。
+        async def run() -> List[Optional[str]]:
+            client = AsyncOpenAI(api_key=self._api_key)
+            try:
+                parts = await asyncio.gather(*(
+                    self._openai_batch(client, lines[start:end], target_name,
+                                       source_lang, source_name)
+                    for start, end in batches
+                ))
+            finally:
+                await client.close()
+            return [text for part in parts for text in part]
+
+        return self._run(run())
+
+    async def _openai_batch(self, client: Any, batch: List[str],
+                            target_name: str, source_lang: str,
+                            source_name: str) -> List[Optional[str]]:
+        """翻译一批；返回行数与原文对不上时拆半重试"""
+        # 构建提示词
+        if source_lang == "auto":
+            prompt = f"""将以下{len(batch)}段字幕翻译成{target_name}。
 只返回翻译后的文本，每行一段，不要加任何解释或序号。
 
 原文:
 {chr(10).join(batch)}"""
-            else:
-                prompt = f"""将以下{len(batch)}段从{source_name}翻译成{target_name}。
+        else:
+            prompt = f"""将以下{len(batch)}段从{source_name}翻译成{target_name}。
 只返回翻译后的文本，每行一段，不要加任何解释或序号。
 
 原文:
 {chr(10).join(batch)}"""
 
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
+        prompt_tokens = estimate_text_tokens(prompt)
+        max_tokens = min(4096, max(256, prompt_tokens * 3))
+        try:
+            async with self._rate_limiter().limit(prompt_tokens + max_tokens) as permit:
+                response = await client.chat.completions.create(
+                    model=self.OPENAI_MODEL,
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0.3,
-                    max_tokens=2000,
+                    max_tokens=max_tokens,
                 )
+                usage = getattr(response, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    permit.used_tokens = usage.total_tokens
+        except Exception as e:
+            logger.error(f"OpenAI 翻译批次失败（{len(batch)} 条）: {e}")
+            return [None] * len(batch)
 
-                result_text = response.choices[0].message.content.strip()
-
-                # 解析结果（每行一段）
-                lines = result_text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    # 去除可能的序号
-                    if line and line[0].isdigit() and '.' in line[:3]:
-                        line = line.split('.', 1)[-1].strip()
-                    translated.append(line)
-
-            except Exception as e:
-                logger.error(f"OpenAI 翻译批次 {i//batch_size + 1} 失败: {e}")
-                # 失败时返回原文
-                translated.extend(batch)
-
-        # 确保数量一致
-        while len(translated) < len(texts):
-            translated.append(texts[len(translated)])
-
-        return translated[:len(texts)]
+        # 解析结果（每行一段）
+        translated = []
+        for line in (response.choices[0].message.content or "").strip().split('\n'):
+            line = line.strip()
+            # 去除可能的序号
+            if line and line[0].isdigit() and '.' in line[:3]:
+                line = line.split('.', 1)[-1].strip()
+            if line:
+                translated.append(line)
+
+        if len(translated) == len(batch):
+            return translated
+        if len(batch) > 1:
+            logger.warning(f"OpenAI 返回 {len(translated)} 行，原文 {len(batch)} 行，拆分重试")
+            mid = len(batch) // 2
+            left, right = await asyncio.gather(
+                self._openai_batch(client, batch[:mid], target_name, source_lang, source_name),
+                self._openai_batch(client, batch[mid:], target_name, source_lang, source_name),
+            )
+            return left + right
+        return [" ".join(translated) or None]
 
     def _translate_deepl(self, texts: List[str],
                         target_lang: str,
-                        source_lang: str) -> List[str]:
-        """使用 DeepL API 翻译"""
+                        source_lang: str) -> List[Optional[str]]:
+        """使用 DeepL API 翻译（失败的位置为 None）"""
         import deepl
 
         # DeepL 语言代码映射
@@ -210,64 +324,56 @@ class SubtitleTranslator:
 
             # 解析结果
             result_text = result.text
-            translated = []
+            translated: List[Optional[str]] = []
             for i in range(len(texts)):
                 marker = f"[{i}]"
                 start = result_text.find(marker)
                 if start != -1:
                     end = result_text.find(f"[{i+1}]", start) if i + 1 < len(texts) else len(result_text)
-                    text = result_text[start + len(marker):end].strip()
-                    translated.append(text)
+                    if end == -1:
+                        end = len(result_text)
+                    translated.append(result_text[start + len(marker):end].strip() or None)
                 else:
-                    translated.append(texts[i])
+                    translated.append(None)
 
             return translated
 
         except Exception as e:
             logger.error(f"DeepL 翻译失败: {e}")
-            return texts
+            return [None] * len(texts)
 
     def _translate_google(self, texts: List[str],
                           target_lang: str,
-                          source_lang: str) -> List[str]:
-        """使用 Google Translate 翻译"""
+                          source_lang: str) -> List[Optional[str]]:
+        """使用 Google Translate 翻译（逐条请求，多线程并发；失败的位置为 None）"""
         try:
-            from googletrans import Translator
+            # 优先使用 deep_translator（googletrans 已停止维护）
+            from deep_translator import GoogleTranslator
+
+            translator = GoogleTranslator(source=source_lang, target=target_lang)
+
+            def translate_one(text: str) -> str:
+                return translator.translate(text)
         except ImportError:
             try:
-                from deep_translator import GoogleTranslator
+                from googletrans import Translator
             except ImportError:
                 raise ImportError("Google 翻译需要安装: pip install googletrans 或 pip install deep-translator")
 
-        try:
-            # 尝试使用 deep_translator（googletrans 已停止维护）
-            translator = GoogleTranslator(source=source_lang, target=target_lang)
-
-            translated = []
-            for text in texts:
-                try:
-                    result = translator.translate(text)
-                    translated.append(result)
-                except Exception as e:
-                    logger.error(f"Google 翻译失败 '{text[:20]}...': {e}")
-                    translated.append(text)
+            fallback = Translator()
 
-            return translated
+            def translate_one(text: str) -> str:
+                return fallback.translate(text, src=source_lang, dest=target_lang).text
 
-        except ImportError:
-            # 回退到 googletrans
-            translator = Translator()
-
-            translated = []
-            for text in texts:
-                try:
-                    result = translator.translate(text, src=source_lang, dest=target_lang)
-                    translated.append(result.text)
-                except Exception as e:
-                    logger.error(f"Google 翻译失败 '{text[:20]}...': {e}")
-                    translated.append(text)
+        def safe_translate(text: str) -> Optional[str]:
+            try:
+                return translate_one(text)
+            except Exception as e:
+                logger.error(f"Google 翻译失败 '{text[:20]}...': {e}")
+                return None
 
-            return translated
+        with ThreadPoolExecutor(max_workers=self._max_concurrency) as pool:
+            return list(pool.map(safe_translate, texts))
 
     def get_supported_languages(self) -> Dict[str, str]:
         """获取支持的语言列表"""
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分层 LLM 响应缓存
+
+按顺序查询三层，命中后回填上层：
+- memory:   进程内 LRU（带 TTL）
+- disk:     SQLite 持久化（LLMDiskCache），重启后仍可命中
+- semantic: 可选的近似命中层。提示词拆成“模板”（列表以外的指令行，含其中的数字）
+            和“变量”（列表项），模板相同且变量的相似度不低于阈值时复用已有回答。
+            列表项不计顺序，场景列表换了顺序也能命中
+
+前两层的键基于空白归一化后的提示词，只差空白的提示词直接精确命中。
+每层分别统计命中率。
+
+用法:
+    cache = TieredLLMCache(disk_dir="~/Voxplore/cache/llm", semantic_threshold=0.95)
+    response = await cache.get(request, scope="qwen")
+    if response is None:
+        response = await provider.generate(request)
+        await cache.put(request, response, scope="qwen")
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .base_llm_provider import LLMRequest, LLMResponse
+from .cache import LLMDiskCache
+from .single_flight import request_key
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 提示词归一化
+# ============================================================================
+
+# 列表项前缀：- / * / • / 1. / 1、 / (1) / 场景1:
+_LIST_ITEM = re.compile(r"^(?:[-*•·]|\d+[.、)）:：]|[(（]\d+[)）]|场景\s*\d+\s*[:：]?)\s*")
+_SHINGLE = 3
+
+
+def normalize_prompt(text: str) -> str:
+    """空白归一化：行内连续空白合并为一个空格，去掉行首尾空白和空行"""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def prompt_signature(text: str) -> Tuple[str, FrozenSet[str]]:
+    """
+    拆分提示词的模板与变量
+
+    指令行里的数字（时长、数量等）通常决定回答内容，留在模板里必须完全一致；
+    列表项作为变量只比较相似度。
+
+    Returns:
+        (模板哈希, 变量特征集合)；特征为各列表项的字符 3-gram，与列表顺序无关
+    """
+    template: List[str] = []
+    variables: List[str] = []
+    for line in normalize_prompt(text).split("\n"):
+        match = _LIST_ITEM.match(line)
+        if match and line[match.end():]:
+            variables.append(line[match.end():])
+            if not template or template[-1] != "<list>":
+                template.append("<list>")
+            continue
+        template.append(line)
+
+    features = set()
+    for value in variables:
+        if len(value) <= _SHINGLE:
+            features.add(value)
+        else:
+            features.update(value[i:i + _SHINGLE] for i in range(len(value) - _SHINGLE + 1))
+    digest = hashlib.sha1("\n".join(template).encode()).hexdigest()
+    return digest, frozenset(features)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+# ============================================================================
+# 统计
+# ============================================================================
+
+@dataclass
+class TierStats:
+    """单层缓存的命中统计"""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+# ============================================================================
+# 分层缓存
+# ============================================================================
+
+class TieredLLMCache:
+    """
+    内存 LRU → 持久化存储 → 语义近似 的分层缓存
+
+    内存层和语义层线程安全；持久化层的 SQLite 读写放到线程池执行，不阻塞事件循环。
+    """
+
+    TIERS = ("memory", "disk", "semantic")
+
+    def __init__(
+        self,
+        memory_entries: int = 512,
+        ttl: float = 86400.0,
+        disk_dir: Optional[str] = None,
+        disk_max_mb: int = 500,
+        semantic_threshold: Optional[float] = None,
+        semantic_entries: int = 2048,
+    ):
+        """
+        Args:
+            memory_entries: 内存层最大条目数
+            ttl: 过期时间（秒），内存层与持久化层共用
+            disk_dir: 持久化目录（None 表示不启用持久化层）
+            disk_max_mb: 持久化层大小上限（MB）
+            semantic_threshold: 语义层的变量相似度阈值（0-1，None 表示不启用）
+            semantic_entries: 语义层最大条目数
+        """
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.semantic_entries = semantic_entries
+
+        self._memory: "OrderedDict[str, Tuple[LLMResponse, float]]" = OrderedDict()
+        # 语义层：桶（请求参数 + 模板）→ {键: (变量特征, 响应, 过期时间)}
+        self._semantic: Dict[str, "OrderedDict[str, Tuple[FrozenSet[str], LLMResponse, float]]"] = {}
+        self._semantic_size = 0
+        self._lock = threading.Lock()
+
+        self._disk: Optional[LLMDiskCache] = None
+        if disk_dir:
+            self._disk = LLMDiskCache(
+                cache_dir=str(Path(disk_dir).expanduser()),
+                max_size_mb=disk_max_mb, ttl=int(ttl),
+            )
+
+        self._stats = {tier: TierStats() for tier in self.TIERS}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TieredLLMCache":
+        """从 LLM.cache 配置创建"""
+        semantic = config.get("semantic", {}) or {}
+        disk_dir = None
+        if config.get("persistent", False):
+            disk_dir = config.get("cache_dir") or str(Path.home() / "Voxplore" / "cache" / "llm")
+        return cls(
+            memory_entries=int(config.get("memory_entries", 512)),
+            ttl=float(config.get("ttl", 86400)),
+            disk_dir=disk_dir,
+            disk_max_mb=int(config.get("max_size_mb", 500)),
+            semantic_threshold=(
+                float(semantic.get("threshold", 0.95)) if semantic.get("enabled", False) else None
+            ),
+        )
+
+    # ---------- 键 ----------
+
+    @staticmethod
+    def _key(request: LLMRequest, scope: Any) -> str:
+        """精确键：空白归一化后的完整请求 + 作用域（如提供商）"""
+        normalized = dataclasses.replace(
+            request,
+            prompt=normalize_prompt(request.prompt),
+            system_prompt=normalize_prompt(request.system_prompt),
+        )
+        return request_key(normalized, scope)
+
+    @staticmethod
+    def _bucket(request: LLMRequest, scope: Any, template: str) -> str:
+        """语义桶：除提示词外的全部参数 + 提示词模板"""
+        params = dataclasses.replace(
+            request, prompt="", system_prompt=normalize_prompt(request.system_prompt)
+        )
+        return request_key(params, scope, template)
+
+    # ---------- 查询 ----------
+
+    async def get(self, request: LLMRequest, scope: Any = None) -> Optional[LLMResponse]:
+        """逐层查找，返回响应副本；未命中返回 None"""
+        key = self._key(request, scope)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory"].hits += 1
+                return dataclasses.replace(entry[0])
+            if entry is not None:
+                del self._memory[key]
+            self._stats["memory"].misses += 1
+
+        if self._disk is not None:
+            row = await asyncio.to_thread(self._disk.get_key, key)
+            if row is not None:
+                response = LLMResponse(
+                    content=row["content"], model=row["model"] or request.model,
+                    tokens_used=row["tokens_used"] or 0, latency_ms=row["latency_ms"] or 0.0,
+                )
+                self._stats["disk"].hits += 1
+                self._remember(key, request, scope, response)
+                return dataclasses.replace(response)
+            self._stats["disk"].misses += 1
+
+        if self.semantic_threshold is not None:
+            response = self._semantic_lookup(request, scope, now)
+            if response is not None:
+                self._stats["semantic"].hits += 1
+                return response
+            self._stats["semantic"].misses += 1
+        return None
+
+    def _semantic_lookup(self, request: LLMRequest, scope: Any,
+                         now: float) -> Optional[LLMResponse]:
+        template, features = prompt_signature(request.prompt)
+        bucket_key = self._bucket(request, scope, template)
+        with self._lock:
+            bucket = self._semantic.get(bucket_key)
+            if not bucket:
+                return None
+            best_key, best_score = None, self.semantic_threshold
+            for key, (other, _, expires) in bucket.items():
+                if expires <= now:
+                    continue
+                score = jaccard(features, other)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            bucket.move_to_end(best_key)
+            logger.debug(f"语义缓存命中（相似度 {best_score:.3f}）")
+            return dataclasses.replace(bucket[best_key][1])
+
+    # ---------- 写入 ----------
+
+    async def put(self, request: LLMRequest, response: LLMResponse, scope: Any = None) -> None:
+        """写入所有层"""
+        key = self._key(request, scope)
+        self._remember(key, request, scope, response)
+        if self._disk is not None:
+            await asyncio.to_thread(
+                self._disk.set_key, key, request.model, response.content,
+                temperature=request.temperature, provider=str(scope or ""),
+                tokens_used=response.tokens_used, latency_ms=response.latency_ms,
+                prompt_preview=request.prompt[:100],
+            )
+
+    def _remember(self, key: str, request: LLMRequest, scope: Any,
+                  response: LLMResponse) -> None:
+        """写入内存层和语义层"""
+        stored = dataclasses.replace(response, raw_response=None)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._memory[key] = (stored, expires)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+        if self.semantic_threshold is None:
+            return
+        template, features = prompt_signature(request.prompt)
+        bucket_key = self._bucket(request, scope, template)
+        with self._lock:
+            bucket = self._semantic.setdefault(bucket_key, OrderedDict())
+            if key not in bucket:
+                self._semantic_size += 1
+            bucket[key] = (features, stored, expires)
+            bucket.move_to_end(key)
+            while self._semantic_size > self.semantic_entries:
+                self._evict_semantic()
+
+    def _evict_semantic(self) -> None:
+        """淘汰最大桶里最久未用的条目（调用方持有锁）"""
+        bucket_key = max(self._semantic, key=lambda k: len(self._semantic[k]))
+        bucket = self._semantic[bucket_key]
+        bucket.popitem(last=False)
+        self._semantic_size -= 1
+        if not bucket:
+            del self._semantic[bucket_key]
+
+    # ---------- 管理 ----------
+
+    def clear(self) -> None:
+        """清空内存层和语义层（持久化层保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._semantic.clear()
+            self._semantic_size = 0
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """每层的命中数 / 未命中数 / 命中率，以及总体命中率"""
+        result = {tier: self._stats[tier].as_dict() for tier in self.TIERS}
+        lookups = self._stats["memory"].hits + self._stats["memory"].misses
+        hits = sum(s.hits for s in self._stats.values())
+        result["overall"] = {"hits": hits, "misses": lookups - hits,
+                             "hit_rate": hits / lookups if lookups else 0.0}
+        return result
+
+
+__all__ = [
+    "TieredLLMCache",
+    "TierStats",
+    "normalize_prompt",
+    "prompt_signature",
+]
@@ -0,0 +1,197 @@
+"""
+翻译记忆 (Translation Memory)
+
+持久化已翻译过的字幕文本，重新导出项目或反复出现的口头禅不必再次调用翻译接口。
+
+- 键: (原文, 源语言, 目标语言, 翻译引擎)
+- 精确匹配优先；其次按规范化原文匹配（NFKC、去首尾空白、合并空白、忽略大小写）
+- 存储为 SQLite，线程安全
+
+使用示例:
+    memory = get_translation_memory()
+    found = memory.lookup(["你好", "再见"], "zh", "en", "openai")   # {原文: 译文}
+    memory.store({"你好": "Hello"}, "zh", "en", "openai")
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """规范化原文：全角/半角统一、合并空白、忽略大小写"""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class TranslationMemory:
+    """
+    翻译记忆库（SQLite，线程安全）
+
+    db_path 为 None 时使用内存数据库（进程内有效）。
+    """
+
+    # SQLite 单条语句的参数上限以内分块查询
+    _CHUNK = 500
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(os.path.expanduser(db_path)) if db_path else None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.db_path is not None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.db_path) if self.db_path else ":memory:", check_same_thread=False
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory (
+                    provider TEXT,
+                    source_lang TEXT,
+                    target_lang TEXT,
+                    source_text TEXT,
+                    normalized TEXT,
+                    translation TEXT,
+                    updated_at INTEGER,
+                    PRIMARY KEY (provider, source_lang, target_lang, source_text)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_memory_normalized "
+                "ON memory(provider, source_lang, target_lang, normalized)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, texts: Iterable[str], source_lang: str, target_lang: str,
+               provider: str) -> Dict[str, str]:
+        """
+        查询已有译文
+
+        Args:
+            texts: 原文列表
+            source_lang / target_lang: 语言代码
+            provider: 翻译引擎
+
+        Returns:
+            {原文: 译文}，只包含命中的原文
+        """
+        texts = list(dict.fromkeys(texts))
+        found: Dict[str, str] = {}
+        if not texts:
+            return found
+        key = (provider, source_lang, target_lang)
+
+        with self._lock:
+            try:
+                conn = self._db()
+                # 精确匹配
+                for chunk in self._chunks(texts):
+                    rows = conn.execute(
+                        "SELECT source_text, translation FROM memory "
+                        "WHERE provider=? AND source_lang=? AND target_lang=? "
+                        f"AND source_text IN ({','.join('?' * len(chunk))})",
+                        key + tuple(chunk),
+                    ).fetchall()
+                    found.update(rows)
+
+                # 规范化匹配
+                pending: Dict[str, List[str]] = {}
+                for text in texts:
+                    if text not in found:
+                        pending.setdefault(normalize_text(text), []).append(text)
+                for chunk in self._chunks(list(pending)):
+                    rows = conn.execute(
+                        "SELECT normalized, translation FROM memory "
+                        "WHERE provider=? AND source_lang=? AND target_lang=? "
+                        f"AND normalized IN ({','.join('?' * len(chunk))}) "
+                        "ORDER BY updated_at",
+                        key + tuple(chunk),
+                    ).fetchall()
+                    for normalized, translation in rows:
+                        for text in pending[normalized]:
+                            found[text] = translation
+            except sqlite3.Error as e:
+                logger.warning(f"翻译记忆查询失败: {e}")
+        return found
+
+    def store(self, translations: Dict[str, str], source_lang: str, target_lang: str,
+              provider: str) -> None:
+        """写入译文 {原文: 译文}"""
+        if not translations:
+            return
+        now = int(time.time())
+        rows = [
+            (provider, source_lang, target_lang, text, normalize_text(text), translation, now)
+            for text, translation in translations.items()
+        ]
+        with self._lock:
+            try:
+                conn = self._db()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO memory (provider, source_lang, target_lang, "
+                    "source_text, normalized, translation, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"翻译记忆写入失败: {e}")
+
+    def count(self) -> int:
+        """记忆条数"""
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _chunks(self, items: List[str]) -> Iterable[List[str]]:
+        for i in range(0, len(items), self._CHUNK):
+            yield items[i:i + self._CHUNK]
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """
+    获取全局翻译记忆
+
+    数据库位置可用环境变量 VOXPLORE_TRANSLATION_MEMORY 指定，设为空字符串则只用内存。
+    """
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                db_path = os.environ.get(
+                    "VOXPLORE_TRANSLATION_MEMORY",
+                    str(Path.home() / "Voxplore" / "cache" / "translation_memory.db"),
+                )
+                _memory = TranslationMemory(os.path.expanduser(db_path) if db_path else None)
+    return _memory
+
+
+__all__ = [
+    "TranslationMemory",
+    "normalize_text",
+    "get_translation_memory",
+]
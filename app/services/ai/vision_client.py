@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视觉 API 公共设施
+
+- 共享客户端：OpenAI 兼容客户端 / httpx 客户端按 (api_key, base_url) 复用连接池，
+  异步客户端按事件循环区分
+- 图片预处理：按模型的最佳分块尺寸缩放并重新编码为 JPEG，再 base64
+- 结果缓存：按感知哈希（dHash）+ 提供者 / 模型 / 提示词缓存，相同或几乎相同的画面
+  不重复请求，换模型后不会拿到其他模型的结果
+
+用法:
+    prepared = prepare_image(image_base64, max_side=512)
+    cache = get_vision_cache()
+    result = cache.get(prepared.phash, prompt, provider="openai", model="gpt-4o")
+"""
+
+import asyncio
+import base64
+import binascii
+import copy
+import hashlib
+import io
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 图片预处理
+# ============================================================================
+
+JPEG_QUALITY = 85
+HASH_SIZE = 8            # dHash 取 (HASH_SIZE+1) x HASH_SIZE 灰度图，得到 64 位
+
+
+@dataclass
+class PreparedImage:
+    """预处理后的图片"""
+    data: str                   # base64 JPEG
+    phash: Optional[int]        # 64 位感知哈希，无法解码时为 None
+
+
+def _to_bytes(image: Union[str, bytes]) -> bytes:
+    if isinstance(image, bytes):
+        return image
+    try:
+        return base64.b64decode(image, validate=True)
+    except (binascii.Error, ValueError):
+        return image.encode()
+
+
+def dhash(img) -> int:
+    """差值哈希：比较相邻像素亮度，对缩放和轻微压缩不敏感"""
+    from PIL import Image
+
+    gray = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def prepare_image(image: Union[str, bytes], max_side: int = 768,
+                  multiple: int = 1, quality: int = JPEG_QUALITY) -> PreparedImage:
+    """
+    缩放到模型的最佳尺寸并重新编码
+
+    Args:
+        image: base64 字符串或原始图片字节
+        max_side: 长边上限（只缩小不放大）
+        multiple: 宽高对齐的倍数（如 Qwen-VL 的 28 像素 patch）
+        quality: JPEG 质量
+
+    Returns:
+        PreparedImage；无法解码时原样 base64 返回，phash 为 None
+    """
+    raw = _to_bytes(image)
+    try:
+        from PIL import Image
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+    except Exception as e:
+        logger.debug(f"图片无法解码，跳过预处理: {e}")
+        data = image if isinstance(image, str) else base64.b64encode(raw).decode()
+        return PreparedImage(data=data, phash=None)
+
+    phash = dhash(img)
+    width, height = img.size
+    scale = min(1.0, max_side / max(width, height))
+    new_w = max(multiple, round(width * scale / multiple) * multiple)
+    new_h = max(multiple, round(height * scale / multiple) * multiple)
+    if (new_w, new_h) != (width, height):
+        img = img.resize((new_w, new_h), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=quality)
+    return PreparedImage(data=base64.b64encode(buf.getvalue()).decode(), phash=phash)
+
+
+def image_hash(image: Union[str, bytes]) -> Optional[int]:
+    """只计算感知哈希，无法解码返回 None"""
+    try:
+        from PIL import Image
+        return dhash(Image.open(io.BytesIO(_to_bytes(image))))
+    except Exception:
+        return None
+
+
+# ============================================================================
+# 结果缓存
+# ============================================================================
+
+class VisionResultCache:
+    """
+    按 (感知哈希, 提供者:模型:提示词) 缓存视觉分析结果（线程安全）
+
+    同一提供者、模型与提示词下，哈希汉明距离 <= max_distance 的画面视为同一画面。
+    """
+
+    def __init__(self, max_entries: int = 2048, max_distance: int = 4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self._by_prompt: Dict[str, Dict[int, None]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _prompt_key(prompt: str, provider: str = "", model: str = "") -> str:
+        return hashlib.sha1(f"{provider}:{model}:{prompt}".encode()).hexdigest()
+
+    def _find(self, pkey: str, phash: int) -> Optional[Tuple[str, int]]:
+        if (pkey, phash) in self._entries:
+            return (pkey, phash)
+        if self.max_distance <= 0:
+            return None
+        for other in self._by_prompt.get(pkey, ()):
+            if hamming(phash, other) <= self.max_distance:
+                return (pkey, other)
+        return None
+
+    def get(self, phash: Optional[int], prompt: str, provider: str = "",
+            model: str = "") -> Optional[Dict[str, Any]]:
+        """查找缓存结果（返回副本）"""
+        if phash is None:
+            return None
+        with self._lock:
+            key = self._find(self._prompt_key(prompt, provider, model), phash)
+            if key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[key])
+
+    def put(self, phash: Optional[int], prompt: str, result: Dict[str, Any],
+            provider: str = "", model: str = "") -> None:
+        if phash is None:
+            return
+        pkey = self._prompt_key(prompt, provider, model)
+        with self._lock:
+            self._entries[(pkey, phash)] = copy.deepcopy(result)
+            self._entries.move_to_end((pkey, phash))
+            self._by_prompt.setdefault(pkey, {})[phash] = None
+            while len(self._entries) > self.max_entries:
+                (old_pkey, old_hash), _ = self._entries.popitem(last=False)
+                self._by_prompt[old_pkey].pop(old_hash, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_prompt.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[VisionResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_vision_cache() -> VisionResultCache:
+    """获取全局视觉结果缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VisionResultCache()
+    return _cache
+
+
+# ============================================================================
+# 共享客户端
+# ============================================================================
+
+_clients: Dict[Tuple, Any] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def openai_client(api_key: str, base_url: Optional[str] = None):
+    """共享的同步 OpenAI 兼容客户端（复用连接池）"""
+    key = ("openai", api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import OpenAI
+            kwargs = {"api_key": api_key}
+            if base_url:
+                kwargs["base_url"] = base_url
+            client = _clients[key] = OpenAI(**kwargs)
+        return client
+
+
+def async_openai_client(api_key: str, base_url: Optional[str] = None):
+    """当前事件循环共享的异步 OpenAI 兼容客户端"""
+    key = ("openai", api_key, base_url)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI
+            kwargs = {"api_key": api_key}
+            if base_url:
+                kwargs["base_url"] = base_url
+            client = clients[key] = AsyncOpenAI(**kwargs)
+        return client
+
+
+def http_client(timeout: float = 30):
+    """共享的同步 httpx 客户端"""
+    key = ("httpx", timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            client = _clients[key] = httpx.Client(timeout=timeout)
+        return client
+
+
+def async_http_client(timeout: float = 30):
+    """当前事件循环共享的异步 httpx 客户端"""
+    key = ("httpx", timeout)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            import httpx
+            client = clients[key] = httpx.AsyncClient(timeout=timeout)
+        return client
+
+
+def clear_clients() -> None:
+    """丢弃所有共享客户端（切换密钥或测试时使用）"""
+    with _clients_lock:
+        _clients.clear()
+        _async_clients.clear()
+
+
+__all__ = [
+    "PreparedImage",
+    "prepare_image",
+    "image_hash",
+    "dhash",
+    "hamming",
+    "VisionResultCache",
+    "get_vision_cache",
+    "openai_client",
+    "async_openai_client",
+    "http_client",
+    "async_http_client",
+    "clear_clients",
+]
@@ -6,12 +6,26 @@
 支持 Qwen2.5-VL (72B SOTA)、GPT-5 Vision、Gemini 3 Vision 等多种 Vision 模型
 """
 
+import asyncio
+import copy
 import os
 import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 
+from .vision_client import (
+    VisionResultCache,
+    async_http_client,
+    async_openai_client,
+    get_vision_cache,
+    hamming,
+    http_client,
+    image_hash,
+    openai_client,
+    prepare_image,
+)
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -71,7 +85,8 @@ FIRST_PERSON_ANALYSIS_PROMPT = """你是一位专业的电影分镜师和第一
     "protagonist_action": "主角正在做什么（用动词，简洁）",
     "environment_mood": "环境氛围关键词（3-5个）",
     "first_person_hook": "一句适合第一人称的开场叙述（10-20字，要有画面感）",
-    "narrative_angle": "这个场景适合从哪个角度切入叙事（旁观/内心独白/现场解说）"
+    "narrative_angle": "这个场景适合从哪个角度切入叙事（旁观/内心独白/现场解说）",
+    "first_person": "0-100，画面是否为主角的第一人称视角（主观镜头、主角视线）"
 }
 
 注意：
@@ -86,16 +101,29 @@ FIRST_PERSON_ANALYSIS_PROMPT = """你是一位专业的电影分镜师和第一
 class VisionProvider(ABC):
     """视觉分析提供者基类"""
 
+    # 模型的最佳输入尺寸：长边上限 / 宽高对齐倍数
+    tile_size: int = 768
+    tile_multiple: int = 1
+
     @abstractmethod
     def analyze_image(self, image_base64: str,
                       prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
         """分析图片，返回解析后的字典"""
         pass
 
+    async def analyze_image_async(self, image_base64: str,
+                                  prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        """异步分析图片（默认在线程中执行同步实现）"""
+        return await asyncio.to_thread(self.analyze_image, image_base64, prompt)
+
     @abstractmethod
     def get_name(self) -> str:
         pass
 
+    def prepare(self, image_base64: str) -> str:
+        """缩放并重新编码为本模型的最佳尺寸"""
+        return prepare_image(image_base64, self.tile_size, self.tile_multiple).data
+
     @staticmethod
     def _parse_json_response(content: str) -> Dict[str, Any]:
         """从可能包含 markdown 的响应中提取 JSON"""
@@ -109,12 +137,55 @@ class VisionProvider(ABC):
             return {"description": content.strip()}
 
 
+class OpenAICompatibleVisionProvider(VisionProvider):
+    """OpenAI 兼容接口的视觉提供者（共享连接池，同步/异步共用请求构造）"""
+
+    api_key: str
+    base_url: Optional[str]
+    model: str
+    max_tokens: int = 800
+
+    def _content(self, image_base64: str, prompt: str) -> List[Dict[str, Any]]:
+        return [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {
+                "url": f"data:image/jpeg;base64,{image_base64}"
+            }}
+        ]
+
+    def _request(self, image_base64: str, prompt: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{
+                "role": "user",
+                "content": self._content(self.prepare(image_base64), prompt),
+            }],
+            "max_tokens": self.max_tokens,
+        }
+
+    def analyze_image(self, image_base64: str,
+                      prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        client = openai_client(self.api_key, self.base_url)
+        response = client.chat.completions.create(**self._request(image_base64, prompt))
+        return self._parse_json_response(response.choices[0].message.content)
+
+    async def analyze_image_async(self, image_base64: str,
+                                  prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        request = await asyncio.to_thread(self._request, image_base64, prompt)
+        client = async_openai_client(self.api_key, self.base_url)
+        response = await client.chat.completions.create(**request)
+        return self._parse_json_response(response.choices[0].message.content)
+
+
 # ============================================================================
 # OpenAI GPT-5 Vision
 # ============================================================================
-class OpenAIVisionProvider(VisionProvider):
+class OpenAIVisionProvider(OpenAICompatibleVisionProvider):
     """OpenAI GPT-5 Vision"""
 
+    # detail=low 固定按 512x512 计费，更大的图只会浪费上传带宽
+    tile_size = 512
+
     def __init__(self, api_key: str, model: str = "gpt-4o",
                  base_url: Optional[str] = None):
         self.api_key = api_key
@@ -124,37 +195,26 @@ class OpenAIVisionProvider(VisionProvider):
     def get_name(self) -> str:
         return f"OpenAI/{self.model}"
 
-    def analyze_image(self, image_base64: str,
-                      prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
-        from openai import OpenAI
-        kwargs = {"api_key": self.api_key}
-        if self.base_url:
-            kwargs["base_url"] = self.base_url
-
-        client = OpenAI(**kwargs)
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}",
-                        "detail": "low"
-                    }}
-                ]
-            }],
-            max_tokens=800,
-        )
-        return self._parse_json_response(response.choices[0].message.content)
+    def _content(self, image_base64: str, prompt: str) -> List[Dict[str, Any]]:
+        return [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {
+                "url": f"data:image/jpeg;base64,{image_base64}",
+                "detail": "low"
+            }}
+        ]
 
 
 # ============================================================================
 # 通义千问 Qwen-VL（Plus / Max）
 # ============================================================================
-class QwenVLProvider(VisionProvider):
+class QwenVLProvider(OpenAICompatibleVisionProvider):
     """通义千问 Qwen-VL（Plus/Max）"""
 
+    # Qwen-VL 以 28x28 像素为一个视觉 token
+    tile_size = 896
+    tile_multiple = 28
+
     def __init__(self, api_key: str,
                  base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1",
                  model: str = "qwen-vl-plus"):
@@ -165,30 +225,11 @@ class QwenVLProvider(VisionProvider):
     def get_name(self) -> str:
         return f"Qwen/{self.model}"
 
-    def analyze_image(self, image_base64: str,
-                      prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
-        from openai import OpenAI
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}"
-                    }}
-                ]
-            }],
-            max_tokens=800,
-        )
-        return self._parse_json_response(response.choices[0].message.content)
-
 
 # ============================================================================
 # 通义千问 Qwen2.5-VL（2025年2月新版，72B SOTA）⭐ 主力推荐
 # ============================================================================
-class Qwen25VLProvider(VisionProvider):
+class Qwen25VLProvider(OpenAICompatibleVisionProvider):
     """
     通义千问 Qwen2.5-VL（72B）
 
@@ -196,6 +237,10 @@ class Qwen25VLProvider(VisionProvider):
     推荐作为第一人称解说场景理解的主力模型。
     """
 
+    tile_size = 896
+    tile_multiple = 28
+    max_tokens = 1024
+
     def __init__(self, api_key: str,
                  base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1",
                  model: str = "qwen2.5-vl-72b-instruct"):
@@ -206,28 +251,25 @@ class Qwen25VLProvider(VisionProvider):
     def get_name(self) -> str:
         return f"Qwen2.5-VL/{self.model}"
 
+    def _content(self, image_base64: str, prompt: str) -> List[Dict[str, Any]]:
+        return [
+            {"type": "image_url", "image_url": {
+                "url": f"data:image/jpeg;base64,{image_base64}"
+            }},
+            {"type": "text", "text": prompt}
+        ]
+
     def analyze_image(self, image_base64: str,
                       prompt: str = FIRST_PERSON_ANALYSIS_PROMPT) -> Dict[str, Any]:
         """
         使用 Qwen2.5-VL 进行第一人称解说专用分析。
         默认 prompt 使用 FIRST_PERSON_ANALYSIS_PROMPT。
         """
-        from openai import OpenAI
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image_url", "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}"
-                    }},
-                    {"type": "text", "text": prompt}
-                ]
-            }],
-            max_tokens=1024,
-        )
-        return self._parse_json_response(response.choices[0].message.content)
+        return super().analyze_image(image_base64, prompt)
+
+    async def analyze_image_async(self, image_base64: str,
+                                  prompt: str = FIRST_PERSON_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        return await super().analyze_image_async(image_base64, prompt)
 
     def analyze_video_frames(self, frames: List[Dict[str, Any]],
                             narrative_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -244,15 +286,14 @@ class Qwen25VLProvider(VisionProvider):
         if not frames:
             return []
 
-        from openai import OpenAI
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        client = openai_client(self.api_key, self.base_url)
 
         # 构建多帧消息
         content_parts = []
         for frame in frames:
             content_parts.append({
                 "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{frame['image_base64']}"}
+                "image_url": {"url": f"data:image/jpeg;base64,{self.prepare(frame['image_base64'])}"}
             })
 
         prompt = narrative_prompt or (
@@ -284,6 +325,9 @@ class Qwen25VLProvider(VisionProvider):
 class GeminiVisionProvider(VisionProvider):
     """Google Gemini 3.x Vision"""
 
+    # Gemini 按 768x768 分块计费
+    tile_size = 768
+
     def __init__(self, api_key: str, model: str = "gemini-2.5-flash-preview-0506"):
         self.api_key = api_key
         self.model = model
@@ -291,10 +335,7 @@ class GeminiVisionProvider(VisionProvider):
     def get_name(self) -> str:
         return f"Gemini/{self.model}"
 
-    def analyze_image(self, image_base64: str,
-                      prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
-        import httpx
-
+    def _request(self, image_base64: str, prompt: str):
         url = (f"https://generativelanguage.googleapis.com/v1beta/"
                f"models/{self.model}:generateContent?key={self.api_key}")
 
@@ -304,20 +345,32 @@ class GeminiVisionProvider(VisionProvider):
                     {"text": prompt},
                     {"inline_data": {
                         "mime_type": "image/jpeg",
-                        "data": image_base64
+                        "data": self.prepare(image_base64)
                     }}
                 ]
             }],
             "generationConfig": {"maxOutputTokens": 800}
         }
+        return url, payload
 
-        resp = httpx.post(url, json=payload, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-
+    def _parse(self, data: Dict[str, Any]) -> Dict[str, Any]:
         text = data["candidates"][0]["content"]["parts"][0]["text"]
         return self._parse_json_response(text)
 
+    def analyze_image(self, image_base64: str,
+                      prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        url, payload = self._request(image_base64, prompt)
+        resp = http_client().post(url, json=payload)
+        resp.raise_for_status()
+        return self._parse(resp.json())
+
+    async def analyze_image_async(self, image_base64: str,
+                                  prompt: str = VISION_ANALYSIS_PROMPT) -> Dict[str, Any]:
+        url, payload = await asyncio.to_thread(self._request, image_base64, prompt)
+        resp = await async_http_client().post(url, json=payload)
+        resp.raise_for_status()
+        return self._parse(resp.json())
+
 
 # ============================================================================
 # 视觉分析器工厂
@@ -342,9 +395,13 @@ class VisionAnalyzerFactory:
         "gemini": GeminiVisionProvider,
     }
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any],
+                 cache: Optional[VisionResultCache] = None,
+                 max_concurrency: int = 4):
         self._config = config
         self._providers: List[VisionProvider] = []
+        self._cache = cache if cache is not None else get_vision_cache()
+        self.max_concurrency = max_concurrency
         self._init_providers()
 
     def _init_providers(self):
@@ -392,16 +449,36 @@ class VisionAnalyzerFactory:
                     return p
         return self._providers[0] if self._providers else None
 
+    @staticmethod
+    def _cache_scope(provider: VisionProvider) -> Dict[str, str]:
+        """缓存键中的提供者与模型"""
+        return {"provider": type(provider).__name__, "model": getattr(provider, "model", "")}
+
+    def _cached(self, phash: Optional[int], prompt: str) -> Optional[Dict[str, Any]]:
+        """按提供者优先顺序查找缓存（结果记在实际给出它的提供者 / 模型下）"""
+        for provider in self._providers:
+            cached = self._cache.get(phash, prompt, **self._cache_scope(provider))
+            if cached is not None:
+                return cached
+        return None
+
     def analyze_with_fallback(self, image_base64: str,
                                prompt: str = FIRST_PERSON_ANALYSIS_PROMPT) -> Dict[str, Any]:
-        """带 fallback 的分析，自动切换提供者直到成功"""
+        """带 fallback 的分析，自动切换提供者直到成功（相同画面命中缓存）"""
+        phash = image_hash(image_base64)
+        cached = self._cached(phash, prompt)
+        if cached is not None:
+            return cached
+
         last_error = None
         tried = []
 
         for provider in self._providers:
             tried.append(provider.get_name())
             try:
-                return provider.analyze_image(image_base64, prompt)
+                result = provider.analyze_image(image_base64, prompt)
+                self._cache.put(phash, prompt, result, **self._cache_scope(provider))
+                return result
             except Exception as e:
                 last_error = e
                 logger.error(f"{provider.get_name()} 分析失败: {e}")
@@ -412,5 +489,96 @@ class VisionAnalyzerFactory:
             f"最后错误: {last_error}"
         )
 
+    async def _analyze_async_with_fallback(
+        self, image_base64: str, prompt: str,
+    ) -> Tuple[VisionProvider, Dict[str, Any]]:
+        last_error = None
+        tried = []
+        for provider in self._providers:
+            tried.append(provider.get_name())
+            try:
+                return provider, await provider.analyze_image_async(image_base64, prompt)
+            except Exception as e:
+                last_error = e
+                logger.error(f"{provider.get_name()} 分析失败: {e}")
+        raise RuntimeError(
+            f"所有视觉分析提供者均失败（已尝试: {tried}），"
+            f"最后错误: {last_error}"
+        )
+
+    async def analyze_many_async(self, images: List[str],
+                                 prompt: str = FIRST_PERSON_ANALYSIS_PROMPT) -> List[Any]:
+        """
+        并发分析多帧（并发数受 max_concurrency 限制）
+
+        命中缓存的帧、以及与本批中其他帧几乎相同的帧不会发出请求。
+
+        Returns:
+            与 images 一一对应的结果；全部提供者失败的帧对应 RuntimeError 实例
+        """
+        hashes = await asyncio.gather(*(asyncio.to_thread(image_hash, img) for img in images))
+
+        results: List[Any] = [None] * len(images)
+        owner: Dict[int, int] = {}          # 帧下标 → 负责请求的帧下标
+        pending: List[int] = []
+        for i, phash in enumerate(hashes):
+            cached = self._cached(phash, prompt)
+            if cached is not None:
+                results[i] = cached
+                continue
+            same = None
+            if phash is not None:
+                same = next((j for j in pending if hashes[j] is not None
+                             and hamming(phash, hashes[j]) <= self._cache.max_distance), None)
+            if same is None:
+                pending.append(i)
+                owner[i] = i
+            else:
+                owner[i] = same
+
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run(i: int):
+            async with semaphore:
+                return await self._analyze_async_with_fallback(images[i], prompt)
+
+        outcomes = await asyncio.gather(*(run(i) for i in pending), return_exceptions=True)
+        for i, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                results[i] = outcome
+                continue
+            provider, results[i] = outcome
+            self._cache.put(hashes[i], prompt, results[i], **self._cache_scope(provider))
+
+        for i, j in owner.items():
+            if i != j:
+                outcome = results[j]
+                results[i] = outcome if isinstance(outcome, BaseException) else copy.deepcopy(outcome)
+        return results
+
+    def analyze_many(self, images: List[str],
+                     prompt: str = FIRST_PERSON_ANALYSIS_PROMPT) -> List[Any]:
+        """
+        analyze_many_async 的同步版本
+
+        在共享的常驻后台事件循环中运行：异步客户端按事件循环缓存，
+        每批新建事件循环会导致连接无法复用、客户端无法回收。
+
+        Raises:
+            RuntimeError: 在后台循环自身中调用（会死锁，请直接 await analyze_many_async）
+        """
+        from .llm_manager import get_background_loop
+
+        loop = get_background_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("analyze_many() 不能在后台事件循环中调用，请直接 await")
+        return asyncio.run_coroutine_threadsafe(
+            self.analyze_many_async(images, prompt), loop
+        ).result()
+
     def get_available_providers(self) -> List[str]:
         return [p.get_name() for p in self._providers]
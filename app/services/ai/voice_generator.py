@@ -29,6 +29,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from .voice_models import VoiceStyle, VoiceGender, VoiceConfig, VoiceInfo, GeneratedVoice
+from app.utils.tracing import tracer
 
 
 class TTSProvider(ABC):
@@ -49,6 +50,11 @@ class TTSProvider(ABC):
         """列出可用声音"""
         pass
 
+    def _get_audio_duration(self, audio_path: str) -> float:
+        """获取音频时长（经 MediaCatalog 探测），失败返回 0.0"""
+        from app.services.video_tools.ffmpeg_tool import FFmpegTool
+        return FFmpegTool.get_duration(audio_path)
+
 
 class EdgeTTSProvider(TTSProvider):
     """
@@ -169,36 +175,6 @@ class EdgeTTSProvider(TTSProvider):
         else:
             return voices[0][0]  # 默认第一个
 
-    def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长"""
-        try:
-            from pydub import AudioSegment
-            audio = AudioSegment.from_file(audio_path)
-            return len(audio) / 1000.0  # 毫秒转秒
-        except ImportError:
-            logger.debug("pydub not available for duration, falling back to ffprobe")
-
-        # 使用 ffprobe
-        try:
-            import subprocess
-            cmd = [
-                'ffprobe', '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'csv=p=0',
-                audio_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-        except FileNotFoundError:
-            logger.debug("ffprobe not found")
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"ffprobe failed: {e}")
-        except Exception as e:
-            logger.debug(f"Getting audio duration failed: {e}")
-
-        return 0.0
-
     def list_voices(self, language: str = "zh-CN") -> List[VoiceInfo]:
         """列出可用声音"""
         voices = []
@@ -280,27 +256,6 @@ class OpenAITTSProvider(TTSProvider):
             sentence_timestamps=[],
         )
 
-    def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长"""
-        try:
-            import subprocess
-            cmd = [
-                'ffprobe', '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'csv=p=0',
-                audio_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-        except FileNotFoundError:
-            logger.debug("ffprobe not found")
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"ffprobe failed: {e}")
-        except Exception as e:
-            logger.debug(f"Getting audio duration failed: {e}")
-        return 0.0
-
     def list_voices(self, language: str = "zh-CN") -> List[VoiceInfo]:
         """列出可用声音"""
         return [
@@ -417,22 +372,6 @@ class F5TTSProvider(TTSProvider):
         ]
         subprocess.run(cmd, capture_output=True)
 
-    def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长"""
-        try:
-            import subprocess
-            cmd = [
-                "ffprobe", "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0", audio_path,
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-        except Exception as e:
-            logger.debug(f"ffprobe duration failed for {audio_path}: {e}")
-        return 0.0
-
     def list_voices(self, language: str = "zh-CN") -> List[VoiceInfo]:
         """
         列出可用"声音"(音色克隆模式下实际返回已注册的参考音频)
@@ -529,7 +468,12 @@ class VoiceGenerator:
         # 确保输出目录存在
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-        return self._provider.generate(text, output_path, config)
+        with tracer.span("tts.generate", category="tts",
+                         provider=self.provider_name, chars=len(text)) as span:
+            result = self._provider.generate(text, output_path, config)
+            if tracer.enabled and os.path.exists(result.audio_path):
+                span.set(bytes=os.path.getsize(result.audio_path), duration=result.duration)
+            return result
 
     def generate_segments(
         self,
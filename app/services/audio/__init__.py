@@ -4,6 +4,7 @@ Voxplore 音频分析服务
 提供音频处理能力:
 - BeatDetector: 节拍检测
 - SyncEngine: 音画同步
+- WaveformPeaks: 波形峰值金字塔（时间轴绘制）
 """
 
 from enum import Enum
@@ -19,7 +20,9 @@ from .sync_engine import (
     SyncEngine,
     SyncPoint,
     SyncPlan,
+    SyncChange,
 )
+from .waveform_peaks import WaveformPeaks, WaveformStore, get_waveform_store
 
 
 # ============ 枚举定义 ============
@@ -93,4 +96,10 @@ __all__ = [
     "TransitionType",
     "SyncPoint",
     "SyncPlan",
+    "SyncChange",
+
+    # Waveform
+    "WaveformPeaks",
+    "WaveformStore",
+    "get_waveform_store",
 ]
@@ -97,6 +97,13 @@ class AudioAnalysisResult:
     # Beat-sync 剪辑点
     beat_sync_cutpoints: List[BeatSyncCutpoint] = field(default_factory=list)
 
+    # 内容版本号：原地修改节拍/段落等数据后调用 mark_changed()，缓存的索引随之失效
+    version: int = field(default=0, compare=False, repr=False)
+
+    def mark_changed(self) -> None:
+        """标记分析结果已被原地修改"""
+        self.version += 1
+
 
 class BeatDetector:
     """
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+节拍时间索引
+
+将 AudioAnalysisResult 中的节拍、onset、段落边界整理为有序 numpy 数组，
+区间查询用 searchsorted 完成（O(log n)），供 SyncEngine 反复规划时复用。
+
+用法:
+    index = BeatIndex.build(audio)
+    lo, hi = index.beat_range(10.0, 20.0)       # 10s <= t < 20s 的节拍下标
+    beats = index.beats_in(10.0, 20.0)          # 对应的 BeatInfo 列表
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .beat_detector import AudioAnalysisResult, BeatInfo, BeatStrength, SectionInfo
+
+
+# 节拍强度编码（数组里存 int8）
+STRENGTH_CODES = {
+    BeatStrength.WEAK: 0,
+    BeatStrength.MEDIUM: 1,
+    BeatStrength.STRONG: 2,
+}
+
+
+class BeatIndex:
+    """AudioAnalysisResult 的只读时间索引"""
+
+    def __init__(
+        self,
+        beats: List[BeatInfo],
+        onsets: List[float],
+        sections: List[SectionInfo],
+        energy_curve: List[Tuple[float, float]],
+        duration: float,
+    ):
+        order = np.argsort(np.fromiter((b.timestamp for b in beats), dtype=np.float64,
+                                       count=len(beats)), kind="stable")
+        self.beats: List[BeatInfo] = [beats[i] for i in order]
+        self.beat_times = np.fromiter((b.timestamp for b in self.beats),
+                                      dtype=np.float64, count=len(self.beats))
+        self.beat_strengths = np.fromiter((STRENGTH_CODES.get(b.strength, 0) for b in self.beats),
+                                          dtype=np.int8, count=len(self.beats))
+
+        self.onset_times = np.sort(np.asarray(onsets, dtype=np.float64), kind="stable")
+
+        self.sections: List[SectionInfo] = list(sections)
+        self.section_starts = np.fromiter((s.start for s in self.sections),
+                                          dtype=np.float64, count=len(self.sections))
+        self.section_ends = np.fromiter((s.end for s in self.sections),
+                                        dtype=np.float64, count=len(self.sections))
+
+        self.energy_curve = energy_curve
+        self.duration = duration
+        self._speed_curve: Optional[List[Tuple[float, float]]] = None
+
+    @classmethod
+    def build(cls, audio: AudioAnalysisResult) -> "BeatIndex":
+        return cls(audio.beats, audio.onsets, audio.sections,
+                   audio.energy_curve, audio.duration)
+
+    # ---------- 区间查询 ----------
+
+    def beat_range(self, start: float, end: float) -> Tuple[int, int]:
+        """返回满足 start <= t < end 的节拍下标区间 [lo, hi)"""
+        lo = int(np.searchsorted(self.beat_times, start, side="left"))
+        hi = int(np.searchsorted(self.beat_times, end, side="left"))
+        return lo, max(lo, hi)
+
+    def beats_in(self, start: float, end: float) -> List[BeatInfo]:
+        lo, hi = self.beat_range(start, end)
+        return self.beats[lo:hi]
+
+    def onset_range(self, start: float, end: float) -> Tuple[int, int]:
+        """返回满足 start <= t < end 的 onset 下标区间 [lo, hi)"""
+        lo = int(np.searchsorted(self.onset_times, start, side="left"))
+        hi = int(np.searchsorted(self.onset_times, end, side="left"))
+        return lo, max(lo, hi)
+
+    def section_at(self, t: float) -> int:
+        """返回包含时间 t 的段落下标，不在任何段落内返回 -1"""
+        i = int(np.searchsorted(self.section_starts, t, side="right")) - 1
+        if 0 <= i < len(self.sections) and t < self.section_ends[i]:
+            return i
+        return -1
+
+    # ---------- 派生数据 ----------
+
+    def speed_curve(self) -> List[Tuple[float, float]]:
+        """
+        根据音频能量生成速度曲线（结果缓存）
+
+        高能量 → 快节奏（speed > 1.0），低能量 → 慢节奏（speed < 1.0）
+        """
+        if self._speed_curve is not None:
+            return self._speed_curve
+
+        if not self.energy_curve:
+            self._speed_curve = [(0.0, 1.0), (self.duration, 1.0)]
+            return self._speed_curve
+
+        curve = np.asarray(self.energy_curve, dtype=np.float64)
+        times, energies = curve[:, 0], curve[:, 1]
+        avg_energy = sum(energies.tolist()) / len(energies)
+
+        if avg_energy > 0:
+            # 映射到 0.7-1.5 的速度范围
+            speeds = np.clip(0.7 + (energies / avg_energy) * 0.4, 0.7, 1.5)
+        else:
+            speeds = np.ones_like(energies)
+
+        self._speed_curve = [
+            (t, round(s, 2))
+            for t, s in zip(times.tolist(), speeds.tolist())
+        ]
+        return self._speed_curve
+
+
+def greedy_min_gap(times: np.ndarray, min_gap: float,
+                   last: Optional[float] = None) -> List[int]:
+    """
+    在有序时间点中贪心选取，保证相邻两点间隔 >= min_gap
+
+    与逐个判断 ``t - last >= min_gap`` 的结果一致，但用二分跳过不满足的点。
+
+    Args:
+        times: 升序候选时间
+        min_gap: 最小间隔
+        last: 已存在的上一个切点时间
+
+    Returns:
+        被选中的候选下标
+    """
+    n = len(times)
+    picked: List[int] = []
+    pos = 0
+    while pos < n:
+        if last is not None:
+            pos = max(pos, int(np.searchsorted(times, last + min_gap, side="left")) - 1)
+            # searchsorted 基于加法阈值，这里按原始减法语义校正浮点边界
+            while pos < n and times[pos] - last < min_gap:
+                pos += 1
+            if pos >= n:
+                break
+        picked.append(pos)
+        last = float(times[pos])
+        pos += 1
+    return picked
+
+
+__all__ = ["BeatIndex", "STRENGTH_CODES", "greedy_min_gap"]
@@ -12,13 +12,18 @@
 - HYBRID: 混合策略（推荐）
 """
 
-from typing import List, Tuple
-from dataclasses import dataclass, field
+import bisect
+import weakref
+from typing import List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 from enum import Enum
 
+import numpy as np
+
 from .beat_detector import (
     AudioAnalysisResult, BeatStrength, MusicSection
 )
+from .beat_index import BeatIndex, greedy_min_gap
 
 
 class SyncStrategy(Enum):
@@ -56,6 +61,26 @@ class SyncPlan:
     sync_points: List[SyncPoint] = field(default_factory=list)
     speed_curve: List[Tuple[float, float]] = field(default_factory=list)  # (time, speed)
 
+    # 规划参数（增量重规划时复用）
+    num_clips: int = 0
+    min_clip_duration: float = 0.3
+    max_clip_duration: float = 5.0
+    anchor: str = ""              # 切点来源：beats / onsets / sections
+    stride: int = 0               # beats / onsets 的取点步长
+
+
+@dataclass
+class SyncChange:
+    """
+    音频变更集（增量重规划用）
+
+    [start, end) 为音频分析结果发生变化的区间（旧时间轴）；
+    end 之后的内容整体平移 time_shift 秒（插入为正、删除为负）。
+    """
+    start: float
+    end: float
+    time_shift: float = 0.0
+
 
 class SyncEngine:
     """
@@ -81,6 +106,28 @@ class SyncEngine:
             print(f"{sp.timestamp:.2f}s → clip[{sp.clip_index}] {sp.transition.value}")
     """
 
+    def __init__(self):
+        # 最近一次规划使用的索引（同一份音频反复规划时复用）
+        # 按对象身份（弱引用，对象回收后不会误命中）+ 版本号判断是否仍有效
+        self._index_owner: Optional[weakref.ref] = None
+        self._index_version = -1
+        self._index: Optional[BeatIndex] = None
+
+    def get_index(self, audio_analysis: AudioAnalysisResult) -> BeatIndex:
+        """
+        获取音频分析结果的时间索引，同一结果只构建一次
+
+        原地修改分析结果后需调用 audio_analysis.mark_changed() 才会重建。
+        """
+        if (self._index is None
+                or self._index_owner is None
+                or self._index_owner() is not audio_analysis
+                or self._index_version != audio_analysis.version):
+            self._index = BeatIndex.build(audio_analysis)
+            self._index_owner = weakref.ref(audio_analysis)
+            self._index_version = audio_analysis.version
+        return self._index
+
     def create_sync_plan(
         self,
         audio_analysis: AudioAnalysisResult,
@@ -103,110 +150,131 @@ class SyncEngine:
             total_duration=audio_analysis.duration,
             bpm=audio_analysis.bpm,
             strategy=strategy,
+            num_clips=num_clips,
+            min_clip_duration=min_clip_duration,
+            max_clip_duration=max_clip_duration,
         )
+        index = self.get_index(audio_analysis)
 
         if strategy == SyncStrategy.BEAT_SYNC:
-            self._beat_sync(plan, audio_analysis, num_clips,
+            self._beat_sync(plan, index, num_clips,
                            min_clip_duration, max_clip_duration)
         elif strategy == SyncStrategy.PHRASE_SYNC:
-            self._phrase_sync(plan, audio_analysis, num_clips)
+            self._phrase_sync(plan, index, num_clips)
         elif strategy == SyncStrategy.ENERGY_SYNC:
-            self._energy_sync(plan, audio_analysis, num_clips,
+            self._energy_sync(plan, index, num_clips,
                              min_clip_duration, max_clip_duration)
         else:  # HYBRID
-            self._hybrid_sync(plan, audio_analysis, num_clips,
+            self._hybrid_sync(plan, index, num_clips,
                              min_clip_duration, max_clip_duration)
 
         # 生成速度曲线
-        plan.speed_curve = self._generate_speed_curve(audio_analysis)
+        plan.speed_curve = list(index.speed_curve())
 
         return plan
 
+    def _append_beats(self, plan: SyncPlan, index: BeatIndex,
+                      lo: int, hi: int, step: int, min_dur: float,
+                      clip_idx: int, num_clips: int,
+                      transition: Optional[TransitionType] = None,
+                      speed_factor: float = 1.0) -> int:
+        """
+        在节拍下标 [lo, hi) 内每 step 个节拍取一个切点，跳过间隔不足 min_dur 的点
+
+        Returns:
+            更新后的 clip_idx
+        """
+        candidates = np.arange(lo, hi, step)
+        if len(candidates) == 0:
+            return clip_idx
+
+        last = plan.sync_points[-1].timestamp if plan.sync_points else None
+        for k in greedy_min_gap(index.beat_times[candidates], min_dur, last):
+            beat = index.beats[candidates[k]]
+            plan.sync_points.append(SyncPoint(
+                timestamp=beat.timestamp,
+                clip_index=clip_idx % num_clips,
+                transition=transition or self._beat_to_transition(beat.strength),
+                beat_strength=beat.strength,
+                speed_factor=speed_factor,
+            ))
+            clip_idx += 1
+        return clip_idx
+
     def _beat_sync(self, plan: SyncPlan,
-                   audio: AudioAnalysisResult,
+                   index: BeatIndex,
                    num_clips: int,
-                   min_dur: float, max_dur: float):
+                   min_dur: float, max_dur: float,
+                   from_time: float = 0.0):
         """节拍同步：在每个（或每隔N个）节拍处切换"""
-        beats = audio.beats
-        if not beats:
+        n_beats = len(index.beats)
+        if not n_beats:
             return
 
         # 根据片段数量决定每几个节拍切一次
-        beats_per_cut = max(1, len(beats) // num_clips)
-
-        clip_idx = 0
-        for i, beat in enumerate(beats):
-            if i % beats_per_cut == 0:
-                # 检查与上一个切点的间隔
-                if plan.sync_points:
-                    gap = beat.timestamp - plan.sync_points[-1].timestamp
-                    if gap < min_dur:
-                        continue
-
-                transition = self._beat_to_transition(beat.strength)
-
-                plan.sync_points.append(SyncPoint(
-                    timestamp=beat.timestamp,
-                    clip_index=clip_idx % num_clips,
-                    transition=transition,
-                    beat_strength=beat.strength,
-                ))
-                clip_idx += 1
+        beats_per_cut = max(1, n_beats // num_clips)
+        plan.anchor, plan.stride = "beats", beats_per_cut
+
+        # 增量重规划时从 from_time 之后第一个对齐步长的节拍开始
+        first = int(np.searchsorted(index.beat_times, from_time, side="left"))
+        first = -(-first // beats_per_cut) * beats_per_cut
+        self._append_beats(plan, index, first, n_beats, beats_per_cut,
+                           min_dur, len(plan.sync_points), num_clips)
 
     def _phrase_sync(self, plan: SyncPlan,
-                     audio: AudioAnalysisResult,
+                     index: BeatIndex,
                      num_clips: int):
         """乐句同步：在段落边界切换"""
-        if not audio.sections:
+        if not index.sections:
             # 降级到节拍同步
-            return self._beat_sync(plan, audio, num_clips, 0.5, 10.0)
-
-        clip_idx = 0
-        for section in audio.sections:
-            transition = TransitionType.CROSSFADE
-            if section.section_type == MusicSection.CHORUS:
-                transition = TransitionType.HARD_CUT
-            elif section.section_type == MusicSection.BRIDGE:
-                transition = TransitionType.FADE_IN
-
-            plan.sync_points.append(SyncPoint(
-                timestamp=section.start,
-                clip_index=clip_idx % num_clips,
-                transition=transition,
-            ))
-            clip_idx += 1
+            return self._beat_sync(plan, index, num_clips, 0.5, 10.0)
+
+        plan.anchor = "sections"
+        for section in index.sections:
+            self._phrase_section(plan, section, num_clips)
+
+    def _phrase_section(self, plan: SyncPlan, section, num_clips: int) -> None:
+        """乐句同步中单个段落的切点"""
+        transition = TransitionType.CROSSFADE
+        if section.section_type == MusicSection.CHORUS:
+            transition = TransitionType.HARD_CUT
+        elif section.section_type == MusicSection.BRIDGE:
+            transition = TransitionType.FADE_IN
+
+        plan.sync_points.append(SyncPoint(
+            timestamp=section.start,
+            clip_index=len(plan.sync_points) % num_clips,
+            transition=transition,
+        ))
 
     def _energy_sync(self, plan: SyncPlan,
-                     audio: AudioAnalysisResult,
+                     index: BeatIndex,
                      num_clips: int,
-                     min_dur: float, max_dur: float):
+                     min_dur: float, max_dur: float,
+                     from_time: float = 0.0):
         """能量同步：在能量突变处切换"""
-        onsets = audio.onsets
-        if not onsets:
-            return self._beat_sync(plan, audio, num_clips, min_dur, max_dur)
+        onsets = index.onset_times
+        if not len(onsets):
+            return self._beat_sync(plan, index, num_clips, min_dur, max_dur, from_time)
 
         # 按能量突变点分配切换
         step = max(1, len(onsets) // num_clips)
-        clip_idx = 0
-
-        for i in range(0, len(onsets), step):
-            t = onsets[i]
-
-            # 检查间隔
-            if plan.sync_points:
-                gap = t - plan.sync_points[-1].timestamp
-                if gap < min_dur:
-                    continue
+        plan.anchor, plan.stride = "onsets", step
+        candidates = onsets[::step]
+        candidates = candidates[int(np.searchsorted(candidates, from_time, side="left")):]
 
+        last = plan.sync_points[-1].timestamp if plan.sync_points else None
+        clip_idx = len(plan.sync_points)
+        for k in greedy_min_gap(candidates, min_dur, last):
             plan.sync_points.append(SyncPoint(
-                timestamp=t,
+                timestamp=float(candidates[k]),
                 clip_index=clip_idx % num_clips,
                 transition=TransitionType.HARD_CUT,
             ))
             clip_idx += 1
 
     def _hybrid_sync(self, plan: SyncPlan,
-                     audio: AudioAnalysisResult,
+                     index: BeatIndex,
                      num_clips: int,
                      min_dur: float, max_dur: float):
         """
@@ -218,67 +286,169 @@ class SyncEngine:
         - Intro/Outro：慢节奏
         - 强拍用硬切，弱拍用交叉淡化
         """
-        sections = audio.sections
-        beats = audio.beats
-
-        if not sections:
-            return self._beat_sync(plan, audio, num_clips, min_dur, max_dur)
-
-        clip_idx = 0
-
-        for section in sections:
-            # 获取此段落内的节拍
-            section_beats = [
-                b for b in beats
-                if section.start <= b.timestamp < section.end
-            ]
-
-            if section.section_type == MusicSection.CHORUS:
-                # Chorus：每 1-2 个节拍切一次
-                beats_per_cut = max(1, min(2, len(section_beats) // 4))
-                for i, beat in enumerate(section_beats):
-                    if i % beats_per_cut == 0:
-                        if plan.sync_points:
-                            gap = beat.timestamp - plan.sync_points[-1].timestamp
-                            if gap < min_dur:
-                                continue
-
-                        plan.sync_points.append(SyncPoint(
-                            timestamp=beat.timestamp,
-                            clip_index=clip_idx % num_clips,
-                            transition=self._beat_to_transition(beat.strength),
-                            beat_strength=beat.strength,
-                            speed_factor=1.0,
-                        ))
-                        clip_idx += 1
-
-            elif section.section_type in (MusicSection.INTRO, MusicSection.OUTRO):
-                # Intro/Outro：整个段落一个片段
-                plan.sync_points.append(SyncPoint(
-                    timestamp=section.start,
-                    clip_index=clip_idx % num_clips,
-                    transition=TransitionType.FADE_IN if section.section_type == MusicSection.INTRO else TransitionType.FADE_OUT,
-                    speed_factor=0.8,  # 稍慢
-                ))
-                clip_idx += 1
+        if not index.sections:
+            return self._beat_sync(plan, index, num_clips, min_dur, max_dur)
+
+        plan.anchor = "sections"
+        for section in index.sections:
+            self._hybrid_section(plan, index, section, num_clips, min_dur)
+
+    def _hybrid_section(self, plan: SyncPlan, index: BeatIndex, section,
+                        num_clips: int, min_dur: float) -> None:
+        """混合同步中单个段落的切点（只依赖上一个切点的时间和序号）"""
+        clip_idx = len(plan.sync_points)
+
+        # 此段落内的节拍下标区间（二分查找）
+        lo, hi = index.beat_range(section.start, section.end)
+        n_section_beats = hi - lo
+
+        if section.section_type == MusicSection.CHORUS:
+            # Chorus：每 1-2 个节拍切一次
+            beats_per_cut = max(1, min(2, n_section_beats // 4))
+            self._append_beats(plan, index, lo, hi, beats_per_cut,
+                               min_dur, clip_idx, num_clips)
+
+        elif section.section_type in (MusicSection.INTRO, MusicSection.OUTRO):
+            # Intro/Outro：整个段落一个片段
+            plan.sync_points.append(SyncPoint(
+                timestamp=section.start,
+                clip_index=clip_idx % num_clips,
+                transition=TransitionType.FADE_IN if section.section_type == MusicSection.INTRO else TransitionType.FADE_OUT,
+                speed_factor=0.8,  # 稍慢
+            ))
+
+        else:
+            # Verse/Bridge：每 4 个节拍切一次
+            beats_per_cut = max(2, min(4, n_section_beats // 3))
+            self._append_beats(plan, index, lo, hi, beats_per_cut,
+                               min_dur, clip_idx, num_clips,
+                               transition=TransitionType.CROSSFADE)
+
+    # ─────────────────────────────────────────────────────────────
+    # 增量重规划
+    # ─────────────────────────────────────────────────────────────
+
+    def update_sync_plan(
+        self,
+        previous: SyncPlan,
+        audio_analysis: AudioAnalysisResult,
+        change: SyncChange,
+    ) -> SyncPlan:
+        """
+        增量更新同步计划
+
+        只重算受 change 影响的区间：变更前的切点原样保留；按段落规划的策略
+        （HYBRID / PHRASE_SYNC）在变更区间之后逐段重算，一旦某段结果与旧计划
+        平移后一致，剩余切点整体平移时间并顺延 clip_index。BEAT_SYNC /
+        ENERGY_SYNC 的取点步长耦合了其后所有切点，从变更起点重算后缀。
+
+        结果与对新的 audio_analysis 调用 create_sync_plan 一致（平移的切点时间
+        仅有浮点误差）。
+
+        Args:
+            previous: 之前由 create_sync_plan / update_sync_plan 生成的计划
+            audio_analysis: 变更后的音频分析结果
+            change: 变更区间与平移量
 
+        Returns:
+            新的同步计划（previous 不被修改）
+        """
+        if previous.num_clips <= 0:
+            raise ValueError("previous 计划缺少规划参数，请使用 create_sync_plan 重新生成")
+
+        num_clips = previous.num_clips
+        min_dur = previous.min_clip_duration
+        max_dur = previous.max_clip_duration
+        strategy = previous.strategy
+        index = self.get_index(audio_analysis)
+
+        plan = SyncPlan(
+            total_duration=audio_analysis.duration,
+            bpm=audio_analysis.bpm,
+            strategy=strategy,
+            num_clips=num_clips,
+            min_clip_duration=min_dur,
+            max_clip_duration=max_dur,
+        )
+        old_points = previous.sync_points
+        old_times = [sp.timestamp for sp in old_points]
+        sectioned = strategy in (SyncStrategy.HYBRID, SyncStrategy.PHRASE_SYNC) and index.sections
+
+        if not sectioned:
+            # 步长变化意味着所有切点都要重排
+            if strategy == SyncStrategy.ENERGY_SYNC and len(index.onset_times):
+                anchor, stride = "onsets", max(1, len(index.onset_times) // num_clips)
             else:
-                # Verse/Bridge：每 4 个节拍切一次
-                beats_per_cut = max(2, min(4, len(section_beats) // 3))
-                for i, beat in enumerate(section_beats):
-                    if i % beats_per_cut == 0:
-                        if plan.sync_points:
-                            gap = beat.timestamp - plan.sync_points[-1].timestamp
-                            if gap < min_dur:
-                                continue
-
-                        plan.sync_points.append(SyncPoint(
-                            timestamp=beat.timestamp,
-                            clip_index=clip_idx % num_clips,
-                            transition=TransitionType.CROSSFADE,
-                            beat_strength=beat.strength,
-                        ))
-                        clip_idx += 1
+                anchor, stride = "beats", max(1, len(index.beats) // num_clips)
+            same = (anchor, stride) == (previous.anchor, previous.stride)
+            from_time = change.start if same else 0.0
+
+            plan.sync_points = old_points[:bisect.bisect_left(old_times, from_time)]
+            if strategy == SyncStrategy.ENERGY_SYNC:
+                self._energy_sync(plan, index, num_clips, min_dur, max_dur, from_time)
+            elif strategy == SyncStrategy.PHRASE_SYNC:
+                self._beat_sync(plan, index, num_clips, 0.5, 10.0, from_time)
+            else:
+                self._beat_sync(plan, index, num_clips, min_dur, max_dur, from_time)
+            plan.speed_curve = list(index.speed_curve())
+            return plan
+
+        # 第一个可能受影响的段落；旧计划不是按段落规划的则全部重算
+        plan.anchor = "sections"
+        if previous.anchor != "sections":
+            first, cut = 0, 0.0
+        else:
+            first = int(np.searchsorted(index.section_ends, change.start, side="right"))
+            cut = change.start
+            if first < len(index.sections):
+                cut = min(cut, index.sections[first].start)
+        plan.sync_points = old_points[:bisect.bisect_left(old_times, cut)]
+
+        new_end = change.end + change.time_shift
+        eps = 1e-9
+        for s_idx in range(first, len(index.sections)):
+            section = index.sections[s_idx]
+            before = len(plan.sync_points)
+            if strategy == SyncStrategy.PHRASE_SYNC:
+                self._phrase_section(plan, section, num_clips)
+            else:
+                self._hybrid_section(plan, index, section, num_clips, min_dur)
+
+            if section.start < new_end:
+                continue
+
+            # 变更区间之后：与旧计划对应段落比较，一致则整体平移剩余切点
+            # （该段至少要有一个切点，否则后续段落的贪心状态仍取决于变更区间）
+            old_lo = bisect.bisect_left(old_times, section.start - change.time_shift - eps)
+            old_hi = bisect.bisect_left(old_times, section.end - change.time_shift - eps)
+            new_points = plan.sync_points[before:]
+            if new_points and self._points_match(new_points, old_points[old_lo:old_hi],
+                                                 change.time_shift, eps):
+                base = len(plan.sync_points)
+                plan.sync_points.extend(
+                    replace(sp,
+                            timestamp=sp.timestamp + change.time_shift,
+                            clip_index=(base + k) % num_clips)
+                    for k, sp in enumerate(old_points[old_hi:])
+                )
+                break
+
+        plan.speed_curve = list(index.speed_curve())
+        return plan
+
+    @staticmethod
+    def _points_match(new: List[SyncPoint], old: List[SyncPoint],
+                      shift: float, eps: float = 1e-9) -> bool:
+        """判断重算的切点与平移后的旧切点是否一致（忽略 clip_index）"""
+        if len(new) != len(old):
+            return False
+        return all(
+            abs(a.timestamp - (b.timestamp + shift)) <= eps
+            and a.transition == b.transition
+            and a.beat_strength == b.beat_strength
+            and a.speed_factor == b.speed_factor
+            for a, b in zip(new, old)
+        )
 
     def _beat_to_transition(self, strength: BeatStrength) -> TransitionType:
         """根据节拍强度选择转场类型"""
@@ -298,21 +468,4 @@ class SyncEngine:
         高能量 → 快节奏（speed > 1.0）
         低能量 → 慢节奏（speed < 1.0）
         """
-        if not audio.energy_curve:
-            return [(0.0, 1.0), (audio.duration, 1.0)]
-
-        # 计算平均能量
-        energies = [e for _, e in audio.energy_curve]
-        avg_energy = sum(energies) / len(energies) if energies else 0.5
-
-        curve = []
-        for t, energy in audio.energy_curve:
-            if avg_energy > 0:
-                ratio = energy / avg_energy
-                # 映射到 0.7-1.5 的速度范围
-                speed = max(0.7, min(1.5, 0.7 + ratio * 0.4))
-            else:
-                speed = 1.0
-            curve.append((t, round(speed, 2)))
-
-        return curve
+        return list(self.get_index(audio).speed_curve())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多分辨率波形峰值金字塔
+
+音频只解码一次，生成若干缩放级别的 (min, max) 峰值（int16），
+按音频指纹缓存为内存映射文件；时间轴在任意时间范围、任意像素宽度下
+取切片只需选级别 + 一次 reduceat，不再为每次缩放重新跑 ffmpeg。
+
+用法:
+    peaks = get_waveform_store().load("/path/music.mp3")
+    columns = peaks.slice(10.0, 20.0, width=800)    # (800, 2) float32, [-1, 1]
+    get_waveform_store().submit(path).add_done_callback(...)  # 时间轴后台加载
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+SAMPLE_RATE = 16000      # 解码采样率（单声道）
+BASE_BLOCK = 64          # 第 0 级每个峰值覆盖的采样数（4ms）
+LEVEL_FACTOR = 4         # 相邻级别的聚合倍数
+MIN_LEVEL_BINS = 512     # 最粗一级至少保留的峰值数
+
+
+def _block_minmax(samples: np.ndarray, block: int) -> np.ndarray:
+    """按 block 分组取 (min, max)，尾部不足一组的也单独成组"""
+    n = len(samples)
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.int16)
+    full = n // block * block
+    parts = []
+    if full:
+        grid = samples[:full].reshape(-1, block)
+        parts.append(np.stack([grid.min(axis=1), grid.max(axis=1)], axis=1))
+    if full < n:
+        tail = samples[full:]
+        parts.append(np.array([[tail.min(), tail.max()]], dtype=samples.dtype))
+    return np.concatenate(parts).astype(np.int16, copy=False)
+
+
+def _reduce_level(peaks: np.ndarray, factor: int) -> np.ndarray:
+    """把上一级的 (min, max) 每 factor 个再聚合一次"""
+    starts = np.arange(0, len(peaks), factor)
+    return np.stack([
+        np.minimum.reduceat(peaks[:, 0], starts),
+        np.maximum.reduceat(peaks[:, 1], starts),
+    ], axis=1)
+
+
+def _write_atomic(target: Path, write: Callable[[IO], None], mode: str = "wb") -> None:
+    """写入同目录下的独立临时文件后 os.replace，并发写同一目标互不干扰"""
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(mode, dir=target.parent, prefix=f".{target.name}.",
+                                         suffix=".tmp", delete=False,
+                                         encoding=None if "b" in mode else "utf-8") as f:
+            tmp = f.name
+            write(f)
+        os.replace(tmp, target)
+    except BaseException:
+        if tmp is not None:
+            Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class WaveformPeaks:
+    """
+    波形峰值金字塔
+
+    levels[k] 形状为 (n_k, 2)，第 k 级每个峰值覆盖
+    BASE_BLOCK * LEVEL_FACTOR**k 个采样。
+    """
+
+    def __init__(self, levels: List[np.ndarray], sample_rate: int = SAMPLE_RATE,
+                 base_block: int = BASE_BLOCK, factor: int = LEVEL_FACTOR,
+                 num_samples: int = 0):
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.base_block = base_block
+        self.factor = factor
+        self.num_samples = num_samples
+
+    @property
+    def duration(self) -> float:
+        return self.num_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def bin_seconds(self, level: int) -> float:
+        """第 level 级每个峰值对应的秒数"""
+        return self.base_block * self.factor ** level / self.sample_rate
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def from_samples(cls, samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                     base_block: int = BASE_BLOCK, factor: int = LEVEL_FACTOR) -> "WaveformPeaks":
+        """从 int16 单声道采样构建"""
+        samples = np.asarray(samples)
+        if samples.dtype != np.int16:
+            samples = np.clip(np.round(samples * 32767), -32768, 32767).astype(np.int16)
+        return cls._from_base(_block_minmax(samples, base_block), sample_rate,
+                              base_block, factor, len(samples))
+
+    @classmethod
+    def _from_base(cls, base: np.ndarray, sample_rate: int, base_block: int,
+                   factor: int, num_samples: int) -> "WaveformPeaks":
+        levels = [base]
+        while len(levels[-1]) > MIN_LEVEL_BINS * factor:
+            levels.append(_reduce_level(levels[-1], factor))
+        return cls(levels, sample_rate, base_block, factor, num_samples)
+
+    @classmethod
+    def decode(cls, audio_path: str, sample_rate: int = SAMPLE_RATE,
+               base_block: int = BASE_BLOCK, factor: int = LEVEL_FACTOR) -> "WaveformPeaks":
+        """
+        用 ffmpeg 流式解码为单声道 s16le 并逐块计算第 0 级峰值
+
+        内存占用与音频时长无关（只保留峰值）。
+        """
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', audio_path,
+            '-ac', '1', '-ar', str(sample_rate),
+            '-f', 's16le', '-',
+        ]
+        chunk_bytes = base_block * 2 * 4096
+        parts: List[np.ndarray] = []
+        num_samples = 0
+        pending = b""
+
+        with tracer.span("ffmpeg", category="ffmpeg", file=audio_path, purpose="waveform"):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                while True:
+                    data = proc.stdout.read(chunk_bytes)
+                    if not data:
+                        break
+                    data = pending + data
+                    usable = len(data) // (base_block * 2) * (base_block * 2)
+                    pending = data[usable:]
+                    if usable:
+                        samples = np.frombuffer(data[:usable], dtype='<i2')
+                        parts.append(_block_minmax(samples, base_block))
+                        num_samples += len(samples)
+                stderr = proc.stderr.read()
+            finally:
+                proc.stdout.close()
+                proc.stderr.close()
+                returncode = proc.wait()
+
+        if returncode != 0:
+            raise RuntimeError(f"波形解码失败: {stderr.decode(errors='ignore')[:200]}")
+
+        tail = np.frombuffer(pending[:len(pending) // 2 * 2], dtype='<i2')
+        if len(tail):
+            parts.append(_block_minmax(tail, base_block))
+            num_samples += len(tail)
+
+        base = np.concatenate(parts) if parts else np.zeros((0, 2), dtype=np.int16)
+        return cls._from_base(base, sample_rate, base_block, factor, num_samples)
+
+    # ---------- 存取 ----------
+
+    def save(self, path: str) -> None:
+        """
+        保存为 <path>.npy（各级拼接）+ <path>.json（元数据）
+
+        两个文件都原子替换；.json 最后写入，读者以它的存在判断缓存可用。
+        """
+        base = Path(path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        offsets = np.cumsum([0] + [len(level) for level in self.levels]).tolist()
+        data = (np.concatenate(self.levels) if self.levels
+                else np.zeros((0, 2), dtype=np.int16))
+        _write_atomic(base.with_suffix(".npy"), lambda f: np.save(f, data))
+        meta = {
+            "sample_rate": self.sample_rate,
+            "base_block": self.base_block,
+            "factor": self.factor,
+            "num_samples": self.num_samples,
+            "offsets": offsets,
+        }
+        _write_atomic(base.with_suffix(".json"), lambda f: json.dump(meta, f), mode="w")
+
+    @classmethod
+    def load(cls, path: str) -> "WaveformPeaks":
+        """内存映射方式加载（不读入全部数据）"""
+        base = Path(path)
+        with open(base.with_suffix(".json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        data = np.load(base.with_suffix(".npy"), mmap_mode="r")
+        offsets = meta["offsets"]
+        levels = [data[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return cls(levels, meta["sample_rate"], meta["base_block"],
+                   meta["factor"], meta["num_samples"])
+
+    # ---------- 查询 ----------
+
+    def level_for(self, seconds_per_pixel: float) -> int:
+        """选择每像素至少覆盖一个峰值的最粗级别"""
+        level = 0
+        while (level + 1 < len(self.levels)
+               and self.bin_seconds(level + 1) <= seconds_per_pixel):
+            level += 1
+        return level
+
+    def slice(self, start: float, end: float, width: int) -> np.ndarray:
+        """
+        取 [start, end) 在 width 个像素列上的 (min, max)
+
+        Returns:
+            (width, 2) float32，范围 [-1, 1]；无数据的列为 0
+        """
+        out = np.zeros((max(width, 0), 2), dtype=np.float32)
+        if width <= 0 or end <= start or not self.levels:
+            return out
+
+        level = self.level_for((end - start) / width)
+        peaks = self.levels[level]
+        bin_sec = self.bin_seconds(level)
+
+        # 每个像素列对应的峰值下标区间 [lo, hi)
+        edges = np.floor(np.linspace(start, end, width + 1) / bin_sec).astype(np.int64)
+        lo = np.clip(edges[:-1], 0, len(peaks))
+        hi = np.clip(np.maximum(edges[1:], edges[:-1] + 1), 0, len(peaks))
+        valid = hi > lo
+        if not valid.any():
+            return out
+
+        # 相邻列的区间首尾相接（同一峰值被放大到多列时起点相同），
+        # 因此一次 reduceat 即可得到每列的 min/max
+        first, last = int(lo[valid].min()), int(hi[valid].max())
+        window = np.asarray(peaks[first:last], dtype=np.float32) / 32768.0
+        starts = lo[valid] - first
+        mins = np.minimum.reduceat(window[:, 0], starts)
+        maxs = np.maximum.reduceat(window[:, 1], starts)
+
+        out[valid, 0] = mins
+        out[valid, 1] = maxs
+        return out
+
+
+class WaveformStore:
+    """按音频指纹缓存的峰值金字塔"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else (
+            Path.home() / "Voxplore" / "cache" / "waveforms"
+        )
+        self._loaded: dict = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _key(self, audio_path: str) -> Tuple[str, Path]:
+        from app.services.video_tools.thumbnail_service import file_fingerprint
+        fingerprint = file_fingerprint(audio_path)
+        return fingerprint, self.cache_dir / fingerprint[:2] / fingerprint
+
+    def load(self, audio_path: str) -> Optional[WaveformPeaks]:
+        """获取峰值金字塔（首次会解码并写入缓存），失败返回 None"""
+        try:
+            fingerprint, base = self._key(audio_path)
+        except OSError as e:
+            logger.warning(f"读取音频失败 {audio_path}: {e}")
+            return None
+
+        with self._lock:
+            peaks = self._loaded.get(fingerprint)
+        if peaks is not None:
+            return peaks
+
+        try:
+            if base.with_suffix(".json").exists():
+                peaks = WaveformPeaks.load(str(base))
+            else:
+                WaveformPeaks.decode(audio_path).save(str(base))
+                peaks = WaveformPeaks.load(str(base))
+        except (OSError, RuntimeError, ValueError, KeyError) as e:
+            logger.warning(f"生成波形失败 {audio_path}: {e}")
+            return None
+
+        with self._lock:
+            self._loaded[fingerprint] = peaks
+        return peaks
+
+    def submit(self, audio_path: str) -> Future:
+        """后台加载峰值金字塔（时间轴用，不阻塞 GUI 线程）"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="waveform")
+            executor = self._executor
+        return executor.submit(self.load, audio_path)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_store: Optional[WaveformStore] = None
+_store_lock = threading.Lock()
+
+
+def get_waveform_store() -> WaveformStore:
+    """获取全局波形缓存"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WaveformStore()
+    return _store
+
+
+__all__ = ["WaveformPeaks", "WaveformStore", "get_waveform_store"]
@@ -224,20 +224,18 @@ class BatchExportManager:
         try:
             logger.info(f"开始导出: {task.name} → {task.output_path}")
 
-            # 加载项目数据
-            import json
+            # 加载项目数据（经 JournaledStore 读取，包含尚未合并进快照的保存日志）
             from pathlib import Path
+            from ...core.project_journal import get_store
 
             project_path = Path(task.project_path)
             if project_path.exists() and project_path.suffix == '.json':
-                with open(project_path, 'r', encoding='utf-8') as f:
-                    project_data = json.load(f)
+                project_data = get_store(str(project_path)).load()
             else:
                 # 如果是目录，尝试读取 project.json
                 proj_file = project_path / 'project.json'
                 if proj_file.exists():
-                    with open(proj_file, 'r', encoding='utf-8') as f:
-                        project_data = json.load(f)
+                    project_data = get_store(str(proj_file)).load()
                 else:
                     project_data = {"source": str(project_path)}
 
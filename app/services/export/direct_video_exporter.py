@@ -33,6 +33,7 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 from ..video_tools.ffmpeg_tool import FFmpegTool
+from ..video_tools.smart_cut import SMART_CUT_CODECS, SOURCE_ENCODERS, smart_cut
 logger = logging.getLogger(__name__)
 
 
@@ -286,6 +287,15 @@ class DirectVideoExporter:
         config: VideoExportConfig,
     ) -> None:
         """提取视频片段"""
+        # 源视频编码与分辨率已符合导出配置时，只用软件编码器重编码首尾 GOP；
+        # 开启硬件加速时硬件编码器无法与源参数对齐，走整段重编码
+        if config.hw_accel == HWAccel.NONE and self._matches_source(video_path, config):
+            audio_args = ['-c:a', 'aac', '-b:a', config.audio_bitrate, '-ar', '48000']
+            if smart_cut(video_path, output_path, start, start + duration, audio_args,
+                         crf=config.crf, preset=config.preset):
+                return
+            logger.debug(f"smart cut 失败，回退到整段重编码: {video_path}")
+
         cmd = [
             'ffmpeg', '-y',
             '-ss', str(start),
@@ -307,6 +317,19 @@ class DirectVideoExporter:
 
         subprocess.run(cmd, capture_output=True)
 
+    def _matches_source(self, video_path: str, config: VideoExportConfig) -> bool:
+        """源视频是否与导出配置的编码、分辨率、像素格式一致且支持 smart cut（可流复制）"""
+        info = FFmpegTool.probe(video_path)
+        video = info.video if info else None
+        if video is None:
+            return False
+        return (
+            video.codec_name in SMART_CUT_CODECS
+            and SOURCE_ENCODERS.get(video.codec_name) == config.video_codec.value
+            and (video.width, video.height) == (config.resolution.width, config.resolution.height)
+            and video.pix_fmt == 'yuv420p'
+        )
+
     def _merge_video_audio(
         self,
         video_path: str,
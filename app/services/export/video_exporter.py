@@ -226,30 +226,12 @@ class VideoExporter:
         output = Path(output_path)
         output.parent.mkdir(parents=True, exist_ok=True)
 
-        # 创建文件列表
-        list_file = output.parent / "concat_list.txt"
-        with open(list_file, 'w') as f:
-            for path in video_paths:
-                f.write(f"file '{path}'\n")
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', str(list_file),
-            '-c', 'copy',
-            str(output)
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        # 清理
-        list_file.unlink(missing_ok=True)
-
-        if result.returncode != 0:
+        # 编码一致的片段直接复制，只归一化不兼容的片段
+        errors: List[str] = []
+        if not FFmpegTool.concat_videos(video_paths, str(output), method="auto", errors=errors):
             raise ExportError(
                 message="拼接失败",
-                details={"stderr": result.stderr}
+                details={"stderr": "\n".join(errors), "inputs": video_paths}
             )
 
         return str(output)
@@ -5,6 +5,8 @@
 - enums.py        工作流枚举（WorkflowStep/CreationMode/WorkflowStatus/ExportFormat）
 - models.py       工作流数据模型（VideoSource/ScriptData/TimelineData 等）
 - project_manager.py  项目管理
+- analysis_executor.py  CPU 密集分析阶段的进程池
+- batch_scheduler.py  多视频批量分析调度
 """
 
 from .enums import (
@@ -36,6 +38,19 @@ from .project_manager import (
     load_project,
 )
 
+from .analysis_executor import (
+    AnalysisExecutor,
+    AnalysisFuture,
+    get_analysis_executor,
+)
+
+from .batch_scheduler import (
+    AnalysisStage,
+    VideoAnalysis,
+    BatchAnalysisScheduler,
+    default_stages,
+)
+
 __all__ = [
     # 枚举
     "WorkflowStep",
@@ -60,4 +75,13 @@ __all__ = [
     "VoxploreProject",
     "save_project",
     "load_project",
+    # 分析进程池
+    "AnalysisExecutor",
+    "AnalysisFuture",
+    "get_analysis_executor",
+    # 批量分析调度
+    "AnalysisStage",
+    "VideoAnalysis",
+    "BatchAnalysisScheduler",
+    "default_stages",
 ]
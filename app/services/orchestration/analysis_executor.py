@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析进程池 (Analysis Executor)
+
+场景检测、节拍检测、librosa 声学分析、智能分组都是 CPU 密集型阶段，
+放在线程池里跑时 numpy/librosa 之间的 Python 胶水代码被 GIL 串行化。
+本模块把这些阶段放到常驻进程池中执行：
+
+- 工作进程启动时预先导入重型依赖（numpy / librosa / scenedetect 等），首个任务不再付导入开销
+- 大数组结果通过共享内存回传，主进程直接得到指向共享内存的 ndarray，无需反序列化拷贝
+- 多个视频可以在多个核心上真正并行分析
+
+使用示例:
+    executor = get_analysis_executor()
+    executor.warm_up()
+
+    future = executor.submit("scenes", "a.mp4")          # 内置阶段名
+    beats = executor.run("beats", "music.mp3")            # 阻塞等待
+    results = executor.map("scenes", ["a.mp4", "b.mp4"])  # 多视频并行
+
+    # 任意模块级函数也可以作为阶段（需能被 pickle 按引用传递）
+    future = executor.submit(my_module.compute_features, path)
+"""
+
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 超过该字节数的 ndarray 走共享内存，其余随结果一起 pickle
+SHM_THRESHOLD = 1 << 20
+
+# 工作进程启动时预先导入的模块（缺失的模块跳过）
+DEFAULT_PRELOAD: Tuple[str, ...] = (
+    "numpy",
+    "scipy",
+    "librosa",
+    "scenedetect",
+    "app.services.ai.scene_analyzer",
+    "app.services.audio.beat_detector",
+    "app.services.ai.sensevoice_provider",
+    "app.services.video.grouping.smart_grouper",
+)
+
+
+# =============================================================================
+# 共享内存数组传输
+# =============================================================================
+
+class SharedArrayRef(NamedTuple):
+    """共享内存中的数组描述（替代数组本身随结果 pickle）"""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _export_arrays(obj: Any, threshold: int) -> Any:
+    """工作进程侧：把结果中的大数组复制到共享内存，替换为 SharedArrayRef"""
+    if isinstance(obj, np.ndarray):
+        if obj.nbytes < threshold or obj.dtype.hasobject:
+            return obj
+        shm = shared_memory.SharedMemory(create=True, size=obj.nbytes)
+        try:
+            np.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf)[...] = obj
+        finally:
+            shm.close()
+        return SharedArrayRef(shm.name, obj.shape, obj.dtype.str)
+    if isinstance(obj, dict):
+        return {k: _export_arrays(v, threshold) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_export_arrays(v, threshold) for v in obj]
+    if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+        return tuple(_export_arrays(v, threshold) for v in obj)
+    return obj
+
+
+def _release_segment(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # 仍有视图引用该内存；映射随对象回收一起释放
+        pass
+
+
+def _attach_array(ref: SharedArrayRef) -> np.ndarray:
+    """主进程侧：映射共享内存为 ndarray（零拷贝）"""
+    shm = shared_memory.SharedMemory(name=ref.name)
+    # 名字立即解除，映射在最后一个视图回收时释放
+    shm.unlink()
+    array = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf)
+    weakref.finalize(array, _release_segment, shm)
+    return array
+
+
+def _import_arrays(obj: Any) -> Any:
+    """主进程侧：把 SharedArrayRef 还原为 ndarray"""
+    if isinstance(obj, SharedArrayRef):
+        return _attach_array(obj)
+    if isinstance(obj, dict):
+        return {k: _import_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_import_arrays(v) for v in obj]
+    if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+        return tuple(_import_arrays(v) for v in obj)
+    return obj
+
+
+# =============================================================================
+# 工作进程
+# =============================================================================
+
+# 工作进程内复用的对象（如 SenseVoiceProvider）
+_worker_instances: Dict[Tuple, Any] = {}
+
+
+def _init_worker(preload: Sequence[str]) -> None:
+    """工作进程初始化：预先导入重型依赖"""
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.debug(f"预加载 {module} 失败: {e}")
+
+
+def _worker_instance(cls: type, *args) -> Any:
+    """获取工作进程内缓存的实例"""
+    key = (cls, args)
+    instance = _worker_instances.get(key)
+    if instance is None:
+        instance = cls(*args)
+        _worker_instances[key] = instance
+    return instance
+
+
+def _run_stage(func: Callable, args: tuple, kwargs: dict, threshold: int) -> Any:
+    """在工作进程中执行阶段，并导出大数组"""
+    return _export_arrays(func(*args, **kwargs), threshold)
+
+
+def _worker_ping(hold: float) -> int:
+    """占住工作进程片刻，让预热请求分散到每个进程"""
+    time.sleep(hold)
+    return os.getpid()
+
+
+# =============================================================================
+# 内置分析阶段（在工作进程中执行）
+# =============================================================================
+
+def _stage_scenes(video_path: str, config=None):
+    """场景检测"""
+    from app.services.ai.scene_analyzer import SceneAnalyzer
+    return SceneAnalyzer(config).analyze(video_path)
+
+
+def _stage_scene_importance(video_path: str, config=None):
+    """场景检测 + 重要性评分"""
+    from app.services.ai.scene_analyzer import SceneAnalyzerV2
+    return SceneAnalyzerV2(config).analyze_with_importance(video_path)
+
+
+def _stage_beats(audio_path: str, extract_sections: bool = True, hop_length: int = 512):
+    """节拍 / BPM / 段落分析"""
+    from app.services.audio.beat_detector import BeatDetector
+    return BeatDetector(hop_length).analyze(audio_path, extract_sections=extract_sections)
+
+
+def _sensevoice():
+    from app.services.ai.sensevoice_provider import SenseVoiceProvider
+    return _worker_instance(SenseVoiceProvider)
+
+
+def _stage_voice_emotions(audio_path: str, segment_duration: float = 3.0):
+    """语音情感分析（librosa 声学特征）"""
+    return _sensevoice().extract_emotions_librosa(audio_path, segment_duration)
+
+
+def _stage_diarize(audio_path: str, num_speakers: Optional[int] = None):
+    """说话人分离（librosa MFCC 聚类）"""
+    return _sensevoice().diarize_librosa(audio_path, num_speakers)
+
+
+def _stage_audio_events(audio_path: str, energy_threshold: float = 0.05):
+    """音频事件检测（静音 / 能量爆发）"""
+    return _sensevoice().detect_audio_events(audio_path, energy_threshold)
+
+
+def _stage_audio_features(audio_path: str, sample_rate: int = 22050,
+                          hop_length: int = 512) -> Dict[str, Any]:
+    """
+    帧级声学特征（RMS 能量、onset 强度）
+
+    一小时音频约 15 万帧，数组经共享内存回传。
+    """
+    import librosa
+    y, sr = librosa.load(audio_path, sr=sample_rate, mono=True)
+    rms = librosa.feature.rms(y=y, hop_length=hop_length)[0]
+    onset = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    return {
+        "sample_rate": sr,
+        "hop_length": hop_length,
+        "duration": len(y) / sr,
+        "times": librosa.times_like(rms, sr=sr, hop_length=hop_length),
+        "rms": rms,
+        "onset_strength": onset,
+    }
+
+
+def _stage_group_videos(video_paths: List[str], **grouper_kwargs):
+    """多视频智能分组"""
+    from app.services.video.grouping.smart_grouper import SmartGrouper
+    return SmartGrouper(**grouper_kwargs).group_videos(video_paths)
+
+
+# 阶段名 -> 模块级函数（函数按引用 pickle，重型导入在工作进程内完成）
+STAGES: Dict[str, Callable] = {
+    "scenes": _stage_scenes,
+    "scene_importance": _stage_scene_importance,
+    "beats": _stage_beats,
+    "voice_emotions": _stage_voice_emotions,
+    "diarize": _stage_diarize,
+    "audio_events": _stage_audio_events,
+    "audio_features": _stage_audio_features,
+    "group_videos": _stage_group_videos,
+}
+
+
+# =============================================================================
+# 执行器
+# =============================================================================
+
+class AnalysisFuture(Future):
+    """
+    分析任务的 Future
+
+    结果到达时立即映射共享内存（及时解除共享内存名），取消操作转发给进程池任务。
+    """
+
+    def __init__(self, inner: Future):
+        super().__init__()
+        self._inner = inner
+        inner.add_done_callback(self._on_inner_done)
+
+    def cancel(self) -> bool:
+        # 进程池任务取消成功时，回调会把本 Future 标记为已取消
+        return self._inner.cancel() or self.cancelled()
+
+    def running(self) -> bool:
+        return self._inner.running() and not self.done()
+
+    def _on_inner_done(self, inner: Future) -> None:
+        if inner.cancelled():
+            Future.cancel(self)
+            self.set_running_or_notify_cancel()
+            return
+        if not self.set_running_or_notify_cancel():
+            return
+        exc = inner.exception()
+        if exc is not None:
+            self.set_exception(exc)
+            return
+        try:
+            self.set_result(_import_arrays(inner.result()))
+        except Exception as e:
+            self.set_exception(e)
+
+
+class AnalysisExecutor:
+    """
+    CPU 密集型分析阶段的常驻进程池
+
+    - 进程池懒创建，默认使用 spawn（与 Qt 等多线程宿主进程安全共存）
+    - 工作进程异常退出时，下一次提交自动重建进程池
+    - 进度回调无法跨进程传递，需要细粒度进度时请在调用方按阶段汇报
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        shm_threshold: int = SHM_THRESHOLD,
+        mp_context: str = "spawn",
+    ):
+        """
+        Args:
+            max_workers: 工作进程数，默认 CPU 核数
+            preload: 工作进程启动时预先导入的模块
+            shm_threshold: 超过该字节数的 ndarray 结果经共享内存回传
+            mp_context: multiprocessing 启动方式
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.preload = tuple(preload)
+        self.shm_threshold = shm_threshold
+        self._mp_context = mp_context
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self._mp_context),
+                        initializer=_init_worker,
+                        initargs=(self.preload,),
+                    )
+        return self._executor
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("分析进程池已损坏，重建进程池")
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def resolve(stage: Union[str, Callable]) -> Callable:
+        """解析阶段名或可调用对象"""
+        if callable(stage):
+            return stage
+        try:
+            return STAGES[stage]
+        except KeyError:
+            raise ValueError(f"未知分析阶段: {stage}") from None
+
+    def submit(self, stage: Union[str, Callable], *args, **kwargs) -> AnalysisFuture:
+        """
+        提交分析阶段
+
+        Args:
+            stage: 内置阶段名（见 STAGES）或模块级函数
+            *args, **kwargs: 阶段参数（需可 pickle）
+
+        Returns:
+            AnalysisFuture，结果中的大数组为共享内存视图
+        """
+        func = self.resolve(stage)
+        pool = self._pool()
+        try:
+            inner = pool.submit(_run_stage, func, args, kwargs, self.shm_threshold)
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            inner = self._pool().submit(_run_stage, func, args, kwargs, self.shm_threshold)
+        return AnalysisFuture(inner)
+
+    def run(self, stage: Union[str, Callable], *args, **kwargs) -> Any:
+        """提交并等待结果"""
+        return self.submit(stage, *args, **kwargs).result()
+
+    def map(self, stage: Union[str, Callable], items: Iterable[Any], **kwargs) -> List[Any]:
+        """
+        对多个输入并行执行同一阶段（如多个视频的场景检测）
+
+        Returns:
+            与输入顺序一致的结果列表
+        """
+        futures = [self.submit(stage, item, **kwargs) for item in items]
+        return [future.result() for future in futures]
+
+    def warm_up(self, timeout: float = 60.0) -> int:
+        """
+        启动全部工作进程并完成预加载
+
+        进程池按需启动工作进程，这里逐轮提交短暂占用进程的探测任务，
+        直到每个进程都回应过（或超时）。
+
+        Returns:
+            已就绪的工作进程数（超时时可能少于 max_workers）
+        """
+        pool = self._pool()
+        deadline = time.monotonic() + timeout
+        pids = set()
+        while len(pids) < self.max_workers and time.monotonic() < deadline:
+            futures = [pool.submit(_worker_ping, 0.05) for _ in range(self.max_workers)]
+            for future in futures:
+                try:
+                    pids.add(future.result(timeout=max(0.0, deadline - time.monotonic())))
+                except FutureTimeoutError:
+                    logger.warning(f"分析进程预热超时，已就绪 {len(pids)}/{self.max_workers}")
+                    return len(pids)
+        return len(pids)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """关闭进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self) -> "AnalysisExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+_executor: Optional[AnalysisExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """
+    获取全局分析进程池
+
+    工作进程数可用环境变量 VOXPLORE_ANALYSIS_WORKERS 指定，默认 CPU 核数。
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = os.environ.get("VOXPLORE_ANALYSIS_WORKERS")
+                _executor = AnalysisExecutor(max_workers=int(workers) if workers else None)
+    return _executor
+
+
+__all__ = [
+    "SHM_THRESHOLD",
+    "DEFAULT_PRELOAD",
+    "STAGES",
+    "SharedArrayRef",
+    "AnalysisFuture",
+    "AnalysisExecutor",
+    "get_analysis_executor",
+]
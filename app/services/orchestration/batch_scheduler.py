@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量分析调度器 (Batch Analysis Scheduler)
+
+「批量上传 → 场景理解 → 智能分组 → 叙事选段」流程中，每个视频都要经过
+场景检测、第一人称提取、情感峰值检测等阶段。逐个视频串行执行时，
+解码、远程视觉调用与 CPU 计算互相等待，机器大部分时间是空闲的。
+
+本调度器为每个视频构建阶段 DAG，跨视频交错执行：
+- 每个阶段声明占用的资源（decode 解码槽 / api 远程调用并发 / cpu 计算进程），按资源限流
+- I/O 型阶段在线程中执行，CPU 型阶段交给 AnalysisExecutor 进程池
+- 同一资源上优先调度靠前的视频，单个视频的结果尽早完成并立即流式返回
+- 某阶段失败只跳过依赖它的阶段，不影响其它视频
+
+使用示例:
+    scheduler = BatchAnalysisScheduler(default_stages(), limits={"api": 8})
+
+    for analysis in scheduler.run(video_paths):        # 按完成顺序返回
+        if analysis.ok:
+            peaks = analysis.results["emotion_peaks"]
+
+    # 也可以通过 TaskManager 在后台执行，进度回调签名一致（场景理解步骤即如此）
+    task_manager.submit("batch", "批量分析", scheduler.analyze, video_paths,
+                        progress_callback=on_progress)
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .analysis_executor import AnalysisExecutor, _worker_instance, get_analysis_executor
+
+logger = logging.getLogger(__name__)
+
+
+# 默认资源上限（cpu 默认取分析进程池的进程数）
+DEFAULT_LIMITS: Dict[str, int] = {
+    "decode": 2,
+    "api": 4,
+}
+
+
+@dataclass
+class AnalysisStage:
+    """
+    单个分析阶段
+
+    func 为可调用对象时以 func(video_path, deps, **options) 调用，deps 为 {依赖阶段名: 结果}；
+    in_process 阶段的 func 也可以是 AnalysisExecutor 的内置阶段名，此时以
+    (video_path, **options) 调用。
+    """
+    name: str
+    func: Union[str, Callable]
+    resource: str = "cpu"
+    depends_on: Tuple[str, ...] = ()
+    in_process: bool = False            # 是否在分析进程池中执行
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class VideoAnalysis:
+    """单个视频的分析结果"""
+    video_path: str
+    index: int                                             # 在输入列表中的位置
+    results: Dict[str, Any] = field(default_factory=dict)  # 阶段名 -> 结果
+    errors: Dict[str, str] = field(default_factory=dict)   # 阶段名 -> 错误信息
+    skipped: List[str] = field(default_factory=list)       # 因依赖失败或取消未执行的阶段
+    elapsed: float = 0.0                                   # 首个阶段开始到全部结束（秒）
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.skipped
+
+
+def _detect_emotion_peaks(video_path: str, deps: Dict[str, Any], detector=None):
+    """情感峰值检测（在工作进程中执行，默认检测器按进程缓存）"""
+    if detector is None:
+        from app.services.video.extraction.emotion_peak_detector import EmotionPeakDetector
+        detector = _worker_instance(EmotionPeakDetector)
+    return detector.detect_peaks(deps["first_person"])
+
+
+def default_stages(
+    scene_config=None,
+    extractor=None,
+    detector=None,
+) -> List[AnalysisStage]:
+    """
+    README 流程的默认阶段
+
+    - scenes: 场景检测（解码密集，进程池执行，占 decode 槽）
+    - first_person: 第一人称片段提取（逐帧视觉模型调用，占 api 并发）
+    - emotion_peaks: 情感峰值检测（依赖 first_person，进程池执行，占 cpu）
+
+    Args:
+        scene_config: SceneAnalyzer 的 AnalysisConfig
+        extractor: FirstPersonExtractor，默认新建（已配置视觉模型时经
+            VisionAnalyzerFactory.analyze_many 批量分析采样帧）
+        detector: EmotionPeakDetector（需可 pickle），默认在工作进程中新建
+    """
+    if extractor is None:
+        from app.services.video.extraction.first_person_extractor import (
+            FirstPersonExtractor, default_vision_model,
+        )
+        extractor = FirstPersonExtractor(vision_model=default_vision_model())
+
+    return [
+        AnalysisStage("scenes", "scenes", resource="decode", in_process=True,
+                      options={"config": scene_config}),
+        AnalysisStage("first_person",
+                      lambda path, deps: extractor.extract_first_person_segments(path),
+                      resource="api"),
+        AnalysisStage("emotion_peaks", _detect_emotion_peaks, resource="cpu",
+                      depends_on=("first_person",), in_process=True,
+                      options={"detector": detector} if detector is not None else {}),
+    ]
+
+
+class BatchAnalysisScheduler:
+    """
+    多视频批量分析调度器
+
+    调度在调用 run() 的线程中进行；同一实例同一时间只应运行一个批次。
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[AnalysisStage],
+        limits: Optional[Dict[str, int]] = None,
+        executor: Optional[AnalysisExecutor] = None,
+    ):
+        """
+        Args:
+            stages: 每个视频要执行的阶段
+            limits: 资源并发上限，覆盖 DEFAULT_LIMITS（cpu 默认取进程池进程数）
+            executor: 执行 in_process 阶段的进程池，默认全局分析进程池
+        """
+        self._stages = self._sort_stages(stages)
+        self._order = {stage.name: i for i, stage in enumerate(self._stages)}
+        self._dependents: Dict[str, List[str]] = {stage.name: [] for stage in self._stages}
+        for stage in self._stages:
+            for dep in stage.depends_on:
+                self._dependents[dep].append(stage.name)
+
+        self._executor = executor
+        if self._executor is None and any(stage.in_process for stage in self._stages):
+            self._executor = get_analysis_executor()
+
+        cpu_default = self._executor.max_workers if self._executor else (os.cpu_count() or 1)
+        self.limits = {**DEFAULT_LIMITS, "cpu": cpu_default, **(limits or {})}
+        for stage in self._stages:
+            if self.limits.get(stage.resource, 0) < 1:
+                raise ValueError(f"阶段 {stage.name} 的资源 {stage.resource} 没有可用配额")
+
+        self._cancelled = threading.Event()
+
+    @staticmethod
+    def _sort_stages(stages: Sequence[AnalysisStage]) -> List[AnalysisStage]:
+        """按依赖拓扑排序（保持声明顺序），校验重名、未知依赖和环"""
+        by_name: Dict[str, AnalysisStage] = {}
+        for stage in stages:
+            if stage.name in by_name:
+                raise ValueError(f"阶段重名: {stage.name}")
+            by_name[stage.name] = stage
+        for stage in stages:
+            for dep in stage.depends_on:
+                if dep not in by_name:
+                    raise ValueError(f"阶段 {stage.name} 依赖未知阶段: {dep}")
+
+        ordered: List[AnalysisStage] = []
+        placed = set()
+        remaining = list(stages)
+        while remaining:
+            ready = [s for s in remaining if all(d in placed for d in s.depends_on)]
+            if not ready:
+                raise ValueError(f"阶段依赖存在环: {[s.name for s in remaining]}")
+            for stage in ready:
+                ordered.append(stage)
+                placed.add(stage.name)
+            remaining = [s for s in remaining if s.name not in placed]
+        return ordered
+
+    @property
+    def stages(self) -> List[AnalysisStage]:
+        return list(self._stages)
+
+    def cancel(self) -> None:
+        """取消当前批次：不再启动新阶段，已在执行的阶段完成后结束"""
+        self._cancelled.set()
+
+    def analyze(
+        self,
+        video_paths: Sequence[str],
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+    ) -> List[VideoAnalysis]:
+        """执行批量分析，返回与输入顺序一致的结果"""
+        results = list(self.run(video_paths, progress_callback))
+        results.sort(key=lambda a: a.index)
+        return results
+
+    def run(
+        self,
+        video_paths: Sequence[str],
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+    ) -> Iterator[VideoAnalysis]:
+        """
+        执行批量分析，按视频完成顺序流式返回结果
+
+        Args:
+            video_paths: 视频路径列表
+            progress_callback: 进度回调 (0-100, 说明)
+        """
+        self._cancelled.clear()
+        videos = [VideoAnalysis(video_path=path, index=i) for i, path in enumerate(video_paths)]
+        if not videos:
+            return
+
+        stage_count = len(self._stages)
+        total = len(videos) * stage_count
+        finished = 0
+        remaining = [stage_count] * len(videos)
+        started: Dict[int, float] = {}
+        waiting = [{s.name: len(s.depends_on) for s in self._stages} for _ in videos]
+
+        # 每种资源一个就绪堆：(视频序号, 阶段序号)
+        ready: Dict[str, List[Tuple[int, int]]] = {name: [] for name in self.limits}
+        used: Dict[str, int] = {name: 0 for name in self.limits}
+        in_flight: Dict[Future, Tuple[int, AnalysisStage]] = {}
+
+        for vi in range(len(videos)):
+            for si, stage in enumerate(self._stages):
+                if not stage.depends_on:
+                    heapq.heappush(ready[stage.resource], (vi, si))
+
+        thread_workers = sum(
+            self.limits[r] for r in {s.resource for s in self._stages if not s.in_process}
+        )
+        io_pool = ThreadPoolExecutor(
+            max_workers=max(1, thread_workers), thread_name_prefix="BatchAnalysis"
+        ) if thread_workers else None
+
+        def settle(vi: int) -> Optional[VideoAnalysis]:
+            nonlocal finished
+            finished += 1
+            remaining[vi] -= 1
+            if remaining[vi]:
+                return None
+            video = videos[vi]
+            if vi in started:
+                video.elapsed = time.perf_counter() - started[vi]
+            return video
+
+        def skip(vi: int, name: str) -> List[VideoAnalysis]:
+            """跳过某阶段及其所有下游阶段"""
+            done = []
+            stack = [name]
+            while stack:
+                current = stack.pop()
+                if current in videos[vi].skipped:
+                    continue
+                videos[vi].skipped.append(current)
+                video = settle(vi)
+                if video:
+                    done.append(video)
+                stack.extend(self._dependents[current])
+            return done
+
+        def report(message: str) -> None:
+            if progress_callback:
+                try:
+                    progress_callback(finished * 100.0 / total, message)
+                except Exception as e:
+                    logger.debug(f"进度回调失败: {e}")
+
+        try:
+            while in_flight or any(ready.values()):
+                if self._cancelled.is_set():
+                    for resource, heap in ready.items():
+                        for vi, si in heap:
+                            yield from self._sorted(skip(vi, self._stages[si].name))
+                        heap.clear()
+                    if not in_flight:
+                        break
+                else:
+                    for resource, heap in ready.items():
+                        while heap and used[resource] < self.limits[resource]:
+                            vi, si = heapq.heappop(heap)
+                            stage = self._stages[si]
+                            started.setdefault(vi, time.perf_counter())
+                            future = self._submit(stage, videos[vi], io_pool)
+                            used[resource] += 1
+                            in_flight[future] = (vi, stage)
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                completed: List[VideoAnalysis] = []
+                for future in done:
+                    vi, stage = in_flight.pop(future)
+                    used[stage.resource] -= 1
+                    video = videos[vi]
+                    try:
+                        video.results[stage.name] = future.result()
+                    except Exception as e:
+                        logger.warning(f"{video.video_path} 阶段 {stage.name} 失败: {e}")
+                        video.errors[stage.name] = str(e) or type(e).__name__
+                        finished_video = settle(vi)
+                        if finished_video:
+                            completed.append(finished_video)
+                        for dependent in self._dependents[stage.name]:
+                            completed.extend(skip(vi, dependent))
+                        continue
+
+                    for dependent in self._dependents[stage.name]:
+                        waiting[vi][dependent] -= 1
+                        if waiting[vi][dependent] == 0:
+                            heapq.heappush(ready[self._stages[self._order[dependent]].resource],
+                                           (vi, self._order[dependent]))
+                    finished_video = settle(vi)
+                    if finished_video:
+                        completed.append(finished_video)
+
+                report(f"已完成 {finished}/{total} 个阶段")
+                yield from self._sorted(completed)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if io_pool is not None:
+                io_pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _sorted(videos: List[VideoAnalysis]) -> List[VideoAnalysis]:
+        return sorted(videos, key=lambda a: a.index)
+
+    def _submit(self, stage: AnalysisStage, video: VideoAnalysis,
+                io_pool: Optional[ThreadPoolExecutor]) -> Future:
+        deps = {name: video.results[name] for name in stage.depends_on}
+        if stage.in_process:
+            if isinstance(stage.func, str):
+                return self._executor.submit(stage.func, video.video_path, **stage.options)
+            return self._executor.submit(stage.func, video.video_path, deps, **stage.options)
+        return io_pool.submit(stage.func, video.video_path, deps, **stage.options)
+
+
+__all__ = [
+    "DEFAULT_LIMITS",
+    "AnalysisStage",
+    "VideoAnalysis",
+    "BatchAnalysisScheduler",
+    "default_stages",
+]
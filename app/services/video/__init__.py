@@ -34,6 +34,7 @@ from .models.perspective_models import (
     ClipSegment,
     InterleaveTimeline,
     InterleaveDecision,
+    InterleaveChange,
     InterleaveMode,
     TransitionType,
 )
@@ -82,6 +83,7 @@ __all__ = [
     "ClipSegment",
     "InterleaveTimeline",
     "InterleaveDecision",
+    "InterleaveChange",
     "InterleaveMode",
     "TransitionType",
     # Phase 3 新增（extraction/）
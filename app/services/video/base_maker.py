@@ -12,6 +12,8 @@ from typing import Optional, List, Dict, Callable, TypeVar, Generic
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 
+from app.utils.task_manager import task_manager
+from app.utils.tracing import tracer
 from ..ai.scene_analyzer import SceneAnalyzer, SceneInfo
 from ..export.jianying_exporter import JianyingExporter
 from ..export.jianying_models import (
@@ -95,12 +97,19 @@ class BaseVideoMaker(ABC, Generic[T], ProgressMixin):
         project.source_video = str(source_path.absolute())
         project.output_dir = output_dir or str(source_path.parent / "output")
 
-        # 分析场景
-        project.scenes = self.scene_analyzer.analyze(source_video)
+        # 分析场景（CPU 密集，在分析进程池中执行，不占用 GIL）
+        with tracer.span("analyze_scenes", category="stage", file=source_video) as span:
+            task = task_manager.submit_analysis(
+                f"scenes-{project.id}", "场景分析", "scenes",
+                project.source_video, self.scene_analyzer.config,
+            )
+            project.scenes = task_manager.wait(task.id)
+            span.set(scenes=len(project.scenes))
         project.video_duration = sum(s.duration for s in project.scenes) if project.scenes else 0
 
         return project
 
+    @tracer.traced("export_jianying")
     def export_to_jianying(
         self,
         project: T,
@@ -0,0 +1,52 @@
+"""
+Clip Interval Index
+原片片段区间索引——按时间范围查询重叠的 ClipSegment
+"""
+
+import bisect
+from itertools import accumulate
+from operator import attrgetter
+from typing import Any, Callable, List, Sequence
+
+
+class ClipIntervalIndex:
+    """
+    ClipSegment 的只读区间索引
+
+    片段按 start_time 排序，另存 end_time 的前缀最大值（单调不减）：
+    - start_time < end 的候选是排序后的前缀 [0, hi)
+    - 前缀最大值首次超过 start 的位置 lo 之前不可能有重叠
+    扫描 [lo, hi) 并过滤 end_time > start 即可。场景片段基本不相互重叠，
+    查询为 O(log M + k)。
+
+    返回结果保持片段在原列表中的顺序，与线性扫描完全一致。
+    其他带起止时间的对象（如时间线界面上的片段）可通过 start / end 取值函数建索引。
+    """
+
+    def __init__(self, clips: Sequence[Any],
+                 start: Callable[[Any], float] = attrgetter("start_time"),
+                 end: Callable[[Any], float] = attrgetter("end_time")):
+        self.clips = list(clips)
+        starts = [start(c) for c in self.clips]
+        ends = [end(c) for c in self.clips]
+        order = sorted(range(len(self.clips)), key=starts.__getitem__)
+        self._order = order
+        self._starts = [starts[i] for i in order]
+        self._ends = [ends[i] for i in order]
+        self._max_ends = list(accumulate(self._ends, max))
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def overlapping(self, start: float, end: float) -> List[Any]:
+        """返回满足 clip.start_time < end 且 clip.end_time > start 的片段"""
+        hi = bisect.bisect_left(self._starts, end)
+        lo = bisect.bisect_right(self._max_ends, start, 0, hi)
+        ends = self._ends
+        hits = [self._order[j] for j in range(lo, hi) if ends[j] > start]
+        if len(hits) > 1:
+            hits.sort()
+        return [self.clips[i] for i in hits]
+
+
+__all__ = ["ClipIntervalIndex"]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+情感曲线数值工具（numpy）
+
+EmotionCurveGenerator 与 PipelineIntegrator 共用：
+- step_curve: 片段强度按时长展平为固定采样率的阶梯曲线
+- moving_average: 卷积实现的居中移动均值（边缘按实际窗口内点数取平均）
+- normalize: min-max 归一化到 [0, 1]
+- resample: 重采样到任意时间网格
+
+全部接受 list / ndarray，返回 float64 ndarray；需要列表时调用 .tolist()。
+一小时项目按秒分辨率（3600 点）或 0.1 秒分辨率（36000 点）计算都只需毫秒级。
+"""
+
+from typing import Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def moving_average(values: ArrayLike, window: int) -> np.ndarray:
+    """
+    居中简单移动均值
+
+    第 i 点取 [i - window//2, i + window//2] 内的平均，越界部分不计入，
+    与逐点切片求平均的结果一致。window <= 1 或数据不长于窗口时原样返回。
+    """
+    data = np.asarray(values, dtype=np.float64)
+    if window <= 1 or len(data) <= window:
+        return data.copy()
+
+    kernel = np.ones(2 * (window // 2) + 1)
+    sums = np.convolve(data, kernel, mode="same")
+    counts = np.convolve(np.ones(len(data)), kernel, mode="same")
+    return sums / counts
+
+
+def normalize(values: ArrayLike, eps: float = 1e-6) -> np.ndarray:
+    """min-max 归一化到 [0, 1]；常数曲线返回全 0"""
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return data.copy()
+    low = data.min()
+    span = data.max() - low
+    if span < eps:
+        return np.zeros_like(data)
+    return (data - low) / span
+
+
+def step_curve(durations: ArrayLike, intensities: ArrayLike, rate: float = 10.0) -> np.ndarray:
+    """
+    把每个片段的强度按时长展平为阶梯曲线
+
+    Args:
+        durations: 各片段时长（秒）；<= 0 的片段跳过
+        intensities: 各片段强度
+        rate: 每秒采样点数；每个片段至少占 1 个点
+
+    Returns:
+        依次拼接的采样点（第 k 点对应曲线时间 k / rate）
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    intensities = np.asarray(intensities, dtype=np.float64)
+    keep = durations > 0
+    steps = np.maximum(1, (durations[keep] * rate).astype(np.int64))
+    return np.repeat(intensities[keep], steps)
+
+
+def resample(times: ArrayLike, values: ArrayLike, grid: ArrayLike,
+             method: str = "linear") -> np.ndarray:
+    """
+    把 (times, values) 描述的曲线重采样到 grid 上
+
+    Args:
+        times: 原始采样时间（递增）
+        values: 原始采样值
+        grid: 目标时间点
+        method: "linear" 线性插值；"previous" 取不晚于该时间的最近采样（阶梯曲线用）
+
+    Returns:
+        grid 上的曲线值；超出范围的点取两端值
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    grid = np.asarray(grid, dtype=np.float64)
+    if times.size == 0:
+        return np.zeros_like(grid)
+    if method == "linear":
+        return np.interp(grid, times, values)
+    if method == "previous":
+        idx = np.searchsorted(times, grid, side="right") - 1
+        return values[np.clip(idx, 0, len(values) - 1)]
+    raise ValueError(f"unknown resample method: {method}")
+
+
+__all__ = [
+    "moving_average",
+    "normalize",
+    "step_curve",
+    "resample",
+]
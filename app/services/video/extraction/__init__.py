@@ -6,6 +6,7 @@
 from .first_person_extractor import (
     VideoSegment,
     FirstPersonExtractor,
+    FactoryVisionModel,
     VisionModel,
 )
 
@@ -17,6 +18,7 @@ from .emotion_peak_detector import (
 __all__ = [
     "VideoSegment",
     "FirstPersonExtractor",
+    "FactoryVisionModel",
     "VisionModel",
     "EmotionPeak",
     "EmotionPeakDetector",
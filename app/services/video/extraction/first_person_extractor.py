@@ -9,10 +9,15 @@ FirstPersonExtractor - 第一人称视角提取服务
 3. 提取适合做解说的片段（时序连续、信息完整）
 4. 返回片段列表（含时间戳、置信度）
 
-接口预留：
-- 视觉模型: VisionModel 协议（未来替换为真实 Qwen2.5-VL）
+视觉模型：
+- VisionModel 协议；实现 analyze_frames() 的模型一次分析一段视频的全部采样帧
+- FactoryVisionModel: 经 VisionAnalyzerFactory.analyze_many 并发分析（共享连接池与结果缓存）
+- MockVisionModel: 未配置视觉模型 API Key 时使用
 """
 
+import base64
+import os
+import tempfile
 from dataclasses import dataclass
 from typing import Protocol, runtime_checkable
 import logging
@@ -83,6 +88,85 @@ class MockVisionModel:
             }
 
 
+class FactoryVisionModel:
+    """基于 VisionAnalyzerFactory 的视觉模型（截取采样帧后批量并发分析）"""
+
+    # 截帧宽度（提供者会再按自身的最佳尺寸缩放）
+    FRAME_WIDTH = 768
+
+    def __init__(self, factory):
+        """
+        Args:
+            factory: VisionAnalyzerFactory
+        """
+        self._factory = factory
+
+    def analyze_frame(self, video_path: str, timestamp: float) -> dict:
+        result = self.analyze_frames(video_path, [timestamp])[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def analyze_frames(self, video_path: str, timestamps: list[float]) -> list:
+        """批量分析多帧，返回与 timestamps 一一对应的结果；失败的帧对应异常实例"""
+        from app.services.ai.vision_providers import FIRST_PERSON_ANALYSIS_PROMPT
+
+        images = self._grab_frames(video_path, timestamps)
+        indices = [i for i, image in enumerate(images) if image is not None]
+        analyzed = self._factory.analyze_many(
+            [images[i] for i in indices], FIRST_PERSON_ANALYSIS_PROMPT
+        ) if indices else []
+
+        results: list = [RuntimeError(f"截帧失败 @{t:.1f}s") for t in timestamps]
+        for i, outcome in zip(indices, analyzed):
+            results[i] = outcome if isinstance(outcome, BaseException) else self._to_frame_result(outcome)
+        return results
+
+    def _grab_frames(self, video_path: str, timestamps: list[float]) -> list:
+        """截取各时间点的画面（base64 JPEG），失败为 None"""
+        from app.services.video_tools.ffmpeg_tool import FFmpegTool
+
+        images = []
+        with tempfile.TemporaryDirectory(prefix="voxplore_frames_") as tmp:
+            for i, timestamp in enumerate(timestamps):
+                path = os.path.join(tmp, f"{i:05d}.jpg")
+                if FFmpegTool.generate_thumbnail(video_path, path, timestamp=timestamp,
+                                                 width=self.FRAME_WIDTH, height=-2) \
+                        and os.path.exists(path):
+                    with open(path, "rb") as f:
+                        images.append(base64.b64encode(f.read()).decode())
+                else:
+                    images.append(None)
+        return images
+
+    @staticmethod
+    def _to_frame_result(data: dict) -> dict:
+        """FIRST_PERSON_ANALYSIS_PROMPT 的返回转成 VisionModel 的结果格式"""
+        try:
+            confidence = min(max(float(data.get("first_person", 0)) / 100.0, 0.0), 1.0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        return {
+            "is_first_person": confidence >= 0.5,
+            "confidence": confidence,
+            "description": data.get("first_person_hook") or data.get("description", ""),
+        }
+
+
+def default_vision_model() -> VisionModel:
+    """已配置视觉模型 API Key 时使用 FactoryVisionModel，否则使用 Mock"""
+    try:
+        from app.services.ai.llm_manager import load_llm_config
+        from app.services.ai.vision_providers import VisionAnalyzerFactory
+        factory = VisionAnalyzerFactory(load_llm_config())
+    except Exception as e:
+        logger.debug(f"Vision factory unavailable, using mock model: {e}")
+        return MockVisionModel()
+    if factory.get_provider() is None:
+        return MockVisionModel()
+    return FactoryVisionModel(factory)
+
+
 class FirstPersonExtractor:
     """第一人称视角提取器"""
 
@@ -135,23 +219,40 @@ class FirstPersonExtractor:
         if duration <= 0:
             return []
 
-        # 逐帧分析
-        frame_results = []
+        # 采样时间点
+        timestamps = []
         timestamp = 0.0
-        frame_errors = 0
         while timestamp < duration:
+            timestamps.append(timestamp)
+            timestamp += self._frame_interval
+
+        # 逐帧分析（支持批量的模型一次提交全部帧，并发请求；
+        # 按类型查找方法，避免 Mock 对象的动态属性被误判为支持批量）
+        if callable(getattr(type(self._vision_model), "analyze_frames", None)):
             try:
-                result = self._vision_model.analyze_frame(video_path, timestamp)
-                frame_results.append((timestamp, result))
+                outcomes = self._vision_model.analyze_frames(video_path, timestamps)
             except Exception as e:
+                outcomes = [e] * len(timestamps)
+        else:
+            outcomes = []
+            for timestamp in timestamps:
+                try:
+                    outcomes.append(self._vision_model.analyze_frame(video_path, timestamp))
+                except Exception as e:
+                    outcomes.append(e)
+
+        frame_results = []
+        frame_errors = 0
+        for timestamp, result in zip(timestamps, outcomes):
+            if isinstance(result, BaseException):
                 frame_errors += 1
-                logger.warning(f"Frame analysis failed at {timestamp}s: {e}")
-                frame_results.append((timestamp, {
+                logger.warning(f"Frame analysis failed at {timestamp}s: {result}")
+                result = {
                     "is_first_person": False,
                     "confidence": 0.0,
                     "description": "",
-                }))
-            timestamp += self._frame_interval
+                }
+            frame_results.append((timestamp, result))
 
         if frame_errors > 0:
             logger.warning(f"Frame analysis errors: {frame_errors}/{int(duration / self._frame_interval) + 1}")
@@ -282,4 +383,6 @@ __all__ = [
     "VideoSegment",
     "VisionModel",
     "MockVisionModel",
+    "FactoryVisionModel",
+    "default_vision_model",
 ]
\ No newline at end of file
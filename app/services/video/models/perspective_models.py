@@ -4,7 +4,7 @@ Voxplore Video Perspective & Interleave Models
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 # ─────────────────────────────────────────────────────────────
@@ -194,6 +194,10 @@ class InterleaveTimeline:
     interleave_mode: InterleaveMode = InterleaveMode.CINEMATIC
     emotion_curve: List[float] = field(default_factory=list)
 
+    # 决策输入（增量更新时复用）
+    perspective_shots: List[PerspectiveShot] = field(default_factory=list)
+    context: Optional["InterleaveContext"] = None
+
 
 @dataclass
 class InterleaveContext:
@@ -204,3 +208,18 @@ class InterleaveContext:
     emotion_threshold: float = 0.7             # 情绪阈值（超过则展原片）
     allow_zoom_highlight: bool = True
     allow_subtitle_only_gaps: bool = True      # 允许纯字幕间隙
+
+
+@dataclass
+class InterleaveChange:
+    """
+    穿插时间线的变更集（增量更新用）
+
+    segments 中替换的解说片段按旧时间轴给出起止时间；若时长改变且
+    shift_downstream 为 True，其后所有片段的起止时间按时长差顺延。
+    """
+    segments: Dict[int, NarrationSegment] = field(default_factory=dict)   # 下标 → 新解说片段
+    emotions: Dict[int, float] = field(default_factory=dict)              # 下标 → 新情感强度
+    shots: Dict[int, PerspectiveShot] = field(default_factory=dict)       # 下标 → 新视角
+    clip_windows: List[Tuple[float, float]] = field(default_factory=list)  # 原片有改动的时间窗
+    shift_downstream: bool = True
@@ -26,21 +26,25 @@ AI 第一人称独白制作器 (Monologue Maker)
 
 import re
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from typing import Optional, List
 from dataclasses import dataclass, field
 from enum import Enum
 
 logger = logging.getLogger(__name__)
+from app.utils.tracing import tracer
+from app.core.project_journal import get_background_saver, get_store, snapshot
 from .base_maker import BaseVideoMaker, BaseProject
 from .models.monologue_models import MonologueStyle, EmotionType, MonologueSegment
-from ..ai.script_generator import ScriptGenerator, VoiceTone
+from ..ai.script_generator import VoiceTone
+from ..ai.script_generator_streaming import StreamingScriptGenerator
 from ..ai.voice_generator import VoiceGenerator, VoiceConfig, VoiceStyle
 from ..video_tools.caption_generator import CaptionGenerator
 from ..video_tools.ffmpeg_tool import FFmpegTool
 from ..export.jianying_models import JianyingDraft
 from .track_builder import build_monologue_tracks, CAPTION_STYLES
+from .narration_pipeline import SegmentSplitter, split_script
 
 
 @dataclass
@@ -66,18 +70,20 @@ class MonologueProject(BaseProject):
     #  持久化 (.narrafiilm JSON)                                        #
     # ------------------------------------------------------------------ #
 
-    def save(self, path: Optional[str] = None) -> str:
+    def save(self, path: Optional[str] = None, background: bool = False) -> str:
         """
         将项目保存为 .narrafiilm 文件（JSON）。
 
+        后台保存只向 <文件>.journal 追加差异，定期压缩为完整快照；
+        显式保存（background=False）写完后立即压缩。
+
         Args:
             path: 保存路径，默认 <output_dir>/<name>.narrafiilm
+            background: 交给后台写线程并立即返回（自动保存用）
 
         Returns:
             实际保存的文件路径
         """
-        import json
-
         save_path = Path(path) if path else Path(self.output_dir) / f"{self.name}.narrafiilm"
         save_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -108,8 +114,13 @@ class MonologueProject(BaseProject):
             ],
         }
 
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # 复制一份，写线程处理期间字幕等仍可继续编辑
+        store = get_store(str(save_path))
+        future = get_background_saver().submit(store, snapshot(data))
+        if not background:
+            # 显式保存：等写完并合并日志，文件外部可直接读取
+            future.result()
+            store.compact()
 
         return str(save_path)
 
@@ -124,10 +135,9 @@ class MonologueProject(BaseProject):
         Returns:
             MonologueProject 实例
         """
-        import json
-
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
+        data = get_store(path).load()
+        if data is None:
+            raise FileNotFoundError(path)
 
         segments = [
             MonologueSegment(
@@ -250,7 +260,7 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
         self.voice_provider = voice_provider
 
         self.voice_generator = VoiceGenerator(provider=voice_provider)
-        self.script_generator = ScriptGenerator(use_llm_manager=True)
+        self.script_generator = StreamingScriptGenerator(use_llm_manager=True)
         self.caption_generator = CaptionGenerator()
 
     def create_project(
@@ -281,6 +291,7 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
 
         return project
 
+    @tracer.traced("generate_script")
     def generate_script(
         self,
         project: MonologueProject,
@@ -313,54 +324,32 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
 
     def _segment_script(self, project: MonologueProject) -> None:
         """将独白分段 — 支持空白行和中文句末标点双重拆分"""
-        # 优先按空白行分段，否则按中文句末标点分
-        paragraphs = [p.strip() for p in project.full_script.split('\n\n') if p.strip()]
-
-        if len(paragraphs) <= 1:
-            # 按句末标点拆分（保留标点）
-            parts = re.split(r'([。！？\?!]+)', project.full_script)
-            merged = []
-            for i in range(0, len(parts) - 1, 2):
-                text = parts[i] + (parts[i + 1] if i + 1 < len(parts) else '')
-                if text.strip():
-                    merged.append(text.strip())
-            # 合并过短的碎片
-            if merged and len(merged) > 3:
-                paragraphs = []
-                buf = ""
-                for p in merged:
-                    buf += p
-                    if len(buf) >= 30:
-                        paragraphs.append(buf)
-                        buf = ""
-                if buf:
-                    paragraphs.append(buf)
-            elif merged:
-                paragraphs = merged
-
-        if not paragraphs:
-            paragraphs = [project.full_script]
-
-        # 匹配场景
+        paragraphs = split_script(project.full_script)
+
+        project.segments = [
+            MonologueSegment(
+                script=para,
+                emotion=self._infer_emotion(para, project.emotion),  # 根据内容推断情感
+                video_start=0.0,
+                video_end=0.0,
+            )
+            for para in paragraphs
+        ]
+        self._assign_scenes(project)
+
+    def _assign_scenes(self, project: MonologueProject) -> None:
+        """按段落顺序匹配场景（无场景时均分视频时长）"""
         scenes = project.scenes if project.scenes else [None]
         n_scenes = len(scenes) if scenes and scenes[0] else 1
+        n_segments = len(project.segments)
 
-        project.segments = []
-        for i, para in enumerate(paragraphs):
+        for i, segment in enumerate(project.segments):
             scene_idx = i % n_scenes
             scene = scenes[scene_idx] if scenes and scenes[0] else None
 
-            # 根据内容推断情感
-            emotion = self._infer_emotion(para, project.emotion)
-
-            seg_duration = project.video_duration / len(paragraphs) if paragraphs else 10.0
-            segment = MonologueSegment(
-                script=para,
-                emotion=emotion,
-                video_start=scene.start if scene else i * seg_duration,
-                video_end=scene.end if scene else (i + 1) * seg_duration,
-            )
-            project.segments.append(segment)
+            seg_duration = project.video_duration / n_segments if n_segments else 10.0
+            segment.video_start = scene.start if scene else i * seg_duration
+            segment.video_end = scene.end if scene else (i + 1) * seg_duration
 
     def _infer_emotion(self, text: str, base_emotion: str) -> EmotionType:
         """根据文本内容推断情感"""
@@ -391,6 +380,7 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
 
         return emotion_map.get(base_emotion, EmotionType.NEUTRAL)
 
+    @tracer.traced("generate_voice")
     def generate_voice(
         self,
         project: MonologueProject,
@@ -403,21 +393,7 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
             project: 项目对象
             voice_config: 配音配置
         """
-        style_cfg = self.STYLE_CONFIG.get(
-            project.style,
-            self.STYLE_CONFIG[MonologueStyle.MELANCHOLIC]
-        )
-
-        if voice_config:
-            project.voice_config = voice_config
-        else:
-            project.voice_config = VoiceConfig(
-                style=style_cfg["voice_style"],
-                rate=style_cfg["rate"],
-            )
-
-        output_dir = Path(project.output_dir) / "audio"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = self._prepare_voice(project, voice_config)
 
         # 准备任务列表
         tasks = [
@@ -428,26 +404,15 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
         results: dict[int, tuple[str, float, list]] = {}
         completed = 0
 
-        def _generate_one(i: int, segment: MonologueSegment, audio_path: str):
-            config = VoiceConfig(
-                voice_id=project.voice_config.voice_id,
-                rate=project.voice_config.rate,
-            )
-            result = self.voice_generator.generate(
-                text=segment.script,
-                output_path=audio_path,
-                config=config,
-            )
-            return i, result.audio_path, result.duration, result.sentence_timestamps or []
-
+        generate_one = tracer.bind(self._synthesize_segment)
         with ThreadPoolExecutor(max_workers=4) as executor:
             futures = {
-                executor.submit(_generate_one, i, seg, path): i
+                executor.submit(generate_one, project, i, seg, path): i
                 for i, seg, path in tasks
             }
             for future in as_completed(futures):
-                i, audio_path, duration = future.result()
-                results[i] = (audio_path, duration)
+                i, audio_path, duration, timestamps = future.result()
+                results[i] = (audio_path, duration, timestamps)
                 completed += 1
                 self._report_progress("生成配音", completed / len(tasks))
 
@@ -457,6 +422,50 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
 
         self._report_progress("生成配音", 1.0)
 
+    def _prepare_voice(
+        self,
+        project: MonologueProject,
+        voice_config: Optional[VoiceConfig] = None,
+    ) -> Path:
+        """确定配音配置并创建音频目录，返回音频目录"""
+        style_cfg = self.STYLE_CONFIG.get(
+            project.style,
+            self.STYLE_CONFIG[MonologueStyle.MELANCHOLIC]
+        )
+
+        if voice_config:
+            project.voice_config = voice_config
+        else:
+            project.voice_config = VoiceConfig(
+                style=style_cfg["voice_style"],
+                rate=style_cfg["rate"],
+            )
+
+        output_dir = Path(project.output_dir) / "audio"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+
+    def _synthesize_segment(
+        self,
+        project: MonologueProject,
+        i: int,
+        segment: MonologueSegment,
+        audio_path: str,
+    ) -> tuple:
+        """合成单段配音，返回 (序号, 音频路径, 时长, 句子时间戳)"""
+        config = VoiceConfig(
+            voice_id=project.voice_config.voice_id,
+            rate=project.voice_config.rate,
+        )
+        with tracer.span("voice_segment", category="stage", segment=i):
+            result = self.voice_generator.generate(
+                text=segment.script,
+                output_path=audio_path,
+                config=config,
+            )
+        return i, result.audio_path, result.duration, result.sentence_timestamps or []
+
+    @tracer.traced("generate_captions")
     def generate_captions(
         self,
         project: MonologueProject,
@@ -477,63 +486,182 @@ class MonologueMaker(BaseVideoMaker[MonologueProject]):
         current_time = 0.0
 
         for i, segment in enumerate(project.segments):
-            segment.captions = []
-
-            # 优先使用 EdgeTTS 真实句子时间戳
-            if segment.sentence_timestamps:
-                for ts in segment.sentence_timestamps:
-                    segment.captions.append({
-                        "text": ts["text"],
-                        "start": current_time + ts["start"],
-                        "duration": max(ts["end"] - ts["start"], 0.5),
-                        "style": caption_cfg,
-                        "emotion": segment.emotion.value,
-                    })
-            else:
-                # 回退：按中文句末标点拆分并按字符数估算时长
-                parts = re.split(r'([。！？\u3001])', segment.script)
-                segment_words = max(len(segment.script.replace(' ', '')), 1)
-
-                current_start = current_time
-                current_text = ""
-
-                for part in parts:
-                    if not part:
-                        continue
-                    if part in ('，', '；'):
-                        current_text += part
-                        continue
-                    if part in ('。', '！', '？'):
-                        current_text += part
-                        if len(current_text.strip()) >= 2:
-                            word_count = len(current_text)
-                            duration = (word_count / segment_words) * segment.audio_duration
-                            segment.captions.append({
-                                "text": current_text,
-                                "start": current_start,
-                                "duration": max(duration, 0.5),
-                                "style": caption_cfg,
-                                "emotion": segment.emotion.value,
-                            })
-                            current_start += duration
-                            current_text = ""
-                    else:
-                        current_text += part
-
-                if current_text.strip() and len(current_text.strip()) >= 2:
+            segment.captions = self._segment_captions(segment, current_time, caption_cfg)
+            current_time += segment.audio_duration
+            self._report_progress("生成字幕", (i + 1) / len(project.segments))
+
+        self._report_progress("生成字幕", 1.0)
+
+    def _segment_captions(
+        self,
+        segment: MonologueSegment,
+        current_time: float,
+        caption_cfg: dict,
+    ) -> List[dict]:
+        """生成单段字幕，current_time 为该段配音在成片中的起点"""
+        captions: List[dict] = []
+
+        # 优先使用 EdgeTTS 真实句子时间戳
+        if segment.sentence_timestamps:
+            for ts in segment.sentence_timestamps:
+                captions.append({
+                    "text": ts["text"],
+                    "start": current_time + ts["start"],
+                    "duration": max(ts["end"] - ts["start"], 0.5),
+                    "style": caption_cfg,
+                    "emotion": segment.emotion.value,
+                })
+            return captions
+
+        # 回退：按中文句末标点拆分并按字符数估算时长
+        parts = re.split(r'([。！？\u3001])', segment.script)
+        segment_words = max(len(segment.script.replace(' ', '')), 1)
+
+        current_start = current_time
+        current_text = ""
+
+        for part in parts:
+            if not part:
+                continue
+            if part in ('，', '；'):
+                current_text += part
+                continue
+            if part in ('。', '！', '？'):
+                current_text += part
+                if len(current_text.strip()) >= 2:
                     word_count = len(current_text)
                     duration = (word_count / segment_words) * segment.audio_duration
-                    segment.captions.append({
+                    captions.append({
                         "text": current_text,
                         "start": current_start,
                         "duration": max(duration, 0.5),
                         "style": caption_cfg,
                         "emotion": segment.emotion.value,
                     })
+                    current_start += duration
+                    current_text = ""
+            else:
+                current_text += part
+
+        if current_text.strip() and len(current_text.strip()) >= 2:
+            word_count = len(current_text)
+            duration = (word_count / segment_words) * segment.audio_duration
+            captions.append({
+                "text": current_text,
+                "start": current_start,
+                "duration": max(duration, 0.5),
+                "style": caption_cfg,
+                "emotion": segment.emotion.value,
+            })
+        return captions
+
+    @tracer.traced("generate_pipelined")
+    def generate_pipelined(
+        self,
+        project: MonologueProject,
+        custom_script: Optional[str] = None,
+        voice_config: Optional[VoiceConfig] = None,
+        caption_style: str = "cinematic",
+    ) -> None:
+        """
+        流水线模式：文案、配音、字幕重叠进行
 
-            current_time += segment.audio_duration
-            self._report_progress("生成字幕", (i + 1) / len(project.segments))
+        文案流式生成，每完成一段就提交配音（并行 max_workers=4）；
+        配音按顺序完成一段就生成该段字幕。切段与 _segment_script 相同，
+        结果与依次调用 generate_script / generate_voice / generate_captions
+        等价。多段落文案的第一段配音不必等整篇文案生成完；单段落文案需
+        按整篇切句，文案结束后才开始配音。
+
+        Args:
+            project: 项目对象
+            custom_script: 自定义文案（跳过 LLM）
+            voice_config: 配音配置
+            caption_style: 字幕风格 (cinematic, minimal, expressive)
+        """
+        self._report_progress("生成独白", 0.0)
+
+        output_dir = self._prepare_voice(project, voice_config)
+        project.caption_style = caption_style
+        caption_cfg = CAPTION_STYLES.get(caption_style, CAPTION_STYLES["cinematic"])
+
+        if custom_script:
+            chunks = [custom_script]
+        elif hasattr(self.script_generator, "iter_monologue_chunks"):
+            chunks = self.script_generator.iter_monologue_chunks(
+                context=project.context,
+                emotion=project.emotion,
+                duration=project.video_duration,
+            )
+        else:
+            chunks = [self.script_generator.generate_monologue(
+                context=project.context,
+                emotion=project.emotion,
+                duration=project.video_duration,
+            ).content]
+
+        splitter = SegmentSplitter()
+        project.segments = []
+        script_parts: List[str] = []
+        pending: dict = {}
+        finished: set = set()
+        next_caption = 0
+        current_time = 0.0
 
+        def _collect(done) -> None:
+            nonlocal next_caption, current_time
+            for future in done:
+                pending.pop(future)
+                i, audio_path, duration, timestamps = future.result()
+                segment = project.segments[i]
+                segment.audio_path, segment.audio_duration, segment.sentence_timestamps = (
+                    audio_path, duration, timestamps
+                )
+                finished.add(i)
+            # 字幕起点依赖前面所有段的时长，按顺序推进
+            while next_caption in finished:
+                segment = project.segments[next_caption]
+                segment.captions = self._segment_captions(segment, current_time, caption_cfg)
+                current_time += segment.audio_duration
+                next_caption += 1
+            if project.segments:
+                self._report_progress("生成配音", len(finished) / len(project.segments))
+
+        generate_one = tracer.bind(self._synthesize_segment)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            def _submit(texts: List[str]) -> None:
+                for text in texts:
+                    i = len(project.segments)
+                    segment = MonologueSegment(
+                        script=text,
+                        emotion=self._infer_emotion(text, project.emotion),
+                        video_start=0.0,
+                        video_end=0.0,
+                    )
+                    project.segments.append(segment)
+                    path = str(output_dir / f"monologue_{i:03d}.mp3")
+                    pending[executor.submit(generate_one, project, i, segment, path)] = i
+
+            for chunk in chunks:
+                script_parts.append(chunk)
+                _submit(splitter.feed(chunk))
+                _collect([f for f in pending if f.done()])
+            _submit(splitter.flush())
+            self._report_progress("生成独白", 1.0)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+
+        project.full_script = "".join(script_parts).strip()
+        if not project.segments:
+            # 文案为空：保持与 generate_script 相同的行为
+            self._segment_script(project)
+            self.generate_voice(project, project.voice_config)
+            self.generate_captions(project, caption_style)
+            return
+
+        self._assign_scenes(project)
+        self._report_progress("生成配音", 1.0)
         self._report_progress("生成字幕", 1.0)
 
     def _build_jianying_tracks(self, draft: JianyingDraft, project: MonologueProject) -> None:
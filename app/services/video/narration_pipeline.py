@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式文案切段
+
+把 LLM 流式返回的文本块切成可以立即送去配音的段落，切段结果与
+split_script(完整文案) 完全一致：
+- 多段落文案：确认出现第二段后，每遇到空行（段落结束）立即切出一段
+- 单段落文案：按句末标点切分并合并碎片，需要完整文案，flush() 时才切出
+- 文案结束后 flush() 切出剩余内容
+
+用法:
+    splitter = SegmentSplitter()
+    for chunk in chunks:
+        for text in splitter.feed(chunk):
+            submit_tts(text)
+    for text in splitter.flush():
+        submit_tts(text)
+"""
+
+import re
+from typing import List, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 句末标点（保留在句子末尾）
+_SENTENCE_END = re.compile(r'([。！？\?!]+)')
+
+# 单段落文案按句切分后，碎片合并到至少该长度
+MIN_MERGED_CHARS = 30
+
+
+def split_script(script: str) -> List[str]:
+    """将独白分段 — 优先按空白行分段，单段落时按中文句末标点分"""
+    paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
+
+    if len(paragraphs) <= 1:
+        # 按句末标点拆分（保留标点）
+        parts = _SENTENCE_END.split(script)
+        merged = []
+        for i in range(0, len(parts) - 1, 2):
+            text = parts[i] + (parts[i + 1] if i + 1 < len(parts) else '')
+            if text.strip():
+                merged.append(text.strip())
+        # 合并过短的碎片
+        if merged and len(merged) > 3:
+            paragraphs = []
+            buf = ""
+            for p in merged:
+                buf += p
+                if len(buf) >= MIN_MERGED_CHARS:
+                    paragraphs.append(buf)
+                    buf = ""
+            if buf:
+                paragraphs.append(buf)
+        elif merged:
+            paragraphs = merged
+
+    if not paragraphs:
+        paragraphs = [script]
+    return paragraphs
+
+
+class SegmentSplitter:
+    """增量切段器（非线程安全，一个文案流一个实例）"""
+
+    def __init__(self):
+        self._text = ""
+        self._buffer = ""
+        # 第一段先扣住：只有确认存在第二段，才按段落切分
+        self._first: Optional[str] = None
+        self._multi = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        追加文本块
+
+        Returns:
+            本次新完成的段落（可能为空）
+        """
+        self._text += chunk
+        self._buffer += chunk
+        segments: List[str] = []
+        while True:
+            head, sep, tail = self._buffer.partition("\n\n")
+            if not sep:
+                break
+            self._buffer = tail
+            self._add(head.strip(), segments)
+
+        if self._first is not None and not self._multi and self._buffer.strip():
+            # 第一段之后出现了新内容：文案至少有两段
+            self._multi = True
+            segments.append(self._first)
+        return segments
+
+    def flush(self) -> List[str]:
+        """文案结束，切出剩余内容"""
+        text, rest, multi = self._text, self._buffer.strip(), self._multi
+        self._text = self._buffer = ""
+        self._first, self._multi = None, False
+        if multi:
+            return [rest] if rest else []
+        if not text.strip():
+            return []
+        return split_script(text)
+
+    def _add(self, paragraph: str, segments: List[str]) -> None:
+        if not paragraph:
+            return
+        if self._multi:
+            segments.append(paragraph)
+        elif self._first is None:
+            self._first = paragraph
+        else:
+            self._multi = True
+            segments.extend([self._first, paragraph])
+
+
+__all__ = ["SegmentSplitter", "split_script"]
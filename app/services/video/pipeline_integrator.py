@@ -30,8 +30,12 @@ Pipeline Integrator
     maker.apply_interleave_to_project(project, timeline)
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 
+import numpy as np
+
+from app.utils.tracing import tracer
+from .emotion_curve import moving_average
 from .monologue_maker import MonologueMaker, MonologueProject, MonologueSegment
 from .perspective_mapper import PerspectiveMapper
 from .video_interleaver import VideoInterleaver
@@ -83,6 +87,7 @@ class PipelineIntegrator(MonologueMaker):
     # 视角映射
     # ─────────────────────────────────────────────────────────────────
 
+    @tracer.traced("perspective_mapping")
     def run_perspective_mapping(self, project: MonologueProject) -> List[PerspectiveShot]:
         """
         运行视角映射
@@ -185,6 +190,7 @@ class PipelineIntegrator(MonologueMaker):
     # 视频穿插
     # ─────────────────────────────────────────────────────────────────
 
+    @tracer.traced("video_interleave")
     def run_video_interleave(
         self,
         project: MonologueProject,
@@ -261,6 +267,7 @@ class PipelineIntegrator(MonologueMaker):
     # 应用穿插决策
     # ─────────────────────────────────────────────────────────────────
 
+    @tracer.traced("apply_interleave")
     def apply_interleave_to_project(
         self,
         project: MonologueProject,
@@ -313,7 +320,11 @@ class PipelineIntegrator(MonologueMaker):
     # 情感曲线
     # ─────────────────────────────────────────────────────────────────
 
-    def generate_emotion_curve(self, segments: List[MonologueSegment]) -> List[float]:
+    def generate_emotion_curve(
+        self,
+        segments: List[MonologueSegment],
+        as_array: bool = False,
+    ) -> Union[List[float], np.ndarray]:
         """
         生成情感强度曲线
 
@@ -321,21 +332,20 @@ class PipelineIntegrator(MonologueMaker):
 
         Args:
             segments: 独白片段列表
+            as_array: 返回 numpy 数组
 
         Returns:
-            情感强度曲线列表，每项 0-1
+            情感强度曲线列表（或数组），每项 0-1
         """
         if not segments:
-            return []
+            return np.zeros(0) if as_array else []
 
-        emotion_curve = []
-        for segment in segments:
-            intensity = self._emotion_to_intensity(segment.emotion)
-            emotion_curve.append(intensity)
+        emotion_curve = [self._emotion_to_intensity(segment.emotion) for segment in segments]
 
         # 平滑处理（简单移动平均）
-        smoothed = self._smooth_curve(emotion_curve, window=3)
-        return smoothed
+        if as_array:
+            return moving_average(emotion_curve, 3)
+        return self._smooth_curve(emotion_curve, window=3)
 
     def _emotion_to_intensity(self, emotion: EmotionType) -> float:
         """
@@ -378,22 +388,13 @@ class PipelineIntegrator(MonologueMaker):
         """
         if len(curve) <= window:
             return curve
-
-        smoothed = []
-        half_window = window // 2
-
-        for i in range(len(curve)):
-            start = max(0, i - half_window)
-            end = min(len(curve), i + half_window + 1)
-            avg = sum(curve[start:end]) / (end - start)
-            smoothed.append(avg)
-
-        return smoothed
+        return moving_average(curve, window).tolist()
 
     # ─────────────────────────────────────────────────────────────────
     # 完整流水线
     # ─────────────────────────────────────────────────────────────────
 
+    @tracer.traced("full_pipeline")
     def run_full_pipeline(
         self,
         project: MonologueProject,
@@ -9,7 +9,9 @@
 """
 
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Union
+
+import numpy as np
 
 from app.services.ai.scene_models import SceneInfo, SceneType
 from app.services.video.models.perspective_models import (
@@ -18,6 +20,7 @@ from app.services.video.models.perspective_models import (
     SceneSegment,
 )
 from app.services.video.models.monologue_models import EmotionType, MonologueSegment
+from app.services.video import emotion_curve
 
 
 # ─────────────────────────────────────────────────────────────
@@ -243,7 +246,9 @@ class EmotionCurveGenerator:
         self,
         segments: List[MonologueSegment],
         normalize: bool = True,
-    ) -> List[float]:
+        as_array: bool = False,
+        rate: float = 10.0,
+    ) -> Union[List[float], np.ndarray]:
         """
         为给定的独白片段列表生成情感强度曲线。
 
@@ -256,69 +261,63 @@ class EmotionCurveGenerator:
         Args:
             segments: MonologueSegment 列表（按时间顺序）
             normalize: 是否将最终曲线归一化到 [0, 1]
+            as_array: 返回 numpy 数组（长曲线绘图/重采样时避免转成列表）
+            rate: 每秒采样点数，默认 10（0.1 秒分辨率）
 
         Returns:
-            浮点值列表，每项代表对应时间点的情感强度（0.0–1.0）
+            浮点值列表（或数组），每项代表对应时间点的情感强度（0.0–1.0）
         """
         if not segments:
-            return []
+            return np.zeros(0) if as_array else []
 
         # Step 1: 收集原始强度值
-        raw_intensities = [
-            self.EMOTION_INTENSITY_MAP.get(seg.emotion, self.DEFAULT_INTENSITY)
-            for seg in segments
-        ]
+        raw_intensities = self.get_segment_emotions(segments)
 
         # Step 2: 展平到时间轴（每片段强度在其时间范围内保持不变）
-        flat_curve: List[float] = []
-        for seg, intensity in zip(segments, raw_intensities):
-            duration = seg.video_end - seg.video_start
-            if duration <= 0:
-                continue
-            # 按 0.1 秒为步长展平（固定分辨率，便于平滑）
-            steps = max(1, int(duration * 10))
-            flat_curve.extend([intensity] * steps)
+        durations = [seg.video_end - seg.video_start for seg in segments]
+        curve = emotion_curve.step_curve(durations, raw_intensities, rate)
 
-        if not flat_curve:
-            return []
+        if curve.size:
+            # Step 3: 移动均值平滑
+            curve = emotion_curve.moving_average(curve, self.smoothing_window)
 
-        # Step 3: 移动均值平滑
-        smoothed = self._moving_average(flat_curve, self.smoothing_window)
+            # Step 4: 归一化
+            if normalize:
+                curve = emotion_curve.normalize(curve)
 
-        # Step 4: 归一化
-        if normalize:
-            smoothed = self._normalize(smoothed)
+        return curve if as_array else curve.tolist()
 
-        return smoothed
+    def sample_curve(
+        self,
+        segments: List[MonologueSegment],
+        grid: np.ndarray,
+        normalize: bool = True,
+        rate: float = 10.0,
+    ) -> np.ndarray:
+        """
+        在任意时间网格（秒，曲线自身的时间轴）上取情感强度
+
+        Args:
+            segments: MonologueSegment 列表
+            grid: 目标时间点，如 np.arange(0, duration, 1.0) 得到秒级曲线
+            normalize / rate: 同 generate_curve
+
+        Returns:
+            与 grid 等长的强度数组
+        """
+        curve = self.generate_curve(segments, normalize=normalize, as_array=True, rate=rate)
+        times = np.arange(curve.size) / rate
+        return emotion_curve.resample(times, curve, grid)
 
     @staticmethod
     def _moving_average(data: List[float], window: int) -> List[float]:
         """计算简单移动均值 (SMA)。"""
-        if window <= 1 or len(data) <= window:
-            return list(data)
-
-        half = window // 2
-        result: List[float] = []
-        n = len(data)
-
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            result.append(sum(data[start:end]) / (end - start))
-
-        return result
+        return emotion_curve.moving_average(data, window).tolist()
 
     @staticmethod
     def _normalize(data: List[float]) -> List[float]:
         """将数据归一化到 [0.0, 1.0] 范围。"""
-        if not data:
-            return []
-        min_val = min(data)
-        max_val = max(data)
-        if max_val - min_val < 1e-6:
-            # 常数曲线，直接返回零到 max
-            return [0.0 for _ in data]
-        return [(v - min_val) / (max_val - min_val) for v in data]
+        return emotion_curve.normalize(data).tolist()
 
     def get_segment_emotions(
         self,
@@ -3,12 +3,14 @@ Video Interleaver
 视频穿插逻辑处理器——决定解说与原片的穿插策略
 """
 
+from dataclasses import replace
 from typing import List, Optional, Dict, Any, Tuple
 
+from .clip_index import ClipIntervalIndex
 from .models.perspective_models import (
     NarrationSegment, ClipSegment, PerspectiveShot,
     InterleaveDecision, InterleaveTimeline, InterleaveMode,
-    InterleaveContext, TransitionType, SceneSegment,
+    InterleaveContext, InterleaveChange, TransitionType, SceneSegment,
     SubjectRole, SubjectPosition
 )
 
@@ -64,7 +66,7 @@ class VideoInterleaver:
         decisions: List[InterleaveDecision] = []
 
         # 构建原片时间索引
-        self._build_clip_lookup(original_clips)
+        clip_index = self._build_clip_lookup(original_clips)
 
         # 遍历解说片段
         for i, narration in enumerate(narration_timeline):
@@ -72,32 +74,135 @@ class VideoInterleaver:
             shot = perspective_shots[i] if i < len(perspective_shots) else None
             emotional_intensity = emotion_curve[i] if i < len(emotion_curve) else 0.5
 
-            # 查找重叠的原片片段
-            overlapping_clips = self._find_overlapping_clips(
-                narration.start_time,
-                narration.end_time,
-                original_clips
-            )
+            decisions.append(self._decide_segment(
+                narration, clip_index, shot, emotional_intensity, ctx
+            ))
 
-            # 选择最佳原片片段
-            selected_clip = self._select_best_clip(
-                overlapping_clips,
-                narration,
-                shot,
-                emotional_intensity
-            )
+        return self._build_timeline(
+            decisions, original_clips, perspective_shots, emotion_curve, ctx
+        )
+
+    def update_interleave(
+        self,
+        previous: InterleaveTimeline,
+        original_clips: List[ClipSegment],
+        change: InterleaveChange,
+    ) -> InterleaveTimeline:
+        """
+        增量更新穿插时间线
+
+        只重算受变更影响的片段：被替换的解说片段、情感或视角有变化的片段、
+        与 change.clip_windows 重叠的片段，以及顺延后重叠原片集合发生变化的
+        下游片段。其余决策直接复用（顺延的片段替换为平移后的解说片段）。
+
+        结果与用变更后的输入调用 decide_interleave 一致。
 
-            # 决定穿插策略
-            decision = self._make_interleave_decision(
-                narration=narration,
-                clip=selected_clip,
-                shot=shot,
-                emotional_intensity=emotional_intensity,
-                ctx=ctx
+        Args:
+            previous: decide_interleave / update_interleave 的返回值
+            original_clips: 原片片段列表（已应用 clip_windows 对应的改动）
+            change: 变更集
+
+        Returns:
+            新的穿插时间线（previous 不被修改）
+        """
+        ctx = previous.context or InterleaveContext()
+        n = len(previous.decisions)
+
+        emotion_curve = list(previous.emotion_curve)
+        for i, value in change.emotions.items():
+            if i < len(emotion_curve):
+                emotion_curve[i] = value
+        shots = list(previous.perspective_shots)
+        for i, shot in change.shots.items():
+            if i < len(shots):
+                shots[i] = shot
+
+        clip_index = self._build_clip_lookup(original_clips)
+        dirty = set(change.segments) | set(change.emotions) | set(change.shots)
+        decisions = list(previous.decisions)
+        shift = 0.0
+
+        for i in range(n):
+            old = previous.decisions[i].narration_segment
+            if i in change.segments:
+                narration = change.segments[i]
+                if change.shift_downstream:
+                    narration = replace(narration,
+                                        start_time=narration.start_time + shift,
+                                        end_time=narration.end_time + shift)
+                    shift += narration.duration - old.duration
+            elif shift:
+                narration = replace(old, start_time=old.start_time + shift,
+                                    end_time=old.end_time + shift)
+            else:
+                narration = old
+
+            touched = any(
+                old.start_time < w_end and old.end_time > w_start
+                or narration.start_time < w_end and narration.end_time > w_start
+                for w_start, w_end in change.clip_windows
+            )
+            if i not in dirty and not touched:
+                if narration is old:
+                    continue
+                # 只是平移：重叠原片集合不变则决策不变
+                before = self._find_overlapping_clips(old.start_time, old.end_time, clip_index)
+                after = self._find_overlapping_clips(narration.start_time, narration.end_time,
+                                                     clip_index)
+                if len(before) == len(after) and all(a is b for a, b in zip(before, after)):
+                    decisions[i] = replace(previous.decisions[i], narration_segment=narration)
+                    continue
+
+            shot = shots[i] if i < len(shots) else None
+            emotional_intensity = emotion_curve[i] if i < len(emotion_curve) else 0.5
+            decisions[i] = self._decide_segment(
+                narration, clip_index, shot, emotional_intensity, ctx
             )
-            decisions.append(decision)
 
-        # 计算统计
+        return self._build_timeline(decisions, original_clips, shots, emotion_curve, ctx)
+
+    def _decide_segment(
+        self,
+        narration: NarrationSegment,
+        clip_index: ClipIntervalIndex,
+        shot: Optional[PerspectiveShot],
+        emotional_intensity: float,
+        ctx: InterleaveContext,
+    ) -> InterleaveDecision:
+        """单个解说片段的穿插决策"""
+        # 查找重叠的原片片段
+        overlapping_clips = self._find_overlapping_clips(
+            narration.start_time,
+            narration.end_time,
+            clip_index
+        )
+
+        # 选择最佳原片片段
+        selected_clip = self._select_best_clip(
+            overlapping_clips,
+            narration,
+            shot,
+            emotional_intensity
+        )
+
+        # 决定穿插策略
+        return self._make_interleave_decision(
+            narration=narration,
+            clip=selected_clip,
+            shot=shot,
+            emotional_intensity=emotional_intensity,
+            ctx=ctx
+        )
+
+    def _build_timeline(
+        self,
+        decisions: List[InterleaveDecision],
+        original_clips: List[ClipSegment],
+        perspective_shots: List[PerspectiveShot],
+        emotion_curve: List[float],
+        ctx: InterleaveContext,
+    ) -> InterleaveTimeline:
+        """汇总统计并生成时间线"""
         total_duration = sum(d.narration_segment.duration for d in decisions)
         original_duration = sum(
             d.original_end - d.original_start
@@ -113,27 +218,26 @@ class VideoInterleaver:
             original_coverage_percent=original_duration / total_duration if total_duration > 0 else 0,
             narration_coverage_percent=100.0,
             interleave_mode=self._infer_interleave_mode(emotion_curve),
-            emotion_curve=emotion_curve
+            emotion_curve=emotion_curve,
+            perspective_shots=list(perspective_shots),
+            context=ctx,
         )
 
     def _build_clip_lookup(
         self,
         clips: List[ClipSegment]
-    ) -> Dict[int, ClipSegment]:
+    ) -> ClipIntervalIndex:
         """构建时间索引"""
-        return {clip.start_time: clip for clip in clips}
+        return ClipIntervalIndex(clips)
 
     def _find_overlapping_clips(
         self,
         start: float,
         end: float,
-        clips: List[ClipSegment],
+        clip_index: ClipIntervalIndex,
     ) -> List[ClipSegment]:
-        """查找与给定时间范围重叠的原片片段"""
-        return [
-            clip for clip in clips
-            if clip.start_time < end and clip.end_time > start
-        ]
+        """查找与给定时间范围重叠的原片片段（保持原列表顺序）"""
+        return clip_index.overlapping(start, end)
 
     def _select_best_clip(
         self,
@@ -3,11 +3,20 @@
 
 活跃模块：
 - FFmpegTool        FFmpeg 封装（视频/音频处理）
+- MediaCatalog      媒体探测目录（ffprobe 结果持久化缓存）
+- ThumbnailService  缩略图 / 时间轴雪碧图（并发生成 + 内容缓存）
+- smart_cut         关键帧感知的帧精确裁剪（只重编码首尾 GOP）
+- concat_auto       编码兼容性感知的拼接（只归一化不兼容的输入）
 - CaptionGenerator  动态字幕生成
+- KeywordMatcher    多模式关键词匹配（Aho-Corasick）
 - BaseVideoProcessor / IVideoProcessor  视频处理基类
 """
 
 from .ffmpeg_tool import FFmpegTool
+from .media_catalog import MediaCatalog, MediaInfo, StreamInfo, get_media_catalog
+from .thumbnail_service import ThumbnailService, SpriteSheet, get_thumbnail_service
+from .smart_cut import CutSegment, plan_smart_cut, smart_cut
+from .concat_planner import StreamSignature, ConcatPlan, plan_concat, concat_auto
 from .base import (
     IVideoProcessor,
     BaseVideoProcessor,
@@ -15,10 +24,25 @@ from .base import (
     ProcessingResult,
 )
 from .caption_generator import CaptionGenerator, Caption, CaptionConfig, CaptionStyle
+from .keyword_matcher import KeywordMatcher
 
 __all__ = [
     # 工具
     "FFmpegTool",
+    "MediaCatalog",
+    "MediaInfo",
+    "StreamInfo",
+    "get_media_catalog",
+    "ThumbnailService",
+    "SpriteSheet",
+    "get_thumbnail_service",
+    "CutSegment",
+    "plan_smart_cut",
+    "smart_cut",
+    "StreamSignature",
+    "ConcatPlan",
+    "plan_concat",
+    "concat_auto",
 
     # 基类
     "IVideoProcessor",
@@ -31,4 +55,5 @@ __all__ = [
     "Caption",
     "CaptionConfig",
     "CaptionStyle",
+    "KeywordMatcher",
 ]
@@ -90,33 +90,20 @@ class BaseVideoProcessor(IVideoProcessor):
         """分析视频获取元数据"""
         from .ffmpeg_tool import FFmpegTool
 
-        info = FFmpegTool.get_video_info(video_path)
-        video_stream = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), {})
-        format_info = info.get('format', {})
-        duration = float(format_info.get('duration') or 0)
-        width = video_stream.get('width', 0) or 0
-        height = video_stream.get('height', 0) or 0
-        fps_str = video_stream.get('r_frame_rate', '0/1')
-        num, denom = fps_str.split('/')
-        fps = float(num) / float(denom) if float(denom) != 0 else 0.0
-
-        # 获取文件大小
-        size_bytes = 0
-        try:
-            size_bytes = Path(video_path).stat().st_size
-        except OSError as e:
-            logger.debug(f"Failed to get file size for {video_path}: {e}")
-
-        bitrate = int(format_info.get('bit_rate') or 0)
+        info = FFmpegTool.probe(video_path)
+        if info is None:
+            return VideoMetadata(path=video_path, width=0, height=0, fps=0.0)
 
+        video = info.video
         return VideoMetadata(
             path=video_path,
-            duration=duration,
-            width=width,
-            height=height,
-            fps=fps,
-            bitrate=bitrate,
-            size_bytes=size_bytes,
+            duration=info.duration,
+            width=video.width if video else 0,
+            height=video.height if video else 0,
+            fps=video.fps if video else 0.0,
+            bitrate=info.bit_rate,
+            codec=video.codec_name if video else "",
+            size_bytes=max(info.size, 0),
         )
 
     def get_output_path(self, input_path: str, suffix: str = "_processed") -> str:
@@ -10,11 +10,16 @@ Caption Generator - 动态字幕生成器
 """
 
 import logging
-from typing import List, Dict, Optional
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Iterator, List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
+from .keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,6 +76,16 @@ class CaptionConfig:
     enable_word_highlight: bool = True  # 启用逐词高亮
 
 
+@lru_cache(maxsize=8)
+def _tag_matcher(keywords: frozenset, high: frozenset, medium: frozenset) -> KeywordMatcher:
+    """编译关键词/情绪词自动机（同一组词库只编译一次）"""
+    return KeywordMatcher.from_groups([
+        (keywords, "keyword"),
+        (high, EmotionLevel.HIGH),
+        (medium, EmotionLevel.MEDIUM),
+    ])
+
+
 class CaptionGenerator:
     """
     字幕生成器
@@ -78,6 +93,9 @@ class CaptionGenerator:
     自动生成具有爆款特征的动态字幕
     """
 
+    # 导出文件写缓冲
+    WRITE_BUFFER_SIZE = 1 << 16
+
     # 关键词词库（中文）
     KEYWORDS_CN = {
         '爆款', '惊人', '震惊', '必看', '超级', '绝对', '完美',
@@ -219,26 +237,28 @@ class CaptionGenerator:
         """
         导出为 ASS 字幕格式（支持高级样式）
 
+        逐行写入带缓冲的文件，不在内存中拼接整份字幕。
+
         Args:
             captions: 字幕列表
             output_path: 输出文件路径
         """
         output_path = Path(output_path)
 
-        # ASS 文件头
-        ass_content = self._generate_ass_header()
-
-        # 添加字幕条目
-        for caption in captions:
-            if self.config.enable_word_highlight:
-                # 逐词高亮版本
-                ass_content += self._generate_ass_karaoke(caption)
-            else:
-                # 普通版本
-                ass_content += self._generate_ass_simple(caption)
-
-        # 写入文件
-        output_path.write_text(ass_content, encoding='utf-8-sig')
+        with open(output_path, 'w', encoding='utf-8-sig',
+                  buffering=self.WRITE_BUFFER_SIZE) as f:
+            # ASS 文件头
+            f.write(self._generate_ass_header())
+
+            # 添加字幕条目
+            colors = self._ass_color_tags()
+            for caption in captions:
+                if self.config.enable_word_highlight:
+                    # 逐词高亮版本
+                    f.writelines(self._iter_ass_karaoke(caption, colors))
+                else:
+                    # 普通版本
+                    f.write(self._generate_ass_simple(caption))
 
     def to_srt_format(self, captions: List[Caption], output_path: str) -> None:
         """
@@ -250,24 +270,17 @@ class CaptionGenerator:
         """
         output_path = Path(output_path)
 
-        srt_content = []
-
-        for i, caption in enumerate(captions, start=1):
-            # 序号
-            srt_content.append(str(i))
-
-            # 时间轴
-            start = self._format_srt_time(caption.start_time)
-            end = self._format_srt_time(caption.end_time)
-            srt_content.append(f"{start} --> {end}")
-
-            # 文本
-            srt_content.append(caption.text)
+        with open(output_path, 'w', encoding='utf-8',
+                  buffering=self.WRITE_BUFFER_SIZE) as f:
+            for i, caption in enumerate(captions, start=1):
+                # 条目之间空一行
+                if i > 1:
+                    f.write("\n")
 
-            # 空行
-            srt_content.append("")
-
-        output_path.write_text('\n'.join(srt_content), encoding='utf-8')
+                # 序号、时间轴、文本
+                start = self._format_srt_time(caption.start_time)
+                end = self._format_srt_time(caption.end_time)
+                f.write(f"{i}\n{start} --> {end}\n{caption.text}\n")
 
     def _segment_words(self, text: str) -> List[str]:
         """
@@ -292,42 +305,45 @@ class CaptionGenerator:
             return []
 
         time_per_word = duration / word_count
-
-        word_objects = []
-        for i, word_text in enumerate(words):
-            word_start = start_time + i * time_per_word
-            word_end = word_start + time_per_word
-
-            word = Word(
-                text=word_text,
-                start_time=word_start,
-                end_time=word_end,
-                is_keyword=False,
-                emotion=EmotionLevel.NEUTRAL
+        neutral = EmotionLevel.NEUTRAL
+
+        # 字段顺序: text, start_time, end_time, is_keyword, emotion
+        return [
+            Word(word_text, word_start, word_start + time_per_word, False, neutral)
+            for word_text, word_start in (
+                (word_text, start_time + i * time_per_word)
+                for i, word_text in enumerate(words)
             )
-            word_objects.append(word)
-
-        return word_objects
+        ]
 
     def _mark_keywords_and_emotions(self, words: List[Word]) -> List[Word]:
-        """标记关键词和情绪词"""
-        full_text = ''.join(w.text for w in words)
-
-        for word in words:
-            # 检查是否为关键词
-            if word.text in self.KEYWORDS_CN:
-                word.is_keyword = True
-
-            # 检查是否为情绪词
-            if word.text in self.EMOTION_WORDS_HIGH:
-                word.emotion = EmotionLevel.HIGH
-            elif word.text in self.EMOTION_WORDS_MEDIUM:
-                word.emotion = EmotionLevel.MEDIUM
+        """
+        标记关键词和情绪词
 
-            # 检查是否在关键词短语中
-            for keyword in self.KEYWORDS_CN:
-                if keyword in full_text and word.text in keyword:
-                    word.is_keyword = True
+        在拼接后的全文上用预编译自动机一次扫描出所有命中区间，
+        与命中区间重叠的词即为关键词 / 情绪词（跨多个字的词也能识别）。
+        """
+        full_text = ''.join(w.text for w in words)
+        matcher = _tag_matcher(
+            frozenset(self.KEYWORDS_CN),
+            frozenset(self.EMOTION_WORDS_HIGH),
+            frozenset(self.EMOTION_WORDS_MEDIUM),
+        )
+        matches = matcher.find_all(full_text)
+        if not matches:
+            return words
+
+        # 命中区间（字符偏移）按各词的结束偏移二分映射到词下标
+        ends = list(accumulate(len(w.text) for w in words))
+        for start, end, tags in matches:
+            first = bisect_right(ends, start)
+            last = bisect_right(ends, end - 1) + 1
+            for word in words[first:last]:
+                for tag in tags:
+                    if tag == "keyword":
+                        word.is_keyword = True
+                    elif tag.value > word.emotion.value:
+                        word.emotion = tag
 
         return words
 
@@ -351,8 +367,10 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
     def _generate_ass_karaoke(self, caption: Caption) -> str:
         """生成带逐词高亮的 ASS 字幕"""
-        lines = []
+        return ''.join(self._iter_ass_karaoke(caption, self._ass_color_tags()))
 
+    def _iter_ass_karaoke(self, caption: Caption, colors: Dict[str, str]) -> Iterator[str]:
+        """逐词产出 ASS Dialogue 行"""
         for word in caption.words:
             start = self._format_ass_time(word.start_time)
             end = self._format_ass_time(word.end_time)
@@ -360,15 +378,18 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             # 选择样式
             style = "Keyword" if word.is_keyword else "Default"
 
-            # 选择颜色
-            color = self._get_word_color(word)
-
             # 构建文本（带颜色标记）
-            text = f"{{\\c&H{self._hex_to_ass(color)}&}}{word.text}"
+            text = f"{colors[self._get_word_color(word)]}{word.text}"
 
-            lines.append(f"Dialogue: 0,{start},{end},{style},,0,0,0,,{text}\n")
+            yield f"Dialogue: 0,{start},{end},{style},,0,0,0,,{text}\n"
 
-        return ''.join(lines)
+    def _ass_color_tags(self) -> Dict[str, str]:
+        """颜色 -> ASS 颜色标记，导出时每种颜色只转换一次"""
+        return {
+            color: f"{{\\c&H{self._hex_to_ass(color)}&}}"
+            for color in (self.config.keyword_color, self.config.emotion_color,
+                          self.config.primary_color)
+        }
 
     def _generate_ass_simple(self, caption: Caption) -> str:
         """生成简单版 ASS 字幕"""
@@ -0,0 +1,257 @@
+"""
+编码兼容性感知的拼接规划
+
+拼接前探测全部输入，按流参数（视频编码 / 分辨率 / 像素格式 / 帧率 / 时间基，
+音频编码 / 采样率 / 声道）分组：
+- 以总时长最长的一组作为目标参数
+- 与目标一致的输入直接流复制
+- 只有不一致的输入按目标参数归一化重编码
+- 最后用一次 concat demuxer 拼接
+
+混合素材项目里，已兼容的大部分素材不再被重编码。
+
+使用示例:
+    from app.services.video_tools.concat_planner import concat_auto
+
+    concat_auto(["/a.mp4", "/b.mov", "/c.mp4"], "/out.mp4")
+"""
+
+import logging
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .ffmpeg_tool import FFmpegTool, _concat_entry, _run_ok
+from .media_catalog import MediaInfo, get_media_catalog
+from .smart_cut import encoder_args, timescale_args
+
+logger = logging.getLogger(__name__)
+
+
+# 源音频编码 → 归一化时使用的编码器
+AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'ac3': 'ac3',
+    'flac': 'flac',
+}
+
+
+@dataclass(frozen=True)
+class StreamSignature:
+    """决定能否用 concat demuxer 直接拼接的流参数"""
+    video_codec: str
+    width: int
+    height: int
+    pix_fmt: str
+    frame_rate: str
+    time_base: str
+    audio_codec: Optional[str] = None     # 无音频为 None
+    sample_rate: int = 0
+    channels: int = 0
+
+    @classmethod
+    def of(cls, info: MediaInfo) -> Optional["StreamSignature"]:
+        """提取签名，没有视频流返回 None"""
+        video = info.video
+        if video is None:
+            return None
+        raw = _raw_stream(info, video.index)
+        audio = info.audio
+        return cls(
+            video_codec=video.codec_name,
+            width=video.width,
+            height=video.height,
+            pix_fmt=video.pix_fmt,
+            frame_rate=str(raw.get('r_frame_rate', '')),
+            time_base=str(raw.get('time_base', '')),
+            audio_codec=audio.codec_name if audio else None,
+            sample_rate=audio.sample_rate if audio else 0,
+            channels=audio.channels if audio else 0,
+        )
+
+
+@dataclass
+class ConcatPlan:
+    """拼接计划"""
+    target: Optional[StreamSignature]       # 目标流参数
+    reference: int = -1                      # 提供目标参数的输入下标
+    copy: List[bool] = field(default_factory=list)   # 每个输入能否直接复制
+
+    @property
+    def needs_normalize(self) -> bool:
+        return not all(self.copy)
+
+    @property
+    def runs(self) -> List[Tuple[int, int, bool]]:
+        """连续的 (起始下标, 结束下标, 是否复制) 分组"""
+        runs: List[Tuple[int, int, bool]] = []
+        for i, copy in enumerate(self.copy):
+            if runs and runs[-1][2] == copy:
+                runs[-1] = (runs[-1][0], i + 1, copy)
+            else:
+                runs.append((i, i + 1, copy))
+        return runs
+
+
+def _raw_stream(info: MediaInfo, index: int) -> Dict:
+    return next((s for s in info.raw.get('streams', []) if s.get('index') == index), {})
+
+
+def plan_concat(infos: List[MediaInfo]) -> ConcatPlan:
+    """
+    按流参数分组并选出目标参数
+
+    Args:
+        infos: 各输入的探测结果（顺序即拼接顺序）
+
+    Returns:
+        ConcatPlan；存在无视频流的输入时 target 为 None
+    """
+    signatures = [StreamSignature.of(info) for info in infos]
+    if not signatures or any(sig is None for sig in signatures):
+        return ConcatPlan(target=None, copy=[False] * len(infos))
+
+    # 总时长最长的一组作为目标，重编码量最小
+    totals: Dict[StreamSignature, float] = defaultdict(float)
+    for sig, info in zip(signatures, infos):
+        totals[sig] += info.duration
+    target = max(totals, key=lambda sig: totals[sig])   # 并列时取最先出现的
+
+    return ConcatPlan(
+        target=target,
+        reference=signatures.index(target),
+        copy=[sig == target for sig in signatures],
+    )
+
+
+def normalize_args(info: MediaInfo, reference: MediaInfo,
+                   output_path: str) -> Optional[List[str]]:
+    """
+    把 info 归一化到 reference 流参数的 ffmpeg 命令
+
+    reference 的视频或音频编码没有对应编码器时返回 None。
+    """
+    target = StreamSignature.of(reference)
+    video_args = encoder_args(reference)
+    if target is None or video_args is None:
+        return None
+
+    width, height = target.width, target.height
+    vf = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+          f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+    if target.frame_rate and target.frame_rate != '0/0':
+        vf += f",fps={target.frame_rate}"
+
+    cmd = ['ffmpeg', '-y', '-i', info.path]
+    if target.audio_codec is None:
+        audio_args = ['-an']
+        maps = ['-map', '0:v:0']
+    else:
+        audio_encoder = AUDIO_ENCODERS.get(target.audio_codec)
+        if audio_encoder is None:
+            return None
+        audio_args = ['-c:a', audio_encoder,
+                      '-ar', str(target.sample_rate), '-ac', str(target.channels)]
+        bit_rate = reference.audio.bit_rate
+        if bit_rate and audio_encoder != 'flac':
+            audio_args += ['-b:a', str(bit_rate)]
+        if info.has_audio:
+            maps = ['-map', '0:v:0', '-map', '0:a:0']
+        else:
+            # 缺音轨的输入补静音，保证每段流布局一致
+            cmd += ['-f', 'lavfi', '-t', f"{info.duration:.6f}",
+                    '-i', f"anullsrc=r={target.sample_rate}:cl={_channel_layout(target.channels)}"]
+            maps = ['-map', '0:v:0', '-map', '1:a:0']
+
+    return cmd + [
+        *maps,
+        '-vf', vf,
+        *video_args,
+        *timescale_args(reference, output_path),
+        *audio_args,
+        output_path,
+    ]
+
+
+def _channel_layout(channels: int) -> str:
+    return {1: 'mono', 2: 'stereo'}.get(channels, f"{channels}c")
+
+
+def _concat_copy(paths: List[str], output_path: str, workdir: str,
+                 errors: Optional[List[str]] = None) -> bool:
+    list_path = Path(workdir) / "concat_list.txt"
+    list_path.write_text(''.join(_concat_entry(p) for p in paths), encoding='utf-8')
+    cmd = [
+        'ffmpeg', '-y',
+        '-f', 'concat', '-safe', '0',
+        '-i', str(list_path),
+        '-c', 'copy',
+        output_path,
+    ]
+    return _run_ok(cmd, errors)
+
+
+def concat_auto(input_paths: List[str], output_path: str,
+                errors: Optional[List[str]] = None) -> bool:
+    """
+    自动规划拼接：兼容的输入流复制，只归一化不兼容的输入
+
+    Args:
+        input_paths: 输入视频路径（按拼接顺序）
+        output_path: 输出视频路径
+        errors: 传入列表时，失败的 ffmpeg 命令的 stderr 追加到其中
+
+    Returns:
+        是否成功
+    """
+    if not input_paths:
+        return False
+
+    probed = get_media_catalog().probe_many(input_paths)
+    infos = [probed.get(path) for path in input_paths]
+    if any(info is None for info in infos):
+        # 无法探测时保持原先的直接复制行为
+        logger.warning("部分输入无法探测，直接按流复制拼接")
+        with tempfile.TemporaryDirectory(prefix="voxplore_concat_") as tmp:
+            return _concat_copy(list(input_paths), output_path, tmp, errors)
+
+    plan = plan_concat(infos)
+    suffix = Path(output_path).suffix or '.mp4'
+
+    with tempfile.TemporaryDirectory(prefix="voxplore_concat_") as tmp:
+        if plan.target is None:
+            return FFmpegTool.concat_videos(input_paths, output_path, method="demuxer",
+                                            errors=errors)
+
+        parts = []
+        for i, (path, info) in enumerate(zip(input_paths, infos)):
+            if plan.copy[i]:
+                parts.append(path)
+                continue
+            part = str(Path(tmp) / f"norm_{i}{suffix}")
+            cmd = normalize_args(info, infos[plan.reference], part)
+            if cmd is None:
+                logger.info("目标编码无法匹配，整体重编码拼接")
+                return FFmpegTool.concat_videos(input_paths, output_path, method="demuxer",
+                                                errors=errors)
+            if not _run_ok(cmd, errors):
+                return False
+            parts.append(part)
+
+        normalized = plan.copy.count(False)
+        logger.debug(f"拼接 {len(input_paths)} 个输入：{len(input_paths) - normalized} 个流复制，"
+                     f"{normalized} 个归一化")
+        return _concat_copy(parts, output_path, tmp, errors)
+
+
+__all__ = [
+    "StreamSignature",
+    "ConcatPlan",
+    "plan_concat",
+    "normalize_args",
+    "concat_auto",
+]
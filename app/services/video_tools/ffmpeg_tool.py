@@ -4,13 +4,52 @@ FFmpeg 工具模块
 提供 FFmpeg/FFprobe 调用的公共工具函数
 """
 
+import copy
 import json
 import logging
+import os
 import subprocess
 import tempfile
 from pathlib import Path
 logger = logging.getLogger(__name__)
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
+
+from app.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from .media_catalog import MediaInfo
+
+
+def _run(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """执行 ffmpeg/ffprobe 命令，开启追踪时记录耗时"""
+    if not tracer.enabled:
+        return subprocess.run(cmd, **kwargs)
+    source = cmd[cmd.index('-i') + 1] if '-i' in cmd else cmd[-1]
+    with tracer.span(Path(cmd[0]).name, category="ffmpeg", file=source):
+        return subprocess.run(cmd, **kwargs)
+
+
+def _run_ok(cmd: List[str], errors: Optional[List[str]] = None) -> bool:
+    """执行 ffmpeg 命令，失败时记录 stderr 末尾并返回 False（errors 非空时追加完整 stderr）"""
+    try:
+        _run(cmd, capture_output=True, text=True, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        stderr = getattr(e, 'stderr', '') or ''
+        logger.warning(f"ffmpeg 命令失败: {stderr[-200:] or e}")
+        if errors is not None:
+            errors.append(stderr or str(e))
+        return False
+
+
+def _concat_entry(path: str) -> str:
+    """
+    concat 列表文件中的一行
+
+    相对路径按列表文件所在目录解析，因此写绝对路径；单引号按 ffmpeg 规则转义为 '\\''
+    """
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
 
 
 class FFmpegTool:
@@ -33,98 +72,48 @@ class FFmpegTool:
             raise RuntimeError("FFmpeg 未安装，请安装后重试")
 
     # ========== 视频信息获取 ==========
+    # 均读取 MediaCatalog：每个文件只探测一次，并按路径/大小/mtime 持久化
+
+    @staticmethod
+    def probe(video_path: str) -> Optional["MediaInfo"]:
+        """获取媒体探测结果（带缓存），失败返回 None"""
+        from .media_catalog import get_media_catalog
+        return get_media_catalog().probe(video_path)
 
     @staticmethod
     def get_duration(video_path: str) -> float:
         """获取视频时长（秒）"""
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'json', video_path
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            return float(data.get('format', {}).get('duration', 0))
-        except (subprocess.CalledProcessError, KeyError, ValueError, json.JSONDecodeError):
-            return 0.0
+        info = FFmpegTool.probe(video_path)
+        return info.duration if info else 0.0
 
     @staticmethod
     def get_resolution(video_path: str) -> Tuple[int, int]:
         """获取视频分辨率 (width, height)"""
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-print_format', 'json',
-            '-show_streams', video_path
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            for stream in data.get('streams', []):
-                if stream.get('codec_type') == 'video':
-                    return (stream.get('width', 1920), stream.get('height', 1080))
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
-            logger.debug(f"ffprobe resolution parse failed for {video_path}: {e}")
+        info = FFmpegTool.probe(video_path)
+        if info and info.video:
+            return (info.video.width or 1920, info.video.height or 1080)
+        logger.debug(f"ffprobe resolution unavailable for {video_path}")
         return (1920, 1080)
 
     @staticmethod
     def get_framerate(video_path: str) -> float:
         """获取视频帧率"""
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-select_streams', 'v:0',
-            '-show_entries', 'stream=r_frame_rate',
-            '-of', 'json', video_path
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            streams = data.get('streams', [])
-            if streams:
-                fps_str = streams[0].get('r_frame_rate', '30/1')
-                if '/' in fps_str:
-                    num, den = fps_str.split('/')
-                    return float(num) / float(den) if den != '0' else 30.0
-                return float(fps_str)
-        except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError) as e:
-            logger.debug(f"ffprobe framerate parse failed for {video_path}: {e}")
+        info = FFmpegTool.probe(video_path)
+        if info and info.video and info.video.fps > 0:
+            return info.video.fps
         return 30.0
 
     @staticmethod
     def get_bitrate(video_path: str) -> int:
         """获取视频码率 (bps)"""
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=bit_rate',
-            '-of', 'json', video_path
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            return int(data.get('format', {}).get('bit_rate', 0))
-        except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"ffprobe 获取码率失败 {video_path}: {e}")
-            return 0
+        info = FFmpegTool.probe(video_path)
+        return info.bit_rate if info else 0
 
     @staticmethod
     def get_video_info(video_path: str) -> Dict[str, Any]:
-        """获取完整视频信息"""
-        cmd = [
-            'ffprobe', '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format', '-show_streams', video_path
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return json.loads(result.stdout)
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
-            logger.warning(f"ffprobe 获取视频信息失败 {video_path}: {e}")
-            return {}
+        """获取完整视频信息（ffprobe JSON：format + streams）"""
+        info = FFmpegTool.probe(video_path)
+        return copy.deepcopy(info.raw) if info else {}
 
     # ========== 视频处理 ==========
 
@@ -134,6 +123,7 @@ class FFmpegTool:
         output_path: str,
         start: float,
         end: float,
+        mode: str = "copy",
     ) -> bool:
         """
         裁剪视频
@@ -143,10 +133,16 @@ class FFmpegTool:
             output_path: 输出视频路径
             start: 开始时间（秒）
             end: 结束时间（秒）
+            mode: copy 流复制（最快，起点对齐到前一个关键帧）/
+                  smart 帧精确（只重编码首尾不完整的 GOP）
 
         Returns:
             是否成功
         """
+        if mode == "smart":
+            from .smart_cut import smart_cut
+            return smart_cut(input_path, output_path, start, end)
+
         cmd = [
             'ffmpeg', '-y',
             '-ss', str(start),
@@ -157,7 +153,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -167,6 +163,7 @@ class FFmpegTool:
         input_paths: List[str],
         output_path: str,
         method: str = "concat",
+        errors: Optional[List[str]] = None,
     ) -> bool:
         """
         拼接视频
@@ -174,16 +171,22 @@ class FFmpegTool:
         Args:
             input_paths: 输入视频路径列表
             output_path: 输出视频路径
-            method: concat/demuxer
+            method: concat 全部流复制 / demuxer 全部重编码 /
+                    auto 按流参数规划（兼容的复制，不兼容的归一化）
+            errors: 传入列表时，auto / demuxer 失败会追加 ffmpeg 的 stderr
 
         Returns:
             是否成功
         """
+        if method == "auto":
+            from .concat_planner import concat_auto
+            return concat_auto(input_paths, output_path, errors=errors)
+
         if method == "concat":
             # 使用 concat 协议（适用于相同编码的视频）
             with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
                 for p in input_paths:
-                    f.write(f"file '{p}'\n")
+                    f.write(_concat_entry(p))
                 list_path = f.name
 
             try:
@@ -195,7 +198,7 @@ class FFmpegTool:
                     '-c', 'copy',
                     output_path,
                 ]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+                result = _run(cmd, capture_output=True, text=True, check=True)
                 return result.returncode == 0
             finally:
                 Path(list_path).unlink(missing_ok=True)
@@ -215,9 +218,11 @@ class FFmpegTool:
             ])
 
             try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+                result = _run(cmd, capture_output=True, text=True, check=True)
                 return result.returncode == 0
-            except subprocess.CalledProcessError:
+            except subprocess.CalledProcessError as e:
+                if errors is not None:
+                    errors.append(e.stderr or str(e))
                 return False
 
     @staticmethod
@@ -246,7 +251,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -275,7 +280,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -308,7 +313,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -361,7 +366,7 @@ class FFmpegTool:
             ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -391,7 +396,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -405,6 +410,7 @@ class FFmpegTool:
         timestamp: float = 1.0,
         width: int = 320,
         height: int = 180,
+        timeout: Optional[float] = None,
     ) -> bool:
         """
         生成缩略图
@@ -415,6 +421,7 @@ class FFmpegTool:
             timestamp: 时间点（秒）
             width: 输出宽度
             height: 输出高度
+            timeout: 超时时间（秒），超时视为失败
 
         Returns:
             是否成功
@@ -430,9 +437,60 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
             return result.returncode == 0
-        except subprocess.CalledProcessError:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return False
+        except OSError as e:
+            # ffmpeg 未安装等启动失败
+            logger.warning(f"无法运行 ffmpeg: {e}")
+            return False
+
+    @staticmethod
+    def generate_sprite_sheet(
+        video_path: str,
+        output_path: str,
+        interval: float,
+        frames: int,
+        columns: int = 10,
+        width: int = 160,
+        height: int = 90,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        生成时间轴雪碧图（一次解码，fps + tile 滤镜拼成一张图）
+
+        Args:
+            video_path: 视频路径
+            output_path: 输出图片路径
+            interval: 相邻两帧的时间间隔（秒）
+            frames: 帧数
+            columns: 每行帧数
+            width: 单帧宽度
+            height: 单帧高度
+            timeout: 超时时间（秒），超时视为失败
+
+        Returns:
+            是否成功
+        """
+        rows = max(1, -(-frames // columns))
+        cmd = [
+            'ffmpeg', '-y',
+            '-i', video_path,
+            '-vf', f'fps=1/{interval:.6f},scale={width}:{height},tile={columns}x{rows}',
+            '-frames:v', '1',
+            '-q:v', '3',
+            output_path,
+        ]
+
+        try:
+            result = _run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
+            return result.returncode == 0
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return False
+        except OSError as e:
+            # ffmpeg 未安装等启动失败
+            logger.warning(f"无法运行 ffmpeg: {e}")
             return False
 
     @staticmethod
@@ -464,7 +522,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -502,7 +560,7 @@ class FFmpegTool:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = _run(cmd, capture_output=True, text=True, check=True)
             return result.returncode == 0
         except subprocess.CalledProcessError:
             return False
@@ -516,7 +574,7 @@ class FFmpegTool:
         check: bool = False,
     ) -> subprocess.CompletedProcess:
         """运行 FFmpeg 命令"""
-        return subprocess.run(
+        return _run(
             cmd,
             capture_output=capture,
             text=True,
@@ -0,0 +1,104 @@
+"""
+Keyword Matcher - 多模式关键词匹配
+基于 Aho-Corasick 自动机，一次线性扫描找出文本中所有词库命中
+
+特性:
+- 词库预编译为自动机，扫描与词库大小无关
+- 返回所有（含相互重叠的）命中区间
+- 每个模式可以携带任意标签（如 关键词 / 情绪等级）
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 多模式匹配器
+
+    使用示例:
+        matcher = KeywordMatcher({'爆款': 'kw', '牛逼': 'emo'})
+        matcher.find_all('这个爆款真牛逼')
+        # [(2, 4, 'kw'), (5, 7, 'emo')]
+    """
+
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        编译自动机
+
+        Args:
+            patterns: 模式 -> 标签（空字符串会被忽略）
+        """
+        # 每个状态: 转移表、失败指针、输出 [(模式长度, 标签)]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._count = 0
+
+        for pattern, tag in patterns.items():
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(pattern), tag))
+            self._count += 1
+
+        # BFS 计算失败指针，并把失败链上的输出合并进来（扫描时不必再沿链回溯）
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        """模式数量"""
+        return self._count
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        扫描文本，返回所有命中 (start, end, tag)，按结束位置排序
+
+        Args:
+            text: 待扫描文本
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, tag in out[state]:
+                matches.append((i + 1 - length, i + 1, tag))
+        return matches
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[Tuple[Iterable[str], Any]]) -> "KeywordMatcher":
+        """
+        由多组词库构建，同一个词出现在多组时标签合并为元组
+
+        Args:
+            groups: [(词库, 标签), ...]
+        """
+        patterns: Dict[str, Tuple] = {}
+        for words, tag in groups:
+            for word in words:
+                patterns[word] = patterns.get(word, ()) + (tag,)
+        return cls(patterns)
+
+
+__all__ = ["KeywordMatcher"]
@@ -0,0 +1,425 @@
+"""
+媒体探测目录
+
+每个文件只用一次 ffprobe（-show_format -show_streams）探测，结果解析为
+MediaInfo 并按 (路径, 大小, mtime) 持久化到 SQLite，文件未变化时直接复用。
+关键帧索引按需探测并一并缓存。
+
+使用示例:
+    from app.services.video_tools.media_catalog import get_media_catalog
+
+    catalog = get_media_catalog()
+    info = catalog.probe("/path/video.mp4")
+    if info:
+        print(info.duration, info.width, info.height, info.fps)
+
+    catalog.probe_folder("/path/footage")         # 线程池批量探测
+    catalog.keyframes("/path/video.mp4")           # 关键帧时间戳（秒）
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+MEDIA_EXTENSIONS = (
+    '.mp4', '.mov', '.mkv', '.avi', '.webm', '.flv', '.m4v',
+    '.mp3', '.wav', '.aac', '.m4a', '.flac', '.ogg',
+)
+
+
+def _parse_rate(value: Optional[str]) -> float:
+    """解析 "30000/1001" 形式的帧率，无效时返回 0.0"""
+    if not value:
+        return 0.0
+    try:
+        if '/' in value:
+            num, den = value.split('/', 1)
+            return float(num) / float(den) if float(den) != 0 else 0.0
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class StreamInfo:
+    """单路音视频流"""
+    index: int
+    codec_type: str
+    codec_name: str = ""
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    pix_fmt: str = ""
+    sample_rate: int = 0
+    channels: int = 0
+    bit_rate: int = 0
+    duration: float = 0.0
+
+    @classmethod
+    def from_ffprobe(cls, data: Dict[str, Any]) -> "StreamInfo":
+        return cls(
+            index=_to_int(data.get('index')),
+            codec_type=data.get('codec_type', ''),
+            codec_name=data.get('codec_name', ''),
+            width=_to_int(data.get('width')),
+            height=_to_int(data.get('height')),
+            fps=_parse_rate(data.get('r_frame_rate')),
+            pix_fmt=data.get('pix_fmt', ''),
+            sample_rate=_to_int(data.get('sample_rate')),
+            channels=_to_int(data.get('channels')),
+            bit_rate=_to_int(data.get('bit_rate')),
+            duration=_to_float(data.get('duration')),
+        )
+
+
+@dataclass
+class MediaInfo:
+    """媒体文件探测结果"""
+    path: str
+    size: int
+    mtime_ns: int
+    duration: float = 0.0
+    bit_rate: int = 0
+    format_name: str = ""
+    streams: List[StreamInfo] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict)   # ffprobe 原始 JSON（format + streams）
+    keyframes: Optional[List[float]] = None              # 按需探测
+
+    @classmethod
+    def from_ffprobe(cls, path: str, size: int, mtime_ns: int,
+                     data: Dict[str, Any]) -> "MediaInfo":
+        fmt = data.get('format', {})
+        return cls(
+            path=path,
+            size=size,
+            mtime_ns=mtime_ns,
+            duration=_to_float(fmt.get('duration')),
+            bit_rate=_to_int(fmt.get('bit_rate')),
+            format_name=fmt.get('format_name', ''),
+            streams=[StreamInfo.from_ffprobe(s) for s in data.get('streams', [])],
+            raw=data,
+        )
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        """第一路视频流"""
+        return next((s for s in self.streams if s.codec_type == 'video'), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        """第一路音频流"""
+        return next((s for s in self.streams if s.codec_type == 'audio'), None)
+
+    @property
+    def width(self) -> int:
+        return self.video.width if self.video else 0
+
+    @property
+    def height(self) -> int:
+        return self.video.height if self.video else 0
+
+    @property
+    def fps(self) -> float:
+        return self.video.fps if self.video else 0.0
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+
+class MediaCatalog:
+    """
+    媒体探测目录
+
+    内存 LRU + SQLite 两级缓存，线程安全。db_path 为 None 时只在内存中缓存。
+    无法 stat 的路径（如 URL）每次都直接探测，不缓存。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 4096,
+                 timeout: float = 30.0):
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._memory: "OrderedDict[str, MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ---------- 存储 ----------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """首次写入/读取时才创建数据库"""
+        if self.db_path is None:
+            return None
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS media (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    info TEXT,
+                    keyframes TEXT,
+                    probed_at INTEGER
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self, path: str, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+        with self._lock:
+            info = self._memory.get(path)
+            if info is not None and (info.size, info.mtime_ns) == (size, mtime_ns):
+                self._memory.move_to_end(path)
+                return info
+            try:
+                conn = self._db()
+                row = conn.execute(
+                    "SELECT info, keyframes FROM media WHERE path=? AND size=? AND mtime_ns=?",
+                    (path, size, mtime_ns),
+                ).fetchone() if conn else None
+            except sqlite3.Error as e:
+                logger.debug(f"媒体目录读取失败 {path}: {e}")
+                row = None
+        if row is None:
+            return None
+        info = MediaInfo.from_ffprobe(path, size, mtime_ns, json.loads(row[0]))
+        if row[1] is not None:
+            info.keyframes = json.loads(row[1])
+        self._remember(info)
+        return info
+
+    def _remember(self, info: MediaInfo) -> None:
+        with self._lock:
+            self._memory[info.path] = info
+            self._memory.move_to_end(info.path)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, info: MediaInfo) -> None:
+        self._remember(info)
+        with self._lock:
+            try:
+                conn = self._db()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO media (path, size, mtime_ns, info, keyframes, probed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (info.path, info.size, info.mtime_ns,
+                     json.dumps(info.raw, ensure_ascii=False),
+                     json.dumps(info.keyframes) if info.keyframes is not None else None,
+                     int(time.time())),
+                )
+                conn.commit()
+            except (sqlite3.Error, OSError) as e:
+                logger.debug(f"媒体目录写入失败 {info.path}: {e}")
+
+    # ---------- 探测 ----------
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _ffprobe(self, cmd: List[str]) -> subprocess.CompletedProcess:
+        from .ffmpeg_tool import _run
+        return _run(cmd, capture_output=True, text=True, check=True, timeout=self.timeout)
+
+    def probe(self, path: str, refresh: bool = False) -> Optional[MediaInfo]:
+        """
+        获取媒体信息
+
+        Args:
+            path: 文件路径
+            refresh: 忽略缓存重新探测
+
+        Returns:
+            MediaInfo，探测失败返回 None
+        """
+        key = os.path.abspath(path) if '://' not in path else path
+        stat = self._stat(key)
+        if stat is not None and not refresh:
+            cached = self._load(key, *stat)
+            if cached is not None:
+                return cached
+
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-print_format', 'json',
+            '-show_format', '-show_streams', path,
+        ]
+        try:
+            result = self._ffprobe(cmd)
+            data = json.loads(result.stdout)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError, json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"ffprobe 探测失败 {path}: {e}")
+            return None
+
+        info = MediaInfo.from_ffprobe(key, *(stat or (-1, -1)), data)
+        if stat is not None:
+            self._store(info)
+        return info
+
+    def probe_many(self, paths: Iterable[str],
+                   max_workers: int = 4) -> Dict[str, Optional[MediaInfo]]:
+        """线程池批量探测，返回 {输入路径: MediaInfo}"""
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+            return dict(zip(paths, pool.map(self.probe, paths)))
+
+    def probe_folder(self, folder: str, recursive: bool = True,
+                     extensions: Iterable[str] = MEDIA_EXTENSIONS,
+                     max_workers: int = 4) -> Dict[str, Optional[MediaInfo]]:
+        """批量探测目录下的媒体文件"""
+        exts = {e.lower() for e in extensions}
+        root = Path(folder)
+        files = root.rglob('*') if recursive else root.glob('*')
+        paths = sorted(str(p) for p in files if p.is_file() and p.suffix.lower() in exts)
+        return self.probe_many(paths, max_workers=max_workers)
+
+    def keyframes(self, path: str) -> List[float]:
+        """
+        获取视频关键帧时间戳（秒，升序）
+
+        只读取 packet 标志位，不解码；结果随媒体信息一并缓存。
+        """
+        info = self.probe(path)
+        if info is None or info.video is None:
+            return []
+        if info.keyframes is not None:
+            return info.keyframes
+
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0', path,
+        ]
+        try:
+            result = self._ffprobe(cmd)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError) as e:
+            logger.warning(f"ffprobe 关键帧探测失败 {path}: {e}")
+            return []
+
+        times = []
+        for line in result.stdout.splitlines():
+            pts, _, flags = line.partition(',')
+            if 'K' in flags:
+                try:
+                    times.append(float(pts))
+                except ValueError:
+                    continue
+        info.keyframes = sorted(times)
+        if info.size >= 0:
+            self._store(info)
+        return info.keyframes
+
+    # ---------- 维护 ----------
+
+    def invalidate(self, path: str) -> None:
+        """移除某个文件的缓存"""
+        key = os.path.abspath(path) if '://' not in path else path
+        with self._lock:
+            self._memory.pop(key, None)
+            try:
+                conn = self._db()
+                if conn is not None:
+                    conn.execute("DELETE FROM media WHERE path=?", (key,))
+                    conn.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"媒体目录删除失败 {key}: {e}")
+
+    def prune(self) -> int:
+        """删除已不存在或已变化的文件记录，返回删除条数"""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return 0
+            rows = conn.execute("SELECT path, size, mtime_ns FROM media").fetchall()
+            stale = [(p,) for p, size, mtime in rows if self._stat(p) != (size, mtime)]
+            conn.executemany("DELETE FROM media WHERE path=?", stale)
+            conn.commit()
+            for (p,) in stale:
+                self._memory.pop(p, None)
+        return len(stale)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM media")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_catalog: Optional[MediaCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_media_catalog() -> MediaCatalog:
+    """
+    获取全局媒体目录
+
+    数据库位置可用环境变量 VOXPLORE_MEDIA_CATALOG 指定，设为空字符串则只用内存缓存。
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                db_path = os.environ.get(
+                    "VOXPLORE_MEDIA_CATALOG",
+                    str(Path.home() / "Voxplore" / "cache" / "media_catalog.db"),
+                )
+                _catalog = MediaCatalog(os.path.expanduser(db_path) if db_path else None)
+    return _catalog
+
+
+__all__ = [
+    "MediaCatalog",
+    "MediaInfo",
+    "StreamInfo",
+    "MEDIA_EXTENSIONS",
+    "get_media_catalog",
+]
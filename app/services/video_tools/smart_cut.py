@@ -0,0 +1,311 @@
+"""
+关键帧感知的精确裁剪（smart cut）
+
+精确裁剪不再整段重编码：
+- 从 MediaCatalog 读取关键帧索引
+- 起点到其后第一个关键帧、最后一个关键帧到终点这两段不完整的 GOP 按源参数
+  （编码器 / profile / level / 像素格式）重编码
+- 中间完整的 GOP 直接流复制
+- 三段先写成 MPEG-TS（SPS/PPS 随每个关键帧带在码流里），再用 concat demuxer
+  拼接，同一条命令里重编码音频（音频编码开销可忽略）
+
+只对封闭 GOP 的 H.264 源启用：HEVC 等编码重编码部分的参数集无法与复制部分对齐，
+开放 GOP 的前导帧引用上一个 GOP，从关键帧开始复制会花屏。其余情况整段重编码。
+
+长素材中截取片段时，耗时主要取决于读写而不是编码。
+
+使用示例:
+    from app.services.video_tools.smart_cut import smart_cut
+
+    smart_cut("/path/long.mp4", "/path/clip.mp4", start=123.4, end=187.9)
+"""
+
+import logging
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .ffmpeg_tool import _concat_entry, _run, _run_ok
+from .media_catalog import MediaInfo, get_media_catalog
+
+logger = logging.getLogger(__name__)
+
+
+# 源编码 → 重编码边界片段使用的编码器
+SOURCE_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+    'mpeg4': 'mpeg4',
+    'vp9': 'libvpx-vp9',
+    'av1': 'libaom-av1',
+}
+
+# 可以与复制部分拼接的源编码（参数集随码流携带，profile/level 对齐）
+SMART_CUT_CODECS = {'h264'}
+
+# 判断开放 GOP 时从关键帧起读取的 packet 数
+GOP_PROBE_PACKETS = 64
+
+# 中间可复制部分短于该值时不值得拆分，直接整段重编码
+MIN_COPY_DURATION = 1.0
+
+# 关键帧时间与切点比较的容差（秒）
+_EPS = 1e-3
+
+DEFAULT_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '192k']
+
+
+@dataclass
+class CutSegment:
+    """裁剪计划中的一段"""
+    start: float
+    end: float
+    copy: bool      # True: 流复制；False: 重编码
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def plan_smart_cut(
+    keyframes: List[float],
+    start: float,
+    end: float,
+    min_copy: float = MIN_COPY_DURATION,
+) -> List[CutSegment]:
+    """
+    根据关键帧规划裁剪
+
+    Args:
+        keyframes: 升序关键帧时间
+        start: 开始时间（秒）
+        end: 结束时间（秒）
+        min_copy: 可复制部分的最短时长
+
+    Returns:
+        按时间排列的片段；没有足够长的完整 GOP 时只有一段重编码
+    """
+    if end <= start:
+        return []
+
+    # 第一个 >= start 的关键帧，最后一个 <= end 的关键帧
+    first = next((k for k in keyframes if k >= start - _EPS), None)
+    last = next((k for k in reversed(keyframes) if k <= end + _EPS), None)
+    if first is None or last is None or last - first < min_copy:
+        return [CutSegment(start, end, copy=False)]
+
+    segments = []
+    if first - start > _EPS:
+        segments.append(CutSegment(start, first, copy=False))
+    segments.append(CutSegment(max(first, start), min(last, end), copy=True))
+    if end - last > _EPS:
+        segments.append(CutSegment(last, end, copy=False))
+    return segments
+
+
+def encoder_args(info: MediaInfo, crf: Optional[int] = None,
+                 preset: Optional[str] = None) -> Optional[List[str]]:
+    """
+    与源视频流参数一致的编码参数（编码器 / profile / level / 像素格式 / 码率）
+
+    Args:
+        info: 源媒体信息
+        crf: 指定时按恒定质量编码，否则沿用源码率
+        preset: 编码预设
+
+    源编码无对应编码器时返回 None。
+    """
+    video = info.video
+    encoder = SOURCE_ENCODERS.get(video.codec_name) if video else None
+    if encoder is None:
+        return None
+
+    raw: Dict[str, Any] = next(
+        (s for s in info.raw.get('streams', []) if s.get('index') == video.index), {}
+    )
+    args = ['-c:v', encoder]
+    profile = str(raw.get('profile', '')).lower()
+    if encoder == 'libx264' and profile in ('baseline', 'main', 'high', 'high 10'):
+        args += ['-profile:v', profile.replace(' ', '')]
+    elif encoder == 'libx265' and profile in ('main', 'main 10'):
+        args += ['-profile:v', profile.replace(' ', '')]
+    level = raw.get('level')
+    if encoder == 'libx264' and isinstance(level, int) and level >= 10:
+        args += ['-level:v', f"{level // 10}.{level % 10}"]
+    if video.pix_fmt:
+        args += ['-pix_fmt', video.pix_fmt]
+    if preset:
+        args += ['-preset', preset]
+    if crf is not None:
+        args += ['-crf', str(crf)]
+    elif video.bit_rate:
+        args += ['-b:v', str(video.bit_rate)]
+    else:
+        args += ['-crf', '18']
+    return args
+
+
+def closed_gop_at(input_path: str, keyframe: float,
+                  packets: int = GOP_PROBE_PACKETS) -> bool:
+    """
+    keyframe 处的 GOP 是否封闭
+
+    按解码顺序读取关键帧之后的 packet：若在下一个关键帧之前出现显示时间早于
+    该关键帧的帧（开放 GOP 的前导帧），说明它引用了上一个 GOP。探测失败按开放处理。
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-read_intervals', f"{keyframe:.6f}%+#{packets}",
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0', input_path,
+    ]
+    try:
+        result = _run(cmd, capture_output=True, text=True, check=True, timeout=30)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        logger.debug(f"GOP 探测失败 {input_path}: {e}")
+        return False
+
+    key_pts = None
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(',')
+        try:
+            t = float(pts)
+        except ValueError:
+            continue
+        if 'K' in flags:
+            if key_pts is not None:
+                break
+            key_pts = t
+        elif key_pts is not None and t < key_pts - _EPS:
+            return False
+    return key_pts is not None
+
+
+def timescale_args(info: MediaInfo, output_path: str) -> List[str]:
+    """mp4/mov 输出时保持源时间基，避免拼接处时间戳取整"""
+    if Path(output_path).suffix.lower() not in ('.mp4', '.mov', '.m4v'):
+        return []
+    video = info.video
+    raw = next((s for s in info.raw.get('streams', []) if s.get('index') == video.index), {})
+    _, _, den = str(raw.get('time_base', '')).partition('/')
+    return ['-video_track_timescale', den] if den.isdigit() else []
+
+
+def smart_cut(
+    input_path: str,
+    output_path: str,
+    start: float,
+    end: float,
+    audio_args: Optional[List[str]] = None,
+    crf: Optional[int] = None,
+    preset: Optional[str] = None,
+) -> bool:
+    """
+    帧精确裁剪 [start, end)，封闭 GOP 的 H.264 源只重编码首尾不完整的 GOP
+
+    Args:
+        input_path: 输入视频路径
+        output_path: 输出视频路径
+        start: 开始时间（秒）
+        end: 结束时间（秒）
+        audio_args: 音频编码参数，默认 AAC 192k
+        crf: 重编码部分的恒定质量因子，默认沿用源码率
+        preset: 重编码部分的编码预设
+
+    Returns:
+        是否成功
+    """
+    catalog = get_media_catalog()
+    info = catalog.probe(input_path)
+    if info is None or info.video is None:
+        logger.warning(f"smart cut 无法读取视频信息: {input_path}")
+        return False
+    if info.duration:
+        end = min(end, info.duration)
+    if end <= start:
+        return False
+
+    audio_args = list(audio_args or DEFAULT_AUDIO_ARGS)
+    encoder = encoder_args(info, crf=crf, preset=preset)
+    plan = []
+    if encoder and info.video.codec_name in SMART_CUT_CODECS:
+        plan = plan_smart_cut(catalog.keyframes(input_path), start, end)
+        # 复制部分的起点，以及其后紧接重编码尾段时的终点，都落在关键帧上
+        boundaries = {seg.start for seg in plan if seg.copy}
+        boundaries |= {seg.end for seg in plan if seg.copy and seg.end < end - _EPS}
+        if not all(closed_gop_at(input_path, k) for k in sorted(boundaries)):
+            logger.debug(f"开放 GOP，smart cut 改为整段重编码: {input_path}")
+            plan = []
+
+    if not any(segment.copy for segment in plan):
+        # 没有可复制的完整 GOP：整段精确重编码
+        cmd = [
+            'ffmpeg', '-y',
+            '-ss', f"{start:.6f}",
+            '-i', input_path,
+            '-t', f"{end - start:.6f}",
+            '-map', '0:v:0', '-map', '0:a:0?',
+            *(encoder or ['-c:v', 'libx264', '-crf', str(18 if crf is None else crf),
+                          *(['-preset', preset] if preset else [])]),
+            *audio_args,
+            output_path,
+        ]
+        return _run_ok(cmd)
+
+    timescale = timescale_args(info, output_path)
+
+    with tempfile.TemporaryDirectory(prefix="voxplore_smartcut_") as tmp:
+        parts = []
+        for i, segment in enumerate(plan):
+            # MPEG-TS 中间文件：muxer 在每个关键帧前写入各自的 SPS/PPS，
+            # 拼接后解码器随片段切换参数集
+            part = str(Path(tmp) / f"part_{i}.ts")
+            codec = ['-c:v', 'copy'] if segment.copy else encoder
+            cmd = [
+                'ffmpeg', '-y',
+                '-ss', f"{segment.start:.6f}",
+                '-i', input_path,
+                '-t', f"{segment.duration:.6f}",
+                '-map', '0:v:0', '-an', '-sn',
+                *codec,
+                '-avoid_negative_ts', 'make_zero',
+                '-f', 'mpegts',
+                part,
+            ]
+            if not _run_ok(cmd):
+                return False
+            parts.append(part)
+
+        list_path = Path(tmp) / "parts.txt"
+        list_path.write_text(''.join(_concat_entry(p) for p in parts), encoding='utf-8')
+
+        # 拼接视频（流复制）并从源文件截取同一区间的音频
+        cmd = [
+            'ffmpeg', '-y',
+            '-f', 'concat', '-safe', '0', '-i', str(list_path),
+            '-ss', f"{start:.6f}", '-t', f"{end - start:.6f}", '-i', input_path,
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c:v', 'copy',
+            *audio_args,
+            *timescale,
+            output_path,
+        ]
+        ok = _run_ok(cmd)
+
+    copied = sum(s.duration for s in plan if s.copy)
+    logger.debug(f"smart cut {input_path} [{start:.3f}, {end:.3f}): "
+                 f"{copied:.3f}s 流复制, {end - start - copied:.3f}s 重编码")
+    return ok
+
+
+__all__ = [
+    "CutSegment",
+    "plan_smart_cut",
+    "encoder_args",
+    "closed_gop_at",
+    "timescale_args",
+    "smart_cut",
+]
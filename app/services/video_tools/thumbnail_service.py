@@ -0,0 +1,301 @@
+"""
+缩略图服务
+
+统一生成视频缩略图和时间轴雪碧图：
+- 有界并发：同时运行的 ffmpeg 进程数不超过 max_workers
+- 内容缓存：按文件指纹（大小 + 首尾数据块）+ 参数命名，缓存在应用缓存目录，
+  不再在用户素材旁边写 .voxplore_thumbs
+- 雪碧图：一次解码用 fps + tile 滤镜输出 N 帧拼图，供时间轴拖动预览
+
+使用示例:
+    from app.services.video_tools.thumbnail_service import get_thumbnail_service
+
+    service = get_thumbnail_service()
+    thumb = service.thumbnail("/path/video.mp4")
+    service.thumbnails(paths, on_ready=lambda path, thumb: ...)
+    sheet = service.sprite_sheet("/path/video.mp4", frames=50)
+    x, y, w, h = sheet.tile_rect(sheet.frame_at(12.3))
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .ffmpeg_tool import FFmpegTool
+
+logger = logging.getLogger(__name__)
+
+
+_FINGERPRINT_BLOCK = 64 * 1024
+
+# 单帧缩略图 / 雪碧图的 ffmpeg 超时（秒）；雪碧图要解码整段视频，放宽很多
+THUMBNAIL_TIMEOUT = 15
+SPRITE_TIMEOUT = 120
+
+# 记忆的文件指纹条数上限，超出按最近最少使用淘汰
+FINGERPRINT_CACHE_SIZE = 4096
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    文件内容指纹
+
+    只读取首尾各 64KB 与文件大小，与文件名和位置无关，移动/重命名后缓存仍然有效。
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(_FINGERPRINT_BLOCK))
+        if size > 2 * _FINGERPRINT_BLOCK:
+            f.seek(-_FINGERPRINT_BLOCK, os.SEEK_END)
+            h.update(f.read(_FINGERPRINT_BLOCK))
+    return h.hexdigest()
+
+
+@dataclass
+class SpriteSheet:
+    """时间轴雪碧图"""
+    image_path: str
+    frame_times: List[float] = field(default_factory=list)
+    columns: int = 10
+    rows: int = 1
+    tile_width: int = 160
+    tile_height: int = 90
+
+    def frame_at(self, t: float) -> int:
+        """时间 t 对应的帧下标"""
+        if len(self.frame_times) < 2:
+            return 0
+        interval = self.frame_times[1] - self.frame_times[0]
+        return max(0, min(len(self.frame_times) - 1, int(t / interval)))
+
+    def tile_rect(self, index: int) -> Tuple[int, int, int, int]:
+        """帧在雪碧图中的像素区域 (x, y, w, h)"""
+        row, col = divmod(index, self.columns)
+        return (col * self.tile_width, row * self.tile_height,
+                self.tile_width, self.tile_height)
+
+
+class ThumbnailService:
+    """缩略图 / 雪碧图生成服务（线程安全）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else (
+            Path.home() / "Voxplore" / "cache" / "thumbnails"
+        )
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._fingerprints: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    # ---------- 线程池 ----------
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="thumbnail"
+                )
+            return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _once(self, key: str, func: Callable[[], object]) -> object:
+        """同一缓存文件同时只生成一次"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _cache_path(self, video_path: str, suffix: str) -> Path:
+        # 指纹按 (路径, 大小, mtime) 记忆，重复查询不再读文件
+        st = os.stat(video_path)
+        stat_key = (os.path.abspath(video_path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            fingerprint = self._fingerprints.get(stat_key)
+            if fingerprint is not None:
+                self._fingerprints.move_to_end(stat_key)
+        if fingerprint is None:
+            fingerprint = file_fingerprint(video_path)
+            with self._lock:
+                self._fingerprints[stat_key] = fingerprint
+                while len(self._fingerprints) > FINGERPRINT_CACHE_SIZE:
+                    self._fingerprints.popitem(last=False)
+        return self.cache_dir / fingerprint[:2] / f"{fingerprint}_{suffix}.jpg"
+
+    # ---------- 缩略图 ----------
+
+    def thumbnail(self, video_path: str, timestamp: float = 1.0,
+                  width: int = 160, height: int = 90) -> str:
+        """
+        获取单个视频缩略图（命中缓存时不启动 ffmpeg）
+
+        Returns:
+            缩略图路径，失败返回空字符串
+        """
+        try:
+            out = self._cache_path(video_path, f"t{timestamp:g}_{width}x{height}")
+        except OSError as e:
+            logger.debug(f"Thumbnail fingerprint failed for {video_path}: {e}")
+            return ""
+        if out.exists():
+            return str(out)
+
+        def generate() -> str:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            # 短视频的默认时间点可能越界，退到中点
+            duration = FFmpegTool.get_duration(video_path)
+            t = timestamp if not duration or timestamp < duration else duration / 2
+            tmp = out.with_name(f".{out.name}.{threading.get_ident()}.jpg")
+            ok = FFmpegTool.generate_thumbnail(video_path, str(tmp), timestamp=t,
+                                               width=width, height=height,
+                                               timeout=THUMBNAIL_TIMEOUT)
+            if ok and tmp.exists():
+                os.replace(tmp, out)
+                return str(out)
+            tmp.unlink(missing_ok=True)
+            logger.warning(f"Thumbnail generation failed: {video_path}")
+            return ""
+
+        return self._once(str(out), generate)
+
+    def submit(self, video_path: str, **kwargs) -> Future:
+        """异步生成缩略图"""
+        return self._pool().submit(self.thumbnail, video_path, **kwargs)
+
+    def thumbnails(
+        self,
+        video_paths: Iterable[str],
+        on_ready: Optional[Callable[[str, str], None]] = None,
+        **kwargs,
+    ) -> Dict[str, str]:
+        """
+        批量生成缩略图（并发，按完成顺序回调）
+
+        Args:
+            video_paths: 视频路径
+            on_ready: 每个完成时回调 (video_path, thumb_path)，在工作线程中调用
+            **kwargs: 透传给 thumbnail()
+
+        Returns:
+            {video_path: thumb_path}
+        """
+        futures = {}
+        for path in dict.fromkeys(video_paths):
+            future = self.submit(path, **kwargs)
+            if on_ready is not None:
+                future.add_done_callback(
+                    lambda f, p=path: on_ready(p, f.result() if not f.exception() else "")
+                )
+            futures[path] = future
+
+        results = {}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.debug(f"Thumbnail error for {path}: {e}")
+                results[path] = ""
+        return results
+
+    # ---------- 雪碧图 ----------
+
+    def sprite_sheet(self, video_path: str, frames: int = 50, columns: int = 10,
+                     width: int = 160, height: int = 90) -> Optional[SpriteSheet]:
+        """
+        生成时间轴雪碧图（一次解码）
+
+        帧 i 对应时间 i * duration / frames。
+
+        Returns:
+            SpriteSheet，失败返回 None
+        """
+        duration = FFmpegTool.get_duration(video_path)
+        if duration <= 0 or frames <= 0:
+            return None
+
+        interval = duration / frames
+        columns = max(1, min(columns, frames))
+        sheet = SpriteSheet(
+            image_path="",
+            frame_times=[i * interval for i in range(frames)],
+            columns=columns,
+            rows=-(-frames // columns),
+            tile_width=width,
+            tile_height=height,
+        )
+        try:
+            out = self._cache_path(video_path, f"s{frames}x{columns}_{width}x{height}")
+        except OSError as e:
+            logger.debug(f"Sprite fingerprint failed for {video_path}: {e}")
+            return None
+
+        def generate() -> str:
+            if out.exists():
+                return str(out)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_name(f".{out.name}.{threading.get_ident()}.jpg")
+            ok = FFmpegTool.generate_sprite_sheet(
+                video_path, str(tmp), interval=interval, frames=frames,
+                columns=columns, width=width, height=height, timeout=SPRITE_TIMEOUT,
+            )
+            if ok and tmp.exists():
+                os.replace(tmp, out)
+                return str(out)
+            tmp.unlink(missing_ok=True)
+            logger.warning(f"Sprite sheet generation failed: {video_path}")
+            return ""
+
+        sheet.image_path = str(out) if out.exists() else self._once(str(out), generate)
+        return sheet if sheet.image_path else None
+
+    def submit_sprite_sheet(self, video_path: str, **kwargs) -> Future:
+        """异步生成雪碧图"""
+        return self._pool().submit(self.sprite_sheet, video_path, **kwargs)
+
+
+_service: Optional[ThumbnailService] = None
+_service_lock = threading.Lock()
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    """获取全局缩略图服务"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ThumbnailService()
+    return _service
+
+
+__all__ = [
+    "ThumbnailService",
+    "SpriteSheet",
+    "file_fingerprint",
+    "get_thumbnail_service",
+]
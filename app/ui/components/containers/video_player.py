@@ -265,15 +265,8 @@ class ThumbnailGenerator:
         os.makedirs(output_dir, exist_ok=True)
 
         # 获取时长
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            video_path,
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        duration = float(result.stdout.strip() or 0)
+        from app.services.video_tools.ffmpeg_tool import FFmpegTool
+        duration = FFmpegTool.get_duration(video_path)
 
         # 生成缩略图
         interval = duration / (count + 1)
@@ -7,6 +7,8 @@ from app.ui.components.timeline.timeline_shuttle import (
     TimelineShuttle,
     TimelineRuler,
     TimelineTrack,
+    WaveformTrack,
 )
+from app.ui.components.timeline.tile_cache import TimelineTileCache
 
-__all__ = ["TimelineShuttle", "TimelineRuler", "TimelineTrack"]
+__all__ = ["TimelineShuttle", "TimelineRuler", "TimelineTrack", "WaveformTrack", "TimelineTileCache"]
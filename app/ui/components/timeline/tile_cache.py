@@ -0,0 +1,70 @@
+"""
+Timeline Tile Cache
+时间线瓦片缓存 - 按缩放级别缓存已渲染的固定宽度瓦片
+"""
+
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+class TimelineTileCache:
+    """
+    轨道内容的瓦片缓存
+
+    把轨道按 TILE_WIDTH 像素切成瓦片，每块只在首次露出时调用 render 绘制一次，
+    之后滚动、播放头移动等重绘直接贴图。键包含缩放级别，切换缩放不会拿到旧瓦片；
+    片段增删、拖动或选中变化时调用 invalidate()。
+    """
+
+    TILE_WIDTH = 512
+
+    def __init__(self, max_tiles: int = 96):
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple, QPixmap]" = OrderedDict()
+
+    def invalidate(self) -> None:
+        self._tiles.clear()
+
+    def paint(self, painter: QPainter, widget: QWidget, rect: QRect, zoom: Hashable,
+              render: Callable[[QPainter, int, int], None]) -> None:
+        """
+        贴出与 rect 相交的瓦片
+
+        Args:
+            painter: 目标 painter
+            widget: 所在控件（取高度与设备像素比）
+            rect: 需要重绘的区域（event.rect()）
+            zoom: 缩放级别（如每秒像素数）
+            render: render(painter, x0, x1) 在控件坐标系下绘制 [x0, x1) 内的内容
+        """
+        width = self.TILE_WIDTH
+        height = widget.height()
+        ratio = widget.devicePixelRatioF()
+        first = max(0, rect.left()) // width
+        last = max(0, rect.right()) // width
+
+        for i in range(first, last + 1):
+            key = (zoom, height, ratio, i)
+            pixmap = self._tiles.get(key)
+            if pixmap is None:
+                pixmap = QPixmap(int(width * ratio), int(height * ratio))
+                pixmap.setDevicePixelRatio(ratio)
+                pixmap.fill(Qt.GlobalColor.transparent)
+                tile_painter = QPainter(pixmap)
+                tile_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                tile_painter.translate(-i * width, 0)
+                render(tile_painter, i * width, (i + 1) * width)
+                tile_painter.end()
+                self._tiles[key] = pixmap
+                if len(self._tiles) > self.max_tiles:
+                    self._tiles.popitem(last=False)
+            else:
+                self._tiles.move_to_end(key)
+            painter.drawPixmap(i * width, 0, pixmap)
+
+
+__all__ = ["TimelineTileCache"]
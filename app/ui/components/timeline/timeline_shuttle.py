@@ -7,9 +7,14 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFrame,
     QLabel, QPushButton, QSlider, QScrollArea,
 )
-from PySide6.QtCore import Qt, Signal, QPoint
+from PySide6.QtCore import Qt, Signal, QPoint, QLineF
 from PySide6.QtGui import QPainter, QColor, QPen, QBrush
-from typing import List, Dict, Tuple
+from concurrent.futures import Future
+from typing import List, Dict, Tuple, Optional
+
+from app.services.audio.waveform_peaks import WaveformPeaks, get_waveform_store
+from app.services.video.clip_index import ClipIntervalIndex
+from app.ui.components.timeline.tile_cache import TimelineTileCache
 
 from app.services.video.models.perspective_models import (
     NarrationSegment, ClipSegment, InterleaveDecision,
@@ -145,8 +150,13 @@ class TimelineTrack(QWidget):
     """
     单条时间线轨道
     支持解说轨、原片轨、字幕轨
+
+    片段按起止时间建区间索引，只绘制与重绘区域相交的片段；
+    绘制结果按缩放级别缓存为瓦片，滚动与播放头刷新直接贴图。
     """
 
+    BACKGROUND = QColor("#1E293B")
+
     def __init__(self, name: str, track_type: str = "default", parent=None):
         super().__init__(parent)
         self.name = name
@@ -156,12 +166,19 @@ class TimelineTrack(QWidget):
         self.scale = 50.0
         self.height_hint = 40
 
+        self._index: Optional[ClipIntervalIndex] = None
+        self._tiles = TimelineTileCache()
+        self._styles: Dict[str, Tuple[QColor, QPen]] = {}
+        self._text_pen = QPen(QColor("#FFFFFF"), 1)
+
         self.setMinimumHeight(self.height_hint)
         self.setMaximumHeight(self.height_hint)
 
     def set_segments(self, segments: List[Dict]):
         """设置轨道片段"""
         self.segments = segments
+        self._index = None
+        self._tiles.invalidate()
         self.update()
 
     def set_duration(self, duration: float):
@@ -172,62 +189,105 @@ class TimelineTrack(QWidget):
         self.scale = scale
         self.update()
 
+    def _segment_style(self, color: str) -> Tuple[QColor, QPen]:
+        """(填充色, 描边)，按颜色缓存"""
+        style = self._styles.get(color)
+        if style is None:
+            fill = QColor(color)
+            style = self._styles[color] = (fill, QPen(fill.lighter(120), 1))
+        return style
+
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        w = self.width()
-        h = self.height()
 
         # 背景
-        painter.fillRect(self.rect(), QColor("#1E293B"))
+        painter.fillRect(event.rect(), self.BACKGROUND)
 
-        if self.duration <= 0:
+        if self.duration <= 0 or self.scale <= 0:
             return
 
-        px_per_sec = self.scale
-
-        # 绘制片段
-        for seg in self.segments:
-            start = seg.get("start", 0)
-            end = seg.get("end", 0)
-            color = seg.get("color", "#6366F1")
+        self._tiles.paint(painter, self, event.rect(), self.scale, self._paint_segments)
 
-            x1 = int(start * px_per_sec)
-            x2 = int(end * px_per_sec)
-            seg_w = max(4, x2 - x1)
+    def _paint_segments(self, painter: QPainter, x0: int, x1: int):
+        """绘制 [x0, x1) 像素范围内的片段"""
+        if self._index is None:
+            self._index = ClipIntervalIndex(
+                self.segments,
+                start=lambda seg: seg.get("start", 0),
+                end=lambda seg: seg.get("end", 0),
+            )
+        # 最小 4px 宽度与描边会越过片段的实际时间范围，查询时放宽几个像素
+        pad = 6 / self.scale
+        h = self.height()
+        for seg in self._index.overlapping(x0 / self.scale - pad, x1 / self.scale + pad):
+            fill, pen = self._segment_style(seg.get("color", "#6366F1"))
 
-            if x2 < 0 or x1 > w:
-                continue
+            x = int(seg.get("start", 0) * self.scale)
+            seg_w = max(4, int(seg.get("end", 0) * self.scale) - x)
 
             # 片段矩形
-            painter.fillRect(
-                max(0, x1), 4,
-                min(seg_w, w - x1),
-                h - 8,
-                QColor(color)
-            )
+            painter.fillRect(x, 4, seg_w, h - 8, fill)
 
             # 圆角效果
-            painter.setPen(QPen(QColor(color).lighter(120), 1))
-            painter.drawRoundedRect(
-                max(0, x1), 4,
-                min(seg_w, w - x1),
-                h - 8, 4, 4
-            )
+            painter.setPen(pen)
+            painter.drawRoundedRect(x, 4, seg_w, h - 8, 4, 4)
 
             # 标签
             if seg_w > 40:
-                text = seg.get("label", "")
-                painter.setPen(QPen(QColor("#FFFFFF"), 1))
+                painter.setPen(self._text_pen)
                 painter.drawText(
-                    max(0, x1) + 4, h // 2 + 4,
-                    min(seg_w - 8, w - x1 - 8),
-                    16, Qt.AlignLeft | Qt.AlignVCenter,
-                    text[:10]
+                    x + 4, h // 2 + 4, seg_w - 8, 16,
+                    Qt.AlignLeft | Qt.AlignVCenter,
+                    seg.get("label", "")[:10]
                 )
 
 
+class WaveformTrack(TimelineTrack):
+    """
+    音频波形轨道
+
+    按当前可见区域与像素宽度从 WaveformPeaks 取切片绘制，
+    缩放/滚动不需要重新解码或加载图片。
+    """
+
+    def __init__(self, name: str = "音频", parent=None):
+        super().__init__(name, "audio", parent)
+        self.peaks: Optional[WaveformPeaks] = None
+        self.offset = 0.0   # 音频在时间线上的起点（秒）
+
+    def set_peaks(self, peaks: Optional[WaveformPeaks], offset: float = 0.0):
+        self.peaks = peaks
+        self.offset = offset
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1E293B"))
+        if self.peaks is None or self.scale <= 0:
+            return
+
+        # 只绘制需要重绘的区域
+        x0 = max(0, event.rect().left())
+        x1 = min(self.width(), event.rect().right() + 1)
+        width = x1 - x0
+        if width <= 0:
+            return
+
+        columns = self.peaks.slice(
+            x0 / self.scale - self.offset,
+            x1 / self.scale - self.offset,
+            width,
+        )
+        mid = self.height() / 2
+        amp = mid - 4
+        painter.setPen(QPen(QColor("#22D3EE"), 1))
+        painter.drawLines([
+            QLineF(x0 + i, mid - hi * amp, x0 + i, mid - lo * amp)
+            for i, (lo, hi) in enumerate(columns.tolist())
+            if hi > lo
+        ])
+
+
 class TimelineShuttle(QFrame):
     """
     时间线穿梭器 - 双轨时间线对照编辑
@@ -243,6 +303,7 @@ class TimelineShuttle(QFrame):
     position_changed = Signal(float)       # 秒
     segment_clicked = Signal(str, str)      # segment_id, track_type
     playback_requested = Signal(float)       # 开始播放时间
+    _waveform_loaded = Signal(str, object, float)  # audio_path, peaks, offset
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -252,7 +313,9 @@ class TimelineShuttle(QFrame):
         self.duration = 0.0
         self.position = 0.0
         self.scale = 50.0  # px/sec
+        self._waveform_source: Optional[str] = None
 
+        self._waveform_loaded.connect(self._on_waveform_loaded)
         self._setup_ui()
         self._apply_theme()
 
@@ -368,6 +431,24 @@ class TimelineShuttle(QFrame):
 
         tracks_layout.addWidget(original_track_frame)
 
+        # 音频波形轨
+        audio_track_frame = QFrame()
+        audio_track_frame.setObjectName("trackFrame")
+        audio_layout = QHBoxLayout(audio_track_frame)
+        audio_layout.setContentsMargins(12, 0, 12, 0)
+
+        audio_label = QLabel("音频")
+        audio_label.setFixedWidth(60)
+        audio_label.setObjectName("trackLabel")
+        audio_layout.addWidget(audio_label)
+
+        self.audio_track = WaveformTrack("音频")
+        audio_layout.addWidget(self.audio_track, 1)
+
+        audio_track_frame.setVisible(False)
+        self._audio_track_frame = audio_track_frame
+        tracks_layout.addWidget(audio_track_frame)
+
         container_layout.addWidget(tracks_container)
         scroll.setWidget(container)
         layout.addWidget(scroll, 1)
@@ -500,6 +581,19 @@ class TimelineShuttle(QFrame):
         self.original_track.set_duration(self.duration)
         self.original_track.set_scale(self.scale)
 
+    def set_waveform(self, peaks: Optional[WaveformPeaks], offset: float = 0.0) -> None:
+        """设置音频波形（peaks 由 WaveformStore.load 获得，None 隐藏音频轨）"""
+        self.audio_track.set_peaks(peaks, offset)
+        self.audio_track.set_scale(self.scale)
+        self._audio_track_frame.setVisible(peaks is not None)
+
+    def load_waveform(self, audio_path: str, offset: float = 0.0) -> None:
+        """后台通过 WaveformStore 加载音频波形，完成后显示音频轨"""
+        self._waveform_source = audio_path
+        get_waveform_store().submit(audio_path).add_done_callback(
+            lambda f: self._deliver_waveform(audio_path, offset, f)
+        )
+
     def set_position(self, pos: float) -> None:
         """设置播放位置"""
         self.position = pos
@@ -516,12 +610,27 @@ class TimelineShuttle(QFrame):
         self.ruler.set_duration(0)
         self.narration_track.set_segments([])
         self.original_track.set_segments([])
+        self._waveform_source = None
+        self.set_waveform(None)
         self._update_time_label()
 
     # ─────────────────────────────────────────────────────────────
     # Private Methods
     # ─────────────────────────────────────────────────────────────
 
+    def _deliver_waveform(self, audio_path: str, offset: float, future: Future):
+        """工作线程回调：通过信号交给 GUI 线程"""
+        peaks = None if future.cancelled() or future.exception() else future.result()
+        try:
+            self._waveform_loaded.emit(audio_path, peaks, offset)
+        except RuntimeError:
+            pass  # 控件已销毁
+
+    def _on_waveform_loaded(self, audio_path: str, peaks: Optional[WaveformPeaks], offset: float):
+        # 加载期间换了音频或已清空时丢弃旧结果
+        if audio_path == self._waveform_source:
+            self.set_waveform(peaks, offset)
+
     def _on_play_clicked(self):
         self.playback_requested.emit(self.position)
 
@@ -543,6 +652,7 @@ class TimelineShuttle(QFrame):
         self.ruler.set_scale(self.scale)
         self.narration_track.set_scale(self.scale)
         self.original_track.set_scale(self.scale)
+        self.audio_track.set_scale(self.scale)
 
     def _update_time_label(self):
         m, s = divmod(int(self.position), 60)
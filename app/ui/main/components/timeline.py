@@ -6,27 +6,34 @@ Voxplore 时间线组件
 多轨时间线编辑器：视频轨 / 音频轨 / 字幕轨
 """
 
-from typing import Optional, List, Dict, Any
+from concurrent.futures import Future
+from typing import Optional, List, Dict, Any, Set, Tuple
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea,
     QFrame, QToolButton
 )
-from PySide6.QtCore import Qt, Signal, QRect
-from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QMouseEvent, QPaintEvent
+from PySide6.QtCore import Qt, Signal, QRect, QLineF
+from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QMouseEvent, QPaintEvent, QPixmap
 
 from app.ui.components.design_system import Colors
+from app.ui.components.timeline.tile_cache import TimelineTileCache
+from app.services.audio.waveform_peaks import WaveformPeaks, get_waveform_store
+from app.services.video.clip_index import ClipIntervalIndex
+from app.services.video_tools.thumbnail_service import SpriteSheet, get_thumbnail_service
 
 
 class TimelineClip:
     """时间线上的片段"""
     def __init__(self, clip_id: str, start: float, end: float,
-                 label: str = "", color: str = "#667eea", track_type: str = "video"):
+                 label: str = "", color: str = "#667eea", track_type: str = "video",
+                 source: str = ""):
         self.id = clip_id
         self.start = start
         self.end = end
         self.label = label
         self.color = color
         self.track_type = track_type
+        self.source = source
         self.selected = False
 
     @property
@@ -51,6 +58,21 @@ class TimelineTrackWidget(QFrame):
         self._drag_clip: Optional[TimelineClip] = None
         self._drag_offset = 0.0
 
+        # 绘制缓存：片段区间索引、瓦片、复用的画笔/字体
+        self._index: Optional[ClipIntervalIndex] = None
+        self._tiles = TimelineTileCache()
+        self._styles: Dict[tuple, tuple] = {}
+        self._label_font = QFont("Arial", 10)
+        self._clip_font = QFont("Arial", 8)
+        self._label_pen = QPen(QColor(Colors.TextSecondary))
+        self._text_pen = QPen(QColor(Colors.TextPrimary))
+
+        # 视频素材的时间轴雪碧图：source -> (sheet, pixmap)
+        self._sprites: Dict[str, Tuple[SpriteSheet, QPixmap]] = {}
+        # 音频素材的波形峰值：source -> WaveformPeaks
+        self._waveforms: Dict[str, WaveformPeaks] = {}
+        self._wave_pen = QPen(QColor(color).lighter(160), 1)
+
         self.setFixedHeight(48)
         self.setMinimumWidth(600)
         self.setMouseTracking(True)
@@ -68,10 +90,29 @@ class TimelineTrackWidget(QFrame):
 
     def add_clip(self, clip: TimelineClip):
         self.clips.append(clip)
-        self.update()
+        self._invalidate()
 
     def clear_clips(self):
         self.clips.clear()
+        self._invalidate()
+
+    def set_sprite_sheet(self, source: str, sheet: SpriteSheet):
+        """设置素材的雪碧图，视频片段内按时间绘制胶片条"""
+        pixmap = QPixmap(sheet.image_path)
+        if pixmap.isNull():
+            return
+        self._sprites[source] = (sheet, pixmap)
+        self._invalidate()
+
+    def set_waveform(self, source: str, peaks: WaveformPeaks):
+        """设置素材的波形峰值，音频片段内按可见范围取切片绘制"""
+        self._waveforms[source] = peaks
+        self._invalidate()
+
+    def _invalidate(self):
+        """片段增删、移动或选中变化后重建索引与瓦片"""
+        self._index = None
+        self._tiles.invalidate()
         self.update()
 
     def _time_to_x(self, t: float) -> int:
@@ -80,40 +121,104 @@ class TimelineTrackWidget(QFrame):
     def _x_to_time(self, x: int) -> float:
         return max(0, (x - 80) / self.pixels_per_second)
 
+    def _clip_style(self, color: str, selected: bool) -> tuple:
+        """(brush, pen)，按颜色与选中状态缓存"""
+        style = self._styles.get((color, selected))
+        if style is None:
+            fill = QColor(color)
+            if selected:
+                fill = fill.lighter(130)
+            style = self._styles[(color, selected)] = (QBrush(fill), QPen(fill.darker(120), 1))
+        return style
+
     def paintEvent(self, event: QPaintEvent):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # 片段层：只绘制与重绘区域相交的瓦片
+        self._tiles.paint(painter, self, event.rect(), self.pixels_per_second, self._paint_clips)
 
         # 轨道标签
-        painter.setPen(QColor(Colors.TextSecondary))
-        painter.setFont(QFont("Arial", 10))
+        painter.setPen(self._label_pen)
+        painter.setFont(self._label_font)
         painter.drawText(QRect(4, 0, 72, self.height()), Qt.AlignmentFlag.AlignVCenter, self.track_label)
 
-        # 绘制片段
-        for clip in self.clips:
-            x1 = self._time_to_x(clip.start)
-            x2 = self._time_to_x(clip.end)
-            w = max(x2 - x1, 4)
-            h = self.height() - 8
-            y = 4
+        painter.end()
+
+    def _paint_clips(self, painter: QPainter, x0: int, x1: int):
+        """绘制 [x0, x1) 像素范围内的片段"""
+        if self._index is None:
+            self._index = ClipIntervalIndex(
+                self.clips, start=lambda c: c.start, end=lambda c: c.end
+            )
+        # 最小 4px 宽度与描边会越过片段的实际时间范围，查询时放宽几个像素
+        pad = 6 / self.pixels_per_second
+        visible = self._index.overlapping(self._x_to_time(x0) - pad, self._x_to_time(x1) + pad)
+
+        h = self.height() - 8
+        y = 4
+        painter.setFont(self._clip_font)
+        for clip in visible:
+            x = self._time_to_x(clip.start)
+            w = max(self._time_to_x(clip.end) - x, 4)
 
             # 片段背景
-            color = QColor(clip.color)
-            if clip.selected:
-                color = color.lighter(130)
-            painter.setBrush(QBrush(color))
-            painter.setPen(QPen(color.darker(120), 1))
-            painter.drawRoundedRect(x1, y, w, h, 3, 3)
+            brush, pen = self._clip_style(clip.color, clip.selected)
+            painter.setBrush(brush)
+            painter.setPen(pen)
+            painter.drawRoundedRect(x, y, w, h, 3, 3)
+
+            # 胶片条
+            sprite = self._sprites.get(clip.source) if clip.source else None
+            if sprite is not None:
+                self._paint_filmstrip(painter, clip, sprite, QRect(x, y, w, h), x0, x1)
+
+            # 波形
+            peaks = self._waveforms.get(clip.source) if clip.source else None
+            if peaks is not None:
+                self._paint_waveform(painter, clip, peaks, QRect(x, y, w, h), x0, x1)
 
             # 片段标签
             if w > 40:
-                painter.setPen(QColor(Colors.TextPrimary))
-                painter.setFont(QFont("Arial", 8))
-                text_rect = QRect(x1 + 4, y, w - 8, h)
+                painter.setPen(self._text_pen)
+                text_rect = QRect(x + 4, y, w - 8, h)
                 painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
                                  clip.label[:20])
 
-        painter.end()
+    def _paint_filmstrip(self, painter: QPainter, clip: TimelineClip,
+                         sprite: Tuple[SpriteSheet, QPixmap], rect: QRect, x0: int, x1: int):
+        """在片段内平铺雪碧图帧，每格取格子中点时间对应的帧"""
+        sheet, pixmap = sprite
+        tile_w = max(8, rect.height() * sheet.tile_width // max(1, sheet.tile_height))
+        first = rect.left() + max(0, x0 - rect.left()) // tile_w * tile_w
+        last = min(rect.right() + 1, x1)
+
+        painter.save()
+        painter.setClipRect(rect)
+        painter.setOpacity(0.6)
+        for tx in range(first, last, tile_w):
+            t = self._x_to_time(tx + tile_w // 2) - clip.start
+            sx, sy, sw, sh = sheet.tile_rect(sheet.frame_at(t))
+            painter.drawPixmap(QRect(tx, rect.top(), tile_w, rect.height()),
+                               pixmap, QRect(sx, sy, sw, sh))
+        painter.restore()
+
+    def _paint_waveform(self, painter: QPainter, clip: TimelineClip, peaks: WaveformPeaks,
+                        rect: QRect, x0: int, x1: int):
+        """只为片段与 [x0, x1) 相交的像素列取峰值切片"""
+        left = max(rect.left(), x0)
+        right = min(rect.right() + 1, x1)
+        if right <= left:
+            return
+        columns = peaks.slice(self._x_to_time(left) - clip.start,
+                              self._x_to_time(right) - clip.start, right - left)
+        mid = rect.top() + rect.height() / 2
+        amp = rect.height() / 2 - 2
+        painter.setPen(self._wave_pen)
+        painter.drawLines([
+            QLineF(left + i, mid - hi * amp, left + i, mid - lo * amp)
+            for i, (lo, hi) in enumerate(columns.tolist())
+            if hi > lo
+        ])
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -127,12 +232,12 @@ class TimelineTrackWidget(QFrame):
                     self._drag_clip = clip
                     self._drag_offset = t - clip.start
                     self.clip_clicked.emit(clip.id)
-                    self.update()
+                    self._invalidate()
                     return
             # 取消选中
             for c in self.clips:
                 c.selected = False
-            self.update()
+            self._invalidate()
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if self._drag_clip:
@@ -146,7 +251,7 @@ class TimelineTrackWidget(QFrame):
             t = max(0, min(t, self.total_duration - dur))
             self._drag_clip.start = t
             self._drag_clip.end = t + dur
-            self.update()
+            self._invalidate()
 
 
 class TimelineRuler(QWidget):
@@ -156,6 +261,8 @@ class TimelineRuler(QWidget):
         self.setFixedHeight(24)
         self.total_duration = 60.0
         self.pixels_per_second = 10.0
+        self._font = QFont("Arial", 8)
+        self._pen = QPen(QColor(Colors.TextMuted))
         self.setStyleSheet(f"background-color: {Colors.BgOverlay};")
 
     def set_params(self, duration: float, pps: float):
@@ -166,8 +273,8 @@ class TimelineRuler(QWidget):
 
     def paintEvent(self, event: QPaintEvent):
         painter = QPainter(self)
-        painter.setPen(QColor(Colors.TextMuted))
-        painter.setFont(QFont("Arial", 8))
+        painter.setPen(self._pen)
+        painter.setFont(self._font)
 
         # 计算刻度间隔
         interval = 5  # 5秒
@@ -176,8 +283,11 @@ class TimelineRuler(QWidget):
         elif self.pixels_per_second > 10:
             interval = 2
 
-        t = 0.0
-        while t <= self.total_duration:
+        # 只绘制重绘区域内的刻度（左侧多留一格给标签）
+        first = max(0, int((event.rect().left() - 80) / self.pixels_per_second) // interval - 1)
+        last_t = min(self.total_duration, (event.rect().right() - 80) / self.pixels_per_second + interval)
+        t = float(first * interval)
+        while t <= last_t:
             x = int(80 + t * self.pixels_per_second)
             painter.drawLine(x, 16, x, 24)
 
@@ -195,6 +305,8 @@ class Timeline(QWidget):
 
     clip_selected = Signal(str)  # clip_id
     position_changed = Signal(float)  # seconds
+    _sprite_ready = Signal(str, object)  # source, SpriteSheet
+    _waveform_ready = Signal(str, object)  # source, WaveformPeaks
 
     def __init__(self, application=None):
         super().__init__(application)
@@ -203,7 +315,11 @@ class Timeline(QWidget):
         self._duration = 60.0
         self._pps = 10.0  # pixels per second
         self._playback_pos = 0.0
+        self._sprite_requests: Set[str] = set()
+        self._waveform_requests: Set[str] = set()
 
+        self._sprite_ready.connect(self._on_sprite_ready)
+        self._waveform_ready.connect(self._on_waveform_ready)
         self._setup_ui()
 
     def _setup_ui(self):
@@ -310,8 +426,10 @@ class Timeline(QWidget):
                 video_track.add_clip(TimelineClip(
                     clip_data.get("id", ""), clip_data.get("start", 0), clip_data.get("end", 0),
                     label=clip_data.get("source", "").split("/")[-1][:15] if clip_data.get("source") else "",
-                    color=Colors.Primary, track_type="video",
+                    color=Colors.Primary, track_type="video", source=clip_data.get("source", ""),
                 ))
+        if video_track:
+            self._load_sprite_sheets({c.source for c in video_track.clips if c.source})
 
         # 音频轨
         audio_track = next((t for t in self._tracks if t.track_type == "audio"), None)
@@ -320,7 +438,10 @@ class Timeline(QWidget):
                 audio_track.add_clip(TimelineClip(
                     clip_data.get("id", ""), clip_data.get("start", 0), clip_data.get("end", 0),
                     label="🔊", color=Colors.Success, track_type="audio",
+                    source=clip_data.get("source", ""),
                 ))
+        if audio_track:
+            self._load_waveforms({c.source for c in audio_track.clips if c.source})
 
         # 字幕轨
         sub_track = next((t for t in self._tracks if t.track_type == "subtitle"), None)
@@ -331,6 +452,48 @@ class Timeline(QWidget):
                     label=clip_data.get("text", "")[:12], color=Colors.Accent, track_type="subtitle",
                 ))
 
+    def _load_sprite_sheets(self, sources: Set[str]):
+        """后台生成素材雪碧图（命中缓存时不启动 ffmpeg），完成后回到 GUI 线程绘制"""
+        service = get_thumbnail_service()
+        for source in sources - self._sprite_requests:
+            self._sprite_requests.add(source)
+            service.submit_sprite_sheet(source).add_done_callback(
+                lambda f, s=source: self._deliver("_sprite_ready", s, f)
+            )
+
+    def _load_waveforms(self, sources: Set[str]):
+        """后台从 WaveformStore 加载素材波形（按内容缓存，只解码一次）"""
+        store = get_waveform_store()
+        for source in sources - self._waveform_requests:
+            self._waveform_requests.add(source)
+            store.submit(source).add_done_callback(
+                lambda f, s=source: self._deliver("_waveform_ready", s, f)
+            )
+
+    def _deliver(self, signal_name: str, source: str, future: Future):
+        """工作线程回调：通过信号把结果排队交给 GUI 线程"""
+        result = None if future.cancelled() or future.exception() else future.result()
+        try:
+            getattr(self, signal_name).emit(source, result)
+        except RuntimeError:
+            pass  # 控件已销毁
+
+    def _on_sprite_ready(self, source: str, sheet: Optional[SpriteSheet]):
+        if sheet is None:
+            self._sprite_requests.discard(source)  # 下次加载时重试
+            return
+        for track in self._tracks:
+            if track.track_type == "video":
+                track.set_sprite_sheet(source, sheet)
+
+    def _on_waveform_ready(self, source: str, peaks: Optional[WaveformPeaks]):
+        if peaks is None:
+            self._waveform_requests.discard(source)
+            return
+        for track in self._tracks:
+            if track.track_type == "audio":
+                track.set_waveform(source, peaks)
+
     def set_playback_position(self, position_ms: int):
         self._playback_pos = position_ms / 1000.0
         m, s = divmod(int(self._playback_pos), 60)
@@ -49,6 +49,9 @@ _create_detail_row = stats.create_detail_row
 class ProjectsPage(BasePage):
     """项目管理页面"""
 
+    # 项目库每页加载的卡片数（滚动到底部时加载下一页）
+    PAGE_SIZE = 60
+
     def __init__(self, application):
         super().__init__("projects", "项目管理", application)
 
@@ -199,38 +202,27 @@ class ProjectsPage(BasePage):
         self.projects_layout.setSpacing(12)
         self.projects_layout.setContentsMargins(0, 0, 0, 0)
         self.projects_scroll.setWidget(self.projects_widget)
+        self.projects_scroll.verticalScrollBar().valueChanged.connect(self._on_projects_scrolled)
         widget.layout().addWidget(self.projects_scroll, 1)
 
         return widget
 
     def _filter_projects(self):
-        """过滤项目 - 响应搜索框和下拉框"""
-        # 获取搜索文本
+        """过滤项目 - 响应搜索框和下拉框（在项目库索引中查询）"""
+        self._load_projects()
+
+    def _project_filters(self) -> dict:
+        """当前搜索框和下拉框对应的项目库查询条件"""
         search_text = ""
         if hasattr(self, 'search_box') and self.search_box:
-            search_text = self.search_box.input.text().lower()
-
-        type_filter = self.type_filter.currentText()
-        status_filter = self.status_filter.currentText()
-
-        for project_id, card in self.project_cards.items():
-            project = card.project
-            matches = True
-
-            # 搜索过滤
-            if search_text:
-                matches = (search_text in project.metadata.name.lower() or
-                           search_text in project.metadata.description.lower())
+            search_text = self.search_box.input.text().strip()
 
-            # 类型过滤
-            if matches and type_filter != "全部类型":
-                matches = project.metadata.project_type.value == type_filter
-
-            # 状态过滤
-            if matches and status_filter != "全部状态":
-                matches = project.metadata.status.value == status_filter
-
-            card.setVisible(matches)
+        filters = {"search": search_text}
+        if hasattr(self, 'type_filter') and self.type_filter.currentText() != "全部类型":
+            filters["project_type"] = self.type_filter.currentText()
+        if hasattr(self, 'status_filter') and self.status_filter.currentText() != "全部状态":
+            filters["status"] = self.status_filter.currentText()
+        return filters
 
     def _create_project_details_section(self) -> QWidget:
         """创建项目详情区域 - 重新设计的现代化布局"""
@@ -443,12 +435,6 @@ class ProjectsPage(BasePage):
                 self.logger.warning(f"添加空状态间隔器失败: {e}")
             return
 
-        try:
-            projects = self.project_manager.get_all_projects()
-        except Exception as e:
-            self.logger.error(f"获取项目列表失败: {e}")
-            return
-
         # 清空现有卡片
         try:
             for i in reversed(range(self.projects_layout.count())):
@@ -464,8 +450,27 @@ class ProjectsPage(BasePage):
             self.logger.warning(f"清空项目布局时出错: {e}")
             return
 
+        self._loaded_count = 0
+        self._has_more_projects = True
+        self._grid_spacer = None
+        self._append_project_page(reconcile=True)
+
+    def _append_project_page(self, reconcile: bool = False):
+        """从项目库追加一页项目卡片"""
+        try:
+            projects = self.project_manager.scan_projects(
+                offset=self._loaded_count, limit=self.PAGE_SIZE,
+                reconcile=reconcile, **self._project_filters(),
+            )
+        except Exception as e:
+            self.logger.error(f"获取项目列表失败: {e}")
+            return
+
+        self._has_more_projects = len(projects) == self.PAGE_SIZE
+        if self._grid_spacer is not None:
+            self.projects_layout.removeItem(self._grid_spacer)
+
         # 添加项目卡片
-        row, col = 0, 0
         for project in projects:
             card = ProjectCard(project)
             card.clicked.connect(self._on_project_selected)
@@ -473,16 +478,21 @@ class ProjectsPage(BasePage):
             card.export_clicked.connect(self._on_export_project)
             card.delete_clicked.connect(self._on_delete_project)
 
+            row, col = divmod(self._loaded_count, 2)
             self.projects_layout.addWidget(card, row, col)
             self.project_cards[project.id] = card
-
-            col += 1
-            if col >= 2:
-                col = 0
-                row += 1
+            self._loaded_count += 1
 
         # 添加拉伸空间
-        self.projects_layout.addItem(QSpacerItem(1, 1, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding), row, col)
+        row, col = divmod(self._loaded_count, 2)
+        self._grid_spacer = QSpacerItem(1, 1, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.projects_layout.addItem(self._grid_spacer, row, col)
+
+    def _on_projects_scrolled(self, value: int):
+        """滚动接近底部时加载下一页"""
+        bar = self.projects_scroll.verticalScrollBar()
+        if getattr(self, '_has_more_projects', False) and value >= bar.maximum() - 50:
+            self._append_project_page()
 
     # _filter_projects 已在前面定义，支持 MacSearchBox
 
@@ -490,6 +500,9 @@ class ProjectsPage(BasePage):
         """项目选择"""
         self.selected_project_id = project_id
         project = self.project_manager.get_project(project_id)
+        if project is None and project_id in self.project_cards:
+            # 未打开的项目只有项目库中的元数据
+            project = self.project_cards[project_id].project
 
         if project:
             # 更新详情显示
@@ -6,8 +6,13 @@ Task 2.3 UX 改善:
 - 解说文案预览：QTextEdit 显示 AI 生成的解说稿
 - 手动编辑：预览文案只读，编辑时切换
 - 风格/角色调整：QComboBox 选择预设风格，QLineEdit 设置角色参数
+- 重新生成：后台线程调用 ScriptGenerator.regenerate（绕过响应缓存）
 """
 
+import logging
+import os
+import threading
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QFrame, QTextEdit, QComboBox, QLineEdit, QCheckBox, QScrollArea,
@@ -17,6 +22,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QFont
 
+logger = logging.getLogger(__name__)
+
 
 # ── OKLCH Design Tokens ──────────────────────────────────────
 _T = {
@@ -75,7 +82,7 @@ class NarrationSegmentCard(QFrame):
 
         # 时间段标签
         self._time_label = QLabel(self._time_range)
-        self._time_label.setFont(QFont("", 11, QFont.Weight.SemiBold))
+        self._time_label.setFont(QFont("", 11, QFont.Weight.DemiBold))
         self._time_label.setStyleSheet(f"""
             color: {_T['primary']};
             background: {_T['primary']}20;
@@ -214,6 +221,7 @@ class NarrationSegmentCard(QFrame):
 class StylePresetPanel(QFrame):
     """风格/角色参数调整面板"""
     style_changed = Signal(str, str, str)  # style, role, custom_params
+    regenerate_requested = Signal(str, str, str)  # style, role, custom_params
 
     # 预设风格
     PRESET_STYLES = {
@@ -244,7 +252,7 @@ class StylePresetPanel(QFrame):
 
         # 标题
         title = QLabel("风格设置")
-        title.setFont(QFont("", 12, QFont.Weight.SemiBold))
+        title.setFont(QFont("", 12, QFont.Weight.DemiBold))
         title.setStyleSheet(f"color: {_T['text_sub']};")
         layout.addWidget(title)
 
@@ -358,8 +366,8 @@ class StylePresetPanel(QFrame):
         )
 
     def _on_regenerate(self):
-        """重新生成（触发父组件重新调用 AI）"""
-        self.style_changed.emit(
+        """重新生成（触发父组件重新调用 AI，需绕过响应缓存）"""
+        self.regenerate_requested.emit(
             self._style_combo.currentText(),
             self._role_input.text().strip(),
             self._param_input.text().strip()
@@ -403,7 +411,7 @@ class PreviewTextArea(QFrame):
         # 头部
         header = QHBoxLayout()
         title = QLabel("解说文案预览")
-        title.setFont(QFont("", 13, QFont.Weight.SemiBold))
+        title.setFont(QFont("", 13, QFont.Weight.DemiBold))
         title.setStyleSheet(f"color: {_T['text']};")
         header.addWidget(title)
 
@@ -577,16 +585,25 @@ class StepPreview(QWidget):
     """
     back_requested = Signal()
     generate_requested = Signal(str, str, str, str)
+    regenerate_requested = Signal(str, str, str)
     # back_requested: 返回上一步
     # generate_requested(style, role, params, full_text)
+    # regenerate_requested(style, role, params): 已开始重新生成文案（页面自行调用
+    #   ScriptGenerator.regenerate，use_cache=False，不会拿回缓存的同一份文案）
+
+    # 后台线程生成完毕后回到 UI 线程
+    _script_regenerated = Signal(str)
 
     def __init__(self, video_path: str = "", narration_text: str = "",
-                 style: str = "治愈", parent=None):
+                 style: str = "治愈", script_generator=None, parent=None):
         super().__init__(parent)
         self._video_path = video_path
         self._narration_text = narration_text
         self._current_style = style
+        self._script_generator = script_generator
+        self._regen_thread = None
         self._setup_ui()
+        self._script_regenerated.connect(self._on_script_regenerated)
 
         if narration_text:
             self._load_demo_segments(narration_text)
@@ -630,6 +647,7 @@ class StepPreview(QWidget):
         self._style_panel = StylePresetPanel()
         self._style_panel.setFixedWidth(240)
         self._style_panel.style_changed.connect(self._on_style_changed)
+        self._style_panel.regenerate_requested.connect(self._on_regenerate)
         main_split.addWidget(self._style_panel)
 
         main_split.setStretchFactor(0, 1)
@@ -702,6 +720,60 @@ class StepPreview(QWidget):
         self._current_style = style
         # 可在此触发重新生成（debounce）
 
+    def _on_regenerate(self, style: str, role: str, params: str):
+        """重新生成文案（后台线程调用 ScriptGenerator.regenerate，绕过响应缓存）"""
+        if self._regen_thread is not None and self._regen_thread.is_alive():
+            return
+        self._current_style = style
+        self._style_panel.setEnabled(False)
+        self.regenerate_requested.emit(style, role, params)
+        self._regen_thread = threading.Thread(
+            target=self._regenerate_worker, args=(style, role, params), daemon=True
+        )
+        self._regen_thread.start()
+
+    def _regenerate_worker(self, style: str, role: str, params: str):
+        """后台线程：请求新的文案"""
+        from app.services.ai.script_generator import ScriptGenerator
+        from app.services.ai.script_models import ScriptConfig, ScriptStyle, VoiceTone
+
+        text = ""
+        try:
+            if self._script_generator is None:
+                self._script_generator = ScriptGenerator(use_llm_manager=True)
+            config = ScriptConfig(style=ScriptStyle.MONOLOGUE, tone=VoiceTone.EMOTIONAL)
+            script = self._script_generator.regenerate(
+                self._build_regenerate_topic(style, role, params), config
+            )
+            text = script.content
+        except Exception as e:
+            logger.warning(f"重新生成文案失败: {e}")
+        try:
+            self._script_regenerated.emit(text)
+        except RuntimeError:
+            pass  # 页面已销毁
+
+    def _build_regenerate_topic(self, style: str, role: str, params: str) -> str:
+        """根据当前视频、风格与角色设置构建文案主题"""
+        parts = []
+        if self._video_path:
+            parts.append(f"视频: {os.path.basename(self._video_path)}")
+        parts.append(f"解说风格: {style}（{StylePresetPanel.PRESET_STYLES.get(style, '')}）")
+        parts.append(f"主角: {role or '我'}")
+        if params:
+            parts.append(f"角色参数: {params}")
+        if self._narration_text:
+            parts.append(f"上一版文案（请换一种写法）:\n{self._narration_text}")
+        return "\n".join(parts)
+
+    def _on_script_regenerated(self, text: str):
+        """新文案回到 UI 线程后刷新预览"""
+        self._style_panel.setEnabled(True)
+        if text:
+            self.set_narration_text(text)
+        else:
+            QMessageBox.warning(self, "重新生成失败", "未能生成新的解说文案，请检查 AI 服务配置")
+
     def _on_save_draft(self):
         """保存草稿到项目"""
         # 获取当前文本内容
@@ -10,8 +10,6 @@ Task 2.1 UX 改善:
 """
 
 import os
-import json
-import subprocess
 import logging
 from pathlib import Path
 
@@ -27,6 +25,8 @@ from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 
 from ...components import MacCard
+from app.services.video_tools.media_catalog import get_media_catalog
+from app.services.video_tools.thumbnail_service import get_thumbnail_service
 
 # ── OKLCH Design Tokens ──────────────────────────────────────
 _T = {
@@ -51,7 +51,7 @@ VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
 
 # ── 缩略图生成线程 ──────────────────────────────────────────
 class ThumbnailWorker(QThread):
-    """后台线程生成缩略图"""
+    """后台线程生成缩略图（并发由 ThumbnailService 控制）"""
     thumbnail_ready = Signal(str, str)  # path, thumbnail_path
     finished = Signal()
 
@@ -60,35 +60,13 @@ class ThumbnailWorker(QThread):
         self._paths = video_paths
 
     def run(self):
-        for path in self._paths:
-            thumb = self._generate_one(path)
-            self.thumbnail_ready.emit(path, thumb)
+        get_thumbnail_service().thumbnails(self._paths, on_ready=self.thumbnail_ready.emit)
         self.finished.emit()
 
-    def _generate_one(self, video_path: str) -> str:
+    @staticmethod
+    def _generate_one(video_path: str) -> str:
         """生成单个视频缩略图"""
-        thumb_dir = os.path.join(os.path.dirname(video_path), ".voxplore_thumbs")
-        os.makedirs(thumb_dir, exist_ok=True)
-        thumb_path = os.path.join(thumb_dir, f"{Path(video_path).stem}_thumb.jpg")
-
-        if os.path.exists(thumb_path):
-            return thumb_path
-
-        try:
-            subprocess.run([
-                "ffmpeg", "-y", "-ss", "1",
-                "-i", video_path,
-                "-vframes", "1",
-                "-q:v", "3",
-                "-vf", "scale=160:90",
-                thumb_path,
-            ], capture_output=True, timeout=15)
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"Thumbnail generation failed: {e}")
-        except Exception as e:
-            logger.debug(f"Thumbnail generation error: {e}")
-
-        return thumb_path if os.path.exists(thumb_path) else ""
+        return get_thumbnail_service().thumbnail(video_path)
 
 
 # ── 视频缩略图列表项 ────────────────────────────────────────
@@ -399,27 +377,21 @@ class VideoMetadataPanel(QFrame):
 
     def set_metadata(self, path: str):
         try:
-            result = subprocess.run(
-                ["ffprobe", "-v", "quiet", "-print_format", "json",
-                 "-show_format", "-show_streams", path],
-                capture_output=True, text=True, timeout=10
-            )
-            data = json.loads(result.stdout)
-            fmt = data.get("format", {})
-            dur = float(fmt.get("duration", 0))
+            info = get_media_catalog().probe(path)
+            if info is None:
+                return
+            dur = info.duration
             self.labels["duration"].setText(f"{int(dur//60):02d}:{int(dur%60):02d}")
-            for s in data.get("streams", []):
-                if s.get("codec_type") == "video":
-                    self.labels["resolution"].setText(f"{s.get('width','?')}×{s.get('height','?')}")
-                    break
-            size = int(fmt.get("size", 0))
+            if info.video:
+                self.labels["resolution"].setText(f"{info.video.width or '?'}×{info.video.height or '?'}")
+            size = info.size if info.size >= 0 else 0
             if size > 1024**3:
                 self.labels["size"].setText(f"{size/1024**3:.1f} GB")
             elif size > 1024**2:
                 self.labels["size"].setText(f"{size/1024**2:.0f} MB")
             else:
                 self.labels["size"].setText(f"{size/1024:.0f} KB")
-            self.labels["format"].setText(fmt.get("format_name", "").split(",")[0])
+            self.labels["format"].setText(info.format_name.split(",")[0])
         except Exception as e:
             logging.getLogger(__name__).warning(f"获取文件信息失败: {e}")
 
@@ -690,7 +662,7 @@ class StepUpload(QWidget):
         """立即生成单个缩略图（同步）"""
         import threading
         def worker():
-            thumb = ThumbnailWorker._generate_one(None, path)  # type: ignore
+            thumb = ThumbnailWorker._generate_one(path)
             if thumb:
                 from PySide6.QtCore import QMetaObject, Qt, Q_ARG
                 def update():
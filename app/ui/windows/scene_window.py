@@ -6,8 +6,12 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QScrollArea, QFrame, QProgressBar
 )
+import uuid
+from pathlib import Path
+
 from PySide6.QtCore import Signal
 from app.ui.windows.base_step_window import BaseStepWindow
+from app.utils.task_manager import task_manager
 
 
 class SceneWindow(BaseStepWindow):
@@ -22,10 +26,17 @@ class SceneWindow(BaseStepWindow):
 
     scenes_generated = Signal(list)
 
+    # 后台分析线程 → GUI 线程（跨线程排队投递）
+    _analysis_progress = Signal(float, str)
+    _analysis_done = Signal(object)
+
     def __init__(self, parent=None):
         super().__init__("场景理解", 1, parent)
         self._scenes = []
+        self._files = []
         self._pipeline = None
+        self._analysis_progress.connect(self._on_analysis_progress)
+        self._analysis_done.connect(self._on_analysis_done)
         self._setup_content()
 
     def _setup_content(self):
@@ -63,12 +74,12 @@ class SceneWindow(BaseStepWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll, stretch=1)
 
-        # 模拟分析按钮
+        # 分析按钮
         btn_area = QHBoxLayout()
-        btn_analyze = QPushButton("🎬 开始 AI 分析")
-        btn_analyze.setObjectName("primary")
-        btn_analyze.clicked.connect(self._simulate_analysis)
-        btn_area.addWidget(btn_analyze)
+        self.btn_analyze = QPushButton("🎬 开始 AI 分析")
+        self.btn_analyze.setObjectName("primary")
+        self.btn_analyze.clicked.connect(self._start_analysis)
+        btn_area.addWidget(self.btn_analyze)
         btn_area.addStretch()
 
         layout.addLayout(btn_area)
@@ -80,37 +91,82 @@ class SceneWindow(BaseStepWindow):
     def _on_shared_data_set(self, data: dict):
         """当 MainWindow 设置共享数据时调用（来自上一步骤）"""
         files = data.get("files", [])
+        self._files = list(files)
         if files:
             self.progress_label.setText(f"已加载 {len(files)} 个视频文件，可点击「开始分析」")
 
-    def _simulate_analysis(self):
-        """模拟 AI 分析过程（真实场景中替换为实际 AI 调用）"""
-        import random
+    def _start_analysis(self):
+        """批量分析全部视频（BatchAnalysisScheduler 经 TaskManager 在后台执行）"""
+        if not self._files:
+            self.progress_label.setText("请先在上一步添加视频")
+            return
+        from app.services.orchestration.batch_scheduler import (
+            BatchAnalysisScheduler, default_stages,
+        )
+
+        self.btn_analyze.setEnabled(False)
+        self.progress.setValue(0)
+        self.progress_label.setText("正在分析视频...")
+        scheduler = BatchAnalysisScheduler(default_stages())
+        task_manager.submit(
+            f"scene-analysis-{uuid.uuid4().hex[:8]}", "场景理解",
+            self._run_analysis, scheduler, list(self._files),
+            progress_callback=self._emit_progress,
+        )
+
+    def _run_analysis(self, scheduler, files, progress_callback=None):
+        """后台线程：执行批量分析，结果经信号交给 GUI 线程"""
+        results = None
+        try:
+            results = scheduler.analyze(files, progress_callback=progress_callback)
+            return results
+        finally:
+            try:
+                self._analysis_done.emit(results)
+            except RuntimeError:
+                pass  # 窗口已销毁
+
+    def _emit_progress(self, progress: float, message: str = ""):
+        try:
+            self._analysis_progress.emit(progress, message)
+        except RuntimeError:
+            pass  # 窗口已销毁
+
+    def _on_analysis_progress(self, progress: float, message: str):
+        self.progress.setValue(int(progress))
+        self.progress_label.setText(message or f"分析进度: {int(progress)}%")
+
+    def _on_analysis_done(self, results):
+        """GUI 线程：把各视频的场景检测结果转成场景卡片"""
+        self.btn_analyze.setEnabled(True)
+        if results is None:
+            self.progress_label.setText("分析失败，请重试")
+            return
+
         self._scenes = []
-        # 模拟 3-5 个场景
-        for i in range(random.randint(3, 5)):
-            self._scenes.append({
-                "id": i,
-                "start": i * 15,
-                "end": (i + 1) * 15,
-                "description": f"场景 {i+1}：主角 '{'走在街上' if i % 2 == 0 else '进入房间'}'，周围环境 '{'城市街道' if i % 2 == 0 else '室内空间'}'",
-            })
-
-        # 模拟进度动画
-        self._animate_progress(0, 100, 2000)
-
-    def _animate_progress(self, start, end, duration_ms):
-        import time
-        steps = 20
-        step_ms = duration_ms // steps
-        for i in range(steps + 1):
-            value = start + (end - start) * i // steps
-            self.progress.setValue(value)
-            self.progress_label.setText(f"分析进度: {value}%")
-            time.sleep(step_ms / 1000)
-
-        # 分析完成，渲染场景卡片
+        failed = 0
+        for analysis in results:
+            if "scenes" not in analysis.results:
+                failed += 1
+                continue
+            name = Path(analysis.video_path).name
+            for scene in analysis.results["scenes"]:
+                self._scenes.append({
+                    "id": len(self._scenes),
+                    "video": analysis.video_path,
+                    "start": scene.start,
+                    "end": scene.end,
+                    "description": f"{name} · 场景 {scene.index + 1}"
+                                   + (f"：{scene.description}" if scene.description else ""),
+                })
+
+        self.progress.setValue(100)
+        summary = f"识别到 {len(self._scenes)} 个场景"
+        if failed:
+            summary += f"，{failed} 个视频分析失败"
+        self.progress_label.setText(summary)
         self._render_scene_cards()
+        self.scenes_generated.emit(self._scenes)
 
     def _render_scene_cards(self):
         """渲染场景卡片"""
@@ -127,7 +183,7 @@ class SceneWindow(BaseStepWindow):
                 self.scenes_layout.count() - 1, card
             )
 
-        self.btn_next.setEnabled(True)
+        self.btn_next.setEnabled(bool(self._scenes))
 
     def can_proceed(self) -> bool:
         return len(self._scenes) > 0
@@ -169,7 +225,7 @@ class SceneCard(QFrame):
         layout.setSpacing(8)
 
         # 时间范围
-        time_label = QLabel(f"⏱ {self.scene['start']:02d}:00 — {self.scene['end']:02d}:00")
+        time_label = QLabel(f"⏱ {_format_time(self.scene['start'])} — {_format_time(self.scene['end'])}")
         time_label.setObjectName("scene_time")
 
         # 描述
@@ -179,3 +235,9 @@ class SceneCard(QFrame):
 
         layout.addWidget(time_label)
         layout.addWidget(desc)
+
+
+def _format_time(seconds: float) -> str:
+    """秒数格式化为 mm:ss"""
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{secs:02d}"
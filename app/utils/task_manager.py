@@ -104,6 +104,56 @@ class TaskManager:
 
         return task
 
+    def submit_analysis(
+        self,
+        task_id: str,
+        name: str,
+        stage: Any,
+        *args,
+        executor: Any = None,
+        **kwargs,
+    ) -> Task:
+        """
+        提交 CPU 密集的分析阶段到进程池（不占用本管理器的线程）
+
+        Args:
+            task_id: 任务ID
+            name: 任务名称
+            stage: 分析阶段名或模块级函数（见 analysis_executor.STAGES）
+            executor: AnalysisExecutor，默认全局分析进程池
+            *args, **kwargs: 阶段参数
+
+        Returns:
+            Task 对象
+        """
+        if executor is None:
+            from app.services.orchestration.analysis_executor import get_analysis_executor
+            executor = get_analysis_executor()
+
+        task = Task(id=task_id, name=name, status=TaskStatus.RUNNING, started_at=datetime.now())
+        self._tasks[task_id] = task
+
+        def on_done(future: Future):
+            task.completed_at = datetime.now()
+            if future.cancelled():
+                task.status = TaskStatus.CANCELLED
+                return
+            error = future.exception()
+            if error is not None:
+                task.status = TaskStatus.FAILED
+                task.error = str(error)
+                self._logger.error(f"Task {task_id} failed: {error}")
+                return
+            task.status = TaskStatus.COMPLETED
+            task.result = future.result()
+            task.progress = 100.0
+
+        future = executor.submit(stage, *args, **kwargs)
+        future.add_done_callback(on_done)
+        self._futures[task_id] = future
+
+        return task
+
     def _make_progress_callback(self, task_id: str, callback: Callable):
         """创建进度回调包装"""
         def wrapper(progress: float, message: str = ""):
@@ -126,6 +176,16 @@ class TaskManager:
             return True
         return False
 
+    def wait(self, task_id: str, timeout: Optional[float] = None) -> Any:
+        """
+        等待任务完成并返回结果
+
+        Raises:
+            KeyError: 任务不存在
+            任务本身抛出的异常
+        """
+        return self._futures[task_id].result(timeout=timeout)
+
     def get_task(self, task_id: str) -> Optional[Task]:
         """获取任务状态"""
         return self._tasks.get(task_id)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流水线追踪模块
+
+记录嵌套的耗时区间（span）及其属性，导出 Chrome Trace / Perfetto JSON
+和按阶段聚合的汇总表。
+
+默认关闭；关闭时 span() 返回共享的空上下文，几乎没有开销。
+开启方式:
+    - 环境变量 VOXPLORE_TRACE=1
+    - 代码中调用 tracer.enable()
+
+使用示例:
+    from app.utils.tracing import tracer
+
+    with tracer.span("generate_voice", category="stage", file=path):
+        with tracer.span("tts", category="tts", segment=i) as sp:
+            ...
+            sp.set(bytes=size)
+
+    tracer.export_chrome_trace("trace.json")   # 拖入 ui.perfetto.dev 查看
+    print(tracer.format_summary())
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "voxplore_current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """单个耗时区间"""
+    name: str
+    category: str
+    start_ns: int
+    tid: int
+    parent: Optional["Span"] = None
+    end_ns: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def depth(self) -> int:
+        d, p = 0, self.parent
+        while p is not None:
+            d, p = d + 1, p.parent
+        return d
+
+    def set(self, **attrs: Any) -> None:
+        """补充属性（如执行结束后才知道的字节数）"""
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    """关闭追踪时使用的空 span"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    """span 上下文管理器"""
+
+    __slots__ = ("_tracer", "_span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self._tracer = tracer
+        self._span = span
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self._span.attrs["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self._tracer._finish(self._span)
+
+
+class Tracer:
+    """
+    追踪器
+
+    线程安全；嵌套关系通过 contextvars 维护，因此同样适用于 asyncio 任务。
+    线程池中的任务需要用 bind() 包装以继承父 span。
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 200_000):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self._spans: List[Span] = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    # ---------- 开关 ----------
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """清空已记录的 span"""
+        with self._lock:
+            self._spans.clear()
+            self._dropped = 0
+            self._origin_ns = time.perf_counter_ns()
+
+    # ---------- 记录 ----------
+
+    def span(self, name: str, category: str = "stage", **attrs: Any):
+        """开始一个 span，用作 with 语句"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, Span(
+            name=name,
+            category=category,
+            start_ns=time.perf_counter_ns(),
+            tid=threading.get_ident(),
+            parent=_current_span.get(),
+            attrs=attrs,
+        ))
+
+    def traced(self, name: Optional[str] = None, category: str = "stage"):
+        """函数装饰器版本的 span()"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def bind(self, func: Callable) -> Callable:
+        """让提交到线程池的函数继承当前 span 上下文"""
+        if not self.enabled:
+            return func
+        ctx = contextvars.copy_context()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return ctx.copy().run(func, *args, **kwargs)
+        return wrapper
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) >= self.max_spans:
+                self._dropped += 1
+                return
+            self._spans.append(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def spans_under(self, root: Span) -> List[Span]:
+        """root 及其全部后代 span（用于只导出某一次运行）"""
+        inside: Dict[int, bool] = {id(root): True}
+
+        def belongs(sp: Optional[Span]) -> bool:
+            chain = []
+            while sp is not None and id(sp) not in inside:
+                chain.append(sp)
+                sp = sp.parent
+            result = sp is not None and inside[id(sp)]
+            for item in chain:
+                inside[id(item)] = result
+            return result
+
+        return [sp for sp in self.spans if belongs(sp)]
+
+    def discard(self, spans: List[Span]) -> None:
+        """删除指定的 span，其它调用方的记录保持不变"""
+        ids = {id(sp) for sp in spans}
+        with self._lock:
+            self._spans = [sp for sp in self._spans if id(sp) not in ids]
+
+    # ---------- 导出 ----------
+
+    def to_chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        """生成 Chrome Trace Event Format（Perfetto 兼容）；spans 默认全部"""
+        events = []
+        thread_ids: Dict[int, int] = {}
+        for sp in sorted(self.spans if spans is None else spans, key=lambda s: s.start_ns):
+            tid = thread_ids.setdefault(sp.tid, len(thread_ids) + 1)
+            events.append({
+                "name": sp.name,
+                "cat": sp.category,
+                "ph": "X",
+                "ts": (sp.start_ns - self._origin_ns) / 1000.0,
+                "dur": (sp.end_ns - sp.start_ns) / 1000.0,
+                "pid": self._pid,
+                "tid": tid,
+                "args": {k: _jsonable(v) for k, v in sp.attrs.items()},
+            })
+        for ident, tid in thread_ids.items():
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                "args": {"name": f"thread-{ident}"},
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_spans": self._dropped},
+        }
+
+    def export_chrome_trace(self, path: str, spans: Optional[List[Span]] = None) -> str:
+        """写出 trace JSON，返回文件路径"""
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(spans), f, ensure_ascii=False)
+        return str(out)
+
+    def summary(self, spans: Optional[List[Span]] = None) -> List[Dict[str, Any]]:
+        """
+        按 (category, name) 聚合
+
+        self_ms 为扣除直接子 span 后的自身耗时，便于定位真正的热点。
+        """
+        spans = self.spans if spans is None else spans
+        child_ns: Dict[int, int] = {}
+        for sp in spans:
+            if sp.parent is not None:
+                key = id(sp.parent)
+                child_ns[key] = child_ns.get(key, 0) + (sp.end_ns - sp.start_ns)
+
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for sp in spans:
+            dur_ns = sp.end_ns - sp.start_ns
+            row = rows.setdefault((sp.category, sp.name), {
+                "category": sp.category, "name": sp.name, "count": 0,
+                "total_ms": 0.0, "self_ms": 0.0, "max_ms": 0.0,
+            })
+            row["count"] += 1
+            row["total_ms"] += dur_ns / 1e6
+            row["self_ms"] += max(dur_ns - child_ns.get(id(sp), 0), 0) / 1e6
+            row["max_ms"] = max(row["max_ms"], dur_ns / 1e6)
+
+        result = sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+        for row in result:
+            row["avg_ms"] = row["total_ms"] / row["count"]
+        return result
+
+    def format_summary(self, spans: Optional[List[Span]] = None) -> str:
+        """汇总表文本"""
+        lines = [
+            f"{'category':<10} {'name':<32} {'count':>6} {'total_ms':>11} "
+            f"{'self_ms':>11} {'avg_ms':>9} {'max_ms':>9}"
+        ]
+        for r in self.summary(spans):
+            lines.append(
+                f"{r['category']:<10} {r['name'][:32]:<32} {r['count']:>6} "
+                f"{r['total_ms']:>11.1f} {r['self_ms']:>11.1f} "
+                f"{r['avg_ms']:>9.1f} {r['max_ms']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+# 全局实例
+tracer = Tracer(enabled=os.environ.get("VOXPLORE_TRACE", "") in ("1", "true", "yes"))
+
+
+__all__ = ["Span", "Tracer", "tracer"]
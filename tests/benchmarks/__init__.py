@@ -0,0 +1 @@
+"""Voxplore 性能基准测试"""
@@ -0,0 +1,48 @@
+"""基准测试 fixtures：基线存储、执行器与合成素材"""
+import os
+
+import pytest
+
+from .fixtures import make_test_clip
+from .harness import BaselineStore, BenchmarkRunner, DEFAULT_THRESHOLD, format_results
+
+
+_session_runner = None
+
+
+@pytest.fixture(scope="session")
+def bench_runner():
+    """会话级执行器；VOXPLORE_BENCH_SAVE=1 时在会话结束写回基线"""
+    global _session_runner
+    save = os.environ.get("VOXPLORE_BENCH_SAVE", "") == "1"
+    threshold = float(os.environ.get("VOXPLORE_BENCH_THRESHOLD", DEFAULT_THRESHOLD))
+    runner = BenchmarkRunner(BaselineStore(), save=save, threshold=threshold)
+    _session_runner = runner
+    yield runner
+    if save and runner.results:
+        runner.store.save()
+
+
+@pytest.fixture
+def bench(bench_runner):
+    """单个用例使用的计时入口"""
+    return bench_runner
+
+
+@pytest.fixture(scope="session")
+def bench_clip(tmp_path_factory):
+    """ffmpeg 生成的测试视频；环境没有 ffmpeg 时跳过"""
+    clip = make_test_clip(tmp_path_factory.mktemp("bench_media"))
+    if clip is None:
+        pytest.skip("ffmpeg 不可用，跳过依赖真实视频的基准")
+    return clip
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _session_runner is None or not _session_runner.results:
+        return
+    terminalreporter.section("benchmarks")
+    for line in format_results(_session_runner.results, _session_runner.store):
+        terminalreporter.write_line(line)
+    if _session_runner.save:
+        terminalreporter.write_line(f"基线已写入: {_session_runner.store.path}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试合成数据
+
+所有数据在本地确定性生成，不依赖外部素材或网络。
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ai.subtitle_types import SubtitleSegment, SubtitleExtractionResult
+from app.services.video.models.perspective_models import (
+    NarrationSegment, ClipSegment, PerspectiveShot,
+)
+
+
+def has_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+class FixedEmbedder:
+    """返回预生成 embedding 的提取器，排除 embedding 生成本身的开销"""
+
+    def __init__(self, embeddings: Dict[str, List[float]]):
+        self._embeddings = embeddings
+
+    def extract(self, video_path: str, num_frames: int = 8) -> List[float]:
+        return self._embeddings[video_path]
+
+
+def make_embeddings(
+    n: int, num_groups: int = 8, seed: int = 7
+) -> Tuple[List[str], FixedEmbedder, FixedEmbedder]:
+    """生成 n 个视频的视觉/音频 embedding，按 num_groups 个簇分布"""
+    rng = np.random.RandomState(seed)
+    v_centers = rng.randn(num_groups, 128)
+    a_centers = rng.randn(num_groups, 64)
+
+    paths = [f"/bench/video_{i:04d}.mp4" for i in range(n)]
+    vision: Dict[str, List[float]] = {}
+    audio: Dict[str, List[float]] = {}
+    for i, path in enumerate(paths):
+        g = i % num_groups
+        vision[path] = list(v_centers[g] + rng.randn(128) * 0.2)
+        audio[path] = list(a_centers[g] + rng.randn(64) * 0.2)
+    return paths, FixedEmbedder(vision), FixedEmbedder(audio)
+
+
+def make_subtitle_results(
+    n: int, seed: int = 11
+) -> Tuple[SubtitleExtractionResult, SubtitleExtractionResult]:
+    """生成 OCR / 语音两路字幕，约一半时间重叠"""
+    rng = np.random.RandomState(seed)
+    speech = SubtitleExtractionResult(video_path="bench.mp4", duration=n * 3.0, method="speech")
+    ocr = SubtitleExtractionResult(video_path="bench.mp4", duration=n * 3.0, method="ocr")
+
+    t = 0.0
+    for i in range(n):
+        dur = 1.0 + rng.rand() * 2.0
+        speech.segments.append(SubtitleSegment(t, t + dur, f"第{i}句台词", 0.9, "speech"))
+        if i % 2 == 0:
+            jitter = rng.rand() * 0.3
+            ocr.segments.append(SubtitleSegment(t + jitter, t + dur, f"第{i}句台词", 0.8, "ocr"))
+        else:
+            ocr.segments.append(SubtitleSegment(t + dur * 0.9, t + dur + 0.5, f"标题{i}", 0.7, "ocr"))
+        t += dur + rng.rand() * 0.5
+    return ocr, speech
+
+
+def make_interleave_inputs(
+    num_segments: int, num_clips: int, seed: int = 13
+) -> Tuple[List[NarrationSegment], List[ClipSegment], List[PerspectiveShot], List[float]]:
+    """生成解说时间轴、原片片段、视角镜头和情感曲线"""
+    rng = np.random.RandomState(seed)
+
+    narration = []
+    t = 0.0
+    for i in range(num_segments):
+        dur = 2.0 + rng.rand() * 4.0
+        narration.append(NarrationSegment(
+            segment_id=f"n_{i}",
+            text=f"解说第{i}段",
+            start_time=t,
+            end_time=t + dur,
+            duration=dur,
+            emotion=["neutral", "sad", "excited", "tense"][i % 4],
+        ))
+        t += dur
+    total = t
+
+    clips = []
+    clip_dur = total / num_clips
+    for i in range(num_clips):
+        start = i * clip_dur
+        clips.append(ClipSegment(
+            clip_id=f"c_{i}",
+            source_path="/bench/source.mp4",
+            start_time=start,
+            end_time=start + clip_dur,
+            duration=clip_dur,
+            is_key_moment=(i % 7 == 0),
+        ))
+
+    emotion_curve = [float(x) for x in rng.rand(num_segments)]
+    shots = [
+        PerspectiveShot(
+            shot_id=f"shot_{i}",
+            start_time=n.start_time,
+            end_time=n.end_time,
+            duration=n.duration,
+            viewpoint=None,
+            show_original_clip=emotion_curve[i] >= 0.5,
+            original_clip_weight=emotion_curve[i],
+        )
+        for i, n in enumerate(narration)
+    ]
+    return narration, clips, shots, emotion_curve
+
+
+def make_test_clip(output_dir: Path, duration: int = 6) -> Optional[Path]:
+    """用 ffmpeg lavfi 生成带三次场景切换和正弦音轨的测试视频"""
+    if not has_ffmpeg():
+        return None
+
+    output = output_dir / "bench_clip.mp4"
+    part = duration / 3
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=320x240:rate=25:duration={part}",
+        "-f", "lavfi", "-i", f"smptebars=size=320x240:rate=25:duration={part}",
+        "-f", "lavfi", "-i", f"mandelbrot=size=320x240:rate=25:end_pts={part}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-filter_complex", "[0:v][1:v][2:v]concat=n=3:v=1:a=0,trim=duration="
+        f"{duration}[v]",
+        "-map", "[v]", "-map", "3:a",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest",
+        str(output),
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0 or not output.exists():
+        return None
+    return output
+
+
+__all__ = [
+    "has_ffmpeg",
+    "FixedEmbedder",
+    "make_embeddings",
+    "make_subtitle_results",
+    "make_interleave_inputs",
+    "make_test_clip",
+]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试框架
+
+对一个可调用对象做预热 + 多轮计时，取中位数与 JSON 基线比较。
+
+环境变量:
+    VOXPLORE_BENCH_BASELINE   基线文件路径（默认 tests/benchmarks/.baselines/<平台>.json）
+    VOXPLORE_BENCH_SAVE       设为 1 时将本次结果写入基线（不做回归判断）
+    VOXPLORE_BENCH_THRESHOLD  允许的回归比例，默认 0.25（慢 25% 以上判定失败）
+
+基线只对同一台机器有意义，因此默认按平台分文件且不纳入版本控制。
+"""
+
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+DEFAULT_THRESHOLD = 0.25
+
+# 绝对噪声下限：中位数低于该值（秒）的用例只做记录，不因抖动判失败
+NOISE_FLOOR = 0.0005
+
+
+@dataclass
+class BenchmarkResult:
+    """单个用例的计时结果"""
+    name: str
+    rounds: int
+    median: float
+    mean: float
+    min: float
+    max: float
+    stdev: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class BaselineStore:
+    """JSON 基线存储"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else self.default_path()
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = self._load()
+
+    @staticmethod
+    def default_path() -> Path:
+        env_path = os.environ.get("VOXPLORE_BENCH_BASELINE")
+        if env_path:
+            return Path(env_path)
+        machine = f"{platform.system()}-{platform.machine()}-py{platform.python_version()}"
+        return Path(__file__).parent / ".baselines" / f"{machine.lower()}.json"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("results", {})
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._data.get(name)
+
+    def put(self, result: BenchmarkResult) -> None:
+        with self._lock:
+            self._data[result.name] = asdict(result)
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": dict(sorted(self._data.items())),
+            }
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class RegressionError(AssertionError):
+    """基准回归超过阈值"""
+
+
+class BenchmarkRunner:
+    """
+    基准执行器
+
+    使用示例:
+        def test_merge(bench):
+            bench("subtitle_merger.merge[2000]", SubtitleMerger.merge, ocr, speech)
+    """
+
+    def __init__(
+        self,
+        store: BaselineStore,
+        save: bool = False,
+        threshold: float = DEFAULT_THRESHOLD,
+    ):
+        self.store = store
+        self.save = save
+        self.threshold = threshold
+        self.results: List[BenchmarkResult] = []
+
+    def run(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        rounds: int = 5,
+        warmup: int = 1,
+        setup: Optional[Callable[[], None]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """执行基准并与基线比较，返回最后一轮的函数返回值"""
+        for _ in range(warmup):
+            if setup:
+                setup()
+            func(*args, **kwargs)
+
+        timings = []
+        value = None
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            value = func(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+
+        result = BenchmarkResult(
+            name=name,
+            rounds=rounds,
+            median=statistics.median(timings),
+            mean=statistics.fmean(timings),
+            min=min(timings),
+            max=max(timings),
+            stdev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            params=params or {},
+        )
+        self.results.append(result)
+
+        if self.save:
+            self.store.put(result)
+        else:
+            self.check(result)
+        return value
+
+    __call__ = run
+
+    def check(self, result: BenchmarkResult) -> None:
+        """与基线比较，超过阈值时抛出 RegressionError"""
+        baseline = self.store.get(result.name)
+        if not baseline:
+            return
+        base_median = float(baseline["median"])
+        if max(result.median, base_median) < NOISE_FLOOR:
+            return
+        limit = base_median * (1 + self.threshold)
+        if result.median > limit:
+            raise RegressionError(
+                f"{result.name}: 中位数 {result.median * 1000:.2f}ms 超过基线 "
+                f"{base_median * 1000:.2f}ms 的 {self.threshold:.0%} 阈值"
+            )
+
+
+def format_results(results: List[BenchmarkResult], store: BaselineStore) -> List[str]:
+    """生成终端汇总表"""
+    lines = [f"{'benchmark':<48} {'median':>10} {'baseline':>10} {'delta':>8}"]
+    for r in results:
+        baseline = store.get(r.name)
+        if baseline:
+            base = float(baseline["median"])
+            delta = f"{(r.median / base - 1) * 100:+.1f}%" if base > 0 else "-"
+            base_str = f"{base * 1000:.2f}ms"
+        else:
+            delta, base_str = "new", "-"
+        lines.append(f"{r.name:<48} {r.median * 1000:>8.2f}ms {base_str:>10} {delta:>8}")
+    return lines
+
+
+__all__ = [
+    "BenchmarkResult",
+    "BaselineStore",
+    "BenchmarkRunner",
+    "RegressionError",
+    "format_results",
+    "DEFAULT_THRESHOLD",
+]
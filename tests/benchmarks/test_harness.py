@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""测试基准框架的基线读写与回归判断"""
+
+import pytest
+
+from .harness import BaselineStore, BenchmarkRunner, BenchmarkResult, RegressionError
+
+
+def _result(name, median):
+    return BenchmarkResult(name=name, rounds=1, median=median, mean=median,
+                           min=median, max=median, stdev=0.0)
+
+
+class TestBenchmarkHarness:
+    """BenchmarkRunner / BaselineStore"""
+
+    def test_save_and_reload(self, tmp_path):
+        path = tmp_path / "baseline.json"
+        runner = BenchmarkRunner(BaselineStore(path), save=True)
+        runner.run("noop", lambda: None, rounds=2)
+        runner.store.save()
+
+        reloaded = BaselineStore(path)
+        assert reloaded.get("noop")["rounds"] == 2
+
+    def test_regression_detected(self, tmp_path):
+        store = BaselineStore(tmp_path / "baseline.json")
+        store.put(_result("slow", 0.010))
+        runner = BenchmarkRunner(store, threshold=0.25)
+
+        runner.check(_result("slow", 0.012))
+        with pytest.raises(RegressionError):
+            runner.check(_result("slow", 0.020))
+
+    def test_missing_baseline_and_noise_floor(self, tmp_path):
+        store = BaselineStore(tmp_path / "baseline.json")
+        store.put(_result("tiny", 0.00001))
+        runner = BenchmarkRunner(store, threshold=0.25)
+
+        runner.check(_result("unknown", 10.0))
+        runner.check(_result("tiny", 0.0001))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线热点基准测试
+
+运行:
+    pytest tests/benchmarks -m benchmark                       # 与基线比较
+    VOXPLORE_BENCH_SAVE=1 pytest tests/benchmarks -m benchmark  # 更新基线
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.ai.subtitle_merger import SubtitleMerger
+from app.services.video.grouping.smart_grouper import SmartGrouper
+from app.services.video.video_interleaver import VideoInterleaver
+
+from .fixtures import (
+    make_embeddings,
+    make_subtitle_results,
+    make_interleave_inputs,
+)
+
+
+pytestmark = pytest.mark.benchmark
+
+
+class TestGroupingBenchmarks:
+    """SmartGrouper 分组"""
+
+    @pytest.mark.parametrize("n", [20, 60])
+    def test_group_videos(self, bench, n):
+        paths, vision, audio = make_embeddings(n)
+        grouper = SmartGrouper(vision_embedder=vision, audio_embedder=audio)
+
+        groups = bench(f"smart_grouper.group_videos[{n}]", grouper.group_videos, paths,
+                       rounds=3, params={"n": n})
+
+        assert sum(len(g.video_paths) for g in groups) == n
+
+
+class TestSubtitleBenchmarks:
+    """SubtitleMerger 合并"""
+
+    @pytest.mark.parametrize("n", [500, 5000])
+    def test_merge(self, bench, n):
+        ocr, speech = make_subtitle_results(n)
+
+        merged = bench(f"subtitle_merger.merge[{n}]", SubtitleMerger.merge, ocr, speech,
+                       params={"n": n})
+
+        assert len(merged.segments) >= n
+
+
+class TestInterleaveBenchmarks:
+    """VideoInterleaver 穿插决策"""
+
+    @pytest.mark.parametrize("segments,clips", [(100, 500), (400, 4000)])
+    def test_decide_interleave(self, bench, segments, clips):
+        narration, original, shots, curve = make_interleave_inputs(segments, clips)
+        interleaver = VideoInterleaver()
+
+        timeline = bench(
+            f"video_interleaver.decide_interleave[{segments}x{clips}]",
+            interleaver.decide_interleave,
+            narration, original, shots, [], curve,
+            params={"segments": segments, "clips": clips},
+        )
+
+        assert len(timeline.decisions) == segments
+
+
+class TestCacheBenchmarks:
+    """缓存后端读写"""
+
+    N = 2000
+
+    def _write_read(self, cache, n):
+        for i in range(n):
+            cache.set(f"key_{i}", {"value": i, "payload": "x" * 64})
+        for i in range(n):
+            cache.get(f"key_{i}")
+
+    def test_core_memory_cache(self, bench):
+        from app.core.cache_impl.memory_cache import MemoryCache
+
+        cache = MemoryCache(max_size=self.N)
+        bench("cache.core_memory[2000]", self._write_read, cache, self.N,
+              setup=cache.clear)
+
+    def test_core_disk_cache(self, bench, tmp_path):
+        from app.core.cache_impl.disk_cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "disk_cache"))
+        bench("cache.core_disk[200]", self._write_read, cache, 200,
+              rounds=3, setup=cache.clear)
+
+    def test_utils_memory_cache(self, bench):
+        from app.utils.performance import MemoryCache
+
+        cache = MemoryCache(max_size=self.N, ttl=60)
+        bench("cache.utils_memory[2000]", self._write_read, cache, self.N,
+              setup=cache.clear)
+
+    def test_llm_memory_cache(self, bench):
+        from app.services.ai.cache import LLMMemoryCache
+
+        cache = LLMMemoryCache(max_size=self.N)
+        messages = [[{"role": "user", "content": f"prompt {i}"}] for i in range(self.N)]
+
+        def run():
+            for m in messages:
+                cache.set(m, "model", "response")
+            for m in messages:
+                cache.get(m, "model")
+
+        bench("cache.llm_memory[2000]", run, setup=cache.clear)
+
+
+class TestMediaBenchmarks:
+    """依赖 ffmpeg 生成的测试视频"""
+
+    def test_scene_analyzer(self, bench, bench_clip):
+        from app.services.ai.scene_analyzer import SceneAnalyzer
+        from app.services.ai.scene_models import AnalysisConfig
+
+        analyzer = SceneAnalyzer(AnalysisConfig(use_pyscenect=False, extract_keyframes=False))
+
+        scenes = bench("scene_analyzer.analyze[6s]", analyzer.analyze, str(bench_clip),
+                       rounds=3)
+
+        assert scenes
+
+    def test_direct_video_exporter(self, bench, bench_clip, tmp_path):
+        from app.services.export.direct_video_exporter import (
+            DirectVideoExporter, VideoExportConfig, Resolution,
+        )
+
+        project = SimpleNamespace(
+            source_video=str(bench_clip),
+            segments=[
+                SimpleNamespace(video_start=float(i), video_end=float(i) + 1.5,
+                                audio_path=None, captions=[])
+                for i in range(0, 4)
+            ],
+        )
+        config = VideoExportConfig(resolution=Resolution.SD_480P, preset="ultrafast",
+                                   include_subtitles=False)
+        exporter = DirectVideoExporter(config)
+        output = tmp_path / "export.mp4"
+
+        bench("direct_video_exporter.export_commentary[4]", exporter.export_commentary,
+              project, str(output), rounds=3)
+
+        assert output.exists()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试情感曲线数值工具"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.services.video.emotion_curve import moving_average, normalize, resample, step_curve
+from app.services.video.models.monologue_models import EmotionType, MonologueSegment
+from app.services.video.scene_converter import EmotionCurveGenerator
+
+
+def _slow_moving_average(data, window):
+    """逐点切片求平均（原实现）"""
+    if window <= 1 or len(data) <= window:
+        return list(data)
+    half = window // 2
+    n = len(data)
+    return [sum(data[max(0, i - half):min(n, i + half + 1)]) / (min(n, i + half + 1) - max(0, i - half))
+            for i in range(n)]
+
+
+def _segments(n=60, seed=0):
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    for _ in range(n):
+        d = rng.choice([0.0, 0.05, 0.3, 2.0, 3.7])
+        segments.append(MonologueSegment(script="", emotion=rng.choice(list(EmotionType)),
+                                         video_start=t, video_end=t + d))
+        t += d
+    return segments
+
+
+class TestMovingAverage:
+    """测试卷积移动均值"""
+
+    @pytest.mark.parametrize("window", [1, 2, 3, 5, 9])
+    def test_matches_slicing(self, window):
+        """与逐点切片平均一致（含边缘）"""
+        data = [random.Random(window).random() for _ in range(50)]
+        assert np.allclose(moving_average(data, window), _slow_moving_average(data, window))
+
+    def test_short_input_unchanged(self):
+        assert moving_average([0.1, 0.5], 3).tolist() == [0.1, 0.5]
+
+
+class TestNormalizeAndResample:
+    """测试归一化与重采样"""
+
+    def test_normalize(self):
+        assert normalize([2.0, 4.0, 3.0]).tolist() == [0.0, 1.0, 0.5]
+        assert normalize([0.3, 0.3]).tolist() == [0.0, 0.0]
+        assert normalize([]).size == 0
+
+    def test_step_curve(self):
+        """每个片段至少一个点，时长为 0 的片段跳过"""
+        assert step_curve([0.25, 0.0, 0.01], [0.1, 0.9, 0.5]).tolist() == [0.1, 0.1, 0.5]
+
+    def test_resample(self):
+        times, values = [0.0, 1.0, 2.0], [0.0, 1.0, 0.0]
+        assert resample(times, values, [0.5, 1.5, 5.0]).tolist() == [0.5, 0.5, 0.0]
+        assert resample(times, values, [0.5, 1.0, 1.9], method="previous").tolist() == [0.0, 1.0, 1.0]
+        with pytest.raises(ValueError):
+            resample(times, values, [0.0], method="cubic")
+
+
+class TestEmotionCurveGenerator:
+    """测试 EmotionCurveGenerator 使用向量化实现"""
+
+    def test_same_as_list_pipeline(self):
+        """曲线与逐点展平 + 平滑 + 归一化的结果一致"""
+        generator = EmotionCurveGenerator(smoothing_window=5)
+        segments = _segments()
+
+        flat = []
+        for seg in segments:
+            duration = seg.video_end - seg.video_start
+            if duration > 0:
+                flat.extend([generator.EMOTION_INTENSITY_MAP[seg.emotion]] * max(1, int(duration * 10)))
+        expected = normalize(_slow_moving_average(flat, 5))
+
+        curve = generator.generate_curve(segments)
+        assert isinstance(curve, list)
+        assert np.allclose(curve, expected)
+
+    def test_array_and_grid(self):
+        generator = EmotionCurveGenerator()
+        segments = _segments()
+        curve = generator.generate_curve(segments, as_array=True)
+        assert isinstance(curve, np.ndarray)
+
+        grid = np.arange(0, len(curve) / 10, 1.0)
+        per_second = generator.sample_curve(segments, grid)
+        assert per_second.shape == grid.shape
+        assert np.allclose(per_second, curve[::10][:len(grid)])
+
+    def test_empty(self):
+        generator = EmotionCurveGenerator()
+        assert generator.generate_curve([]) == []
+        assert generator.generate_curve([], as_array=True).size == 0
@@ -7,6 +7,7 @@ from unittest.mock import MagicMock
 
 from app.services.video.extraction.first_person_extractor import (
     VideoSegment,
+    FactoryVisionModel,
     FirstPersonExtractor,
 )
 
@@ -186,6 +187,29 @@ class TestFirstPersonExtractor:
         assert all(seg.video_path == video_path for seg in segments)
 
 
+class TestFactoryVisionModel:
+    """测试 FactoryVisionModel 批量分析"""
+
+    def test_frames_analyzed_in_one_batch(self, monkeypatch):
+        """全部采样帧一次交给 analyze_many，结果转换为 VisionModel 格式"""
+        factory = MagicMock()
+        factory.analyze_many.side_effect = lambda images, prompt: [
+            {"first_person": 90, "first_person_hook": "我走进雨里"} if i % 2 else RuntimeError("down")
+            for i, _ in enumerate(images)
+        ]
+        model = FactoryVisionModel(factory)
+        monkeypatch.setattr(model, "_grab_frames", lambda path, ts: ["img"] * len(ts))
+
+        extractor = FirstPersonExtractor(vision_model=model)
+        extractor.extract_first_person_segments("/test/video.mp4")
+        assert factory.analyze_many.call_count == 1
+        assert len(factory.analyze_many.call_args[0][0]) == 60
+
+        results = model.analyze_frames("/test/video.mp4", [0.0, 1.0])
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] == {"is_first_person": True, "confidence": 0.9, "description": "我走进雨里"}
+
+
 class TestVideoSegmentDataclass:
     """测试 VideoSegment 数据类完整性"""
 
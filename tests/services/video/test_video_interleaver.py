@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试视频穿插增量更新"""
+
+from dataclasses import replace
+
+from app.services.video.models.perspective_models import (
+    ClipSegment,
+    InterleaveChange,
+    NarrationSegment,
+    PerspectiveShot,
+)
+from app.services.video.video_interleaver import VideoInterleaver
+
+
+def _inputs(n=12):
+    narration, shots, t = [], [], 0.0
+    for i in range(n):
+        dur = 2.0 + (i % 3)
+        narration.append(NarrationSegment(
+            segment_id=f"n_{i}", text=f"第{i}段", start_time=t, end_time=t + dur,
+            duration=dur, emotion=["neutral", "sad", "excited"][i % 3],
+        ))
+        shots.append(PerspectiveShot(
+            shot_id=f"shot_{i}", start_time=t, end_time=t + dur, duration=dur,
+            viewpoint=None, show_original_clip=i % 2 == 0, original_clip_weight=0.4,
+        ))
+        t += dur
+    clips = [
+        ClipSegment(clip_id=f"c_{i}", source_path="/v.mp4", start_time=i * 1.5,
+                    end_time=(i + 1) * 1.5, duration=1.5, is_key_moment=i % 5 == 0)
+        for i in range(int(t / 1.5) + 4)
+    ]
+    curve = [0.2 + 0.07 * i for i in range(n)]
+    return narration, clips, shots, curve
+
+
+def _summary(timeline):
+    return [
+        (d.narration_segment.segment_id, round(d.narration_segment.start_time, 6),
+         d.clip_segment.clip_id if d.clip_segment else None,
+         d.show_original, d.transition, d.subtitle_text, d.subtitle_style)
+        for d in timeline.decisions
+    ]
+
+
+class TestIncrementalInterleave:
+    """测试 update_interleave"""
+
+    def test_retimed_segment_matches_full(self):
+        """改写一段解说（时长变化）后与全量结果一致"""
+        narration, clips, shots, curve = _inputs()
+        interleaver = VideoInterleaver()
+        previous = interleaver.decide_interleave(narration, clips, shots, [], curve)
+
+        new_seg = replace(narration[3], text="改写后的解说", duration=narration[3].duration + 1.5,
+                          end_time=narration[3].end_time + 1.5)
+        timeline = interleaver.update_interleave(
+            previous, clips, InterleaveChange(segments={3: new_seg})
+        )
+
+        edited = narration[:3] + [new_seg] + [
+            replace(n, start_time=n.start_time + 1.5, end_time=n.end_time + 1.5)
+            for n in narration[4:]
+        ]
+        full = interleaver.decide_interleave(edited, clips, shots, [], curve)
+
+        assert _summary(timeline) == _summary(full)
+        assert timeline.total_duration == full.total_duration
+        assert timeline.decisions[0] is previous.decisions[0]
+
+    def test_emotion_and_shot_updates(self):
+        """情感与视角变更只重算对应片段"""
+        narration, clips, shots, curve = _inputs()
+        interleaver = VideoInterleaver()
+        previous = interleaver.decide_interleave(narration, clips, shots, [], curve)
+
+        new_shot = replace(shots[5], show_original_clip=not shots[5].show_original_clip)
+        timeline = interleaver.update_interleave(
+            previous, clips, InterleaveChange(emotions={2: 0.95}, shots={5: new_shot})
+        )
+
+        curve2 = list(curve)
+        curve2[2] = 0.95
+        shots2 = list(shots)
+        shots2[5] = new_shot
+        full = interleaver.decide_interleave(narration, clips, shots2, [], curve2)
+
+        assert _summary(timeline) == _summary(full)
+        assert timeline.emotion_curve == curve2
+        assert timeline.decisions[1] is previous.decisions[1]
+        assert previous.emotion_curve == curve
+
+    def test_clip_window(self):
+        """原片改动只影响重叠的解说片段"""
+        narration, clips, shots, curve = _inputs()
+        interleaver = VideoInterleaver()
+        previous = interleaver.decide_interleave(narration, clips, shots, [], curve)
+
+        clips2 = [replace(c, is_key_moment=True) if 6.0 <= c.start_time < 9.0 else c
+                  for c in clips]
+        timeline = interleaver.update_interleave(
+            previous, clips2, InterleaveChange(clip_windows=[(6.0, 9.0)])
+        )
+        full = interleaver.decide_interleave(narration, clips2, shots, [], curve)
+
+        assert _summary(timeline) == _summary(full)
+
+
+class TestClipIntervalIndex:
+    """测试原片区间索引"""
+
+    def test_matches_linear_scan(self):
+        """查询结果与线性扫描一致（含相互重叠的长片段）"""
+        from app.services.video.clip_index import ClipIntervalIndex
+
+        clips = [
+            ClipSegment(clip_id=str(i), source_path="/v.mp4", start_time=float(s),
+                        end_time=float(s + d), duration=float(d))
+            for i, (s, d) in enumerate([(9, 1), (0, 30), (3, 2), (3, 0), (12, 4), (5, 1)])
+        ]
+        index = ClipIntervalIndex(clips)
+
+        for start, end in [(0, 1), (3, 3.5), (4.9, 9.5), (15, 40), (-5, 0), (30, 31)]:
+            expected = [c for c in clips if c.start_time < end and c.end_time > start]
+            assert index.overlapping(start, end) == expected
+
+    def test_empty(self):
+        """空片段列表"""
+        from app.services.video.clip_index import ClipIntervalIndex
+
+        assert ClipIntervalIndex([]).overlapping(0.0, 10.0) == []
+
+    def test_key_functions(self):
+        """按取值函数索引其他对象（时间线轨道上的字典片段），保持原顺序"""
+        from app.services.video.clip_index import ClipIntervalIndex
+
+        segments = [{"start": float(s), "end": float(s) + 0.8} for s in range(2000)][::-1]
+        index = ClipIntervalIndex(segments, start=lambda s: s["start"], end=lambda s: s["end"])
+
+        visible = index.overlapping(100.5, 103.0)
+        assert visible == [s for s in segments if s["start"] < 103.0 and s["end"] > 100.5]
+        assert [s["start"] for s in visible] == [102.0, 101.0, 100.0]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Test the process-pool analysis executor"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.services.orchestration.analysis_executor import (
+    AnalysisExecutor,
+    SharedArrayRef,
+    _export_arrays,
+    _import_arrays,
+)
+from app.utils.task_manager import TaskManager, TaskStatus
+
+
+# Stage functions must be importable from the worker processes
+
+def make_arrays(n):
+    return {"big": np.arange(n, dtype=np.float64), "small": np.ones(4), "pid": os.getpid()}
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return os.getpid()
+
+
+def fail():
+    raise ValueError("bad input")
+
+
+@pytest.fixture(scope="module")
+def executor():
+    executor = AnalysisExecutor(max_workers=2, preload=("numpy",), shm_threshold=1024)
+    yield executor
+    executor.shutdown()
+
+
+class TestSharedArrays:
+    """Test shared-memory array transport"""
+
+    def test_round_trip(self):
+        exported = _export_arrays({"a": [np.arange(1000.0)], "b": np.zeros(2)}, threshold=1024)
+        assert isinstance(exported["a"][0], SharedArrayRef)
+        assert isinstance(exported["b"], np.ndarray)
+
+        imported = _import_arrays(exported)
+        assert np.array_equal(imported["a"][0], np.arange(1000.0))
+
+    def test_view_outlives_parent_array(self):
+        array = _import_arrays(_export_arrays(np.arange(1000.0), threshold=1024))
+        view = array[10:20]
+        del array
+        assert view.sum() == sum(range(10, 20))
+
+
+class TestAnalysisExecutor:
+    """Test AnalysisExecutor"""
+
+    def test_runs_in_worker_process(self, executor):
+        result = executor.run(make_arrays, 100_000)
+        assert result["pid"] != os.getpid()
+        assert np.array_equal(result["big"], np.arange(100_000, dtype=np.float64))
+        # Large arrays map shared memory instead of owning a copy
+        assert not result["big"].flags.owndata
+        assert result["small"].flags.owndata
+
+    def test_parallel_workers(self, executor):
+        assert executor.warm_up() == 2
+        pids = executor.map(busy, [0.05] * 4)
+        assert len(pids) == 4 and os.getpid() not in pids
+
+    def test_warm_up_timeout(self):
+        """Workers that are not ready in time are reported, not raised"""
+        with AnalysisExecutor(max_workers=1, preload=()) as slow:
+            assert slow.warm_up(timeout=0.001) == 0
+
+    def test_errors_propagate(self, executor):
+        with pytest.raises(ValueError, match="bad input"):
+            executor.run(fail)
+
+    def test_unknown_stage(self, executor):
+        with pytest.raises(ValueError):
+            executor.submit("nope")
+
+    def test_task_manager_integration(self, executor):
+        manager = TaskManager(max_workers=1)
+        task = manager.submit_analysis("t1", "arrays", make_arrays, 10, executor=executor)
+        manager.wait("t1", timeout=30)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.result["big"].tolist() == list(range(10))
+
+        failed = manager.submit_analysis("t2", "fail", fail, executor=executor)
+        with pytest.raises(ValueError):
+            manager.wait("t2", timeout=30)
+        assert failed.status == TaskStatus.FAILED
+        manager.shutdown()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Test the multi-video batch analysis scheduler"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+
+from app.services.orchestration.analysis_executor import AnalysisExecutor
+from app.services.orchestration.batch_scheduler import (
+    AnalysisStage,
+    BatchAnalysisScheduler,
+    default_stages,
+)
+
+
+def path_length(video_path, deps):
+    """Process-pool stage: must be importable from the worker"""
+    return len(video_path), os.getpid()
+
+
+class Recorder:
+    """Stage factory that tracks peak concurrency per resource"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.peak = defaultdict(int)
+
+    def stage(self, name, resource, seconds=0.02, depends_on=(), fail_on=None):
+        def run(path, deps):
+            with self.lock:
+                self.active[resource] += 1
+                self.peak[resource] = max(self.peak[resource], self.active[resource])
+            try:
+                time.sleep(seconds * (5 if "slow" in path else 1))
+                if fail_on and fail_on in path:
+                    raise RuntimeError(f"{name} failed")
+                return (name, path, sorted(deps))
+            finally:
+                with self.lock:
+                    self.active[resource] -= 1
+        return AnalysisStage(name, run, resource=resource, depends_on=tuple(depends_on))
+
+
+@pytest.fixture(scope="module")
+def executor():
+    executor = AnalysisExecutor(max_workers=1, preload=())
+    yield executor
+    executor.shutdown()
+
+
+def _pipeline(recorder, fail_on=None):
+    return [
+        recorder.stage("peaks", "cpu", depends_on=("decode", "vision")),
+        recorder.stage("decode", "decode", fail_on=fail_on),
+        recorder.stage("vision", "api"),
+    ]
+
+
+class TestBatchAnalysisScheduler:
+    """Test BatchAnalysisScheduler"""
+
+    def test_dependencies_and_order(self):
+        recorder = Recorder()
+        scheduler = BatchAnalysisScheduler(_pipeline(recorder), limits={"cpu": 2})
+        assert [s.name for s in scheduler.stages] == ["decode", "vision", "peaks"]
+
+        results = scheduler.analyze([f"v{i}.mp4" for i in range(6)])
+        assert [r.video_path for r in results] == [f"v{i}.mp4" for i in range(6)]
+        assert all(r.ok for r in results)
+        assert results[0].results["peaks"] == ("peaks", "v0.mp4", ["decode", "vision"])
+
+    def test_resource_limits(self):
+        recorder = Recorder()
+        scheduler = BatchAnalysisScheduler(
+            _pipeline(recorder), limits={"decode": 2, "api": 3, "cpu": 1}
+        )
+        scheduler.analyze([f"v{i}.mp4" for i in range(12)])
+        assert recorder.peak["decode"] == 2
+        assert recorder.peak["api"] == 3
+        assert recorder.peak["cpu"] == 1
+
+    def test_streams_as_videos_complete(self):
+        recorder = Recorder()
+        scheduler = BatchAnalysisScheduler(_pipeline(recorder))
+        order = [r.video_path for r in scheduler.run(["slow.mp4", "a.mp4", "b.mp4"])]
+        assert order[-1] == "slow.mp4"
+
+    def test_failure_skips_dependents_only(self):
+        recorder = Recorder()
+        scheduler = BatchAnalysisScheduler(_pipeline(recorder, fail_on="bad"))
+        results = scheduler.analyze(["bad.mp4", "good.mp4"])
+        assert results[0].errors == {"decode": "decode failed"}
+        assert results[0].skipped == ["peaks"]
+        assert "vision" in results[0].results
+        assert results[1].ok
+
+    def test_progress_callback(self):
+        recorder = Recorder()
+        progress = []
+        BatchAnalysisScheduler(_pipeline(recorder)).analyze(
+            ["a.mp4", "b.mp4"], progress_callback=lambda p, msg: progress.append(p)
+        )
+        assert progress[-1] == 100.0
+        assert progress == sorted(progress)
+
+    def test_cancel(self):
+        recorder = Recorder()
+        scheduler = BatchAnalysisScheduler(_pipeline(recorder), limits={"decode": 1, "api": 1})
+        results = []
+        for analysis in scheduler.run([f"v{i}.mp4" for i in range(5)]):
+            results.append(analysis)
+            scheduler.cancel()
+        assert len(results) == 5
+        assert results[0].ok
+        assert any(r.skipped for r in results[1:])
+
+    @pytest.mark.parametrize("stages, error", [
+        ([AnalysisStage("a", print, depends_on=("missing",))], "未知"),
+        ([AnalysisStage("a", print, depends_on=("b",)),
+          AnalysisStage("b", print, depends_on=("a",))], "环"),
+        ([AnalysisStage("a", print), AnalysisStage("a", print)], "重名"),
+        ([AnalysisStage("a", print, resource="gpu")], "配额"),
+    ])
+    def test_invalid_stages(self, stages, error):
+        with pytest.raises(ValueError, match=error):
+            BatchAnalysisScheduler(stages)
+
+    def test_process_stage(self, executor):
+        stages = [
+            AnalysisStage("length", path_length, in_process=True),
+            AnalysisStage("double", lambda path, deps: deps["length"][0] * 2, depends_on=("length",)),
+        ]
+        results = BatchAnalysisScheduler(stages, executor=executor).analyze(["a.mp4", "bb.mp4"])
+        assert [r.results["double"] for r in results] == [10, 12]
+        assert results[0].results["length"][1] != os.getpid()
+
+    def test_default_stages(self, executor):
+        stages = default_stages()
+        # CPU-bound stages run in the process pool, the vision calls on threads
+        assert {s.name for s in stages if s.in_process} == {"scenes", "emotion_peaks"}
+        results = BatchAnalysisScheduler(stages, executor=executor).analyze(["missing.mp4"])
+        analysis = results[0]
+        # Scene detection needs a real file; the vision stages use the mock models
+        assert "scenes" in analysis.errors
+        assert set(analysis.results) == {"first_person", "emotion_peaks"}
@@ -10,6 +10,7 @@ from app.services.video_tools.caption_generator import (
     CaptionConfig,
     CaptionGenerator,
 )
+from app.services.video_tools.keyword_matcher import KeywordMatcher
 
 
 class TestCaptionStyle:
@@ -230,3 +231,91 @@ class TestCaptionGeneratorMethods:
         assert "[Script Info]" in header
         assert "[V4+ Styles]" in header
         assert "[Events]" in header
+
+
+class TestKeywordMatcher:
+    """Test Aho-Corasick keyword matcher"""
+
+    def test_overlapping_matches(self):
+        """Nested and overlapping patterns are all reported"""
+        matcher = KeywordMatcher({"he": 1, "she": 2, "his": 3, "hers": 4})
+        assert sorted(matcher.find_all("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+        assert len(matcher) == 4
+
+    def test_matches_naive_search(self):
+        """Every occurrence of every pattern is found"""
+        words = CaptionGenerator.KEYWORDS_CN | CaptionGenerator.EMOTION_WORDS_HIGH
+        matcher = KeywordMatcher({w: w for w in words})
+        text = "史上最强！这个爆款真的太强了，牛逼炸裂，哇，揭秘真相" * 3
+        expected = sorted(
+            (i, i + len(w), w) for w in words
+            for i in range(len(text)) if text.startswith(w, i)
+        )
+        assert sorted(matcher.find_all(text)) == expected
+
+    def test_groups_merge_tags(self):
+        matcher = KeywordMatcher.from_groups([({"牛逼"}, "kw"), ({"牛逼", "哇"}, "emo")])
+        assert sorted(matcher.find_all("哇牛逼")) == [(0, 1, ("emo",)), (1, 3, ("kw", "emo"))]
+
+
+class TestKeywordTagging:
+    """Test keyword and emotion tagging"""
+
+    def test_multi_char_emotion(self):
+        """Multi-character emotion words mark every character they cover"""
+        caption = CaptionGenerator().generate_from_text("今天真是太强了")
+        levels = [w.emotion for w in caption.words]
+        assert levels[-3:] == [EmotionLevel.HIGH] * 3
+        assert levels[:4] == [EmotionLevel.NEUTRAL] * 4
+
+    def test_keyword_span_only(self):
+        """Only characters inside a keyword occurrence are keywords"""
+        caption = CaptionGenerator().generate_from_text("爆款的款式")
+        assert [w.is_keyword for w in caption.words] == [True, True, False, False, False]
+
+    def test_multi_char_words(self):
+        """Transcript words overlapping a keyword are tagged"""
+        transcript = [{
+            "text": "这是超级棒", "start": 0.0, "end": 1.0,
+            "words": [
+                {"word": "这是", "start": 0.0, "end": 0.3},
+                {"word": "", "start": 0.3, "end": 0.3},
+                {"word": "超级棒", "start": 0.3, "end": 1.0},
+            ],
+        }]
+        words = CaptionGenerator().generate_from_transcript(transcript)[0].words
+        assert [w.is_keyword for w in words] == [False, False, True]
+        assert words[2].emotion == EmotionLevel.MEDIUM
+
+
+class TestStreamedWriters:
+    """Test buffered ASS/SRT writers"""
+
+    def _captions(self, generator):
+        return [
+            generator.generate_from_text(f"第{i}句很重要", start_time=i * 2.0, duration=2.0)
+            for i in range(50)
+        ]
+
+    def test_ass_lines(self, tmp_path):
+        generator = CaptionGenerator()
+        captions = self._captions(generator)
+        out = tmp_path / "out.ass"
+        generator.to_ass_format(captions, str(out))
+        content = out.read_text(encoding="utf-8-sig")
+
+        expected = generator._generate_ass_header() + "".join(
+            generator._generate_ass_karaoke(c) for c in captions
+        )
+        assert content == expected
+        assert content.count("Dialogue: ") == sum(len(c.words) for c in captions)
+
+    def test_srt_entries(self, tmp_path):
+        generator = CaptionGenerator()
+        captions = self._captions(generator)
+        out = tmp_path / "out.srt"
+        generator.to_srt_format(captions, str(out))
+        blocks = out.read_text(encoding="utf-8").split("\n\n")
+        assert len(blocks) == 50
+        assert blocks[1] == "2\n00:00:02,000 --> 00:00:04,000\n第1句很重要"
+        assert blocks[-1].endswith("第49句很重要\n")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Test codec-aware concat planner"""
+
+import subprocess
+import warnings
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.core.exceptions import ExportError
+from app.services.export.video_exporter import VideoExporter
+from app.services.video_tools.concat_planner import (
+    StreamSignature,
+    concat_auto,
+    normalize_args,
+    plan_concat,
+)
+from app.services.video_tools.ffmpeg_tool import FFmpegTool
+from app.services.video_tools.media_catalog import MediaInfo
+
+
+def _info(path, duration=10.0, codec="h264", width=1920, height=1080,
+          fps="30/1", audio=True):
+    streams = [{"index": 0, "codec_type": "video", "codec_name": codec,
+                "width": width, "height": height, "pix_fmt": "yuv420p",
+                "r_frame_rate": fps, "time_base": "1/15360"}]
+    if audio:
+        streams.append({"index": 1, "codec_type": "audio", "codec_name": "aac",
+                        "sample_rate": "48000", "channels": 2, "bit_rate": "128000"})
+    raw = {"format": {"duration": str(duration)}, "streams": streams}
+    return MediaInfo.from_ffprobe(path, 1, 1, raw)
+
+
+def _catalog(infos):
+    catalog = Mock()
+    catalog.probe_many.side_effect = lambda paths: {i.path: i for i in infos}
+    return catalog
+
+
+class TestPlanConcat:
+    """Test plan_concat"""
+
+    def test_majority_signature_is_copied(self):
+        """The longest-running signature is the target; others normalize"""
+        infos = [
+            _info("/a.mp4", 60), _info("/b.mp4", 60),
+            _info("/c.mov", 5, width=1280, height=720),
+            _info("/d.mp4", 30),
+            _info("/e.mp4", 5, audio=False),
+        ]
+        plan = plan_concat(infos)
+
+        assert plan.target == StreamSignature.of(infos[0])
+        assert plan.copy == [True, True, False, True, False]
+        assert plan.runs == [(0, 2, True), (2, 3, False), (3, 4, True), (4, 5, False)]
+        assert plan.needs_normalize
+
+    def test_uniform_inputs(self):
+        """Identical inputs need no normalization"""
+        plan = plan_concat([_info("/a.mp4"), _info("/b.mp4")])
+        assert not plan.needs_normalize
+
+    def test_missing_video(self):
+        """Audio-only inputs leave no target"""
+        info = _info("/a.mp4")
+        info.streams = info.streams[1:]
+        assert plan_concat([info]).target is None
+
+
+class TestNormalize:
+    """Test normalize_args"""
+
+    def test_scales_and_matches_reference(self):
+        """Mismatched input is padded to the target size, fps and timescale"""
+        cmd = normalize_args(_info("/c.mov", width=1280, height=720, fps="25/1"),
+                             _info("/a.mp4"), "/tmp/out.mp4")
+        vf = cmd[cmd.index('-vf') + 1]
+        assert 'scale=1920:1080' in vf and 'fps=30/1' in vf
+        assert cmd[cmd.index('-c:v') + 1] == 'libx264'
+        assert cmd[cmd.index('-video_track_timescale') + 1] == '15360'
+        assert cmd[cmd.index('-ar') + 1] == '48000'
+
+    def test_silent_input_gets_audio(self):
+        """Inputs without audio get a silent track"""
+        cmd = normalize_args(_info("/e.mp4", audio=False), _info("/a.mp4"), "/tmp/out.mp4")
+        assert any(arg.startswith('anullsrc=r=48000:cl=stereo') for arg in cmd)
+        assert cmd[cmd.index('-map', cmd.index('-map') + 1) + 1] == '1:a:0'
+
+    def test_unsupported_target(self):
+        """No encoder for the target codec means no plan"""
+        assert normalize_args(_info("/c.mp4"), _info("/a.mov", codec="prores"), "/o.mp4") is None
+
+
+class TestConcatAuto:
+    """Test concat_auto"""
+
+    @patch('subprocess.run')
+    def test_only_mismatched_inputs_reencoded(self, mock_run):
+        """One normalize pass plus one stream-copy concat"""
+        mock_run.return_value = Mock(returncode=0)
+        infos = [_info("/a.mp4", 60), _info("/c.mov", 5, width=1280, height=720),
+                 _info("/d.mp4", 30)]
+        with patch('app.services.video_tools.concat_planner.get_media_catalog',
+                   return_value=_catalog(infos)):
+            assert concat_auto([i.path for i in infos], "/out.mp4")
+
+        cmds = [c[0][0] for c in mock_run.call_args_list]
+        assert len(cmds) == 2
+        assert cmds[0][cmds[0].index('-i') + 1] == "/c.mov"
+        assert cmds[1][:4] == ['ffmpeg', '-y', '-f', 'concat']
+        assert cmds[1][cmds[1].index('-c') + 1] == 'copy'
+
+    @patch('subprocess.run')
+    def test_unsupported_target_falls_back(self, mock_run):
+        """Targets without an encoder use the full filter_complex re-encode"""
+        mock_run.return_value = Mock(returncode=0)
+        infos = [_info("/a.mov", 60, codec="prores"), _info("/b.mp4", 5)]
+        with patch('app.services.video_tools.concat_planner.get_media_catalog',
+                   return_value=_catalog(infos)):
+            assert concat_auto([i.path for i in infos], "/out.mp4")
+
+        cmd = mock_run.call_args[0][0]
+        assert '-filter_complex' in cmd
+
+    def test_list_file_paths_absolute_and_escaped(self, tmp_path, monkeypatch):
+        """Relative inputs resolve from the cwd and quotes are escaped"""
+        monkeypatch.chdir(tmp_path)
+        infos = [_info("clips/a.mp4"), _info("clips/it's.mp4")]
+        listed = []
+
+        def run(cmd, **kwargs):
+            with open(cmd[cmd.index('-i') + 1], encoding='utf-8') as f:
+                listed.append(f.read())
+            return Mock(returncode=0)
+
+        with patch('subprocess.run', side_effect=run), \
+                patch('app.services.video_tools.concat_planner.get_media_catalog',
+                      return_value=_catalog(infos)):
+            assert concat_auto([i.path for i in infos], "out.mp4")
+
+        clips = tmp_path / "clips"
+        assert listed == [f"file '{clips}/a.mp4'\nfile '{clips}/it'\\''s.mp4'\n"]
+
+    @patch('subprocess.run')
+    def test_default_method_is_plain_copy(self, mock_run):
+        """Planning is opt-in: the default concat does not probe inputs"""
+        mock_run.return_value = Mock(returncode=0)
+        with patch('app.services.video_tools.concat_planner.get_media_catalog') as catalog:
+            assert FFmpegTool.concat_videos(["/a.mp4", "/b.mp4"], "/out.mp4")
+
+        catalog.assert_not_called()
+        assert mock_run.call_count == 1
+        assert mock_run.call_args[0][0][:4] == ['ffmpeg', '-y', '-f', 'concat']
+
+    @patch('subprocess.run', side_effect=subprocess.CalledProcessError(
+        1, 'ffmpeg', stderr="Non-monotonous DTS in output stream"))
+    def test_export_error_carries_stderr(self, mock_run, tmp_path):
+        """VideoExporter surfaces the ffmpeg stderr of a failed concat"""
+        infos = [_info("/a.mp4"), _info("/b.mp4")]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            exporter = VideoExporter()
+        with patch('app.services.video_tools.concat_planner.get_media_catalog',
+                   return_value=_catalog(infos)):
+            with pytest.raises(ExportError) as exc:
+                exporter.concat_videos([i.path for i in infos], str(tmp_path / "out.mp4"))
+
+        assert "Non-monotonous DTS" in exc.value.details["stderr"]
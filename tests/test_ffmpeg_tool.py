@@ -63,7 +63,7 @@ class TestFFmpegToolBasic:
     def test_get_framerate_success(self, mock_run):
         """测试获取帧率成功"""
         mock_run.return_value = Mock(
-            stdout='{"streams": [{"r_frame_rate": "30000/1001"}]}',
+            stdout='{"streams": [{"codec_type": "video", "r_frame_rate": "30000/1001"}]}',
             returncode=0
         )
 
@@ -75,7 +75,7 @@ class TestFFmpegToolBasic:
     def test_get_framerate_integer(self, mock_run):
         """测试获取整数帧率"""
         mock_run.return_value = Mock(
-            stdout='{"streams": [{"r_frame_rate": "60/1"}]}',
+            stdout='{"streams": [{"codec_type": "video", "r_frame_rate": "60/1"}]}',
             returncode=0
         )
 
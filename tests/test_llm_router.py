@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Test latency-aware LLM routing"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai.base_llm_provider import (
+    BaseLLMProvider,
+    LLMRequest,
+    LLMResponse,
+    ProviderError,
+    ProviderType,
+)
+from app.services.ai.llm_manager import LLMManager
+from app.services.ai.llm_router import LatencyRouter
+
+
+class FakeProvider(BaseLLMProvider):
+    """Provider with a fixed delay that can fail"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(api_key="k", base_url="")
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, request):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ProviderError(f"{self.name} down")
+        return LLMResponse(content=self.name, model="m", tokens_used=1)
+
+
+def _manager(providers, default=ProviderType.QWEN, hedge=False):
+    manager = LLMManager({"LLM": {"routing": {"hedge": hedge}, "cache": {"enabled": False}}})
+    manager.providers = dict(providers)
+    manager._default_provider = default
+    return manager
+
+
+def _request():
+    return LLMRequest(prompt="hi")
+
+
+class TestLatencyRouter:
+    """Test LatencyRouter"""
+
+    def test_orders_by_latency_and_errors(self):
+        """Slow or failing providers sink; ties keep the given order"""
+        router = LatencyRouter(alpha=0.5)
+        assert router.order(["a", "b", "c"]) == ["a", "b", "c"]
+
+        router.record_success("a", 2.0)
+        router.record_success("b", 0.5)
+        assert router.order(["a", "b", "c"])[:2] == ["b", "c"]
+
+        router.record_failure("b")
+        router.record_failure("b")
+        assert router.order(["a", "b"]) == ["a", "b"]
+
+    def test_hedge_delay_needs_samples(self):
+        """p95 is only used after enough samples"""
+        router = LatencyRouter(min_samples=5)
+        for latency in (0.1, 0.1, 0.1, 0.1):
+            router.record_success("a", latency)
+        assert router.hedge_delay("a") is None
+        router.record_success("a", 1.0)
+        assert router.hedge_delay("a") == 1.0
+        assert router.stats()["a"]["requests"] == 5
+
+    def test_cancelled_request_raises_latency(self):
+        """Elapsed time of a cancelled request is a latency lower bound"""
+        router = LatencyRouter(alpha=0.5)
+        router.record_success("a", 1.0)
+        router.record_cancelled("a", 0.5)
+        assert router.stats()["a"]["latency"] == 1.0
+        router.record_cancelled("a", 3.0)
+        assert router.stats()["a"]["latency"] == 2.0
+        assert router.stats()["a"]["failures"] == 0
+
+
+class TestLLMManagerRouting:
+    """Test routing in LLMManager.generate"""
+
+    def test_fallback_learns_to_skip_flaky_default(self):
+        """After failures the healthy provider is tried first"""
+        flaky = FakeProvider("qwen", fail=True)
+        healthy = FakeProvider("kimi")
+        manager = _manager({ProviderType.QWEN: flaky, ProviderType.KIMI: healthy})
+
+        assert asyncio.run(manager.generate(_request())).content == "kimi"
+        assert asyncio.run(manager.generate(_request())).content == "kimi"
+        assert flaky.calls == 1
+        assert manager.routing_stats()[ProviderType.QWEN]["failures"] == 1
+
+    def test_explicit_provider_first(self):
+        """An explicitly requested provider is always tried first"""
+        manager = _manager({ProviderType.QWEN: FakeProvider("qwen"),
+                            ProviderType.KIMI: FakeProvider("kimi")})
+        response = asyncio.run(manager.generate(_request(), provider=ProviderType.KIMI))
+        assert response.content == "kimi"
+
+    def test_all_fail(self):
+        """ProviderError when every provider fails"""
+        manager = _manager({ProviderType.QWEN: FakeProvider("qwen", fail=True)})
+        with pytest.raises(ProviderError):
+            asyncio.run(manager.generate(_request()))
+        with pytest.raises(ProviderError):
+            asyncio.run(_manager({}).generate(_request()))
+
+    def test_hedge_beats_slow_primary(self):
+        """A hedge fires after the primary's p95 and the loser is cancelled"""
+        slow = FakeProvider("qwen", delay=0.005)
+        fast = FakeProvider("kimi", delay=0.005)
+        manager = _manager({ProviderType.QWEN: slow, ProviderType.KIMI: fast}, hedge=True)
+        for _ in range(5):
+            manager.router.record_success(ProviderType.QWEN, 0.01)
+            manager.router.record_success(ProviderType.KIMI, 0.02)
+
+        slow.delay = 1.0
+        response = asyncio.run(manager.generate(_request()))
+
+        assert response.content == "kimi"
+        assert slow.cancelled == 1
+        # The cancelled primary's elapsed time still counts toward its latency
+        stats = manager.routing_stats()[ProviderType.QWEN]
+        assert stats["requests"] == 6 and stats["latency"] > 0.01
+
+    def test_hedge_falls_through_failures(self):
+        """Failures without a pending hedge move on to the next candidate"""
+        manager = _manager({ProviderType.QWEN: FakeProvider("qwen", fail=True),
+                            ProviderType.KIMI: FakeProvider("kimi", fail=True),
+                            ProviderType.GLM5: FakeProvider("glm5")}, hedge=True)
+        assert asyncio.run(manager.generate(_request())).content == "glm5"
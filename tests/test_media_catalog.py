@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test media probe catalog"""
+
+import json
+import os
+from unittest.mock import Mock, patch
+
+from app.services.video_tools.media_catalog import MediaCatalog
+
+
+PROBE_JSON = json.dumps({
+    "format": {"duration": "12.5", "bit_rate": "800000", "format_name": "mov,mp4"},
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264",
+         "width": 1280, "height": 720, "r_frame_rate": "25/1"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac",
+         "sample_rate": "48000", "channels": 2},
+    ],
+})
+
+
+def _media(tmp_path, name="clip.mp4"):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * 64)
+    return str(path)
+
+
+class TestMediaCatalog:
+    """Test MediaCatalog"""
+
+    @patch('subprocess.run')
+    def test_probe_parses_record(self, mock_run, tmp_path):
+        """One ffprobe call yields a typed record"""
+        mock_run.return_value = Mock(stdout=PROBE_JSON, returncode=0)
+        info = MediaCatalog().probe(_media(tmp_path))
+
+        assert info.duration == 12.5
+        assert (info.width, info.height, info.fps) == (1280, 720, 25.0)
+        assert info.audio.sample_rate == 48000
+        assert info.format_name == "mov,mp4"
+
+    @patch('subprocess.run')
+    def test_cached_and_persisted(self, mock_run, tmp_path):
+        """Repeated probes hit the cache; a new instance reads the database"""
+        mock_run.return_value = Mock(stdout=PROBE_JSON, returncode=0)
+        db = str(tmp_path / "catalog.db")
+        path = _media(tmp_path)
+
+        catalog = MediaCatalog(db)
+        catalog.probe(path)
+        catalog.probe(path)
+        catalog.close()
+        assert mock_run.call_count == 1
+
+        assert MediaCatalog(db).probe(path).duration == 12.5
+        assert mock_run.call_count == 1
+
+    @patch('subprocess.run')
+    def test_changed_file_is_reprobed(self, mock_run, tmp_path):
+        """Size/mtime changes invalidate the record"""
+        mock_run.return_value = Mock(stdout=PROBE_JSON, returncode=0)
+        catalog = MediaCatalog(str(tmp_path / "catalog.db"))
+        path = _media(tmp_path)
+
+        catalog.probe(path)
+        with open(path, "ab") as f:
+            f.write(b"more")
+        catalog.probe(path)
+        assert mock_run.call_count == 2
+
+        os.remove(path)
+        assert catalog.prune() == 1
+
+    @patch('subprocess.run')
+    def test_keyframes_on_demand(self, mock_run, tmp_path):
+        """Keyframe index is probed once and cached"""
+        mock_run.side_effect = [
+            Mock(stdout=PROBE_JSON, returncode=0),
+            Mock(stdout="0.000000,K__\n0.040000,___\n2.000000,K__\n", returncode=0),
+        ]
+        catalog = MediaCatalog()
+        path = _media(tmp_path)
+
+        assert catalog.keyframes(path) == [0.0, 2.0]
+        assert catalog.keyframes(path) == [0.0, 2.0]
+        assert mock_run.call_count == 2
+
+    @patch('subprocess.run')
+    def test_probe_folder(self, mock_run, tmp_path):
+        """Folder probing only picks media files"""
+        mock_run.return_value = Mock(stdout=PROBE_JSON, returncode=0)
+        _media(tmp_path, "a.mp4")
+        _media(tmp_path, "b.MOV")
+        _media(tmp_path, "notes.txt")
+
+        result = MediaCatalog().probe_folder(str(tmp_path), max_workers=2)
+
+        assert sorted(os.path.basename(p) for p in result) == ["a.mp4", "b.MOV"]
+        assert all(info.duration == 12.5 for info in result.values())
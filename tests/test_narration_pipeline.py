@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Test overlapped script → voice → caption pipeline"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.orchestration import pipeline_controller
+from app.orchestration.pipeline_controller import PipelineController, PipelineStage
+from app.services.video.base_maker import ProgressMixin
+from app.services.video.monologue_maker import MonologueMaker, MonologueProject
+from app.services.video.narration_pipeline import SegmentSplitter, split_script
+
+
+PARAGRAPHS = [
+    "夜色很深，街灯一盏一盏亮起来。",
+    "我想起那年夏天，我们在河边说过的话。",
+    "后来的路，只剩我一个人走。",
+]
+
+
+class FakeVoice:
+    """Records each synthesis; durations scale with text length"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+
+    def generate(self, text, output_path, config=None):
+        with self.lock:
+            self.calls.append(text)
+        self.started.set()
+        return SimpleNamespace(audio_path=output_path, duration=len(text) / 5,
+                               sentence_timestamps=[])
+
+
+class FakeScript:
+    """Streams chunks; holds the last chunk until synthesis has started"""
+
+    def __init__(self, voice, chunks):
+        self.voice = voice
+        self.chunks = chunks
+        self.started_before_end = False
+
+    def iter_monologue_chunks(self, context, emotion, duration):
+        yield from self.chunks[:-1]
+        self.started_before_end = self.voice.started.wait(timeout=5)
+        yield self.chunks[-1]
+
+    def generate_monologue(self, context, emotion, duration):
+        return SimpleNamespace(content="".join(self.chunks))
+
+
+def _maker(chunks):
+    maker = MonologueMaker.__new__(MonologueMaker)
+    ProgressMixin.__init__(maker)
+    maker.voice_generator = FakeVoice()
+    maker.script_generator = FakeScript(maker.voice_generator, chunks)
+    return maker
+
+
+def _project(tmp_path):
+    return MonologueProject(context="街头", emotion="惆怅", video_duration=30.0,
+                            output_dir=str(tmp_path))
+
+
+def _stream(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestSegmentSplitter:
+    """Test SegmentSplitter"""
+
+    def test_paragraphs(self):
+        """Blank lines end a segment as soon as they arrive"""
+        splitter = SegmentSplitter()
+        assert splitter.feed("第一段。\n") == []
+        assert splitter.feed("\n第二") == ["第一段。"]
+        assert splitter.flush() == ["第二"]
+        assert splitter.flush() == []
+
+    def test_first_paragraph_held_until_second(self):
+        """A lone paragraph is split into sentences, so the first waits for a second"""
+        splitter = SegmentSplitter()
+        assert splitter.feed("第一段。\n\n") == []
+        assert splitter.flush() == ["第一段。"]
+
+    @pytest.mark.parametrize("script", [
+        "\n\n".join(PARAGRAPHS),
+        "\n\n\n".join(PARAGRAPHS) + "\n\n",
+        "".join(PARAGRAPHS),
+        "短句。又一句！第三句？第四句。第五句很长很长很长很长很长很长很长很长很长。尾巴",
+        "他说：“走吧。”然后",
+        "只有一段\n\n",
+        "",
+    ])
+    @pytest.mark.parametrize("size", [1, 3, 1000])
+    def test_matches_split_script(self, script, size):
+        """Streaming output equals splitting the whole script at once"""
+        splitter = SegmentSplitter()
+        segments = []
+        for chunk in _stream(script, size):
+            segments.extend(splitter.feed(chunk))
+        segments.extend(splitter.flush())
+        assert segments == (split_script(script) if script.strip() else [])
+
+
+class TestGeneratePipelined:
+    """Test MonologueMaker.generate_pipelined"""
+
+    def test_matches_sequential(self, tmp_path):
+        """Same segments, audio and captions as the stage-by-stage path"""
+        script = "\n\n".join(PARAGRAPHS)
+
+        sequential = _maker(_stream(script))
+        expected = _project(tmp_path)
+        sequential.generate_script(expected, custom_script=script)
+        sequential.generate_voice(expected)
+        sequential.generate_captions(expected)
+
+        maker = _maker(_stream(script))
+        project = _project(tmp_path)
+        maker.generate_pipelined(project)
+
+        assert project.full_script == script
+        assert [s.script for s in project.segments] == PARAGRAPHS
+        for got, want in zip(project.segments, expected.segments):
+            assert (got.video_start, got.video_end) == (want.video_start, want.video_end)
+            assert got.audio_path == want.audio_path
+            assert got.audio_duration == want.audio_duration
+            assert got.captions == want.captions
+
+    def test_voice_starts_before_script_ends(self, tmp_path):
+        """Finished paragraphs are synthesized while the script still streams"""
+        maker = _maker(_stream("\n\n".join(PARAGRAPHS)))
+        maker.generate_pipelined(_project(tmp_path))
+        assert maker.script_generator.started_before_end
+        assert sorted(maker.voice_generator.calls) == sorted(PARAGRAPHS)
+
+    def test_caption_times_follow_segment_order(self, tmp_path):
+        """Caption start times accumulate in script order"""
+        maker = _maker(_stream("\n\n".join(PARAGRAPHS)))
+        project = _project(tmp_path)
+        maker.generate_pipelined(project)
+
+        starts = [s.captions[0]["start"] for s in project.segments]
+        assert starts[0] == 0.0
+        assert starts[1] == project.segments[0].audio_duration
+        assert starts == sorted(starts)
+
+    def test_progress(self, tmp_path):
+        """Every stage reports completion"""
+        reports = []
+        maker = _maker(_stream("\n\n".join(PARAGRAPHS)))
+        maker.set_progress_callback(lambda stage, p: reports.append((stage, p)))
+        maker.generate_pipelined(_project(tmp_path))
+        for stage in ("生成独白", "生成配音", "生成字幕"):
+            assert (stage, 1.0) in reports
+
+    def test_single_paragraph_matches_sequential(self, tmp_path):
+        """Short single-paragraph custom scripts are split into sentences as well"""
+        script = "".join(PARAGRAPHS)
+
+        sequential = _maker([script])
+        expected = _project(tmp_path)
+        sequential.generate_script(expected, custom_script=script)
+
+        project = _project(tmp_path)
+        _maker([script]).generate_pipelined(project, custom_script=script)
+        assert [s.script for s in project.segments] == [s.script for s in expected.segments]
+        assert len(project.segments) == len(PARAGRAPHS)
+
+    def test_controller_stage_events(self, tmp_path, monkeypatch):
+        """The controller enters the voice and caption stages in pipelined mode"""
+        maker = _maker(_stream("\n\n".join(PARAGRAPHS)))
+        monkeypatch.setattr(pipeline_controller, "MonologueMaker", lambda: maker)
+        controller = PipelineController()
+        stages = []
+        controller.stage_changed.connect(lambda stage, label: stages.append(stage))
+
+        controller._set_stage(PipelineStage.SCRIPT)
+        maker.generate_pipelined(_project(tmp_path))
+        assert stages == ["script", "voice", "caption"]
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Test SQLite project library index"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.core.project_index import ProjectIndex, read_metadata
+from app.core.project_journal import get_store
+
+
+def _write_project(root, dirname, name, description="", tags=(), status="active",
+                   project_type="video_editing", modified_at="2024-01-01T00:00:00"):
+    path = os.path.join(root, dirname)
+    os.makedirs(path, exist_ok=True)
+    data = {
+        "metadata": {
+            "name": name, "description": description, "tags": list(tags),
+            "status": status, "project_type": project_type,
+            "created_at": "2024-01-01T00:00:00", "modified_at": modified_at,
+        },
+        "settings": {},
+        "media_files": {},
+        "timeline": {"tracks": [{"clips": list(range(1000))}]},
+        "version": "2.0.0",
+    }
+    with open(os.path.join(path, "project.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return path
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "Projects"
+    root.mkdir()
+    return str(root)
+
+
+class TestReadMetadata:
+    """Test read_metadata"""
+
+    def test_metadata_first(self, root):
+        path = _write_project(root, "a", "旅行")
+        assert read_metadata(os.path.join(path, "project.json"))["name"] == "旅行"
+
+    def test_metadata_not_first(self, root):
+        """Other key orders fall back to a full parse"""
+        path = os.path.join(root, "b.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": "2.0.0", "metadata": {"name": "b"}}, f)
+        assert read_metadata(path)["name"] == "b"
+
+
+class TestReconcile:
+    """Test ProjectIndex.reconcile"""
+
+    def test_add_update_remove(self, root):
+        index = ProjectIndex()
+        a = _write_project(root, "a", "A")
+        _write_project(root, "b", "B")
+        assert index.reconcile(root) == {"added": 2, "updated": 0, "removed": 0}
+
+        _write_project(root, "a", "A2", description="changed")
+        os.utime(os.path.join(a, "project.json"), ns=(1, 1))
+        assert index.reconcile(root) == {"added": 0, "updated": 1, "removed": 0}
+        assert [e.metadata.name for e in index.query(sort="name", descending=False)] == ["A2", "B"]
+
+        os.remove(os.path.join(root, "b", "project.json"))
+        assert index.reconcile(root)["removed"] == 1
+        assert index.count() == 1
+
+    def test_unchanged_projects_not_reread(self, root):
+        index = ProjectIndex()
+        for i in range(5):
+            _write_project(root, f"p{i}", f"P{i}")
+        index.reconcile(root)
+        with patch("app.core.project_index.read_metadata") as read:
+            assert index.reconcile(root) == {"added": 0, "updated": 0, "removed": 0}
+        read.assert_not_called()
+
+    def test_root_mtime_skips_listing(self, root):
+        """An unchanged root directory is not listed again"""
+        index = ProjectIndex()
+        _write_project(root, "a", "A")
+        index.reconcile(root)
+        with patch("app.core.project_index.os.scandir") as scandir:
+            index.reconcile(root)
+        scandir.assert_not_called()
+
+        _write_project(root, "b", "B")
+        assert index.reconcile(root)["added"] == 1
+
+    def test_incomplete_directory_rechecked(self, root):
+        """A directory whose project.json is not written yet is picked up later"""
+        index = ProjectIndex()
+        os.makedirs(os.path.join(root, "new"))
+        index.reconcile(root)
+        _write_project(root, "new", "New")
+        assert index.reconcile(root)["added"] == 1
+
+    def test_journaled_save_detected(self, root):
+        """Background saves only append to the journal; the index still sees them"""
+        index = ProjectIndex()
+        project_file = os.path.join(_write_project(root, "a", "A"), "project.json")
+        index.reconcile(root)
+
+        store = get_store(project_file)
+        data = store.load()
+        data["metadata"]["name"] = "A2"
+        store.save(data)
+        assert os.path.exists(project_file + ".journal")
+        assert read_metadata(project_file)["name"] == "A2"
+        assert index.reconcile(root)["updated"] == 1
+        assert index.query()[0].metadata.name == "A2"
+
+    def test_persistent(self, root, tmp_path):
+        db = str(tmp_path / "library.db")
+        _write_project(root, "a", "A")
+        ProjectIndex(db).reconcile(root)
+        assert ProjectIndex(db).count() == 1
+
+
+class TestQuery:
+    """Test ProjectIndex.query / count"""
+
+    @pytest.fixture
+    def index(self, root):
+        index = ProjectIndex()
+        for i in range(25):
+            _write_project(
+                root, f"p{i:02d}", f"Project {i:02d}",
+                description="海边旅行" if i % 5 == 0 else "",
+                tags=["vlog"] if i % 2 else [],
+                status="archived" if i % 3 == 0 else "active",
+                modified_at=f"2024-01-{i + 1:02d}T00:00:00",
+            )
+        index.reconcile(root)
+        return index
+
+    def test_paging_sorted_by_modified(self, index):
+        first = index.query(limit=10)
+        second = index.query(offset=10, limit=10)
+        names = [e.metadata.name for e in first + second]
+        assert names[0] == "Project 24" and names[-1] == "Project 05"
+        assert len(set(names)) == 20
+
+    def test_sort_by_name_ascending(self, index):
+        names = [e.metadata.name for e in index.query(sort="name", descending=False, limit=3)]
+        assert names == ["Project 00", "Project 01", "Project 02"]
+
+    def test_search_and_filters(self, index):
+        assert index.count(search="旅行") == 5
+        assert index.count(search="VLOG") == 12
+        assert index.count(status="archived") == 9
+        assert index.count(search="旅行", status="archived") == 2
+        assert index.count(project_type="commentary") == 0
+
+    def test_unknown_sort(self, index):
+        with pytest.raises(ValueError):
+            index.query(sort="path; DROP TABLE projects")
+
+
+class TestUpsert:
+    """Test ProjectIndex.upsert / remove"""
+
+    def test_keeps_project_id(self, root):
+        index = ProjectIndex()
+        path = _write_project(root, "a", "A")
+        assert index.upsert(path, read_metadata(os.path.join(path, "project.json")), "uuid-1")
+        index.reconcile(root)
+        entry = index.query()[0]
+        assert entry.project_id == "uuid-1" and entry.path == os.path.abspath(path)
+
+        index.remove(path)
+        assert index.count() == 0
+
+    def test_missing_project_file(self, root):
+        assert not ProjectIndex().upsert(os.path.join(root, "missing"), {"name": "x"})
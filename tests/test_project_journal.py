@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Test journaled project saves"""
+
+import json
+import os
+import random
+import threading
+
+import pytest
+
+from app.core.project_journal import (
+    BackgroundSaver,
+    JournaledStore,
+    apply,
+    atomic_write_json,
+    diff,
+    snapshot,
+)
+
+
+def _project(n_clips=50):
+    return {
+        "metadata": {"name": "旅行", "tags": ["vlog"], "modified_at": "2024-01-01"},
+        "settings": {"fps": 30},
+        "timeline": {"tracks": [{"clips": [{"id": i, "start": i * 1.0} for i in range(n_clips)]}]},
+        "version": "2.0.0",
+    }
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestDiff:
+    """Test diff / apply"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_roundtrip(self, seed):
+        rng = random.Random(seed)
+        old = _project()
+        new = snapshot(old)
+        clips = new["timeline"]["tracks"][0]["clips"]
+        for _ in range(10):
+            action = rng.choice(["edit", "append", "truncate"])
+            if action == "edit" and clips:
+                clips[rng.randrange(len(clips))]["start"] = rng.random()
+            elif action == "append":
+                clips.append({"id": rng.randint(100, 999)})
+            else:
+                del clips[rng.randrange(len(clips) + 1):]
+        new["metadata"]["name"] = "海边"
+        del new["settings"]["fps"]
+        new["settings"]["width"] = 1920
+
+        assert apply(snapshot(old), json.loads(json.dumps(diff(old, new)))) == new
+
+    def test_small_edit_small_record(self):
+        old = _project(1000)
+        new = snapshot(old)
+        new["timeline"]["tracks"][0]["clips"][500]["start"] = -1
+        ops = diff(old, new)
+        assert ops == [{"op": "set", "path": ["timeline", "tracks", 0, "clips", 500, "start"],
+                        "value": -1}]
+
+    def test_type_change_replaces(self):
+        assert apply({"a": [1]}, diff({"a": [1]}, {"a": {"b": 1}})) == {"a": {"b": 1}}
+
+
+class TestJournaledStore:
+    """Test JournaledStore"""
+
+    def test_first_save_writes_snapshot(self, tmp_path):
+        path = str(tmp_path / "project.json")
+        JournaledStore(path).save(_project())
+        assert _read(path) == _project()
+        assert not os.path.exists(path + ".journal")
+
+    def test_incremental_then_replay(self, tmp_path):
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path)
+        data = _project()
+        store.save(data)
+        for i in range(5):
+            data = snapshot(data)
+            data["timeline"]["tracks"][0]["clips"][i]["start"] = 100.0 + i
+            store.save(data)
+
+        # 快照未变，变化都在日志里
+        assert _read(path) == _project()
+        with open(path + ".journal", encoding="utf-8") as f:
+            lines = f.readlines()
+        # 首行是基线摘要，其后每次保存一条记录
+        assert "base" in json.loads(lines[0])
+        assert len(lines) == 6
+        assert JournaledStore(path).load() == data
+
+    def test_unchanged_save_appends_nothing(self, tmp_path):
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path)
+        store.save(_project())
+        store.save(_project())
+        assert not os.path.exists(path + ".journal")
+
+    def test_compacts_after_record_limit(self, tmp_path):
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path, compact_records=3)
+        data = _project()
+        store.save(data)
+        for i in range(3):
+            data = snapshot(data)
+            data["metadata"]["name"] = f"v{i}"
+            store.save(data)
+        assert _read(path)["metadata"]["name"] == "v2"
+        assert not os.path.exists(path + ".journal")
+
+    def test_torn_tail_ignored(self, tmp_path):
+        """A crash mid-append loses only the unfinished record"""
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path)
+        data = _project()
+        store.save(data)
+        data = snapshot(data)
+        data["metadata"]["name"] = "已保存"
+        store.save(data)
+        with open(path + ".journal", "a", encoding="utf-8") as f:
+            f.write('{"ops": [{"op": "set", "path": ["metadata"')
+
+        recovered = JournaledStore(path)
+        assert recovered.load()["metadata"]["name"] == "已保存"
+
+        # 截断后继续追加仍可重放
+        data = snapshot(data)
+        data["metadata"]["name"] = "之后"
+        recovered.save(data)
+        assert JournaledStore(path).load()["metadata"]["name"] == "之后"
+
+    def test_stale_journal_after_compact_ignored(self, tmp_path):
+        """A crash between replacing the snapshot and deleting the journal"""
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path, compact_ratio=100)
+        store.save([1, 2, 3])
+        store.save([1, 2, 3, 4, 5])
+        store.save([1])
+        with open(path + ".journal", "rb") as f:
+            stale = f.read()
+
+        store.compact()
+        # 模拟崩溃：新快照已写入，旧日志还没删掉
+        with open(path + ".journal", "wb") as f:
+            f.write(stale)
+
+        recovered = JournaledStore(path)
+        assert recovered.load() == [1]
+        assert not os.path.exists(path + ".journal")
+
+        recovered.save([1, 6])
+        assert JournaledStore(path).load() == [1, 6]
+
+    def test_unappliable_record_stops_replay(self, tmp_path):
+        """Replay keeps the records before the first one that cannot apply"""
+        path = str(tmp_path / "project.json")
+        store = JournaledStore(path, compact_ratio=100)
+        store.save({"clips": [1, 2]})
+        store.save({"clips": [1, 2, 3]})
+        bad = {"op": "set", "path": ["clips", 9, "start"], "value": 0}
+        later = {"op": "set", "path": ["name"], "value": "之后"}
+        with open(path + ".journal", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ops": [{"op": "set", "path": ["clips", 0], "value": 0}, bad]}) + "\n")
+            f.write(json.dumps({"ops": [later]}) + "\n")
+
+        recovered = JournaledStore(path)
+        assert recovered.load() == {"clips": [1, 2, 3]}
+
+        recovered.save({"clips": [1, 2, 3, 4]})
+        assert JournaledStore(path).load() == {"clips": [1, 2, 3, 4]}
+
+    def test_missing(self, tmp_path):
+        assert JournaledStore(str(tmp_path / "none.json")).load() is None
+
+
+class TestAtomicWrite:
+    """Test atomic_write_json"""
+
+    def test_failed_write_keeps_original(self, tmp_path):
+        path = str(tmp_path / "project.json")
+        atomic_write_json(path, {"ok": True})
+        with pytest.raises(TypeError):
+            atomic_write_json(path, {"bad": object()})
+        assert _read(path) == {"ok": True}
+        assert os.listdir(tmp_path) == ["project.json"]
+
+
+class TestBackgroundSaver:
+    """Test BackgroundSaver"""
+
+    def test_coalesces_pending(self, tmp_path):
+        """Saves queued behind a slow write collapse into the newest one"""
+        gate = threading.Event()
+        written = []
+
+        class SlowStore(JournaledStore):
+            def save(self, data):
+                gate.wait(timeout=5)
+                written.append(data["n"])
+
+        saver = BackgroundSaver()
+        store = SlowStore(str(tmp_path / "p.json"))
+        first = saver.submit(store, {"n": 0})
+        while not saver._busy:
+            pass
+        futures = [saver.submit(store, {"n": i}) for i in range(1, 6)]
+        gate.set()
+        assert saver.flush(timeout=5)
+        assert written == [0, 5]
+        assert first.done() and all(f.done() for f in futures)
+
+    def test_error_reported(self, tmp_path):
+        class BrokenStore(JournaledStore):
+            def save(self, data):
+                raise OSError("disk full")
+
+        future = BackgroundSaver().submit(BrokenStore(str(tmp_path / "p.json")), {})
+        with pytest.raises(OSError):
+            future.result(timeout=5)
+
+
+class TestMonologueProjectSave:
+    """Test MonologueProject.save"""
+
+    def test_explicit_save_compacts(self, tmp_path):
+        """An explicit save leaves a complete snapshot and no journal"""
+        from app.services.video.monologue_maker import MonologueProject
+
+        project = MonologueProject(name="夜", output_dir=str(tmp_path))
+        path = project.save()
+        project.full_script = "第一段。"
+        project.save(background=True)
+        project.full_script = "第二段。"
+        project.save()
+        assert not os.path.exists(path + ".journal")
+        assert _read(path)["full_script"] == "第二段。"
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Test token-aware adaptive rate limiting"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from app.core.exceptions import RateLimitError
+from app.services.ai.base_llm_provider import (
+    BaseLLMProvider,
+    HTTPClientMixin,
+    LLMRequest,
+    LLMResponse,
+)
+from app.services.ai.retry import AdaptiveRateLimiter, RateLimiter, retry_after_seconds
+
+
+class ThrottledProvider(BaseLLMProvider):
+    """Provider that answers 429 while more than `capacity` calls overlap"""
+
+    def __init__(self, capacity=3, retry_after=None):
+        super().__init__(api_key="k", base_url="")
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.active = 0
+        self.peak = 0
+        self.throttled = 0
+
+    async def generate(self, request):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.active > self.capacity:
+                self.throttled += 1
+                raise RateLimitError("429", retry_after=self.retry_after)
+            await asyncio.sleep(0.005)
+            return LLMResponse(content="ok", model="m", tokens_used=10)
+        finally:
+            self.active -= 1
+
+
+class TestAdaptiveRateLimiter:
+    """Test AdaptiveRateLimiter"""
+
+    def test_concurrency_cap(self):
+        """No more than the current limit run at once"""
+        limiter = AdaptiveRateLimiter(initial_concurrency=2, max_concurrency=2)
+        active, peak = 0, 0
+
+        async def task():
+            nonlocal active, peak
+            async with limiter.limit():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        async def main():
+            await asyncio.gather(*(task() for _ in range(8)))
+
+        asyncio.run(main())
+        assert peak == 2
+        assert limiter.stats()["active"] == 0
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        """Successes grow the limit by ~1 per round; a 429 halves it once"""
+        limiter = AdaptiveRateLimiter(initial_concurrency=4, max_concurrency=32)
+        for _ in range(5):
+            limiter.on_success(0.1)
+        assert limiter.concurrency == 5
+
+        limiter._limit = 8.0
+        limiter._active = 3
+        limiter.on_throttle(retry_after=0)
+        assert limiter.concurrency == 4
+        # 同一轮的其余 429 不再继续减小
+        limiter.on_throttle(retry_after=0)
+        limiter.on_throttle(retry_after=0)
+        assert limiter.concurrency == 4
+
+    def test_latency_congestion_backs_off(self):
+        """A sustained latency rise lowers the limit instead of growing it"""
+        limiter = AdaptiveRateLimiter(initial_concurrency=8, alpha=1.0)
+        limiter.on_success(0.1)
+        limiter.on_success(0.5)
+        assert limiter.concurrency == 7
+
+    def test_retry_after_pauses_admission(self):
+        """New requests wait until Retry-After elapses"""
+        limiter = AdaptiveRateLimiter()
+        limiter.on_throttle(retry_after=0.05)
+
+        async def main():
+            start = time.monotonic()
+            async with limiter.limit():
+                pass
+            return time.monotonic() - start
+
+        assert asyncio.run(main()) >= 0.045
+
+    def test_token_budget_and_reconciliation(self):
+        """Token estimates are charged up front and refunded after use"""
+        limiter = AdaptiveRateLimiter(tpm=600)   # 10 token/s
+
+        async def main():
+            permit = await limiter.acquire(500)
+            permit.used_tokens = 100
+            limiter.release(permit)
+            start = time.monotonic()
+            # 退回 400 后剩余约 500，足够再放行一次
+            await limiter.acquire(450)
+            return time.monotonic() - start
+
+        assert asyncio.run(main()) < 0.05
+
+        async def exhausted():
+            start = time.monotonic()
+            await limiter.acquire(60)
+            return time.monotonic() - start
+
+        assert asyncio.run(exhausted()) > 0.5
+
+    def test_request_budget(self):
+        """rpm caps request starts"""
+        limiter = AdaptiveRateLimiter(rpm=1200)   # 20/s，桶满 1200
+
+        async def main():
+            limiter._requests = 1.0
+            await limiter.acquire()
+            start = time.monotonic()
+            await limiter.acquire()
+            return time.monotonic() - start
+
+        assert 0.03 < asyncio.run(main()) < 0.5
+
+    def test_cancelled_waiter_releases_slot(self):
+        """Cancelling a queued caller does not leak its slot"""
+        limiter = AdaptiveRateLimiter(initial_concurrency=1, max_concurrency=1)
+
+        async def main():
+            first = await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            limiter.release(first)
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+        asyncio.run(main())
+
+
+class TestProviderLimiting:
+    """Test provider integration"""
+
+    def test_batch_adapts_to_provider_capacity(self):
+        """A large batch settles near the provider's real capacity"""
+        provider = ThrottledProvider(capacity=3)
+        provider.configure_rate_limits(initial_concurrency=8, default_backoff=0.01)
+
+        async def main():
+            return await provider.generate_batch(
+                [LLMRequest(prompt=f"p{i}") for i in range(40)], use_cache=False
+            )
+
+        results = asyncio.run(main())
+        assert provider.rate_limiter.concurrency <= 4
+        assert provider.rate_limiter.throttled == provider.throttled > 0
+        assert sum(isinstance(r, LLMResponse) for r in results) >= 30
+
+    def test_estimate_tokens(self):
+        """Estimates cover the prompt and the completion budget"""
+        provider = ThrottledProvider()
+        tokens = asyncio.run(provider.estimate_tokens(
+            LLMRequest(prompt="你好" * 10, system_prompt="abcd", max_tokens=100)
+        ))
+        assert tokens == 30 + 1 + 100
+
+
+class TestRetryAfter:
+    """Test Retry-After handling"""
+
+    def test_parse_seconds_and_http_date(self):
+        """Both Retry-After forms are understood"""
+        exc = Mock(details=None, response=Mock(headers={"retry-after": "7"}))
+        assert retry_after_seconds(exc) == 7.0
+        exc.response.headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        assert retry_after_seconds(exc) == 0.0
+        assert retry_after_seconds(RateLimitError(retry_after=3)) == 3.0
+        assert retry_after_seconds(ValueError()) is None
+
+    def test_http_429_becomes_rate_limit_error(self):
+        """429 responses surface as RateLimitError carrying Retry-After"""
+        response = Mock(status_code=429, headers={"retry-after": "2"})
+        response.json.return_value = {"error": {"message": "slow down"}}
+        error = HTTPClientMixin._handle_http_error(None, Mock(response=response))
+        assert isinstance(error, RateLimitError)
+        assert retry_after_seconds(error) == 2.0
+
+
+class TestRateLimiter:
+    """Test the simple token bucket"""
+
+    def test_monotonic_bucket(self):
+        """Tokens refill at `rate` per second"""
+        limiter = RateLimiter(rate=50, capacity=1)
+
+        async def main():
+            await limiter.acquire()
+            start = time.monotonic()
+            await limiter.acquire()
+            return time.monotonic() - start
+
+        assert 0.01 < asyncio.run(main()) < 0.2
+
+    def test_timeout(self):
+        """Waits longer than the timeout raise"""
+        async def main():
+            limiter = RateLimiter(rate=0.1, capacity=1)
+            await limiter.acquire()
+            await limiter.acquire(timeout=0.01)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(main())
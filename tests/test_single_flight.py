@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Test single-flight request coalescing"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai.base_llm_provider import (
+    BaseLLMProvider,
+    LLMRequest,
+    LLMResponse,
+    ProviderType,
+)
+from app.services.ai.llm_manager import LLMManager
+from app.services.ai.single_flight import SingleFlight, request_key
+
+
+class CountingProvider(BaseLLMProvider):
+    """Slow provider that counts upstream calls"""
+
+    def __init__(self):
+        super().__init__(api_key="k", base_url="")
+        self.calls = 0
+        self.stream_calls = 0
+
+    async def generate(self, request):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return LLMResponse(content=f"re:{request.prompt}", model="m")
+
+    async def stream_generate(self, request):
+        self.stream_calls += 1
+        for part in ("a", "b", "c"):
+            await asyncio.sleep(0.01)
+            yield {"done": False, "content": part}
+        yield {"done": True, "content": ""}
+
+
+class TestSingleFlight:
+    """Test SingleFlight"""
+
+    def test_concurrent_calls_share_one_task(self):
+        """Identical keys run once; different keys run separately"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work(x):
+            calls.append(x)
+            await asyncio.sleep(0.01)
+            return x * 2
+
+        async def main():
+            return await asyncio.gather(
+                *(flights.do("a", lambda: work(1)) for _ in range(5)),
+                flights.do("b", lambda: work(2)),
+            )
+
+        assert asyncio.run(main()) == [2, 2, 2, 2, 2, 4]
+        assert calls == [1, 2]
+        assert flights.stats() == {"started": 2, "coalesced": 4}
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Every waiter sees the failure; the next call retries"""
+        flights = SingleFlight()
+        attempts = []
+
+        async def fail():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def main():
+            results = await asyncio.gather(
+                flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+            )
+            assert all(isinstance(r, ValueError) for r in results)
+            with pytest.raises(ValueError):
+                await flights.do("k", fail)
+
+        asyncio.run(main())
+        assert len(attempts) == 2
+
+    def test_cancellation(self):
+        """One cancelled waiter leaves the others; all cancelled stops upstream"""
+        flights = SingleFlight()
+        upstream = {"cancelled": False}
+
+        async def slow():
+            try:
+                await asyncio.sleep(0.05)
+                return "done"
+            except asyncio.CancelledError:
+                upstream["cancelled"] = True
+                raise
+
+        async def main():
+            first = asyncio.ensure_future(flights.do("k", slow))
+            second = asyncio.ensure_future(flights.do("k", slow))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            assert await second == "done"
+            assert not upstream["cancelled"]
+
+            only = asyncio.ensure_future(flights.do("k2", slow))
+            await asyncio.sleep(0.01)
+            only.cancel()
+            await asyncio.gather(only, return_exceptions=True)
+            await asyncio.sleep(0)
+            assert upstream["cancelled"]
+
+        asyncio.run(main())
+
+    def test_stream_fan_out(self):
+        """Concurrent subscribers, including late ones, get the full stream"""
+        flights = SingleFlight()
+        started = []
+
+        async def source():
+            started.append(1)
+            for i in range(4):
+                await asyncio.sleep(0.01)
+                yield i
+
+        async def consume(delay=0.0):
+            await asyncio.sleep(delay)
+            return [chunk async for chunk in flights.stream("s", source)]
+
+        async def main():
+            return await asyncio.gather(consume(), consume(), consume(0.025))
+
+        assert asyncio.run(main()) == [[0, 1, 2, 3]] * 3
+        assert started == [1]
+
+    def test_request_key_covers_all_fields(self):
+        """Requests differing beyond the prompt prefix get distinct keys"""
+        long = "x" * 300
+        assert request_key(LLMRequest(prompt=long + "a")) != request_key(LLMRequest(prompt=long + "b"))
+        assert request_key(LLMRequest(prompt="p"), "qwen") != request_key(LLMRequest(prompt="p"), "kimi")
+
+
+class TestCoalescingCallers:
+    """Test coalescing in LLMManager and BaseLLMProvider"""
+
+    def _manager(self, provider):
+        manager = LLMManager({"LLM": {}})
+        manager.providers = {ProviderType.QWEN: provider}
+        manager._default_provider = ProviderType.QWEN
+        return manager
+
+    def test_manager_generate_burst(self):
+        """A burst of identical generate calls makes one upstream call"""
+        provider = CountingProvider()
+        manager = self._manager(provider)
+
+        async def main():
+            return await asyncio.gather(
+                *(manager.generate(LLMRequest(prompt="same")) for _ in range(8)),
+                manager.generate(LLMRequest(prompt="other")),
+            )
+
+        results = asyncio.run(main())
+        assert [r.content for r in results] == ["re:same"] * 8 + ["re:other"]
+        assert provider.calls == 2
+
+    def test_manager_stream_burst(self):
+        """Identical streaming requests share one upstream stream"""
+        provider = CountingProvider()
+        manager = self._manager(provider)
+
+        async def consume():
+            return "".join([c["content"] async for c in manager.stream_generate("hi")])
+
+        async def main():
+            return await asyncio.gather(consume(), consume(), consume())
+
+        assert asyncio.run(main()) == ["abc"] * 3
+        assert provider.stream_calls == 1
+
+    def test_generate_cached_coalesces_misses(self):
+        """Concurrent cache misses share a single generate call"""
+        provider = CountingProvider()
+
+        async def main():
+            await asyncio.gather(*(provider.generate_cached(LLMRequest(prompt="p")) for _ in range(4)))
+            await provider.generate_cached(LLMRequest(prompt="p"))
+
+        asyncio.run(main())
+        assert provider.calls == 1
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Test keyframe-aware smart cut"""
+
+import json
+import shutil
+import subprocess
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services.video_tools.ffmpeg_tool import FFmpegTool
+from app.services.video_tools.media_catalog import MediaCatalog, MediaInfo
+from app.services.video_tools.smart_cut import (
+    CutSegment,
+    encoder_args,
+    plan_smart_cut,
+    smart_cut,
+)
+
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="ffmpeg not installed",
+)
+
+
+def _info(codec="h264", **stream):
+    raw = {
+        "format": {"duration": "12.0"},
+        "streams": [
+            {"index": 0, "codec_type": "video", "codec_name": codec,
+             "width": 1920, "height": 1080, "pix_fmt": "yuv420p",
+             "profile": "High", "level": 41, "bit_rate": "4000000", "time_base": "1/15360", **stream},
+            {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+        ],
+    }
+    return MediaInfo.from_ffprobe("/in.mp4", 1, 1, raw)
+
+
+def _fake_run(open_gop=False):
+    """ffprobe packet listing after a keyframe (decode order), ffmpeg succeeds"""
+    def run(cmd, **kwargs):
+        if cmd[0] != 'ffprobe':
+            return Mock(returncode=0, stdout="")
+        key = float(cmd[cmd.index('-read_intervals') + 1].partition('%')[0])
+        leading = key - 0.04 if open_gop else key + 0.08
+        lines = [f"{key:.6f},K_", f"{leading:.6f},__", f"{key + 0.04:.6f},__", f"{key + 2:.6f},K_"]
+        return Mock(returncode=0, stdout="\n".join(lines))
+    return run
+
+
+def _catalog(info, keyframes=KEYFRAMES):
+    catalog = Mock()
+    catalog.probe.return_value = info
+    catalog.keyframes.return_value = keyframes
+    return catalog
+
+
+class TestPlanSmartCut:
+    """Test plan_smart_cut"""
+
+    def test_boundaries_reencoded(self):
+        """Partial GOPs at both ends are re-encoded, the interior copied"""
+        assert plan_smart_cut(KEYFRAMES, 1.5, 8.7) == [
+            CutSegment(1.5, 2.0, copy=False),
+            CutSegment(2.0, 8.0, copy=True),
+            CutSegment(8.0, 8.7, copy=False),
+        ]
+
+    def test_aligned_cut_is_pure_copy(self):
+        """Cuts on keyframes need no re-encoding"""
+        assert plan_smart_cut(KEYFRAMES, 2.0, 6.0) == [CutSegment(2.0, 6.0, copy=True)]
+
+    def test_short_interior_falls_back(self):
+        """Without a long enough full GOP the whole range is re-encoded"""
+        assert plan_smart_cut(KEYFRAMES, 2.5, 3.5) == [CutSegment(2.5, 3.5, copy=False)]
+        assert plan_smart_cut([], 1.0, 5.0) == [CutSegment(1.0, 5.0, copy=False)]
+        assert plan_smart_cut(KEYFRAMES, 5.0, 5.0) == []
+
+
+class TestSmartCut:
+    """Test smart_cut"""
+
+    def test_encoder_matches_source(self):
+        """Boundary encodes reuse the source codec parameters"""
+        args = encoder_args(_info())
+        assert args[:4] == ['-c:v', 'libx264', '-profile:v', 'high']
+        assert args[args.index('-level:v') + 1] == '4.1'
+        assert '-pix_fmt' in args and args[args.index('-b:v') + 1] == '4000000'
+        assert encoder_args(_info(codec="prores")) is None
+
+        args = encoder_args(_info(), crf=20, preset="fast")
+        assert args[args.index('-crf') + 1] == '20' and '-b:v' not in args
+        assert args[args.index('-preset') + 1] == 'fast'
+
+    @patch('subprocess.run', side_effect=_fake_run())
+    def test_three_parts_then_concat(self, mock_run):
+        """Head/tail encoded, middle copied, joined by the concat demuxer"""
+        with patch('app.services.video_tools.smart_cut.get_media_catalog',
+                   return_value=_catalog(_info())):
+            assert FFmpegTool.trim_video("/in.mp4", "/out.mp4", 1.5, 8.7, mode="smart")
+
+        cmds = [c[0][0] for c in mock_run.call_args_list]
+        probes = [c for c in cmds if c[0] == 'ffprobe']
+        assert [c[c.index('-read_intervals') + 1] for c in probes] == ['2.000000%+#64', '8.000000%+#64']
+        cmds = [c for c in cmds if c[0] == 'ffmpeg']
+        assert len(cmds) == 4
+        assert cmds[0][cmds[0].index('-c:v') + 1] == 'libx264'
+        assert cmds[1][cmds[1].index('-c:v') + 1] == 'copy'
+        assert cmds[1][cmds[1].index('-ss') + 1] == '2.000000'
+        assert cmds[2][cmds[2].index('-ss') + 1] == '8.000000'
+        assert all(c[-1].endswith('.ts') for c in cmds[:3])
+        assert 'concat' in cmds[3] and cmds[3][-1] == '/out.mp4'
+        assert cmds[3][cmds[3].index('-c:v') + 1] == 'copy'
+
+    @pytest.mark.parametrize("codec, open_gop", [("h264", True), ("hevc", False)])
+    def test_unsafe_sources_single_reencode(self, codec, open_gop):
+        """Open-GOP and non-H.264 sources fall back to one accurate encode"""
+        with patch('subprocess.run', side_effect=_fake_run(open_gop=open_gop)) as mock_run, \
+                patch('app.services.video_tools.smart_cut.get_media_catalog',
+                      return_value=_catalog(_info(codec=codec))):
+            assert smart_cut("/in.mp4", "/out.mp4", 1.5, 8.7)
+
+        cmds = [c[0][0] for c in mock_run.call_args_list if c[0][0][0] == 'ffmpeg']
+        assert len(cmds) == 1 and 'concat' not in cmds[0]
+
+    @patch('subprocess.run')
+    def test_unknown_codec_single_reencode(self, mock_run):
+        """Sources without a matching encoder are cut with one accurate encode"""
+        mock_run.return_value = Mock(returncode=0)
+        catalog = _catalog(_info(codec="prores"))
+        with patch('app.services.video_tools.smart_cut.get_media_catalog', return_value=catalog):
+            assert smart_cut("/in.mp4", "/out.mp4", 1.5, 8.7)
+
+        assert mock_run.call_count == 1
+        catalog.keyframes.assert_not_called()
+
+    def test_missing_video(self):
+        """Unreadable input fails without running ffmpeg"""
+        with patch('app.services.video_tools.smart_cut.get_media_catalog',
+                   return_value=_catalog(None)):
+            assert not smart_cut("/in.mp4", "/out.mp4", 0, 5)
+
+
+@needs_ffmpeg
+class TestSmartCutFFmpeg:
+    """Run smart cut against real ffmpeg output"""
+
+    @staticmethod
+    def _probe(path, entries):
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', entries, '-of', 'json', path],
+            capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout)
+
+    def test_cut_decodes_cleanly(self, tmp_path):
+        """Spliced output has the requested length and decodes without errors"""
+        src = str(tmp_path / "src.mp4")
+        subprocess.run([
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'lavfi', '-i', 'testsrc2=size=320x240:rate=25',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000',
+            '-t', '8', '-c:v', 'libx264', '-g', '25', '-bf', '2', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', src,
+        ], check=True)
+
+        out = str(tmp_path / "out.mp4")
+        catalog = MediaCatalog(db_path=str(tmp_path / "catalog.db"))
+        with patch('app.services.video_tools.smart_cut.get_media_catalog', return_value=catalog):
+            assert smart_cut(src, out, 1.5, 6.3)
+
+        duration = float(self._probe(out, 'format=duration')['format']['duration'])
+        assert duration == pytest.approx(4.8, abs=0.1)
+        frames = self._probe(out, 'stream=nb_frames')['streams'][0]['nb_frames']
+        assert int(frames) == pytest.approx(120, abs=2)
+
+        decode = subprocess.run(['ffmpeg', '-v', 'error', '-i', out, '-f', 'null', '-'],
+                                capture_output=True, text=True)
+        assert decode.returncode == 0 and decode.stderr.strip() == ""
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test the preview page's regenerate button
+
+The page module only depends on PySide6, so it is loaded straight from its
+file; importing the app.ui package pulls in the whole widget library.
+"""
+
+import importlib.util
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from app.services.ai.script_generator import ScriptGenerator
+from app.services.ai.script_models import GeneratedScript
+
+_PAGE = Path(__file__).parent.parent / "app" / "ui" / "main" / "pages" / "step_preview.py"
+
+
+@pytest.fixture(scope="module")
+def step_preview():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    spec = importlib.util.spec_from_file_location("step_preview_under_test", _PAGE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    app.processEvents()
+
+
+class TestRegenerate:
+    """Test the regenerate button"""
+
+    def test_click_reaches_generator_without_cache(self, step_preview):
+        """Test the click calls ScriptGenerator.regenerate with use_cache=False"""
+        generator = ScriptGenerator(api_key="sk-test")
+        page = step_preview.StepPreview(
+            video_path="/videos/rain.mp4",
+            narration_text="旧文案",
+            script_generator=generator,
+        )
+        requested = []
+        page.regenerate_requested.connect(lambda *args: requested.append(args))
+
+        with patch.object(
+            generator, "generate", return_value=GeneratedScript(content="新文案")
+        ) as generate:
+            page._style_panel._regen_btn.click()
+            page._regen_thread.join(timeout=5)
+            QtWidgets.QApplication.processEvents()
+
+        generate.assert_called_once()
+        assert generate.call_args.kwargs["use_cache"] is False
+        assert "rain.mp4" in generate.call_args.args[0]
+        assert requested == [("治愈", "", "")]
+        assert page._narration_text == "新文案"
+        assert page._style_panel.isEnabled()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Test streaming accumulation, incremental sentiment and the manager loop"""
+
+import asyncio
+import random
+import threading
+
+import pytest
+
+from app.services.ai.llm_manager import LLMManager
+from app.services.ai.script_generator_streaming import (
+    IncrementalSentiment,
+    StreamAccumulator,
+    StreamingScriptGenerator,
+)
+
+
+TEXT = "今天很开心，电影精彩又感动。可是结局让人难过，也有些失望。最后还是充满希望，期待续集。" * 3
+
+
+def _chunks(text, seed):
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 5)
+        chunks.append(text[i:i + n])
+        i += n
+    return chunks
+
+
+class TestIncrementalSentiment:
+    """Test IncrementalSentiment"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_full_scan(self, seed):
+        """Every prefix scores the same as scanning the whole prefix"""
+        scan = StreamingScriptGenerator._analyze_sentiment_fast
+        state = IncrementalSentiment()
+        prefix = ""
+        for chunk in _chunks(TEXT, seed):
+            prefix += chunk
+            assert state.update(chunk) == scan(None, prefix)
+
+    def test_word_split_across_chunks(self):
+        """A keyword cut in half by the chunk boundary still counts"""
+        state = IncrementalSentiment()
+        state.update("真是开")
+        assert state.update("心") == 1.0
+
+    def test_neutral(self):
+        assert IncrementalSentiment().update("一段平常的描述") == 0.0
+
+
+class TestStreamAccumulator:
+    """Test StreamAccumulator"""
+
+    def test_text_and_tail(self):
+        acc = StreamAccumulator()
+        for chunk in _chunks(TEXT, 1):
+            acc.append(chunk)
+            assert acc.tail(20) == TEXT[:len(acc)][-20:]
+        assert len(acc) == len(TEXT)
+        assert acc.text() == TEXT
+        acc.append("尾")
+        assert acc.text() == TEXT + "尾"
+
+    def test_empty(self):
+        acc = StreamAccumulator()
+        assert acc.text() == "" and acc.tail(5) == "" and len(acc) == 0
+
+
+class TestRunSync:
+    """Test LLMManager.run_sync"""
+
+    def _manager(self):
+        return LLMManager({"LLM": {"cache": {"enabled": False}}})
+
+    def test_reuses_loop(self):
+        """Consecutive calls share one event loop"""
+        manager = self._manager()
+
+        async def current():
+            return asyncio.get_running_loop()
+
+        try:
+            assert manager.run_sync(current()) is manager.run_sync(current())
+        finally:
+            manager.shutdown()
+
+    async def test_from_running_loop(self):
+        """Callable from a thread that already runs a loop"""
+        manager = self._manager()
+
+        async def value():
+            return 42
+
+        try:
+            assert manager.run_sync(value()) == 42
+        finally:
+            manager.shutdown()
+
+    def test_shutdown_keeps_loop(self):
+        """Shutdown closes the providers; the manager stays usable"""
+        manager = self._manager()
+
+        async def value():
+            return 1
+
+        manager.run_sync(value())
+        manager.shutdown()
+        assert manager.run_sync(value()) == 1
+        manager.shutdown()
+
+    def test_managers_share_loop(self):
+        """Every manager runs on one background thread"""
+        first, second = self._manager(), self._manager()
+
+        async def current():
+            return asyncio.get_running_loop()
+
+        try:
+            assert first.run_sync(current()) is second.run_sync(current())
+            loops = [t for t in threading.enumerate() if t.name == "llm-manager-loop"]
+            assert len(loops) == 1
+        finally:
+            first.shutdown()
+            second.shutdown()
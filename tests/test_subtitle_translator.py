@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Test subtitle translation batching and translation memory"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.services.ai.subtitle_translator import SubtitleTranslator, pack_batches
+from app.services.ai.subtitle_types import SubtitleExtractionResult, SubtitleSegment
+from app.services.ai.translation_memory import TranslationMemory, normalize_text
+
+
+class FakeClient:
+    """Translates each prompt line to 'EN:<line>'; records batches and peak concurrency"""
+
+    def __init__(self, drop_line=False):
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self.drop_line = drop_line
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, temperature, max_tokens):
+        lines = messages[0]["content"].split("原文:\n", 1)[1].split("\n")
+        self.batches.append(lines)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        out = [f"EN:{line}" for line in lines]
+        if self.drop_line and len(lines) > 1:
+            out = out[:-1]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="\n".join(out)))],
+            usage=None,
+        )
+
+    async def close(self):
+        pass
+
+
+def _result(texts):
+    return SubtitleExtractionResult(
+        video_path="v.mp4", duration=len(texts) * 2.0, language="zh", method="ocr",
+        segments=[SubtitleSegment(start=i * 2.0, end=i * 2.0 + 2, text=t)
+                  for i, t in enumerate(texts)],
+    )
+
+
+@pytest.fixture
+def client():
+    client = FakeClient()
+    with patch("openai.AsyncOpenAI", return_value=client):
+        yield client
+
+
+def _translator(**kwargs):
+    return SubtitleTranslator(api_key="test", memory=TranslationMemory(), **kwargs)
+
+
+class TestPackBatches:
+    """Test token-bounded batch packing"""
+
+    def test_token_and_item_limits(self):
+        texts = ["你好世界"] * 10 + ["长" * 200] + ["hi"] * 3
+        batches = pack_batches(texts, max_tokens=30, max_items=4)
+        assert batches[0] == (0, 4)
+        assert (10, 11) in batches  # oversized text gets its own batch
+        assert batches[-1][1] == len(texts)
+        assert all(a[1] == b[0] for a, b in zip(batches, batches[1:]))
+
+    def test_empty(self):
+        assert pack_batches([], 100, 10) == []
+
+    def test_budget_matches_provider_count(self):
+        """Batches are sized with the same estimate providers use for rate limits"""
+        from app.services.ai.providers.deepseek import DeepSeekProvider
+
+        provider = DeepSeekProvider(api_key="k")
+        text = "你好世界" + "hello world" * 3
+        cost = asyncio.run(provider.count_tokens(text)) + 1
+        assert pack_batches([text] * 3, max_tokens=cost * 2, max_items=10) == [(0, 2), (2, 3)]
+
+
+class TestTranslationMemory:
+    """Test TranslationMemory"""
+
+    def test_exact_and_normalized(self):
+        memory = TranslationMemory()
+        memory.store({"Hello  World": "你好世界"}, "en", "zh", "openai")
+        assert memory.lookup(["Hello  World"], "en", "zh", "openai") == {"Hello  World": "你好世界"}
+        assert memory.lookup([" hello world "], "en", "zh", "openai") == {" hello world ": "你好世界"}
+        assert memory.lookup(["Hello World"], "en", "ja", "openai") == {}
+        assert memory.lookup(["Hello World"], "en", "zh", "google") == {}
+
+    def test_fullwidth(self):
+        assert normalize_text("ＯＫ！") == normalize_text("ok!")
+
+    def test_persistent(self, tmp_path):
+        db = str(tmp_path / "tm.db")
+        TranslationMemory(db).store({"再见": "Bye"}, "zh", "en", "openai")
+        assert TranslationMemory(db).count() == 1
+
+
+class TestSubtitleTranslator:
+    """Test SubtitleTranslator with translation memory"""
+
+    def test_translates_in_order(self, client):
+        texts = [f"第{i}句" for i in range(30)]
+        result = _translator().translate(_result(texts), target_lang="en", batch_size=10)
+        assert [s.text for s in result.segments] == [f"EN:{t}" for t in texts]
+        assert result.language == "en"
+
+    def test_batches_run_concurrently(self, client):
+        texts = [f"第{i}句台词" for i in range(40)]
+        _translator(max_concurrency=4).translate_texts(texts, "en", batch_size=5)
+        assert len(client.batches) == 8
+        assert client.peak > 1
+
+    def test_only_new_lines_sent(self, client):
+        translator = _translator()
+        translator.translate_texts(["口头禅", "第一句", "口头禅"], "en")
+        assert client.batches == [["口头禅", "第一句"]]
+
+        client.batches.clear()
+        out = translator.translate_texts(["口头禅", "第二句", "第一句 "], "en")
+        assert client.batches == [["第二句"]]
+        assert out == ["EN:口头禅", "EN:第二句", "EN:第一句"]
+
+    def test_line_mismatch_splits_batch(self):
+        client = FakeClient(drop_line=True)
+        with patch("openai.AsyncOpenAI", return_value=client):
+            translator = _translator()
+            out = translator.translate_texts(["一", "二", "三", "四"], "en")
+        # 拆到单行后行数对得上，每句都有译文
+        assert out == ["EN:一", "EN:二", "EN:三", "EN:四"]
+
+    def test_failures_keep_source_and_are_not_remembered(self):
+        class Broken(FakeClient):
+            async def _create(self, **kwargs):
+                raise RuntimeError("boom")
+
+        client = Broken()
+        with patch("openai.AsyncOpenAI", return_value=client):
+            memory = TranslationMemory()
+            translator = SubtitleTranslator(api_key="test", memory=memory)
+            assert translator.translate_texts(["你好"], "en") == ["你好"]
+        assert memory.count() == 0
+
+    async def test_callable_inside_event_loop(self, client):
+        assert _translator().translate_texts(["你好"], "en") == ["EN:你好"]
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError):
+            SubtitleTranslator(provider="nope", memory=TranslationMemory()).translate_texts(["x"], "en")
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """Test Sync Engine"""
 
+import copy
+
+import pytest
 
 from app.services.audio.sync_engine import (
     SyncStrategy,
     TransitionType,
     SyncPoint,
     SyncPlan,
+    SyncChange,
     SyncEngine,
 )
 
@@ -82,3 +86,165 @@ class TestSyncEngine:
         engine = SyncEngine()
         
         assert engine is not None
+
+
+def _make_audio(num_beats=64, interval=0.5):
+    from app.services.audio.beat_detector import (
+        AudioAnalysisResult, BeatInfo, BeatStrength, MusicSection, SectionInfo,
+    )
+    duration = num_beats * interval
+    beats = [
+        BeatInfo(timestamp=i * interval,
+                 strength=BeatStrength.STRONG if i % 4 == 0 else BeatStrength.WEAK)
+        for i in range(num_beats)
+    ]
+    quarter = duration / 4
+    sections = [
+        SectionInfo(start=0.0, end=quarter, section_type=MusicSection.INTRO),
+        SectionInfo(start=quarter, end=2 * quarter, section_type=MusicSection.VERSE),
+        SectionInfo(start=2 * quarter, end=3 * quarter, section_type=MusicSection.CHORUS),
+        SectionInfo(start=3 * quarter, end=duration, section_type=MusicSection.OUTRO),
+    ]
+    return AudioAnalysisResult(
+        file_path="music.mp3", duration=duration, sample_rate=22050, bpm=120.0,
+        beats=beats, sections=sections,
+        energy_curve=[(float(t), 0.5 + 0.1 * (t % 3)) for t in range(int(duration))],
+    )
+
+
+class TestBeatIndex:
+    """Test beat index range queries"""
+
+    def test_beat_range(self):
+        """Half-open range matches a linear filter"""
+        from app.services.audio.beat_index import BeatIndex
+
+        audio = _make_audio()
+        index = BeatIndex.build(audio)
+
+        expected = [b for b in audio.beats if 3.0 <= b.timestamp < 7.5]
+        assert index.beats_in(3.0, 7.5) == expected
+        assert index.beat_range(100.0, 200.0) == (64, 64)
+
+    def test_section_at(self):
+        """Section lookup by time"""
+        from app.services.audio.beat_index import BeatIndex
+
+        index = BeatIndex.build(_make_audio())
+        assert index.section_at(0.0) == 0
+        assert index.section_at(20.0) == 2
+        assert index.section_at(1000.0) == -1
+
+    def test_greedy_min_gap(self):
+        """Greedy pick keeps the minimum gap"""
+        import numpy as np
+        from app.services.audio.beat_index import greedy_min_gap
+
+        times = np.array([0.0, 0.1, 0.3, 0.35, 0.9, 1.0])
+        assert greedy_min_gap(times, 0.3) == [0, 2, 4]
+        assert greedy_min_gap(times, 0.3, last=0.6) == [4]
+
+
+class TestSyncPlanning:
+    """Test sync planning with the beat index"""
+
+    def test_hybrid_plan(self):
+        """Hybrid plan respects minimum clip duration"""
+        engine = SyncEngine()
+        plan = engine.create_sync_plan(_make_audio(), num_clips=10,
+                                       strategy=SyncStrategy.HYBRID,
+                                       min_clip_duration=0.4)
+
+        times = [sp.timestamp for sp in plan.sync_points]
+        assert times == sorted(times)
+        assert all(b - a >= 0.4 for a, b in zip(times, times[1:]))
+        assert plan.sync_points[0].transition == TransitionType.FADE_IN
+        assert plan.sync_points[-1].transition == TransitionType.FADE_OUT
+
+    def test_index_reused_across_replans(self):
+        """Re-planning the same analysis reuses the index"""
+        engine = SyncEngine()
+        audio = _make_audio()
+        engine.create_sync_plan(audio, num_clips=5, strategy=SyncStrategy.BEAT_SYNC)
+        index = engine.get_index(audio)
+        engine.create_sync_plan(audio, num_clips=20, strategy=SyncStrategy.HYBRID)
+        assert engine.get_index(audio) is index
+
+        audio.beats.append(audio.beats[-1])
+        audio.mark_changed()
+        assert engine.get_index(audio) is not index
+
+    def test_index_rebuilt_after_in_place_edit(self):
+        """Indexes are keyed by identity plus version; copies get their own index"""
+        engine = SyncEngine()
+        audio = _make_audio()
+        index = engine.get_index(audio)
+        assert engine.get_index(copy.deepcopy(audio)) is not index
+
+        index = engine.get_index(audio)
+        audio.beats[0].timestamp += 0.01
+        audio.mark_changed()
+        rebuilt = engine.get_index(audio)
+        assert rebuilt is not index
+        assert rebuilt.beat_times[0] == audio.beats[0].timestamp
+        assert engine.get_index(audio) is rebuilt
+
+
+def _insert_time(audio, at, shift):
+    """Insert `shift` seconds of audio at time `at` (beats keep the grid)"""
+    from dataclasses import replace
+    interval = audio.beats[1].timestamp - audio.beats[0].timestamp
+    beats = [replace(b, timestamp=b.timestamp + shift if b.timestamp >= at else b.timestamp)
+             for b in audio.beats]
+    beats += [replace(audio.beats[0], timestamp=at + k * interval)
+              for k in range(int(round(shift / interval)))]
+    beats.sort(key=lambda b: b.timestamp)
+    sections = [
+        replace(s,
+                start=s.start + shift if s.start >= at else s.start,
+                end=s.end + shift if s.end > at else s.end)
+        for s in audio.sections
+    ]
+    return replace(audio, duration=audio.duration + shift, beats=beats, sections=sections)
+
+
+def _points(plan):
+    return [(round(sp.timestamp, 6), sp.clip_index, sp.transition, sp.speed_factor)
+            for sp in plan.sync_points]
+
+
+class TestIncrementalSync:
+    """Test incremental re-planning"""
+
+    @pytest.mark.parametrize("strategy", list(SyncStrategy))
+    def test_matches_full_replan(self, strategy):
+        """update_sync_plan equals a fresh create_sync_plan"""
+        engine = SyncEngine()
+        audio = _make_audio(num_beats=128)
+        previous = engine.create_sync_plan(audio, num_clips=7, strategy=strategy)
+
+        edited = _insert_time(audio, at=20.0, shift=1.0)
+        plan = engine.update_sync_plan(previous, edited, SyncChange(20.0, 20.0, time_shift=1.0))
+        full = SyncEngine().create_sync_plan(edited, num_clips=7, strategy=strategy)
+
+        assert _points(plan) == _points(full)
+        assert plan.speed_curve == full.speed_curve
+
+    def test_prefix_reused(self):
+        """Points before the change are kept as-is"""
+        engine = SyncEngine()
+        audio = _make_audio(num_beats=128)
+        previous = engine.create_sync_plan(audio, num_clips=7)
+
+        plan = engine.update_sync_plan(previous, _insert_time(audio, 40.0, 1.0),
+                                       SyncChange(40.0, 40.0, time_shift=1.0))
+        assert plan.sync_points[0] is previous.sync_points[0]
+        assert previous.total_duration == audio.duration
+
+    def test_requires_plan_parameters(self):
+        """Plans without recorded parameters are rejected"""
+        with pytest.raises(ValueError):
+            SyncEngine().update_sync_plan(
+                SyncPlan(total_duration=1.0, bpm=120.0, strategy=SyncStrategy.HYBRID),
+                _make_audio(), SyncChange(0.0, 1.0),
+            )
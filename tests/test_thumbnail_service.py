@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Test thumbnail service"""
+
+import os
+import subprocess
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from app.services.video_tools import thumbnail_service
+from app.services.video_tools.thumbnail_service import (
+    SpriteSheet,
+    ThumbnailService,
+    file_fingerprint,
+)
+
+
+def _fake_ffmpeg(cmd, **kwargs):
+    """Write the output file like ffmpeg would"""
+    Path(cmd[-1]).write_bytes(b"jpg")
+    return Mock(returncode=0, stdout="")
+
+
+def _video(tmp_path, name="clip.mp4", data=b"video"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+class TestThumbnailService:
+    """Test ThumbnailService"""
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=10.0)
+    @patch('subprocess.run', side_effect=_fake_ffmpeg)
+    def test_thumbnail_cached_by_content(self, mock_run, _duration, tmp_path):
+        """Same content hits the cache even after a rename"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        src = _video(tmp_path)
+
+        thumb = service.thumbnail(src)
+        assert thumb.startswith(str(tmp_path / "cache"))
+        assert Path(thumb).exists()
+
+        renamed = str(tmp_path / "renamed.mp4")
+        Path(src).rename(renamed)
+        assert service.thumbnail(renamed) == thumb
+        assert mock_run.call_count == 1
+        assert not (tmp_path / ".voxplore_thumbs").exists()
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=0.4)
+    @patch('subprocess.run', side_effect=_fake_ffmpeg)
+    def test_short_clip_timestamp(self, mock_run, _duration, tmp_path):
+        """Default timestamp falls back to the midpoint for short clips"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        service.thumbnail(_video(tmp_path))
+
+        args = mock_run.call_args[0][0]
+        assert args[args.index('-ss') + 1] == '0.2'
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=10.0)
+    @patch('subprocess.run', side_effect=_fake_ffmpeg)
+    def test_batch_with_callback(self, mock_run, _duration, tmp_path):
+        """Batch generation reports every file"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"), max_workers=3)
+        paths = [_video(tmp_path, f"v{i}.mp4", data=bytes([i]) * 10) for i in range(6)]
+        ready = []
+
+        results = service.thumbnails(paths, on_ready=lambda p, t: ready.append(p))
+        service.shutdown()
+
+        assert sorted(ready) == sorted(paths)
+        assert all(results[p] for p in paths)
+        assert mock_run.call_count == 6
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=20.0)
+    @patch('subprocess.run', side_effect=_fake_ffmpeg)
+    def test_sprite_sheet_single_decode(self, mock_run, _duration, tmp_path):
+        """Sprite sheet uses one ffmpeg call with fps and tile filters"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        sheet = service.sprite_sheet(_video(tmp_path), frames=25, columns=10)
+
+        assert mock_run.call_count == 1
+        vf = mock_run.call_args[0][0][mock_run.call_args[0][0].index('-vf') + 1]
+        assert 'fps=1/0.800000' in vf and 'tile=10x3' in vf
+        assert (sheet.columns, sheet.rows) == (10, 3)
+        assert sheet.frame_at(8.1) == 10
+        assert sheet.tile_rect(12) == (320, 90, 160, 90)
+
+        service.sprite_sheet(_video(tmp_path), frames=25, columns=10)
+        assert mock_run.call_count == 1
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=10.0)
+    @patch('subprocess.run', side_effect=subprocess.TimeoutExpired('ffmpeg', 15))
+    def test_ffmpeg_timeout(self, mock_run, _duration, tmp_path):
+        """A hung ffmpeg is killed after the timeout and reported as a failure"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        assert service.thumbnail(_video(tmp_path)) == ""
+        assert mock_run.call_args.kwargs['timeout'] == thumbnail_service.THUMBNAIL_TIMEOUT
+
+        assert service.sprite_sheet(_video(tmp_path)) is None
+        assert mock_run.call_args.kwargs['timeout'] == thumbnail_service.SPRITE_TIMEOUT
+
+    @patch('app.services.video_tools.ffmpeg_tool.FFmpegTool.get_duration', return_value=10.0)
+    @patch('subprocess.run', side_effect=FileNotFoundError('ffmpeg'))
+    def test_ffmpeg_missing(self, _run, _duration, tmp_path):
+        """A missing ffmpeg binary is reported as a failure, not raised"""
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        assert service.thumbnail(_video(tmp_path)) == ""
+        assert service.sprite_sheet(_video(tmp_path)) is None
+
+    def test_fingerprint_cache_bounded(self, tmp_path, monkeypatch):
+        """Remembered fingerprints are evicted least recently used first"""
+        monkeypatch.setattr(thumbnail_service, "FINGERPRINT_CACHE_SIZE", 2)
+        service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+        paths = [_video(tmp_path, f"v{i}.mp4", data=bytes([i])) for i in range(3)]
+
+        service._cache_path(paths[0], "x")
+        service._cache_path(paths[1], "x")
+        service._cache_path(paths[0], "x")
+        service._cache_path(paths[2], "x")
+        remembered = [key[0] for key in service._fingerprints]
+        assert remembered == [os.path.abspath(paths[0]), os.path.abspath(paths[2])]
+
+    def test_fingerprint_ignores_name(self, tmp_path):
+        """Fingerprint depends only on content"""
+        a = _video(tmp_path, "a.mp4", data=b"x" * 200_000)
+        b = _video(tmp_path, "b.mp4", data=b"x" * 200_000)
+        c = _video(tmp_path, "c.mp4", data=b"x" * 199_999 + b"y")
+        assert file_fingerprint(a) == file_fingerprint(b)
+        assert file_fingerprint(a) != file_fingerprint(c)
+        assert SpriteSheet(image_path="").frame_at(3.0) == 0
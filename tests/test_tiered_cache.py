@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Test tiered LLM response cache"""
+
+import asyncio
+
+from app.services.ai.base_llm_provider import LLMRequest, LLMResponse, ProviderType
+from app.services.ai.llm_manager import LLMManager
+from app.services.ai.tiered_cache import TieredLLMCache, normalize_prompt, prompt_signature
+
+SCENES = ["场景1: 海边日落，人物背影", "场景2: 城市夜景，车流", "场景3: 咖啡馆，特写"]
+
+
+def _prompt(scenes, seconds=30, indent=""):
+    lines = [f"请为以下 {len(scenes)} 个场景写 {seconds} 秒解说:"]
+    lines += [f"{indent}- {scene}" for scene in scenes]
+    return "\n".join(lines)
+
+
+def _response(text="答"):
+    return LLMResponse(content=text, model="m", tokens_used=5)
+
+
+class TestSignature:
+    """Test prompt normalization"""
+
+    def test_whitespace_only_differences(self):
+        """Whitespace differences normalize to the same text"""
+        assert normalize_prompt("  a   b \n\n c\t") == normalize_prompt("a b\nc")
+
+    def test_list_order_ignored(self):
+        """Reordered list items share template and variables"""
+        assert prompt_signature(_prompt(SCENES)) == prompt_signature(_prompt(SCENES[::-1]))
+
+    def test_instruction_numbers_are_template(self):
+        """Numbers in instructions belong to the template; list items are variables"""
+        a, b = prompt_signature(_prompt(SCENES, 30)), prompt_signature(_prompt(SCENES, 60))
+        assert a[0] != b[0] and a[1] == b[1]
+        c = prompt_signature(_prompt(SCENES[:2] + ["场景3: 雨夜，霓虹"]))
+        assert a[0] == c[0] and a[1] != c[1]
+
+
+class TestTieredLLMCache:
+    """Test TieredLLMCache"""
+
+    def test_memory_tier_normalizes_whitespace(self):
+        """Whitespace-only variants hit the memory tier exactly"""
+        cache = TieredLLMCache()
+
+        async def main():
+            await cache.put(LLMRequest(prompt=_prompt(SCENES)), _response(), scope="qwen")
+            hit = await cache.get(LLMRequest(prompt=_prompt(SCENES, indent="   ")), scope="qwen")
+            other_scope = await cache.get(LLMRequest(prompt=_prompt(SCENES)), scope="kimi")
+            return hit, other_scope
+
+        hit, other_scope = asyncio.run(main())
+        assert hit.content == "答" and other_scope is None
+        assert cache.stats()["memory"]["hits"] == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """A new cache instance serves entries from the persistent tier"""
+        request = LLMRequest(prompt="持久化")
+        asyncio.run(TieredLLMCache(disk_dir=str(tmp_path)).put(request, _response("磁盘")))
+
+        cache = TieredLLMCache(disk_dir=str(tmp_path))
+        first = asyncio.run(cache.get(request))
+        second = asyncio.run(cache.get(request))
+        assert first.content == second.content == "磁盘"
+        stats = cache.stats()
+        assert stats["disk"]["hits"] == 1 and stats["memory"]["hits"] == 1
+        assert stats["overall"]["hit_rate"] == 1.0
+
+    def test_semantic_tier(self):
+        """Reordered scene lists hit; changed numbers or other params miss"""
+        cache = TieredLLMCache(semantic_threshold=0.9)
+
+        async def main():
+            await cache.put(LLMRequest(prompt=_prompt(SCENES)), _response("语义"))
+            reordered = await cache.get(LLMRequest(prompt=_prompt(SCENES[::-1])))
+            longer = await cache.get(LLMRequest(prompt=_prompt(SCENES, 60)))
+            hotter = await cache.get(LLMRequest(prompt=_prompt(SCENES[::-1]), temperature=1.0))
+            return reordered, longer, hotter
+
+        reordered, longer, hotter = asyncio.run(main())
+        assert reordered.content == "语义"
+        assert longer is None and hotter is None
+        assert cache.stats()["semantic"] == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+    def test_semantic_disabled_by_default(self):
+        """Without a threshold only exact tiers are used"""
+        cache = TieredLLMCache()
+        asyncio.run(cache.put(LLMRequest(prompt=_prompt(SCENES)), _response()))
+        assert asyncio.run(cache.get(LLMRequest(prompt=_prompt(SCENES[::-1])))) is None
+        assert cache.stats()["semantic"]["misses"] == 0
+
+    def test_memory_lru_eviction(self):
+        """The least recently used entry is evicted"""
+        cache = TieredLLMCache(memory_entries=2)
+
+        async def main():
+            for name in "abc":
+                await cache.put(LLMRequest(prompt=name), _response(name))
+            return [await cache.get(LLMRequest(prompt=name)) for name in "abc"]
+
+        assert [r and r.content for r in asyncio.run(main())] == [None, "b", "c"]
+
+
+class CountingProvider:
+    """Provider that counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_limited(self, request):
+        self.calls += 1
+        return _response(f"#{self.calls}")
+
+
+class TestManagerCache:
+    """Test LLMManager integration"""
+
+    def test_generate_uses_cache(self):
+        """Repeated and whitespace-variant prompts skip the provider"""
+        manager = LLMManager({"LLM": {"cache": {"semantic": {"enabled": True}}}})
+        provider = CountingProvider()
+        manager.providers = {ProviderType.QWEN: provider}
+        manager._default_provider = ProviderType.QWEN
+
+        async def main():
+            first = await manager.generate(LLMRequest(prompt=_prompt(SCENES), temperature=0))
+            again = await manager.generate(LLMRequest(prompt=_prompt(SCENES, indent=" "), temperature=0))
+            reordered = await manager.generate(LLMRequest(prompt=_prompt(SCENES[::-1]), temperature=0))
+            fresh = await manager.generate(LLMRequest(prompt=_prompt(SCENES), temperature=0),
+                                           use_cache=False)
+            return first, again, reordered, fresh
+
+        first, again, reordered, fresh = asyncio.run(main())
+        assert first.content == again.content == reordered.content == "#1"
+        assert fresh.content == "#2"
+        stats = manager.cache_stats()
+        assert stats["memory"]["hits"] == 1 and stats["semantic"]["hits"] == 1
+
+    def test_creative_requests_not_cached_by_default(self):
+        """temperature > 0 requests bypass the cache unless the caller opts in"""
+        manager = LLMManager({"LLM": {"cache": {"persistent": False}}})
+        provider = CountingProvider()
+        manager.providers = {ProviderType.QWEN: provider}
+        manager._default_provider = ProviderType.QWEN
+
+        async def main():
+            request = LLMRequest(prompt="写一段解说", temperature=0.7)
+            creative = [(await manager.generate(request)).content for _ in range(2)]
+            opted_in = [(await manager.generate(request, use_cache=True)).content for _ in range(2)]
+            return creative, opted_in
+
+        creative, opted_in = asyncio.run(main())
+        assert creative == ["#1", "#2"]
+        assert opted_in == ["#3", "#3"]
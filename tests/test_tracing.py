@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Test pipeline tracing"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.tracing import Tracer
+
+
+class TestTracer:
+    """Test Tracer"""
+
+    def test_disabled_records_nothing(self):
+        """Disabled tracer returns a no-op span"""
+        tracer = Tracer(enabled=False)
+        with tracer.span("stage") as span:
+            span.set(bytes=1)
+        assert tracer.spans == []
+
+    def test_nested_spans(self):
+        """Nested spans keep parent links and attributes"""
+        tracer = Tracer(enabled=True)
+        with tracer.span("pipeline", category="pipeline", file="a.mp4"):
+            with tracer.span("tts", category="tts", segment=3) as span:
+                span.set(bytes=1024)
+
+        spans = {s.name: s for s in tracer.spans}
+        assert spans["tts"].parent is spans["pipeline"]
+        assert spans["tts"].attrs == {"segment": 3, "bytes": 1024}
+        assert spans["pipeline"].depth == 0
+        assert spans["tts"].depth == 1
+
+    def test_error_attribute(self):
+        """Exceptions are recorded on the span"""
+        tracer = Tracer(enabled=True)
+        try:
+            with tracer.span("ffprobe", category="ffmpeg"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        assert tracer.spans[0].attrs["error"] == "ValueError"
+
+    def test_bind_propagates_to_threads(self):
+        """bind() lets pool workers inherit the current span"""
+        tracer = Tracer(enabled=True)
+
+        def work(i):
+            with tracer.span("segment", segment=i):
+                pass
+
+        with tracer.span("generate_voice"):
+            bound = tracer.bind(work)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(bound, range(4)))
+
+        segments = [s for s in tracer.spans if s.name == "segment"]
+        assert len(segments) == 4
+        assert all(s.parent.name == "generate_voice" for s in segments)
+
+    def test_async_tasks(self):
+        """Spans nest correctly across asyncio tasks"""
+        tracer = Tracer(enabled=True)
+
+        async def call(i):
+            with tracer.span("llm.generate", category="llm", provider=f"p{i}"):
+                await asyncio.sleep(0)
+
+        async def main():
+            with tracer.span("script"):
+                await asyncio.gather(call(0), call(1))
+
+        asyncio.run(main())
+        llm = [s for s in tracer.spans if s.category == "llm"]
+        assert len(llm) == 2
+        assert all(s.parent.name == "script" for s in llm)
+
+    def test_chrome_trace_export(self, tmp_path):
+        """Chrome trace file contains complete events"""
+        tracer = Tracer(enabled=True)
+        with tracer.span("pipeline", file="a.mp4"):
+            with tracer.span("ffprobe", category="ffmpeg"):
+                pass
+
+        path = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        events = [e for e in data["traceEvents"] if e["ph"] == "X"]
+        assert [e["name"] for e in events] == ["pipeline", "ffprobe"]
+        assert events[0]["args"] == {"file": "a.mp4"}
+        assert events[0]["dur"] >= events[1]["dur"]
+
+    def test_summary_self_time(self):
+        """Summary aggregates by name and subtracts child time"""
+        tracer = Tracer(enabled=True)
+        with tracer.span("stage"):
+            for _ in range(2):
+                with tracer.span("child", category="ffmpeg"):
+                    time.sleep(0.005)
+
+        rows = {r["name"]: r for r in tracer.summary()}
+        assert rows["child"]["count"] == 2
+        assert rows["stage"]["self_ms"] < rows["stage"]["total_ms"]
+        assert "child" in tracer.format_summary()
+
+    def test_max_spans(self):
+        """Spans beyond the limit are dropped"""
+        tracer = Tracer(enabled=True, max_spans=2)
+        for _ in range(3):
+            with tracer.span("s"):
+                pass
+        assert len(tracer.spans) == 2
+        assert tracer.to_chrome_trace()["otherData"]["dropped_spans"] == 1
+
+    def test_spans_under_and_discard(self):
+        """A run exports and clears only its own spans"""
+        tracer = Tracer(enabled=True)
+        with tracer.span("other"):
+            pass
+        with tracer.span("pipeline") as root:
+            with tracer.span("stage"):
+                with tracer.span("ffmpeg", category="ffmpeg"):
+                    pass
+
+        run = tracer.spans_under(root)
+        assert sorted(s.name for s in run) == ["ffmpeg", "pipeline", "stage"]
+        assert "other" not in tracer.format_summary(run)
+
+        tracer.discard(run)
+        assert [s.name for s in tracer.spans] == ["other"]
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Test vision client layer"""
+
+import asyncio
+import base64
+import io
+from unittest.mock import AsyncMock, Mock, patch
+
+from PIL import Image
+
+from app.services.ai.vision_client import (
+    VisionResultCache,
+    clear_clients,
+    hamming,
+    image_hash,
+    openai_client,
+    prepare_image,
+)
+from app.services.ai.vision_providers import (
+    OpenAIVisionProvider,
+    Qwen25VLProvider,
+    VisionAnalyzerFactory,
+    VisionProvider,
+)
+
+
+def _jpeg(width=1920, height=1080, shade=0, quality=90, flip=False):
+    """Horizontal gradient, optionally brightened or mirrored"""
+    img = Image.linear_gradient("L").rotate(90).resize((width, height))
+    img = img.point(lambda v: min(255, v + shade))
+    if flip:
+        img = img.transpose(Image.FLIP_LEFT_RIGHT)
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=quality)
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def _size(b64):
+    return Image.open(io.BytesIO(base64.b64decode(b64))).size
+
+
+class FakeProvider(VisionProvider):
+    """Records calls and can fail"""
+
+    def __init__(self, name="fake", fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def get_name(self):
+        return self.name
+
+    def analyze_image(self, image_base64, prompt=""):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        return {"description": f"{self.name}-{self.calls}"}
+
+    async def analyze_image_async(self, image_base64, prompt=""):
+        await asyncio.sleep(0.01)
+        return self.analyze_image(image_base64, prompt)
+
+
+def _factory(*providers, **kwargs):
+    factory = VisionAnalyzerFactory({"LLM": {}}, cache=VisionResultCache(), **kwargs)
+    factory._providers = list(providers)
+    return factory
+
+
+class TestPrepareImage:
+    """Test prepare_image"""
+
+    def test_resized_to_tile(self):
+        """Large frames are downscaled and aligned to the patch multiple"""
+        assert _size(prepare_image(_jpeg(), max_side=512).data) == (512, 288)
+        w, h = _size(prepare_image(_jpeg(), max_side=896, multiple=28).data)
+        assert w == 896 and h % 28 == 0
+
+    def test_small_image_not_upscaled(self):
+        """Images below the tile size keep their size"""
+        assert _size(prepare_image(_jpeg(320, 180), max_side=512).data) == (320, 180)
+
+    def test_undecodable_passthrough(self):
+        """Non-image data is passed through without a hash"""
+        prepared = prepare_image(b"not an image")
+        assert prepared.phash is None
+        assert base64.b64decode(prepared.data) == b"not an image"
+
+    def test_near_duplicates_hash_close(self):
+        """Re-encoded and slightly brighter frames hash within tolerance"""
+        a = image_hash(_jpeg(640, 360))
+        b = image_hash(_jpeg(640, 360, shade=3, quality=60))
+        assert hamming(a, b) <= 4
+
+
+class TestVisionResultCache:
+    """Test VisionResultCache"""
+
+    def test_near_match_and_prompt_isolation(self):
+        """Nearby hashes hit; other prompts miss"""
+        cache = VisionResultCache(max_distance=2)
+        cache.put(0b1010, "p", {"description": "x"})
+        assert cache.get(0b1011, "p") == {"description": "x"}
+        assert cache.get(0b0101, "p") is None
+        assert cache.get(0b1010, "q") is None
+        assert cache.get(None, "p") is None
+
+    def test_provider_and_model_isolation(self):
+        """Results from one provider or model are not served for another"""
+        cache = VisionResultCache()
+        cache.put(7, "p", {"description": "4o"}, provider="openai", model="gpt-4o")
+        assert cache.get(7, "p", provider="openai", model="gpt-4o") == {"description": "4o"}
+        assert cache.get(7, "p", provider="openai", model="gpt-4o-mini") is None
+        assert cache.get(7, "p", provider="gemini", model="gpt-4o") is None
+        assert cache.get(7, "p") is None
+
+    def test_lru_eviction(self):
+        """Oldest entries are evicted first"""
+        cache = VisionResultCache(max_entries=2, max_distance=0)
+        cache.put(1, "p", {"n": 1})
+        cache.put(2, "p", {"n": 2})
+        cache.get(1, "p")
+        cache.put(3, "p", {"n": 3})
+        assert cache.get(2, "p") is None
+        assert cache.get(1, "p") == {"n": 1}
+        assert len(cache) == 2
+
+
+class TestVisionFactory:
+    """Test concurrent analysis in VisionAnalyzerFactory"""
+
+    def test_analyze_many_dedupes_and_caches(self):
+        """Near-identical frames are analyzed once; repeats hit the cache"""
+        provider = FakeProvider()
+        factory = _factory(provider)
+        frames = [_jpeg(320, 180), _jpeg(320, 180, shade=2),
+                  _jpeg(320, 180, flip=True), _jpeg(320, 180)]
+
+        results = factory.analyze_many(frames, prompt="p")
+        assert provider.calls == 2
+        assert results[0] == results[1] == results[3]
+        assert results[2] != results[0]
+
+        factory.analyze_many(frames, prompt="p")
+        assert factory.analyze_with_fallback(frames[0], prompt="p") == results[0]
+        assert provider.calls == 2
+
+    def test_analyze_many_bounded_concurrency(self):
+        """No more than max_concurrency requests are in flight"""
+        active = peak = 0
+
+        class SlowProvider(FakeProvider):
+            async def analyze_image_async(self, image_base64, prompt=""):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return {"description": "ok"}
+
+        factory = _factory(SlowProvider(), max_concurrency=2)
+        frames = [base64.b64encode(bytes([i]) * 16).decode() for i in range(8)]
+        assert len(factory.analyze_many(frames, prompt="p")) == 8
+        assert peak == 2
+
+    def test_batches_share_event_loop(self):
+        """Batches run on one persistent loop, so pooled async clients are reused"""
+        loops = []
+
+        class LoopProvider(FakeProvider):
+            async def analyze_image_async(self, image_base64, prompt=""):
+                loops.append(asyncio.get_running_loop())
+                return {"description": "ok"}
+
+        factory = _factory(LoopProvider())
+        factory.analyze_many([_jpeg(64, 64)], prompt="p1")
+        factory.analyze_many([_jpeg(64, 64)], prompt="p2")
+        assert len(loops) == 2 and loops[0] is loops[1]
+        assert not loops[0].is_closed()
+
+    def test_fallback_and_failures(self):
+        """Failing providers fall through; total failure yields an error entry"""
+        factory = _factory(FakeProvider("a", fail=True), FakeProvider("b"))
+        assert factory.analyze_many([_jpeg(64, 64)], prompt="p")[0] == {"description": "b-1"}
+
+        broken = _factory(FakeProvider("a", fail=True))
+        assert isinstance(broken.analyze_many([_jpeg(64, 64)], prompt="p")[0], RuntimeError)
+
+
+class TestProviderClients:
+    """Test shared clients and request shaping"""
+
+    @patch('openai.OpenAI')
+    def test_client_reused(self, mock_openai):
+        """Providers share one client per key and endpoint"""
+        clear_clients()
+        mock_openai.return_value.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content='{"description": "ok"}'))]
+        )
+        provider = OpenAIVisionProvider(api_key="sk-shared")
+        provider.analyze_image(_jpeg())
+        provider.analyze_image(_jpeg())
+        assert mock_openai.call_count == 1
+        assert openai_client("sk-shared") is mock_openai.return_value
+
+        request = mock_openai.return_value.chat.completions.create.call_args.kwargs
+        url = request["messages"][0]["content"][1]["image_url"]["url"]
+        assert _size(url.split(",", 1)[1]) == (512, 288)
+        clear_clients()
+
+    @patch('openai.AsyncOpenAI')
+    def test_async_request(self, mock_async):
+        """Async path uses the pooled async client"""
+        clear_clients()
+        mock_async.return_value.chat.completions.create = AsyncMock(return_value=Mock(
+            choices=[Mock(message=Mock(content='{"emotion": "calm"}'))]
+        ))
+        provider = Qwen25VLProvider(api_key="k")
+        assert asyncio.run(provider.analyze_image_async(_jpeg())) == {"emotion": "calm"}
+        content = mock_async.return_value.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert content[0]["type"] == "image_url"
+        clear_clients()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Test waveform peak pyramid"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.audio.waveform_peaks import WaveformPeaks, WaveformStore
+
+
+def _samples(n=16000 * 7 + 123, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(-32768, 32767, size=n, dtype=np.int16)
+
+
+def _brute_slice(samples, sample_rate, start, end, width, bin_samples):
+    """Reference: min/max over whole bins touched by each pixel column"""
+    out = np.zeros((width, 2), dtype=np.float32)
+    n_bins = -(-len(samples) // bin_samples)
+    bin_sec = bin_samples / sample_rate
+    edges = np.floor(np.linspace(start, end, width + 1) / bin_sec).astype(np.int64)
+    for i in range(width):
+        lo = min(max(edges[i], 0), n_bins)
+        hi = min(max(edges[i + 1], edges[i] + 1, 0), n_bins)
+        if hi > lo:
+            chunk = samples[lo * bin_samples:hi * bin_samples]
+            out[i] = (chunk.min() / 32768.0, chunk.max() / 32768.0)
+    return out
+
+
+class TestWaveformPeaks:
+    """Test WaveformPeaks"""
+
+    def test_levels_match_brute_force(self):
+        """Every level equals min/max over its block size"""
+        samples = _samples(16000 * 60 + 7)
+        peaks = WaveformPeaks.from_samples(samples)
+        assert len(peaks.levels) > 1
+        for k, level in enumerate(peaks.levels):
+            block = peaks.base_block * peaks.factor ** k
+            n = -(-len(samples) // block)
+            assert len(level) == n
+            for i in (0, n // 2, n - 1):
+                chunk = samples[i * block:(i + 1) * block]
+                assert tuple(level[i]) == (chunk.min(), chunk.max())
+
+    def test_slice_matches_brute_force(self):
+        """Slices match a per-column scan at the selected level"""
+        samples = _samples(16000 * 60 + 123)
+        peaks = WaveformPeaks.from_samples(samples)
+        for start, end, width in [(0, 60.0, 800), (1.3, 2.1, 300), (0, 0.05, 100),
+                                  (-1.0, 70.0, 64), (59.5, 61.0, 10)]:
+            level = peaks.level_for((end - start) / width)
+            expected = _brute_slice(samples, peaks.sample_rate, start, end, width,
+                                    peaks.base_block * peaks.factor ** level)
+            np.testing.assert_array_equal(peaks.slice(start, end, width), expected)
+
+    def test_level_selection(self):
+        """Zoomed-out views read coarser levels"""
+        peaks = WaveformPeaks.from_samples(_samples(16000 * 60))
+        assert peaks.level_for(0.001) == 0
+        assert peaks.level_for(1.0) == len(peaks.levels) - 1
+
+    def test_empty_slices(self):
+        """Degenerate ranges return zeros"""
+        peaks = WaveformPeaks.from_samples(_samples(1000))
+        assert peaks.slice(0, 1, 0).shape == (0, 2)
+        assert not peaks.slice(5, 5, 10).any()
+        assert not peaks.slice(10, 20, 10).any()
+        assert not WaveformPeaks.from_samples(np.zeros(0, dtype=np.int16)).slice(0, 1, 5).any()
+
+    def test_save_load_mmap(self, tmp_path):
+        """Saved pyramids load back memory mapped"""
+        peaks = WaveformPeaks.from_samples(_samples())
+        peaks.save(str(tmp_path / "wf"))
+        loaded = WaveformPeaks.load(str(tmp_path / "wf"))
+
+        assert isinstance(loaded.levels[0], np.memmap)
+        assert loaded.num_samples == peaks.num_samples
+        for a, b in zip(peaks.levels, loaded.levels):
+            np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(loaded.slice(1, 3, 200), peaks.slice(1, 3, 200))
+
+    def test_concurrent_saves(self, tmp_path):
+        """Concurrent writers each use their own temp file and leave no leftovers"""
+        peaks = WaveformPeaks.from_samples(_samples())
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: peaks.save(str(tmp_path / "wf")), range(8)))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["wf.json", "wf.npy"]
+        loaded = WaveformPeaks.load(str(tmp_path / "wf"))
+        np.testing.assert_array_equal(loaded.levels[0], peaks.levels[0])
+
+
+class TestWaveformStore:
+    """Test WaveformStore"""
+
+    def test_decodes_once_per_content(self, tmp_path):
+        """Same content is decoded once and then served from cache"""
+        audio = tmp_path / "a.mp3"
+        audio.write_bytes(b"audio" * 100)
+        copy = tmp_path / "b.mp3"
+        copy.write_bytes(b"audio" * 100)
+        fake = WaveformPeaks.from_samples(_samples(5000))
+
+        with patch.object(WaveformPeaks, "decode", return_value=fake) as decode:
+            store = WaveformStore(cache_dir=str(tmp_path / "cache"))
+            first = store.load(str(audio))
+            assert store.load(str(audio)) is first
+            assert WaveformStore(cache_dir=str(tmp_path / "cache")).load(str(copy)) is not None
+
+        assert decode.call_count == 1
+        np.testing.assert_array_equal(first.levels[0], fake.levels[0])
+
+    def test_missing_file(self, tmp_path):
+        """Unreadable input returns None"""
+        assert WaveformStore(cache_dir=str(tmp_path)).load(str(tmp_path / "none.mp3")) is None
+
+    def test_submit(self, tmp_path):
+        """Background loading resolves to the same cached pyramid"""
+        audio = tmp_path / "a.mp3"
+        audio.write_bytes(b"audio" * 100)
+        fake = WaveformPeaks.from_samples(_samples(5000))
+
+        with patch.object(WaveformPeaks, "decode", return_value=fake):
+            store = WaveformStore(cache_dir=str(tmp_path / "cache"))
+            peaks = store.submit(str(audio)).result(timeout=10)
+            assert store.load(str(audio)) is peaks
+            store.shutdown()